@@ -0,0 +1,25 @@
+"""
+Configuração do gunicorn para produção: workers gthread (vários threads por processo).
+
+Requisições leves (usuários, cláusulas, prévia, reimpressão) deixam de esperar atrás
+de uma renderização no mesmo worker. O caminho de renderização é seguro com threads:
+cada requisição cria o seu FPDF, os caches de processo (registro de fontes, layouts
+de cláusulas, fragmentos de seção) são protegidos por lock e só guardam objetos
+imutáveis, e a sessão do SQLAlchemy é uma por contexto de app (por requisição).
+scripts/stress_concorrencia.py confere isso byte a byte.
+
+O gunicorn lê este arquivo automaticamente quando é iniciado a partir da raiz do
+repositório; opções de linha de comando têm precedência. Ajuste por variáveis de ambiente:
+    WEB_CONCURRENCY   número de processos (padrão 2)
+    GUNICORN_THREADS  threads por processo (padrão 4)
+    GUNICORN_TIMEOUT  segundos antes de reiniciar um worker travado (padrão 30)
+"""
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+worker_class = "gthread"
+workers = int(os.environ.get("WEB_CONCURRENCY", "2"))
+threads = int(os.environ.get("GUNICORN_THREADS", "4"))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "30"))
+# Cada worker importa o app por conta própria (engine do SQLAlchemy e caches por processo)
+preload_app = False
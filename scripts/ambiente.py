@@ -0,0 +1,37 @@
+"""
+Ambiente isolado dos scripts de carga, benchmark e verificação.
+
+O app lê a configuração das variáveis de ambiente quando src.main é importado: sem
+elas, o banco (src/database/app.db), a fila, o arquivo de documentos e as versões
+das tabelas seriam os do repositório. isolar_ambiente() aponta tudo para um
+diretório temporário, removido na saída do processo; precisa ser chamado antes de
+importar src.main, e os subprocessos (workers, gunicorn) herdam as variáveis.
+"""
+import atexit
+import os
+import shutil
+import tempfile
+
+
+def diretorio_temporario(prefixo):
+    """Diretório temporário removido na saída do processo"""
+    diretorio = tempfile.mkdtemp(prefix=prefixo)
+    atexit.register(shutil.rmtree, diretorio, ignore_errors=True)
+    return diretorio
+
+
+def variaveis_isoladas(diretorio):
+    """Variáveis que levam o estado do app (banco, fila, arquivo, versões) para `diretorio`"""
+    return {
+        "DATABASE_URL": f"sqlite:///{os.path.join(diretorio, 'app.db')}",
+        "FILA_RENDER_DB": os.path.join(diretorio, "fila.db"),
+        "ARQUIVO_DOCUMENTOS_DIR": os.path.join(diretorio, "documentos"),
+        "VERSOES_TABELAS_DIR": os.path.join(diretorio, "versoes"),
+    }
+
+
+def isolar_ambiente(prefixo, **extras):
+    """Aplica variaveis_isoladas (e `extras`) a os.environ; devolve o diretório"""
+    diretorio = diretorio_temporario(prefixo)
+    os.environ.update(variaveis_isoladas(diretorio), **extras)
+    return diretorio
@@ -0,0 +1,209 @@
+"""
+Autocompletar de veículos: índice em memória x SQLite indexado x LIKE ingênuo.
+
+Gera um catálogo sintético (marcas x modelos x versões), importa pelo
+POST /api/veiculos/importar e mede, para consultas tiradas do próprio catálogo
+(prefixos do nome, prefixos de palavras, trechos e consultas sem resultado):
+
+    memória   IndiceVeiculos.buscar + montagem dos itens (CATALOGO_MEMORIA=1)
+    sqlite    prefixo pelo índice de chave + tabela de trigramas (CATALOGO_MEMORIA=0)
+    like      SELECT ... WHERE chave LIKE '%q%' ORDER BY chave LIMIT n, sem índice
+    rota      GET /api/veiculos/autocomplete pelo cliente de teste, em memória
+
+Verificações (sai com código 1 se alguma falhar): memória e sqlite devolvem os
+mesmos itens (na mesma ordem quando só há casamentos de prefixo, como conjunto
+quando não enchem o limite); todo item contém a consulta; quando a memória não
+enche o limite, o like devolve os mesmos itens; a recarga acontece depois de uma nova
+importação; uma mudança feita por outro processo recarrega o índice em segundo plano,
+sem fazer a consulta esperar.
+
+Exemplo:
+    python scripts/bench_catalogo.py --veiculos 50000 --consultas 2000
+"""
+import argparse
+import io
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ambiente import isolar_ambiente
+
+MARCAS = ["Fiat", "Volkswagen", "Chevrolet", "Ford", "Renault", "Toyota", "Honda", "Hyundai", "Nissan", "Peugeot",
+          "Citroën", "Jeep", "Mitsubishi", "Kia", "BMW", "Mercedes-Benz", "Audi", "Volvo", "Land Rover", "Suzuki",
+          "Chery", "JAC", "Caoa Chery", "RAM", "Dodge", "Subaru", "Porsche", "Mini", "Lifan", "Troller",
+          "Yamaha", "Kawasaki", "Harley-Davidson", "Ducati", "Triumph", "Dafra", "Shineray", "Scania", "Iveco", "Agrale"]
+SILABAS = ["ka", "ro", "la", "mi", "to", "sa", "ve", "no", "ri", "an", "tra", "gol", "on", "ix", "cor", "fi", "es",
+           "pa", "li", "ma", "re", "ne", "zo", "qu", "ber", "sto", "ty", "go", "lu", "tor"]
+VERSOES = ["1.0", "1.0 Flex", "1.4", "1.6 16V", "2.0 Turbo", "Sport", "LTZ", "EX", "Automático", "Cabine Dupla",
+           "Hatch", "Sedan", "Diesel 4x4", "Trekking", "Comfortline", "Highline", "Attractive", "Way", "CG 160", "Fan"]
+
+
+def catalogo_sintetico(rng, total):
+    linhas = set()
+    while len(linhas) < total:
+        marca = rng.choice(MARCAS)
+        modelo = "".join(rng.choice(SILABAS) for _ in range(rng.randint(2, 3))).title()
+        versao = " ".join(rng.sample(VERSOES, rng.randint(1, 2)))
+        linhas.add((marca, f"{modelo} {versao}"))
+    return sorted(linhas)
+
+
+def consultas_do_catalogo(rng, linhas, total):
+    from src.services.catalogo import normalizar
+    consultas = []
+    for i in range(total):
+        marca, modelo = rng.choice(linhas)
+        chave = normalizar(f"{marca}/{modelo}")
+        palavras = chave.split()
+        tipo = i % 4
+        if tipo == 0:
+            consulta = chave[:rng.randint(2, 8)]
+        elif tipo == 1:
+            palavra = rng.choice(palavras[1:])
+            consulta = palavra[:rng.randint(2, 6)]
+        elif tipo == 2:
+            inicio = rng.randint(1, max(1, len(chave) - 4))
+            consulta = chave[inicio:inicio + rng.randint(3, 5)]
+        else:
+            consulta = "".join(rng.choice("QWXYZ") for _ in range(4))
+        consultas.append(consulta.strip() or "FI")
+    return consultas
+
+
+def percentis(amostras):
+    amostras = sorted(amostras)
+    return (statistics.median(amostras), amostras[int(len(amostras) * 0.99) - 1], amostras[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--veiculos", type=int, default=50000)
+    parser.add_argument("--consultas", type=int, default=2000)
+    parser.add_argument("--limite", type=int, default=10)
+    args = parser.parse_args()
+
+    isolar_ambiente("bench_catalogo_")
+
+    from sqlalchemy import text
+
+    from src.main import app
+    from src.models.user import db
+    from src.services.catalogo import CATALOGO_VEICULOS
+    from src.services.versoes import tabela_alterada
+
+    rng = random.Random(45)
+    falhas = []
+
+    def conferir(descricao, ok):
+        print(f"{'OK   ' if ok else 'FALHA'} {descricao}")
+        if not ok:
+            falhas.append(descricao)
+
+    linhas = catalogo_sintetico(rng, args.veiculos)
+    csv = "marca;modelo\n" + "".join(f"{marca};{modelo}\n" for marca, modelo in linhas)
+    cliente = app.test_client()
+    inicio = time.perf_counter()
+    resposta = cliente.post("/api/veiculos/importar", data={"arquivo": (io.BytesIO(csv.encode()), "catalogo.csv")},
+                            content_type="multipart/form-data")
+    ms_importacao = (time.perf_counter() - inicio) * 1000
+    conferir(f"importação de {len(linhas)} veículos: {resposta.status_code}, {ms_importacao:.0f} ms",
+             resposta.status_code == 200 and resposta.json["importados"] == len(linhas))
+
+    consultas = consultas_do_catalogo(rng, linhas, args.consultas)
+    limite = args.limite
+    naive = text("SELECT id, marca, modelo, nome FROM veiculo WHERE chave LIKE :padrao ORDER BY chave LIMIT :limite")
+
+    with app.test_request_context():
+        inicio = time.perf_counter()
+        indice = CATALOGO_VEICULOS.indice()
+        ms_carga = (time.perf_counter() - inicio) * 1000
+        print(f"índice em memória: {len(indice)} veículos, {indice.bytes_em_memoria() / 1024:.0f} KiB, "
+              f"carregado em {ms_carga:.0f} ms")
+
+        def em_memoria(consulta):
+            return [indice.item(p) for p in indice.buscar(consulta, limite)]
+
+        medidas = {}
+        resultados = {}
+        for nome, buscar in (("memória", em_memoria),
+                             ("sqlite", lambda q: CATALOGO_VEICULOS.buscar_sql(q, limite)),
+                             ("like", lambda q: db.session.execute(naive, {"padrao": f"%{q}%",
+                                                                           "limite": limite}).all())):
+            buscar(consultas[0])
+            tempos, saidas = [], []
+            for consulta in consultas:
+                inicio = time.perf_counter()
+                saidas.append(buscar(consulta))
+                tempos.append((time.perf_counter() - inicio) * 1e6)
+            medidas[nome] = percentis(tempos)
+            resultados[nome] = saidas
+
+    tempos = []
+    for consulta in consultas:
+        inicio = time.perf_counter()
+        cliente.get("/api/veiculos/autocomplete", query_string={"q": consulta, "limite": limite})
+        tempos.append((time.perf_counter() - inicio) * 1e6)
+    medidas["rota"] = percentis(tempos)
+
+    print(f"\n{'':<8} {'p50 µs':>9} {'p99 µs':>9} {'máx µs':>9}")
+    for nome, (p50, p99, maximo) in medidas.items():
+        print(f"{nome:<8} {p50:>9.1f} {p99:>9.1f} {maximo:>9.1f}")
+    print(f"\nlike / memória (p50): {medidas['like'][0] / medidas['memória'][0]:.0f}x, "
+          f"sqlite / memória (p50): {medidas['sqlite'][0] / medidas['memória'][0]:.0f}x\n")
+
+    from src.services.catalogo import normalizar
+    divergentes = contem = vazios = 0
+    for consulta, memoria, sql, like in zip(consultas, resultados["memória"], resultados["sqlite"], resultados["like"]):
+        nomes_memoria = [item["marcaModelo"] for item in memoria]
+        nomes_sql = [item["marcaModelo"] for item in sql]
+        prefixos = sum(1 for nome in nomes_memoria if normalizar(nome).startswith(consulta))
+        if len(nomes_memoria) != len(nomes_sql) or nomes_memoria[:prefixos] != nomes_sql[:prefixos] \
+                or (len(nomes_memoria) < limite and set(nomes_memoria) != set(nomes_sql)):
+            divergentes += 1
+        contem += not all(consulta in normalizar(nome) for nome in nomes_memoria)
+        vazios += len(memoria) < limite and set(nomes_memoria) != {linha.nome for linha in like}
+    conferir(f"memória e sqlite devolvem os mesmos itens ({divergentes} divergentes)", divergentes == 0)
+    conferir(f"todo item contém a consulta ({contem} sem)", contem == 0)
+    conferir(f"like devolve os mesmos itens quando não enche o limite ({vazios} diferentes)", vazios == 0)
+    conferir(f"p50 da busca em memória abaixo de 1 ms ({medidas['memória'][0]:.1f} µs)", medidas["memória"][0] < 1000)
+    conferir(f"sqlite abaixo do like no p50 e no p99 ({medidas['sqlite'][0]:.0f}/{medidas['like'][0]:.0f} µs, "
+             f"{medidas['sqlite'][1]:.0f}/{medidas['like'][1]:.0f} µs)",
+             medidas["sqlite"][0] < medidas["like"][0] and medidas["sqlite"][1] < medidas["like"][1])
+
+    recargas = CATALOGO_VEICULOS.recargas
+    csv = "marca,modelo\nTroller,Pantanal Teste 4x4\n"
+    cliente.post("/api/veiculos/importar", data={"arquivo": (io.BytesIO(csv.encode()), "novo.csv")},
+                 content_type="multipart/form-data")
+    itens = cliente.get("/api/veiculos/autocomplete", query_string={"q": "pantanal"}).json
+    conferir("nova importação recarrega o índice",
+             CATALOGO_VEICULOS.recargas == recargas + 1 and [i["marcaModelo"] for i in itens]
+             == ["Troller/Pantanal Teste 4x4"])
+
+    # Outro processo muda a tabela: a consulta seguinte usa o índice atual e dispara a recarga
+    with app.app_context():
+        db.session.execute(text("INSERT INTO veiculo (marca, modelo, nome, chave) "
+                                "VALUES ('Agrale', 'Marruá Teste', 'Agrale/Marruá Teste', 'AGRALE MARRUA TESTE')"))
+        db.session.commit()
+        tabela_alterada("veiculo")
+    recargas = CATALOGO_VEICULOS.recargas
+    inicio = time.perf_counter()
+    antes = cliente.get("/api/veiculos/autocomplete", query_string={"q": "marrua"}).json
+    ms_consulta = (time.perf_counter() - inicio) * 1000
+    while CATALOGO_VEICULOS.recargas == recargas and time.perf_counter() - inicio < 60:
+        time.sleep(0.01)
+    ms_recarga = (time.perf_counter() - inicio) * 1000
+    depois = cliente.get("/api/veiculos/autocomplete", query_string={"q": "marrua"}).json
+    conferir(f"mudança em outro processo: consulta em {ms_consulta:.1f} ms com o índice anterior, "
+             f"recarga em segundo plano em {ms_recarga:.0f} ms",
+             antes == [] and [i["marcaModelo"] for i in depois] == ["Agrale/Marruá Teste"])
+
+    print("verificações:", "OK" if not falhas else f"{len(falhas)} falha(s)")
+    sys.exit(1 if falhas else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Benchmark dos perfis de compressão: bytes x milissegundos por tipo de documento.
+
+Para cada tipo e cada perfil (services/compressao.py), monta documentos com
+payloads novos e mede a montagem (layout, igual em todos os perfis), a saída
+(pdf.output, onde o perfil atua) e o tamanho. Nos perfis com recorte exato a fonte
+depende dos glifos do payload, então cada payload novo paga um recorte (o primeiro
+perfil medido; a ordem gira a cada payload); o rapido embute o recorte base, sem
+esse custo. A coluna "reemissão" repete o mesmo payload, com o recorte já no cache.
+
+Verificações (sai com código 1 se alguma falhar):
+  - os fluxos de conteúdo das páginas são os mesmos em todos os perfis;
+  - no perfil compacto, cada entrada da xref em fluxo aponta para o objeto certo;
+  - o perfil padrao é determinístico (mesmos bytes para o mesmo payload).
+
+Exemplo:
+    python scripts/bench_compressao.py --repeticoes 30 --outorgados 40
+"""
+import argparse
+import os
+import random
+import re
+import statistics
+import sys
+import time
+import zlib
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ambiente import isolar_ambiente
+from payloads import ROTAS_DOCUMENTOS, payload_documento
+
+INICIO_FLUXO = re.compile(rb">>\s*stream\r?\n")
+XREF = re.compile(rb"/Type /XRef /Size (\d+) /W \[1 (\d+) 2\].*?/Length (\d+)>>\nstream\n", re.S)
+
+
+def fluxos_conteudo(pdf):
+    """Fluxos de conteúdo das páginas (descomprimidos): os que desenham texto"""
+    conteudos = []
+    posicao = 0
+    while (m := INICIO_FLUXO.search(pdf, posicao)) is not None:
+        dicionario = pdf[pdf.rfind(b" 0 obj", 0, m.start()):m.start()]
+        tamanho = int(re.findall(rb"/Length (\d+)", dicionario)[-1])
+        dados = pdf[m.end():m.end() + tamanho]
+        posicao = m.end() + tamanho
+        if b"/Length1" in dicionario:  # FontFile2: o binário da fonte pode conter "TJ" por acaso
+            continue
+        if b"/FlateDecode" in dicionario:
+            dados = zlib.decompress(dados)
+        if b" Tj" in dados or b"TJ" in dados:
+            conteudos.append(dados)
+    return conteudos
+
+
+def xref_consistente(pdf):
+    """Confere as entradas tipo 1 da xref em fluxo contra os 'N 0 obj' do arquivo"""
+    m = XREF.search(pdf)
+    if m is None:
+        return False
+    tamanho, largura, comprimento = (int(g) for g in m.groups())
+    linhas = zlib.decompress(pdf[m.end():m.end() + comprimento])
+    passo = 1 + largura + 2
+    for numero in range(tamanho):
+        linha = linhas[numero * passo:(numero + 1) * passo]
+        if linha[0] == 1:
+            posicao = int.from_bytes(linha[1:1 + largura], "big")
+            if not pdf.startswith(b"%d 0 obj" % numero, posicao):
+                return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticoes", type=int, default=30)
+    parser.add_argument("--outorgados", type=int, default=3, help="outorgados nos tipos _multiplos")
+    args = parser.parse_args()
+
+    isolar_ambiente("bench_compressao_")
+
+    from src.main import app
+    from src.routes.document_types import TIPOS_DOCUMENTO
+    from src.services.compressao import PERFIS_COMPRESSAO
+
+    rng = random.Random(44)
+    falhas = []
+
+    def conferir(descricao, ok):
+        if not ok:
+            print(f"FALHA {descricao}")
+            falhas.append(descricao)
+
+    def medir(tipo, payload, perfil):
+        inicio = time.perf_counter()
+        pdf = TIPOS_DOCUMENTO[tipo](payload)
+        montado = time.perf_counter()
+        pdf.perfil_compressao = PERFIS_COMPRESSAO[perfil]
+        saida = bytes(pdf.output())
+        return saida, (montado - inicio) * 1000, (time.perf_counter() - montado) * 1000
+
+    print(f"{'tipo':<26} {'perfil':<9} {'bytes':>7} {'x padrao':>9} {'ms montagem':>12} {'ms saída':>9} "
+          f"{'ms total':>9} {'ms reemissão':>13}")
+    totais = {perfil: [0, 0.0] for perfil in PERFIS_COMPRESSAO}
+    with app.test_request_context():
+        for rota in ROTAS_DOCUMENTOS:
+            tipo = rota.removeprefix("generate_")
+            payloads = [payload_documento(rota, rng, args.outorgados) for _ in range(args.repeticoes)]
+            # Montagem aquecida (cache de seções) antes de medir; perfis intercalados por payload
+            for payload in payloads:
+                TIPOS_DOCUMENTO[tipo](payload)
+            amostras = {perfil: ([], [], []) for perfil in PERFIS_COMPRESSAO}
+            ordem = list(amostras.items())
+            for numero, payload in enumerate(payloads):
+                for perfil, (tamanhos, montagens, saidas) in ordem[numero % 3:] + ordem[:numero % 3]:
+                    pdf, ms_montagem, ms_saida = medir(tipo, payload, perfil)
+                    tamanhos.append(len(pdf))
+                    montagens.append(ms_montagem)
+                    saidas.append(ms_saida)
+            medidas = {}
+            for perfil, (tamanhos, montagens, saidas) in amostras.items():
+                reemissoes = [medir(tipo, payloads[0], perfil)[2] for _ in range(5)]
+                medidas[perfil] = (statistics.mean(tamanhos), statistics.median(montagens),
+                                   statistics.median(saidas), statistics.median(reemissoes))
+                totais[perfil][0] += statistics.mean(tamanhos)
+                totais[perfil][1] += statistics.median(montagens) + statistics.median(saidas)
+
+            base = medidas["padrao"][0]
+            for perfil, (tamanho, ms_montagem, ms_saida, ms_reemissao) in medidas.items():
+                print(f"{tipo:<26} {perfil:<9} {tamanho:>7.0f} {tamanho / base:>8.2f}x {ms_montagem:>12.2f} "
+                      f"{ms_saida:>9.2f} {ms_montagem + ms_saida:>9.2f} {ms_reemissao:>13.2f}")
+
+            saidas = {perfil: medir(tipo, payloads[0], perfil)[0] for perfil in PERFIS_COMPRESSAO}
+            referencia = fluxos_conteudo(saidas["padrao"])
+            conferir(f"{tipo}: conteúdo das páginas igual em todos os perfis",
+                     referencia and all(fluxos_conteudo(pdf) == referencia for pdf in saidas.values()))
+            conferir(f"{tipo}: xref em fluxo do perfil compacto", xref_consistente(saidas["compacto"]))
+            conferir(f"{tipo}: perfil padrao determinístico", medir(tipo, payloads[0], "padrao")[0] == saidas["padrao"])
+
+    print()
+    for perfil, (tamanho, ms) in totais.items():
+        print(f"{perfil:<9} média por documento: {tamanho / len(ROTAS_DOCUMENTOS):>7.0f} bytes, "
+              f"{ms / len(ROTAS_DOCUMENTOS):.2f} ms")
+    print("verificações:", "OK" if not falhas else f"{len(falhas)} falha(s)")
+    sys.exit(1 if falhas else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Fila de renderização durável: vazão por número de workers e verificações.
+
+1. API: POST /api/fila/<tipo> responde 202 com Location; payload inválido ou com
+   poderesId desconhecido, 422; tipo desconhecido, 404.
+2. Custo da fila por tarefa (reserva + conclusão, sem renderizar), comparado
+   com a renderização: só a escrita no SQLite, uma fração desse custo, é
+   serializada entre os workers.
+3. Vazão: enfileira N tarefas e drena com `python -m src.worker --processos W
+   --ate-esvaziar` para cada W; a vazão vem das datas de conclusão (sem a partida
+   dos processos). Confere que todas terminam e que o PDF no arquivo é o mesmo
+   da rota generate_* para o mesmo payload.
+4. Lease: mata um worker com SIGKILL no meio de uma renderização; a tarefa órfã é
+   reservada por outro worker quando o lease vence e termina com 2 tentativas.
+5. Retentativas: com RENDER_LIMITE_MS=1 no worker, as tarefas pesadas falham em
+   todas as tentativas e terminam como "falhou", com o erro; uma tarefa com
+   cláusula inexistente termina como "falhou" já na primeira tentativa.
+Sai com código 1 se alguma verificação falhar.
+
+Exemplo:
+    python scripts/bench_fila.py --tarefas 400 --workers 1 2 4
+"""
+import argparse
+import hashlib
+import os
+import random
+import signal
+import subprocess
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(__file__))
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+from ambiente import isolar_ambiente
+from payloads import ROTAS_DOCUMENTOS, payload_documento
+
+
+def iniciar_worker(*argumentos, **ambiente):
+    return subprocess.Popen([sys.executable, "-m", "src.worker", "--intervalo", "0.05", *argumentos],
+                            cwd=RAIZ, env={**os.environ, **ambiente},
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tarefas", type=int, default=400)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    isolar_ambiente("bench_fila_")
+
+    from sqlalchemy import func, select
+
+    from src.main import app
+    from src.models.fila import TarefaRenderizacao
+    from src.models.user import db
+    from src.services.arquivo import arquivo_documentos
+    from src.services.fila import fila_renderizacao
+
+    cliente = app.test_client()
+    rng = random.Random(43)
+    falhas = []
+
+    def conferir(descricao, ok):
+        print(f"{'OK   ' if ok else 'FALHA'} {descricao}")
+        if not ok:
+            falhas.append(descricao)
+
+    def tarefas_do_lote(lote):
+        return db.session.execute(select(TarefaRenderizacao).where(TarefaRenderizacao.lote == lote)).scalars().all()
+
+    # 1. API
+    payload = payload_documento("generate_procuracao_pf", rng)
+    resposta = cliente.post("/api/fila/procuracao_pf", json=payload)
+    conferir(f"POST /api/fila/procuracao_pf -> {resposta.status_code}, Location {resposta.headers.get('Location')}",
+             resposta.status_code == 202 and cliente.get(resposta.headers["Location"]).get_json()["estado"] == "pendente")
+    conferir("payload inválido -> 422",
+             cliente.post("/api/fila/procuracao_pf", json={"outorganteNome": 1}).status_code == 422)
+    conferir("poderesId desconhecido -> 422", cliente.post("/api/fila/procuracao_pf", json={
+        **payload, "poderesId": "nao-existe"}).status_code == 422)
+    conferir("tipo desconhecido -> 404", cliente.post("/api/fila/xyz", json={}).status_code == 404)
+
+    # 2. Custo da fila por tarefa
+    with app.app_context():
+        fila_renderizacao.enfileirar_varios([("procuracao_pf", payload)] * 500, lote="custo")
+        inicio = time.perf_counter()
+        while (tarefa := fila_renderizacao.reservar("bench")) is not None:
+            fila_renderizacao.concluir(tarefa[0], "bench", "0" * 64)
+        custo_fila = (time.perf_counter() - inicio) * 1000 / 501
+    print(f"\nreserva + conclusão: {custo_fila:.2f} ms por tarefa")
+
+    # 3. Vazão por número de workers
+    rotas = list(ROTAS_DOCUMENTOS)
+    print(f"\n{'workers':>7} {'tarefas':>8} {'documentos/s':>13} {'ms/documento':>13} {'x 1 worker':>11}")
+    base = None
+    for workers in args.workers:
+        lote = str(uuid.uuid4())
+        itens = []
+        for i in range(args.tarefas):
+            rota = rotas[i % len(rotas)]
+            itens.append((rota.removeprefix("generate_"), payload_documento(rota, rng)))
+        with app.app_context():
+            fila_renderizacao.enfileirar_varios(itens, lote=lote)
+        processo = iniciar_worker("--processos", str(workers), "--ate-esvaziar")
+        processo.wait(timeout=1800)
+        with app.app_context():
+            tarefas = tarefas_do_lote(lote)
+            concluidas = sorted(t.concluido_em for t in tarefas if t.estado == "concluida")
+            conferir(f"{workers} worker(s): {len(concluidas)}/{len(tarefas)} tarefas concluídas",
+                     len(concluidas) == len(tarefas) == args.tarefas)
+            amostra = rng.sample(tarefas, 8)
+            iguais = True
+            for tarefa in amostra:
+                gerado = cliente.post(f"/api/generate_{tarefa.tipo}", data=tarefa.dados,
+                                      content_type="application/json").data
+                caminho = arquivo_documentos.localizar(tarefa.hash_documento)
+                with open(caminho, "rb") as f:
+                    iguais &= hashlib.sha256(gerado).hexdigest() == tarefa.hash_documento == \
+                        hashlib.sha256(f.read()).hexdigest()
+            conferir(f"{workers} worker(s): PDFs do arquivo iguais aos da rota generate_* (amostra de 8)", iguais)
+        duracao = (concluidas[-1] - concluidas[0]).total_seconds()
+        vazao = (len(concluidas) - 1) / duracao
+        base = base or vazao
+        print(f"{workers:>7} {len(concluidas):>8} {vazao:>13.1f} {1000 / vazao:>13.2f} {vazao / base:>10.2f}x")
+    print(f"CPUs nesta máquina: {os.cpu_count()}")
+
+    # 4. Lease: worker morto no meio de uma renderização
+    print()
+    ambiente_lease = {"FILA_LEASE_S": "2", "RENDER_LIMITE_MS": "1000", "RENDER_CUSTO_MAXIMO_MS": "0"}
+    orfas = []
+    for _ in range(5):
+        lote = str(uuid.uuid4())
+        with app.app_context():
+            fila_renderizacao.enfileirar_varios(
+                [("procuracao_pf_multiplos", payload_documento("generate_procuracao_pf_multiplos", rng, 300))
+                 for _ in range(20)], lote=lote)
+        processo = iniciar_worker(**ambiente_lease)
+        while True:
+            time.sleep(0.1)
+            with app.app_context():
+                contagens = fila_renderizacao.contagens(lote)
+            if (contagens["concluida"] >= 3 and contagens["executando"]) or processo.poll() is not None:
+                break
+        processo.send_signal(signal.SIGKILL)
+        processo.wait()
+        with app.app_context():
+            orfas = [t.id for t in tarefas_do_lote(lote) if t.estado == "executando"]
+        if orfas:
+            break
+    iniciar_worker("--ate-esvaziar", **ambiente_lease).wait(timeout=600)
+    with app.app_context():
+        tarefas = tarefas_do_lote(lote)
+        orfa = db.session.get(TarefaRenderizacao, orfas[0]) if orfas else None
+        conferir(f"worker morto com a tarefa {orfas} em execução: todas as {len(tarefas)} concluídas, "
+                 f"a órfã com {orfa.tentativas if orfa else '-'} tentativas",
+                 orfa is not None and all(t.estado == "concluida" for t in tarefas) and orfa.tentativas == 2)
+
+    # 5. Retentativas até falhar
+    lote = str(uuid.uuid4())
+    with app.app_context():
+        fila_renderizacao.enfileirar_varios(
+            [("procuracao_pf_multiplos", payload_documento("generate_procuracao_pf_multiplos", rng, 100))
+             for _ in range(3)], lote=lote)
+        # Cláusula removida depois de enfileirar: falha definitiva, sem novas tentativas
+        fila_renderizacao.enfileirar_varios([("procuracao_pf", {**payload, "poderesId": "removida"})],
+                                            lote=f"{lote}-clausula")
+    inicio = time.perf_counter()
+    iniciar_worker("--ate-esvaziar", RENDER_LIMITE_MS="1", FILA_MAX_TENTATIVAS="2").wait(timeout=600)
+    with app.app_context():
+        tarefas = tarefas_do_lote(lote)
+        conferir(f"prazo de 1 ms: {[(t.estado, t.tentativas) for t in tarefas]} em "
+                 f"{time.perf_counter() - inicio:.1f} s, erro {tarefas[0].erro!r}",
+                 all(t.estado == "falhou" and t.tentativas == 2 and "excedeu" in (t.erro or "") for t in tarefas))
+        clausula = tarefas_do_lote(f"{lote}-clausula")
+        conferir(f"cláusula inexistente: {[(t.estado, t.tentativas) for t in clausula]}",
+                 [(t.estado, t.tentativas) for t in clausula] == [("falhou", 1)]
+                 and "ClausulaNaoEncontrada" in (clausula[0].erro or ""))
+        total = db.session.scalar(select(func.count()).select_from(TarefaRenderizacao))
+        print(f"\ntarefas na fila ao final: {total}, por estado: {fila_renderizacao.contagens()}")
+    sys.exit(1 if falhas else 0)
+
+
+if __name__ == "__main__":
+    main()
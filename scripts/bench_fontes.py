@@ -0,0 +1,73 @@
+"""
+Benchmark de renderização: fonte core Times x TTF embutida.
+
+Compara, para cada tipo de documento, a latência e o tamanho do PDF em três modos:
+  core      - fonte core Times (latin-1), comportamento anterior
+  ingenua   - TTF embutida analisada e recortada a cada documento (add_font por requisição)
+  registro  - TTF embutida vinda do registro do processo, com cache de subsets
+
+Exemplo:
+    python scripts/bench_fontes.py --repeticoes 50
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ambiente import isolar_ambiente
+from payloads import ROTAS_DOCUMENTOS, payload_documento
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticoes", type=int, default=30)
+    args = parser.parse_args()
+
+    isolar_ambiente("bench_fontes_")
+
+    from fpdf.fonts import TTFFont
+    from src.main import app
+    from src.services import fonts
+
+    registrar_original = fonts.REGISTRO_FONTES.registrar_em
+
+    def registrar_ingenuo(pdf):
+        for fontkey, face in fonts.REGISTRO_FONTES.faces.items():
+            pdf.fonts[fontkey] = TTFFont(pdf, face.caminho, fontkey, fontkey[len(fontkey.rstrip("BI")):])
+
+    modos = {
+        "core": (False, registrar_original),
+        "ingenua": (True, registrar_ingenuo),
+        "registro": (True, registrar_original),
+    }
+    cliente = app.test_client()
+    rng = random.Random(3)
+    payloads = {rota: [payload_documento(rota, rng) for _ in range(args.repeticoes)] for rota in ROTAS_DOCUMENTOS}
+
+    print(f"{'rota':<36} {'modo':<9} {'p50 ms':>8} {'média ms':>9} {'bytes':>8} {'vs core':>8}")
+    for rota, lista in payloads.items():
+        base = None
+        for modo, (embutida, registrar) in modos.items():
+            app.config["PDF_FONTE_EMBUTIDA"] = embutida
+            fonts.REGISTRO_FONTES.registrar_em = registrar
+            cliente.post(f"/api/{rota}", json=lista[0])  # aquecimento
+            tempos, tamanhos = [], []
+            for payload in lista:
+                inicio = time.perf_counter()
+                resposta = cliente.post(f"/api/{rota}", json=payload)
+                tempos.append((time.perf_counter() - inicio) * 1000)
+                tamanhos.append(len(resposta.data))
+            p50 = statistics.median(tempos)
+            base = base or p50
+            print(f"{rota:<36} {modo:<9} {p50:>8.2f} {statistics.mean(tempos):>9.2f} "
+                  f"{int(statistics.mean(tamanhos)):>8} {p50 / base - 1:>+8.1%}")
+    fonts.REGISTRO_FONTES.registrar_em = registrar_original
+    print(f"cache de subsets: {fonts.REGISTRO_FONTES.acertos} acertos, {fonts.REGISTRO_FONTES.faltas} faltas")
+
+
+if __name__ == "__main__":
+    main()
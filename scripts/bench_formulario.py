@@ -0,0 +1,167 @@
+"""
+Benchmark do modo formulário: renderização pelo FPDF (rotas generate_*) x modelo
+AcroForm preenchido (achatado e com campos editáveis).
+
+Para cada tipo de documento mede, pelo test client e com o arquivo e os relatórios
+desligados (só o custo de gerar o PDF), o p50 da latência e o tempo de CPU por
+documento nos três modos, e o tempo de construção do modelo (uma vez por tipo).
+
+Antes de medir, confere:
+  - as tabelas xref de todas as seções (modelo e atualizações) apontam para os objetos;
+  - o documento achatado desenha os dados do payload e o editável os traz em /V;
+  - o mesmo payload gera os mesmos bytes;
+  - o modelo não embute fonte: rótulos e campos usam a mesma fonte core;
+  - um valor que não cabe no campo (muitos outorgados) ou que tem caracteres fora
+    do WinAnsi volta para a renderização;
+  - ?compressao=rapido é atendido pelo formulário, com outros bytes; o compacto
+    (fluxos de objetos) vai para a renderização.
+Sai com código 1 se alguma verificação falhar.
+
+Exemplo:
+    python scripts/bench_formulario.py --repeticoes 200
+"""
+import argparse
+import os
+import random
+import re
+import statistics
+import sys
+import time
+import zlib
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ambiente import isolar_ambiente
+from payloads import ROTAS_DOCUMENTOS, payload_documento
+
+MODOS = (("renderização", "?formulario=0"), ("formulário achatado", "?formulario=1"),
+         ("formulário editável", "?formulario=1&achatar=0"))
+
+
+def xref_consistente(conteudo):
+    """Todas as entradas em uso de todas as seções xref apontam para 'N 0 obj'"""
+    for secao in re.finditer(rb"startxref\s+(\d+)", conteudo):
+        linhas = conteudo[int(secao.group(1)):].split(b"\n")
+        if linhas[0] != b"xref":
+            return False
+        i = 1
+        while re.fullmatch(rb"\d+ \d+", linhas[i]):
+            primeiro, quantidade = map(int, linhas[i].split())
+            for j, entrada in enumerate(linhas[i + 1:i + 1 + quantidade]):
+                deslocamento = int(entrada[:10])
+                if entrada.rstrip().endswith(b"n") and \
+                        not conteudo.startswith(b"%d 0 obj" % (primeiro + j), deslocamento):
+                    return False
+            i += 1 + quantidade
+    return True
+
+
+def textos_desenhados(conteudo):
+    """Texto dos operadores Tj de todos os fluxos comprimidos do arquivo"""
+    textos = []
+    for fluxo in re.finditer(rb"stream\n(.*?)\nendstream", conteudo, re.S):
+        try:
+            textos.extend(re.findall(rb"\((.*?)\) Tj", zlib.decompress(fluxo.group(1))))
+        except zlib.error:
+            pass
+    return b" ".join(textos).decode("cp1252")
+
+
+def medir(cliente, url, payload, repeticoes):
+    """(p50 em ms, CPU em ms por documento)"""
+    tempos = []
+    cpu = time.process_time()
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        cliente.post(url, json=payload).get_data()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tempos), (time.process_time() - cpu) * 1000 / repeticoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticoes", type=int, default=200)
+    args = parser.parse_args()
+
+    isolar_ambiente("bench_formulario_", ARQUIVO_DOCUMENTOS="0", RELATORIOS_EMISSOES="0")
+
+    from src.main import app
+    from src.services.formularios import MODELOS_FORMULARIO
+
+    cliente = app.test_client()
+    rng = random.Random(40)
+    falhas = []
+
+    def conferir(descricao, ok):
+        if not ok:
+            print(f"FALHA {descricao}")
+            falhas.append(descricao)
+
+    payloads = {rota: payload_documento(rota, rng) for rota in ROTAS_DOCUMENTOS}
+    construcao = {}
+    for rota, payload in payloads.items():
+        inicio = time.perf_counter()
+        achatado = cliente.post(f"/api/{rota}?formulario=1", json=payload).data
+        construcao[rota] = (time.perf_counter() - inicio) * 1000
+        editavel = cliente.post(f"/api/{rota}?formulario=1&achatar=0", json=payload).data
+        for nome, conteudo in (("achatado", achatado), ("editável", editavel)):
+            conferir(f"{rota} {nome}: xref", conteudo.startswith(b"%PDF") and xref_consistente(conteudo))
+        desenhado = textos_desenhados(achatado)
+        for chave in ("veiculoPlaca", "veiculoChassi", "veiculoRenavam"):
+            conferir(f"{rota} achatado: {chave} desenhado", payload[chave] in desenhado)
+        valor = payload["veiculoPlaca"].encode("utf-16-be").hex().upper()
+        conferir(f"{rota} editável: placa em /V", valor in editavel.decode("latin-1")
+                 and b"/AcroForm" in editavel and b"/AcroForm" not in achatado)
+        conferir(f"{rota}: mesmo payload, mesmos bytes",
+                 cliente.post(f"/api/{rota}?formulario=1", json=payload).data == achatado)
+        conferir(f"{rota}: sem fonte embutida", b"/FontFile2" not in achatado and b"/Times-Bold" in achatado)
+
+    longo = payload_documento("generate_procuracao_pf_multiplos", rng, 12)
+    recusados = sum(MODELOS_FORMULARIO.recusados.values())
+    resposta = cliente.post("/api/generate_procuracao_pf_multiplos?formulario=1", json=longo)
+    renderizado = cliente.post("/api/generate_procuracao_pf_multiplos?formulario=0", json=longo).data
+    conferir("12 outorgados não cabem: volta para a renderização",
+             resposta.status_code == 200 and resposta.data == renderizado
+             and sum(MODELOS_FORMULARIO.recusados.values()) == recusados + 1)
+    for nome in ("Łukasz Wałęsa", "Nguyễn Văn An"):
+        recusados = sum(MODELOS_FORMULARIO.recusados.values())
+        fora = dict(payloads["generate_procuracao_pf"], outorganteNome=nome)
+        resposta = cliente.post("/api/generate_procuracao_pf?formulario=1", json=fora)
+        renderizado = cliente.post("/api/generate_procuracao_pf?formulario=0", json=fora).data
+        conferir(f"{nome} fora do WinAnsi: volta para a renderização",
+                 resposta.data == renderizado and sum(MODELOS_FORMULARIO.recusados.values()) == recusados + 1)
+
+    payload = payloads["generate_procuracao_pf"]
+    preenchidos = sum(MODELOS_FORMULARIO.preenchidos.values())
+    padrao = cliente.post("/api/generate_procuracao_pf?formulario=1", json=payload).data
+    rapido = cliente.post("/api/generate_procuracao_pf?formulario=1&compressao=rapido", json=payload).data
+    conferir("?compressao=rapido pelo formulário",
+             rapido != padrao and sum(MODELOS_FORMULARIO.preenchidos.values()) == preenchidos + 2)
+    conferir("?compressao=compacto vai para a renderização",
+             cliente.post("/api/generate_procuracao_pf?formulario=1&compressao=compacto", json=payload).data
+             == cliente.post("/api/generate_procuracao_pf?formulario=0&compressao=compacto", json=payload).data
+             and sum(MODELOS_FORMULARIO.preenchidos.values()) == preenchidos + 2)
+    print(f"verificações: {'OK' if not falhas else f'{len(falhas)} falha(s)'}")
+    if falhas:
+        sys.exit(1)
+
+    print(f"\n{'tipo':<26} {'modelo (ms)':>11}", end="")
+    for nome, _ in MODOS:
+        print(f" {nome + ' p50/CPU (ms)':>34}", end="")
+    print()
+    totais = {nome: [] for nome, _ in MODOS}
+    for rota, payload in payloads.items():
+        print(f"{rota.removeprefix('generate_'):<26} {construcao[rota]:>11.1f}", end="")
+        for nome, parametros in MODOS:
+            p50, cpu = medir(cliente, f"/api/{rota}{parametros}", payload, args.repeticoes)
+            totais[nome].append((p50, cpu))
+            print(f" {p50:>24.2f} / {cpu:>7.2f}", end="")
+        print()
+    base = statistics.mean(p for p, _ in totais[MODOS[0][0]])
+    for nome, _ in MODOS[1:]:
+        media = statistics.mean(p for p, _ in totais[nome])
+        print(f"{nome}: {base / media:.1f}x mais rápido que a renderização (média dos p50)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Benchmark do provedor JSON: biblioteca padrão (DefaultJSONProvider do Flask) x
+ProvedorJSONRapido (orjson), em payloads representativos.
+
+Mede, por operação:
+  - loads de payloads de documentos (1, 20 e 100 outorgados), como no request.get_json;
+  - response (jsonify) de listas de usuários e de cláusulas;
+  - json_em_fluxo de uma lista grande de usuários (pico de memória x resposta inteira);
+  - ponta a ponta pelo test client: POST /api/preview/procuracao_pf_multiplos com 100
+    outorgados e GET /api/users (10.000 usuários, sem o cache de respostas).
+
+Antes de medir, confere a compatibilidade: o JSON de cada provedor decodifica para
+o mesmo valor (acentos, datas no formato HTTP, UUID, Decimal, chaves inteiras), e a
+lista em fluxo é igual byte a byte à resposta inteira. Sai com código 1 se não for.
+
+Exemplo:
+    python scripts/bench_json.py --repeticoes 200
+"""
+import argparse
+import decimal
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ambiente import isolar_ambiente
+from payloads import payload_documento
+
+
+def usuarios(quantidade):
+    return [{"id": i, "username": f"usuário_{i}_joão", "email": f"usuario_{i}@exemplo.com.br"}
+            for i in range(1, quantidade + 1)]
+
+
+def cronometrar(funcao, repeticoes):
+    """Mediana em microssegundos"""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - inicio) * 1e6)
+    return statistics.median(tempos)
+
+
+def pico_memoria(funcao):
+    tracemalloc.start()
+    funcao()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return pico
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticoes", type=int, default=200)
+    parser.add_argument("--usuarios", type=int, default=10000, help="usuários no GET /api/users ponta a ponta")
+    args = parser.parse_args()
+
+    isolar_ambiente("bench_json_")
+
+    from flask.json.provider import DefaultJSONProvider
+
+    from src.main import app
+    from src.models.user import User, db
+    from src.services.json_rapido import ProvedorJSONRapido, json_em_fluxo
+
+    padrao, rapido = DefaultJSONProvider(app), ProvedorJSONRapido(app)
+    rng = random.Random(3)
+
+    # Compatibilidade
+    falhas = 0
+    amostras = {
+        "acentos": {"nome": "Conceição Araújo", "endereço": "Rua São João, 7 – Goiânia/GO", "€": "“aspas”"},
+        "tipos extras": {"data": datetime(2024, 5, 17, 12, 30, tzinfo=timezone.utc), "id": uuid.UUID(int=7),
+                         "valor": decimal.Decimal("10.50"), "lista": [1.5, None, True]},
+        "chaves inteiras": {3: "três", 1: "um", 20: "vinte"},
+        "payload 100 outorgados": payload_documento("generate_procuracao_pf_multiplos", rng, 100),
+        "usuários": usuarios(1000),
+    }
+    with app.app_context():
+        for nome, obj in amostras.items():
+            corpo_padrao = padrao.response(obj).get_data()
+            corpo_rapido = rapido.response(obj).get_data()
+            ok = json.loads(corpo_padrao) == json.loads(corpo_rapido) and corpo_rapido.endswith(b"\n")
+            ok = ok and rapido.loads(corpo_padrao) == padrao.loads(corpo_padrao)
+            falhas += not ok
+            print(f"{'OK   ' if ok else 'FALHA'} {nome:<24} {len(corpo_padrao):>8} -> {len(corpo_rapido):>8} bytes")
+        lista = usuarios(2345)
+        for provedor in (padrao, rapido):
+            app.json = provedor
+            ok = b"".join(json_em_fluxo(lista, itens_por_bloco=500)) == provedor.response(lista).get_data()
+            falhas += not ok
+            print(f"{'OK   ' if ok else 'FALHA'} json_em_fluxo == response ({type(provedor).__name__})")
+        ok = rapido.loads(b'{"a": NaN}')["a"] != rapido.loads(b'{"a": NaN}')["a"]
+        falhas += not ok
+        print(f"{'OK   ' if ok else 'FALHA'} NaN aceito como na biblioteca padrão")
+    if falhas:
+        sys.exit(1)
+
+    # Operações isoladas
+    print(f"\n{'operação':<44} {'padrão (µs)':>12} {'orjson (µs)':>12} {'ganho':>7}")
+
+    def linha(nome, medir_padrao, medir_rapido):
+        t_padrao, t_rapido = medir_padrao(), medir_rapido()
+        print(f"{nome:<44} {t_padrao:>12.1f} {t_rapido:>12.1f} {t_padrao / t_rapido:>6.1f}x")
+
+    with app.app_context():
+        for quantidade in (1, 20, 100):
+            corpo = json.dumps(payload_documento("generate_procuracao_pf_multiplos", rng, quantidade)).encode()
+            linha(f"loads payload ({quantidade} outorgados)",
+                  lambda: cronometrar(lambda: padrao.loads(corpo), args.repeticoes),
+                  lambda: cronometrar(lambda: rapido.loads(corpo), args.repeticoes))
+        for quantidade in (100, 1000, 10000):
+            lista = usuarios(quantidade)
+            linha(f"response lista de usuários ({quantidade})",
+                  lambda: cronometrar(lambda: padrao.response(lista), max(5, args.repeticoes // 10)),
+                  lambda: cronometrar(lambda: rapido.response(lista), max(5, args.repeticoes // 10)))
+        clausulas = [{"id": f"clausula-{i}", "nome": f"Cláusula {i}", "versao": 3, "padrao": False,
+                      "atualizadaEm": "2024-05-17T12:30:00+00:00"} for i in range(200)]
+        linha("response lista de cláusulas (200)",
+              lambda: cronometrar(lambda: padrao.response(clausulas), args.repeticoes),
+              lambda: cronometrar(lambda: rapido.response(clausulas), args.repeticoes))
+
+        lista = usuarios(100000)
+        app.json = rapido
+        inteira = pico_memoria(lambda: rapido.response(lista))
+        fluxo = pico_memoria(lambda: sum(len(p) for p in json_em_fluxo(lista)))
+        print(f"\npico de memória, 100.000 usuários: resposta inteira {inteira / 1e6:.1f} MB, "
+              f"json_em_fluxo {fluxo / 1e6:.1f} MB")
+
+    # Ponta a ponta
+    with app.app_context():
+        db.session.bulk_insert_mappings(User, [
+            {"username": u["username"], "email": u["email"]} for u in usuarios(args.usuarios)
+        ])
+        db.session.commit()
+    cliente = app.test_client()
+    payload = payload_documento("generate_procuracao_pf_multiplos", rng, 100)
+    app.config["CACHE_RESPOSTAS"] = False
+    print(f"\n{'ponta a ponta (test client)':<44} {'padrão (ms)':>12} {'orjson (ms)':>12} {'ganho':>7}")
+    for nome, requisitar, repeticoes in (
+        ("POST /api/preview (100 outorgados)",
+         lambda: cliente.post("/api/preview/procuracao_pf_multiplos", json=payload), args.repeticoes),
+        (f"GET /api/users ({args.usuarios}, sem cache)", lambda: cliente.get("/api/users").data,
+         max(5, args.repeticoes // 20)),
+    ):
+        tempos = {}
+        for provedor in (padrao, rapido):
+            app.json = provedor
+            tempos[provedor] = cronometrar(requisitar, repeticoes) / 1000
+        print(f"{nome:<44} {tempos[padrao]:>12.2f} {tempos[rapido]:>12.2f} {tempos[padrao] / tempos[rapido]:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Benchmark de linearização: tempo até a primeira página numa conexão lenta.
+
+Gera cada documento nas duas formas (?linearizar=0 e ?linearizar=1) e o serve a
+partir de um servidor HTTP local com banda limitada (--kbps). O cliente lê a
+resposta em blocos e registra:
+  primeira página - instante em que o visualizador já pode desenhar a página 1:
+                    o byte /E do dicionário de linearização (PDF linearizado) ou o
+                    arquivo inteiro (PDF normal, cuja xref fica no fim)
+  completo        - instante em que o download termina
+Também mostra o custo da linearização na renderização (ms por documento).
+
+Exemplo:
+    python scripts/bench_linearizacao.py --kbps 256 --outorgados 1 40 100
+"""
+import argparse
+import http.client
+import os
+import random
+import re
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ambiente import isolar_ambiente
+from payloads import payload_documento
+
+BLOCO = 1024
+VALOR_E = re.compile(rb"/Linearized.*?/E\s+(\d+)", re.S)
+
+
+class ServidorLento(ThreadingHTTPServer):
+    """Serve os PDFs de `documentos` (caminho -> bytes) a no máximo `kbps` kbit/s"""
+
+    daemon_threads = True
+
+    def __init__(self, documentos, kbps):
+        self.documentos = documentos
+        self.bytes_por_segundo = kbps * 1000 / 8
+        super().__init__(("127.0.0.1", 0), ManipuladorLento)
+
+
+class ManipuladorLento(BaseHTTPRequestHandler):
+    def do_GET(self):
+        corpo = self.server.documentos[self.path]
+        self.send_response(200)
+        self.send_header("Content-Type", "application/pdf")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        inicio = time.perf_counter()
+        for enviado in range(0, len(corpo), BLOCO):
+            espera = inicio + enviado / self.server.bytes_por_segundo - time.perf_counter()
+            if espera > 0:
+                time.sleep(espera)
+            self.wfile.write(corpo[enviado:enviado + BLOCO])
+            self.wfile.flush()
+
+    def log_message(self, *args):
+        pass
+
+
+def baixar(porta, caminho):
+    """Devolve (segundos até a primeira página, segundos até o fim, tamanho)"""
+    conexao = http.client.HTTPConnection("127.0.0.1", porta)
+    inicio = time.perf_counter()
+    conexao.request("GET", caminho)
+    resposta = conexao.getresponse()
+    recebido = bytearray()
+    fim_primeira_pagina = None
+    primeira_pagina = None
+    while True:
+        bloco = resposta.read1(BLOCO)
+        if not bloco:
+            break
+        recebido += bloco
+        if fim_primeira_pagina is None and len(recebido) >= BLOCO:
+            marcador = VALOR_E.search(recebido[:BLOCO])
+            fim_primeira_pagina = int(marcador.group(1)) if marcador else -1
+        if primeira_pagina is None and 0 < (fim_primeira_pagina or 0) <= len(recebido):
+            primeira_pagina = time.perf_counter() - inicio
+    completo = time.perf_counter() - inicio
+    conexao.close()
+    return primeira_pagina or completo, completo, len(recebido)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--kbps", type=float, default=256, help="banda do servidor em kbit/s")
+    parser.add_argument("--outorgados", type=int, nargs="+", default=[1, 40, 100])
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--fonte-core", action="store_true", help="usa a fonte core Times em vez da TTF")
+    args = parser.parse_args()
+
+    isolar_ambiente("bench_linearizacao_")
+
+    from src.main import app
+
+    app.config["PDF_FONTE_EMBUTIDA"] = not args.fonte_core
+    app.config["ARQUIVO_DOCUMENTOS"] = False
+    cliente = app.test_client()
+    rng = random.Random(7)
+    documentos = {}
+    render = {}
+    for num in args.outorgados:
+        payload = payload_documento("generate_procuracao_pf_multiplos", rng, num)
+        for linearizar in ("0", "1"):
+            url = f"/api/generate_procuracao_pf_multiplos?linearizar={linearizar}"
+            cliente.post(url, json=payload)  # aquecimento
+            tempos = []
+            for _ in range(10):
+                inicio = time.perf_counter()
+                resposta = cliente.post(url, json=payload)
+                tempos.append((time.perf_counter() - inicio) * 1000)
+            documentos[f"/{num}/{linearizar}"] = resposta.data
+            render[num, linearizar] = statistics.median(tempos)
+
+    servidor = ServidorLento(documentos, args.kbps)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    porta = servidor.server_address[1]
+
+    print(f"banda: {args.kbps:g} kbit/s, fonte: {'core Times' if args.fonte_core else 'TTF embutida'}")
+    print(f"{'outorgados':>10} {'páginas':>7} {'formato':<11} {'bytes':>7} {'render ms':>9} "
+          f"{'1ª página ms':>12} {'completo ms':>11}")
+    for num in args.outorgados:
+        for linearizar, nome in (("0", "normal"), ("1", "linearizado")):
+            caminho = f"/{num}/{linearizar}"
+            amostras = [baixar(porta, caminho) for _ in range(args.repeticoes)]
+            paginas = documentos[caminho].count(b"/Type /Page\n")
+            print(f"{num:>10} {paginas:>7} {nome:<11} {amostras[0][2]:>7} {render[num, linearizar]:>9.1f} "
+                  f"{statistics.median(a[0] for a in amostras) * 1000:>12.0f} "
+                  f"{statistics.median(a[1] for a in amostras) * 1000:>11.0f}")
+    servidor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Escala das procurações com múltiplos outorgados, de 1 a 500 outorgados.
+
+Para cada tamanho de lista mede:
+  - a montagem do texto da seção OUTORGADOS (texto_outorgados, com join) contra a
+    concatenação com += que o código usava, em µs por outorgado;
+  - a renderização completa pela rota (p50, ms por outorgado e páginas), com e
+    sem o cache de seções.
+
+E confere, com a fonte core (texto legível nos fluxos das páginas):
+  - toda página depois da primeira repete o título "(continuação)" e, enquanto a
+    lista continua, "OUTORGADOS (continuação):";
+  - local e data, linha e rótulo da assinatura estão juntos, na última página;
+  - com e sem o cache de seções os bytes são os mesmos.
+Sai com código 1 se alguma verificação falhar.
+
+Exemplo:
+    python scripts/bench_outorgados.py --repeticoes 5
+"""
+import argparse
+import os
+import random
+import re
+import statistics
+import sys
+import time
+import zlib
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ambiente import isolar_ambiente
+from payloads import payload_documento
+
+TAMANHOS = (1, 10, 50, 100, 200, 300, 400, 500)
+ROTAS = ("generate_procuracao_pf_multiplos", "generate_procuracao_pj_multiplos")
+
+
+def outorgados_concatenando(outorgados, qualificacao_pf):
+    """A montagem antiga: += dentro do laço, recalculando len(outorgados) a cada item"""
+    texto = ""
+    for i, o in enumerate(outorgados):
+        if i == len(outorgados) - 1:
+            texto += qualificacao_pf(o.get("nome", ""), o.get("nacionalidade", ""), o.get("cpf", ""),
+                                     o.get("endereco", "")) + "."
+        else:
+            texto += qualificacao_pf(o.get("nome", ""), o.get("nacionalidade", ""), o.get("cpf", ""),
+                                     o.get("endereco", "")) + ", e/ou: "
+    return texto
+
+
+def textos_paginas(conteudo):
+    """Texto desenhado (operadores Tj) de cada página, na ordem do arquivo"""
+    paginas = []
+    for fluxo in re.finditer(rb"stream\n(.*?)\nendstream", conteudo, re.S):
+        try:
+            pagina = zlib.decompress(fluxo.group(1))
+        except zlib.error:
+            continue
+        textos = [re.sub(rb"\\(.)", rb"\1", t) for t in re.findall(rb"\(((?:\\.|[^\\)])*)\) Tj", pagina)]
+        paginas.append((b" ".join(textos).decode("cp1252"), pagina))
+    return paginas
+
+
+def cronometrar(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    isolar_ambiente("bench_outorgados_", ARQUIVO_DOCUMENTOS="0", RELATORIOS_EMISSOES="0")
+
+    from src.main import app
+    from src.services.textos import (
+        qualificacao_pf, texto_outorgados, textos_procuracao_pf_multiplos, textos_procuracao_pj_multiplos,
+    )
+
+    app.config["RENDER_CUSTO_MAXIMO_MS"] = 0
+    cliente = app.test_client()
+    rng = random.Random(42)
+    falhas = []
+
+    def conferir(descricao, ok):
+        if not ok:
+            print(f"FALHA {descricao}")
+            falhas.append(descricao)
+
+    # Verificações de layout, com a fonte core
+    app.config["PDF_FONTE_EMBUTIDA"] = False
+    for rota, textos_rota in zip(ROTAS, (textos_procuracao_pf_multiplos, textos_procuracao_pj_multiplos)):
+        for n in TAMANHOS:
+            payload = payload_documento(rota, rng, n)
+            app.config["PDF_CACHE_SECOES"] = True
+            conteudo = cliente.post(f"/api/{rota}", json=payload).data
+            app.config["PDF_CACHE_SECOES"] = False
+            conferir(f"{rota} {n}: mesmos bytes com e sem cache",
+                     cliente.post(f"/api/{rota}", json=payload).data == conteudo)
+            paginas = textos_paginas(conteudo)
+            ultimo = payload["outorgados"][-1]["cpf"]
+            lista_aberta = True
+            for numero, (texto, _) in enumerate(paginas[1:], start=2):
+                conferir(f"{rota} {n}: página {numero} repete o título", texto.startswith("PROCURAÇÃO (continuação)"))
+                conferir(f"{rota} {n}: página {numero} repete a seção OUTORGADOS",
+                         ("OUTORGADOS (continuação):" in texto) == lista_aberta)
+                lista_aberta = lista_aberta and ultimo not in texto
+            with app.app_context():
+                textos = textos_rota(payload)
+            texto, fluxo = paginas[-1]
+            conferir(f"{rota} {n}: local e data, linha e rótulo da assinatura na última página",
+                     textos.local_data in texto and textos.assinatura in texto and b" l S" in fluxo
+                     and not any(b" l S" in f for _, f in paginas[:-1]))
+    app.config["PDF_FONTE_EMBUTIDA"] = True
+    print(f"verificações: {'OK' if not falhas else f'{len(falhas)} falha(s)'}")
+
+    print(f"\n{'outorgados':>10} {'join (µs/out.)':>15} {'+= (µs/out.)':>13} {'páginas':>8} "
+          f"{'sem cache (ms)':>15} {'ms/out.':>8} {'com cache (ms)':>15}")
+    por_outorgado = {}
+    for n in TAMANHOS:
+        payload = payload_documento(ROTAS[0], rng, n)
+        outorgados = payload["outorgados"]
+        repeticoes = max(20, 20000 // n)
+        t_join = cronometrar(lambda: [texto_outorgados(outorgados) for _ in range(repeticoes)], 5)
+        t_concat = cronometrar(lambda: [outorgados_concatenando(outorgados, qualificacao_pf)
+                                        for _ in range(repeticoes)], 5)
+        conferir(f"{n}: join e += produzem o mesmo texto",
+                 texto_outorgados(outorgados) == outorgados_concatenando(outorgados, qualificacao_pf))
+        tempos = {}
+        for cache in (False, True):
+            app.config["PDF_CACHE_SECOES"] = cache
+            tempos[cache] = cronometrar(lambda: cliente.post(f"/api/{ROTAS[0]}", json=payload).get_data(),
+                                        args.repeticoes)
+        paginas = len(re.findall(rb"/Type /Page\b(?!s)", cliente.post(f"/api/{ROTAS[0]}", json=payload).data))
+        por_outorgado[n] = tempos[False] / n
+        print(f"{n:>10} {t_join * 1000 / repeticoes / n:>15.2f} {t_concat * 1000 / repeticoes / n:>13.2f} "
+              f"{paginas:>8} {tempos[False]:>15.1f} {tempos[False] / n:>8.2f} {tempos[True]:>15.1f}")
+    crescimento = por_outorgado[500] / por_outorgado[100]
+    print(f"\nms por outorgado, 500 x 100 outorgados: {crescimento:.2f}x (1.0 = linear)")
+    conferir("renderização linear no número de outorgados", crescimento < 1.5)
+    sys.exit(1 if falhas else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark da pré-visualização: POST /api/preview/<tipo> x POST /api/generate_<tipo>.
+
+Simula a digitação do nome do outorgante, um caractere por requisição, e mede a
+latência de cada "tecla" na rota de pré-visualização (JSON e HTML) e, para
+comparação, na rota que gera o PDF.
+
+Exemplo:
+    python scripts/bench_preview.py --caracteres 40
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ambiente import isolar_ambiente
+from payloads import ROTAS_DOCUMENTOS, payload_documento
+
+
+def percentil(valores, p):
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * p))]
+
+
+def digitar(cliente, url, payload, nome):
+    """Latências (ms) de uma requisição por prefixo do nome"""
+    tempos = []
+    for i in range(1, len(nome) + 1):
+        corpo = dict(payload, outorganteNome=nome[:i], outorganteRazaoSocial=nome[:i])
+        inicio = time.perf_counter()
+        resposta = cliente.post(url, json=corpo)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+        assert resposta.status_code == 200, resposta.data
+    return tempos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--caracteres", type=int, default=40)
+    args = parser.parse_args()
+
+    isolar_ambiente("bench_preview_")
+
+    from src.main import app
+
+    app.config["ARQUIVO_DOCUMENTOS"] = False
+    cliente = app.test_client()
+    rng = random.Random(5)
+    nome = ("Maria Aparecida dos Santos Oliveira Pereira da Silva" * 3)[:args.caracteres]
+
+    print(f"{'rota':<28} {'preview p50':>11} {'p99':>6} {'html p50':>9} {'pdf p50':>8} {'pdf p99':>8}  (ms)")
+    for rota in ROTAS_DOCUMENTOS:
+        tipo = rota[len("generate_"):]
+        payload = payload_documento(rota, rng, 5)
+        cliente.post(f"/api/preview/{tipo}", json=payload)  # aquecimento
+        cliente.post(f"/api/{rota}", json=payload)
+        preview = digitar(cliente, f"/api/preview/{tipo}", payload, nome)
+        html = digitar(cliente, f"/api/preview/{tipo}?formato=html", payload, nome)
+        pdf = digitar(cliente, f"/api/{rota}", payload, nome[:10])
+        print(f"{tipo:<28} {statistics.median(preview):>11.2f} {percentil(preview, 0.99):>6.2f} "
+              f"{statistics.median(html):>9.2f} {statistics.median(pdf):>8.1f} {percentil(pdf, 0.99):>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
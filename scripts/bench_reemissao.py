@@ -0,0 +1,240 @@
+"""
+Reemissão em lote por CPF/CNPJ: planejamento, deduplicação, vazão e pacote.
+
+1. Registra emissões históricas (sem renderizar): --documentos que citam um
+   outorgado recorrente (como outorgado, item de outorgados ou outorgante), parte
+   delas emitidas duas vezes com o mesmo payload, e --outras sem ele. As partes da
+   primeira metade são apagadas, como emissões anteriores ao índice.
+2. POST /api/reemissoes com o endereço novo: mede o planejamento (índice, leitura
+   dos payloads, alterações, validação, deduplicação, enfileiramento) e confere
+   as contagens; o ZIP e uma nova reemissão da parte respondem 409 enquanto o
+   lote não termina.
+3. Vazão: drena o lote com `python -m src.worker --processos W --ate-esvaziar`,
+   para cada W em --workers (cada W com uma nova reemissão, de outro endereço,
+   pedida duas vezes ao mesmo tempo: uma responde 202 e a outra 409). A
+   partir da segunda, só os documentos da reemissão anterior são encontrados: as
+   emissões que eles substituíram ficam de fora.
+4. Pacote: GET /api/reemissoes/<lote>/documentos.zip traz um PDF por documento
+   único e reemissao.csv; uma amostra dos PDFs é igual à da rota generate_* para o
+   payload alterado, e nenhum payload reemitido tem o endereço antigo.
+5. Substituição e retenção: uma reemissão com dataEmissao nova seguida de outra
+   sem dataEmissao encontra só os documentos da primeira (não soma as versões
+   anteriores); com os payloads vencidos, a reemissão não encontra nada e eles
+   são apagados.
+Sai com código 1 se alguma verificação falhar.
+
+Exemplo:
+    python scripts/bench_reemissao.py --documentos 1000 --workers 1 2
+"""
+import argparse
+import csv
+import hashlib
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(__file__))
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+from ambiente import isolar_ambiente
+from payloads import ROTAS_DOCUMENTOS, payload_documento
+
+PARTE = {"nome": "Carlos Eduardo Mânica", "nacionalidade": "brasileiro", "cpf": "321.654.987-00",
+         "endereco": "Rua Antiga, 10, Centro, Cascavel/PR"}
+
+
+def com_parte(rota, payload, rng, indice):
+    """Coloca a parte recorrente no payload: como outorgante (1 em 5, tipos PF) ou outorgado"""
+    if indice % 5 == 0 and rota.endswith("_pf"):
+        payload.update({"outorganteNome": PARTE["nome"], "outorganteNacionalidade": PARTE["nacionalidade"],
+                        "outorganteCpf": PARTE["cpf"], "outorganteEndereco": PARTE["endereco"]})
+    elif rota.endswith("_multiplos"):
+        payload["outorgados"].insert(rng.randrange(len(payload["outorgados"]) + 1), dict(PARTE))
+    else:
+        payload.update({"outorgadoNome": PARTE["nome"], "outorgadoNacionalidade": PARTE["nacionalidade"],
+                        "outorgadoCpf": PARTE["cpf"], "outorgadoEndereco": PARTE["endereco"]})
+    return payload
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documentos", type=int, default=1000, help="emissões que citam a parte")
+    parser.add_argument("--outras", type=int, default=3000, help="emissões sem a parte")
+    parser.add_argument("--repetidas", type=float, default=0.1, help="fração emitida duas vezes")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2])
+    args = parser.parse_args()
+
+    isolar_ambiente("bench_reemissao_")
+
+    from sqlalchemy import delete, func, select, update
+
+    from src.main import app
+    from src.models.emissao import Emissao, EmissaoParte, PayloadEmissao
+    from src.models.fila import TarefaRenderizacao
+    from src.models.user import db
+    from src.services.relatorios import confirmar_emissoes, registrar_emissao
+
+    cliente = app.test_client()
+    rng = random.Random(46)
+    falhas = []
+
+    def conferir(descricao, ok):
+        print(f"{'OK   ' if ok else 'FALHA'} {descricao}")
+        if not ok:
+            falhas.append(descricao)
+
+    # 1. Histórico
+    rotas = list(ROTAS_DOCUMENTOS)
+    historico = []
+    for i in range(args.documentos):
+        if historico and rng.random() < args.repetidas:
+            historico.append(rng.choice(historico))
+            continue
+        rota = rotas[i % len(rotas)]
+        historico.append((rota, com_parte(rota, payload_documento(rota, rng), rng, i)))
+    for i in range(args.outras):
+        rota = rotas[i % len(rotas)]
+        historico.insert(rng.randrange(len(historico) + 1), (rota, payload_documento(rota, rng)))
+    unicos = len({json.dumps(payload, sort_keys=True) for _, payload in historico if PARTE["cpf"] in
+                  json.dumps(payload)})
+    with app.test_request_context():
+        for i, (rota, payload) in enumerate(historico, 1):
+            registrar_emissao(rota.removeprefix("generate_"), payload)
+            if i % 500 == 0:
+                confirmar_emissoes()
+        confirmar_emissoes()
+        metade = db.session.scalar(select(func.max(Emissao.id))) // 2
+        db.session.execute(delete(EmissaoParte).where(EmissaoParte.emissao_id <= metade))
+        db.session.commit()
+    print(f"histórico: {len(historico)} emissões, {args.documentos} com a parte ({unicos} payloads distintos), "
+          f"partes apagadas das {metade} primeiras\n")
+
+    # 2. Planejamento
+    enderecos = [f"Av. Nova, {100 + w}, Jardim Alvorada, Cascavel/PR" for w in range(len(args.workers))]
+    inicio = time.perf_counter()
+    resposta = cliente.post("/api/reemissoes", json={"documento": PARTE["cpf"],
+                                                     "alteracoes": {"endereco": enderecos[0]}})
+    ms_planejamento = (time.perf_counter() - inicio) * 1000
+    estado = resposta.get_json()
+    conferir(f"POST /api/reemissoes -> {resposta.status_code} em {ms_planejamento:.0f} ms (com indexação de "
+             f"{metade} emissões antigas): {estado['encontradas']} encontradas, {estado['documentos']} documentos, "
+             f"{estado['duplicadas']} duplicadas",
+             resposta.status_code == 202 and estado["encontradas"] == args.documentos
+             and estado["documentos"] == unicos and estado["estados"]["pendente"] == unicos)
+    conferir("ZIP antes do fim -> 409",
+             cliente.get(f"{resposta.headers['Location']}/documentos.zip").status_code == 409)
+    conferir("nova reemissão da parte antes do fim -> 409", cliente.post("/api/reemissoes", json={
+        "documento": PARTE["cpf"], "alteracoes": {"endereco": enderecos[0]}}).status_code == 409)
+    conferir("pedido inválido -> 422", cliente.post("/api/reemissoes", json={
+        "documento": "", "alteracoes": {"cpf": "1"}}).status_code == 422)
+    segunda = cliente.post("/api/reemissoes", json={"documento": PARTE["cpf"],
+                                                    "alteracoes": {"endereco": enderecos[0]}, "tipos": ["x"]})
+    conferir("tipo desconhecido -> 422", segunda.status_code == 422)
+    with app.app_context():
+        inicio = time.perf_counter()
+        ids = db.session.scalars(select(EmissaoParte.emissao_id)
+                                 .where(EmissaoParte.documento == "32165498700")).all()
+        ms_indice = (time.perf_counter() - inicio) * 1000
+    print(f"consulta ao índice de partes: {len(ids)} emissões em {ms_indice:.2f} ms\n")
+
+    # 3. Vazão
+    print(f"{'workers':>7} {'encontradas':>12} {'documentos':>11} {'documentos/s':>13} {'s (relógio)':>12} "
+          f"{'planejamento ms':>16}")
+    lotes = []
+    for w, workers in enumerate(args.workers):
+        if w:
+            # Dois pedidos simultâneos da mesma parte: os dois passam pela checagem, só um grava
+            inicio = time.perf_counter()
+            with ThreadPoolExecutor(2) as executor:
+                respostas = list(executor.map(lambda _: app.test_client().post("/api/reemissoes", json={
+                    "documento": PARTE["cpf"], "alteracoes": {"endereco": enderecos[w]}}), range(2)))
+            ms_planejamento = (time.perf_counter() - inicio) * 1000
+            conferir(f"pedidos simultâneos -> {sorted(r.status_code for r in respostas)}",
+                     sorted(r.status_code for r in respostas) == [202, 409])
+            estado = next(r for r in respostas if r.status_code == 202).get_json()
+        lote = estado["lote"]
+        lotes.append(lote)
+        inicio = time.perf_counter()
+        subprocess.run([sys.executable, "-m", "src.worker", "--intervalo", "0.05", "--processos", str(workers),
+                        "--ate-esvaziar"], cwd=RAIZ, env=os.environ.copy(), check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=3600)
+        relogio = time.perf_counter() - inicio
+        with app.app_context():
+            concluidas = sorted(db.session.scalars(
+                select(TarefaRenderizacao.concluido_em)
+                .where(TarefaRenderizacao.lote == lote, TarefaRenderizacao.estado == "concluida")).all())
+        vazao = (len(concluidas) - 1) / (concluidas[-1] - concluidas[0]).total_seconds()
+        print(f"{workers:>7} {estado['encontradas']:>12} {estado['documentos']:>11} {vazao:>13.1f} "
+              f"{relogio:>12.1f} {ms_planejamento:>16.0f}")
+        final = cliente.get(f"/api/reemissoes/{lote}").get_json()
+        conferir(f"{workers} worker(s): {final['estados']['concluida']}/{final['documentos']} concluídos, "
+                 f"progresso {final['progresso']}",
+                 final["encerrada"] and final["progresso"] == 1.0 and final["estados"]["concluida"] == unicos)
+        if w:
+            conferir(f"só os documentos da reemissão anterior: {estado['encontradas']} encontradas, "
+                     f"{estado['documentos']} documentos", estado["encontradas"] == estado["documentos"] == unicos)
+    print(f"CPUs nesta máquina: {os.cpu_count()}\n")
+
+    # 4. Pacote
+    inicio = time.perf_counter()
+    conteudo = cliente.get(f"/api/reemissoes/{lotes[-1]}/documentos.zip").data
+    ms_zip = (time.perf_counter() - inicio) * 1000
+    with zipfile.ZipFile(io.BytesIO(conteudo)) as pacote:
+        nomes = pacote.namelist()
+        pdfs = {nome: pacote.read(nome) for nome in nomes if nome.endswith(".pdf")}
+        manifesto = list(csv.DictReader(io.StringIO(pacote.read("reemissao.csv").decode()), delimiter=";"))
+    conferir(f"ZIP: {len(pdfs)} PDFs, {len(manifesto)} linhas no manifesto, {len(conteudo) / 1e6:.1f} MB "
+             f"em {ms_zip:.0f} ms", len(pdfs) == len(manifesto) == unicos
+             and sum(len(linha["emissoes_substituidas"].split()) for linha in manifesto) == estado["encontradas"])
+    with app.app_context():
+        tarefas = db.session.scalars(select(TarefaRenderizacao)
+                                     .where(TarefaRenderizacao.lote == lotes[-1])).all()
+    antigos = sum(any(endereco in tarefa.dados for endereco in [PARTE["endereco"], *enderecos[:-1]])
+                  for tarefa in tarefas)
+    conferir(f"nenhum payload reemitido com endereço antigo ({antigos})", antigos == 0)
+    iguais = True
+    amostra = rng.sample(tarefas, 8)
+    for tarefa in amostra:
+        gerado = cliente.post(f"/api/generate_{tarefa.tipo}", data=tarefa.dados,
+                              content_type="application/json").data
+        arquivo = next(linha["arquivo"] for linha in manifesto if linha["hash"] == tarefa.hash_documento)
+        iguais &= hashlib.sha256(gerado).hexdigest() == tarefa.hash_documento == \
+            hashlib.sha256(pdfs[arquivo]).hexdigest()
+    conferir("PDFs do pacote iguais aos da rota generate_* (amostra de 8)", iguais)
+
+    # 5. Substituição e retenção
+    def reemitir(**extras):
+        estado = cliente.post("/api/reemissoes", json={"documento": PARTE["cpf"],
+                                                       "alteracoes": {"endereco": enderecos[-1]}, **extras}).get_json()
+        subprocess.run([sys.executable, "-m", "src.worker", "--intervalo", "0.05", "--ate-esvaziar"], cwd=RAIZ,
+                       env=os.environ.copy(), check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                       timeout=3600)
+        return estado
+
+    com_data = reemitir(dataEmissao="2030-01-02")
+    sem_data = reemitir()
+    conferir(f"com dataEmissao e depois sem: {com_data['encontradas']}/{com_data['documentos']} e "
+             f"{sem_data['encontradas']}/{sem_data['documentos']} (encontradas/documentos)",
+             # a amostra do passo 4, emitida pela rota, também cita a parte e se junta ao lote na deduplicação
+             com_data["encontradas"] == unicos + len(amostra)
+             and com_data["documentos"] == sem_data["encontradas"] == sem_data["documentos"] == unicos)
+    with app.app_context():
+        db.session.execute(update(PayloadEmissao).values(expira_em=datetime.now(timezone.utc) - timedelta(days=1)))
+        db.session.commit()
+    vencidos = reemitir()
+    with app.app_context():
+        restantes = db.session.scalar(select(func.count()).select_from(PayloadEmissao))
+    conferir(f"payloads vencidos: {vencidos['encontradas']} encontradas, {restantes} payloads restantes",
+             vencidos["encontradas"] == 0 and restantes == 0)
+    sys.exit(1 if falhas else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Benchmark e verificação dos relatórios de emissões.
+
+1. Emite um documento por rota generate_* pelo test client e confere que cada
+   emissão aparece em GET /api/reports (total, tipo, cliente e cidade).
+2. Registra N emissões sintéticas espalhadas por um ano (vazão do registro, em
+   emissões/s) e, a cada marco, mede GET /api/reports de um mês contra a mesma
+   contagem feita na hora com GROUP BY sobre as emissões.
+3. Confere que o resumo diário é igual à recontagem a partir das emissões, que o
+   CSV de um mês tem uma linha por emissão e mede o pico de memória da exportação
+   em streaming (um mês x o ano inteiro).
+
+Sai com código 1 se alguma verificação falhar.
+
+Exemplo:
+    python scripts/bench_relatorios.py --emissoes 100000
+"""
+import argparse
+import csv
+import io
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ambiente import isolar_ambiente
+from payloads import ROTAS_DOCUMENTOS, payload_documento
+
+INICIO_ANO = datetime(2024, 1, 1, 3, tzinfo=timezone.utc)
+
+
+def cronometrar(funcao, repeticoes):
+    """Mediana em milissegundos"""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--emissoes", type=int, default=100000)
+    parser.add_argument("--clientes", type=int, default=200, help="clientes distintos nas emissões sintéticas")
+    parser.add_argument("--repeticoes", type=int, default=20)
+    args = parser.parse_args()
+
+    isolar_ambiente("bench_relatorios_")
+
+    from sqlalchemy import func, select
+
+    from src.main import app
+    from src.models.emissao import Emissao, ResumoEmissoes
+    from src.models.user import db
+    from src.services.relatorios import (
+        cliente_do_payload, confirmar_emissoes, fuso, limites_utc, registrar_emissao,
+    )
+
+    cliente = app.test_client()
+    rng = random.Random(39)
+    falhas = []
+
+    def conferir(descricao, ok):
+        print(f"{'OK   ' if ok else 'FALHA'} {descricao}")
+        if not ok:
+            falhas.append(descricao)
+
+    # 1. Emissões reais pelas rotas
+    esperado = Counter()
+    for rota in ROTAS_DOCUMENTOS:
+        payload = payload_documento(rota, rng)
+        tipo = rota.removeprefix("generate_")
+        resposta = cliente.post(f"/api/{rota}", json=payload)
+        esperado["total"] += resposta.status_code == 200
+        esperado["tipo", tipo] += 1
+        esperado["cliente", cliente_do_payload(tipo, payload)[0]] += 1
+        esperado["cidade", payload["localEmissao"]] += 1
+    with app.app_context():
+        hoje = datetime.now(fuso()).date().isoformat()
+    dados = cliente.get(f"/api/reports?dia={hoje}").get_json()
+    obtido = Counter({"total": dados["total"]})
+    for dimensao in ("tipo", "cliente", "cidade"):
+        for item in dados[dimensao]:
+            obtido[dimensao, item["valor"]] += item["quantidade"]
+    conferir(f"{len(ROTAS_DOCUMENTOS)} documentos emitidos pelas rotas aparecem em /api/reports", obtido == esperado)
+    conferir("período inválido -> 422", cliente.get("/api/reports?inicio=2024-02-01&fim=2024-01-01").status_code == 422)
+
+    # 2. Emissões sintéticas: vazão do registro e /api/reports x GROUP BY
+    clientes = [payload_documento(rota, rng) for rota in rng.choices(list(ROTAS_DOCUMENTOS), k=args.clientes)]
+    tipos = [rota.removeprefix("generate_") for rota in ROTAS_DOCUMENTOS]
+    tipos_pj = [tipo for tipo in tipos if tipo.endswith("_pj") or tipo.endswith("_pj_multiplos")]
+    tipos_pf = [tipo for tipo in tipos if tipo not in tipos_pj]
+    segundos_ano = 366 * 24 * 3600
+    marcos = sorted({m for m in (args.emissoes // 10, args.emissoes) if m})
+
+    def agrupar_na_hora():
+        for coluna in (Emissao.tipo, Emissao.cliente_documento, Emissao.cidade):
+            db.session.execute(
+                select(coluna, func.count()).where(Emissao.emitido_em >= de, Emissao.emitido_em < ate)
+                .group_by(coluna)
+            ).all()
+        db.session.execute(
+            select(func.date(Emissao.emitido_em), func.count())
+            .where(Emissao.emitido_em >= de, Emissao.emitido_em < ate)
+            .group_by(func.date(Emissao.emitido_em))
+        ).all()
+
+    print(f"\n{'emissões':>9} {'registro (emissões/s)':>22} {'/api/reports mês (ms)':>22} {'GROUP BY (ms)':>14}")
+    registradas = 0
+    with app.app_context():
+        de, ate = limites_utc(datetime(2024, 6, 1).date(), datetime(2024, 6, 30).date())
+        for marco in marcos:
+            inicio, antes = time.perf_counter(), registradas
+            while registradas < marco:
+                for _ in range(min(500, marco - registradas)):
+                    payload = rng.choice(clientes)
+                    tipo = rng.choice(tipos_pj if "outorganteCnpj" in payload else tipos_pf)
+                    registrar_emissao(tipo, payload, emitido_em=INICIO_ANO + timedelta(
+                        seconds=rng.randrange(segundos_ano)))
+                    registradas += 1
+                confirmar_emissoes()
+            vazao = (registradas - antes) / (time.perf_counter() - inicio)
+            t_relatorio = cronometrar(lambda: cliente.get("/api/reports?mes=2024-06").get_data(), args.repeticoes)
+            t_grupo = cronometrar(agrupar_na_hora, args.repeticoes)
+            print(f"{marco:>9} {vazao:>22.0f} {t_relatorio:>22.2f} {t_grupo:>14.2f}")
+
+        # 3. Resumo == recontagem, CSV e memória
+        local = fuso()
+        recontagem = Counter()
+        for emitido_em, tipo, documento, cidade in db.session.execute(
+                select(Emissao.emitido_em, Emissao.tipo, Emissao.cliente_documento, Emissao.cidade)):
+            dia = emitido_em.replace(tzinfo=timezone.utc).astimezone(local).date()
+            recontagem.update([(dia, "total", ""), (dia, "tipo", tipo), (dia, "cliente", documento),
+                               (dia, "cidade", cidade)])
+        resumo = Counter({(dia, dimensao, valor): quantidade for dia, dimensao, valor, quantidade in db.session.execute(
+            select(ResumoEmissoes.dia, ResumoEmissoes.dimensao, ResumoEmissoes.valor, ResumoEmissoes.quantidade))})
+        conferir(f"resumo diário ({len(resumo)} linhas) igual à recontagem das emissões", resumo == recontagem)
+        emissoes_junho = db.session.scalar(
+            select(func.count()).where(Emissao.emitido_em >= de, Emissao.emitido_em < ate))
+
+    dados = cliente.get("/api/reports?mes=2024-06").get_json()
+    conferir("total de /api/reports?mes=2024-06 igual às emissões do mês", dados["total"] == emissoes_junho)
+    corpo = cliente.get("/api/reports/emissoes.csv?mes=2024-06").get_data().decode("utf-8-sig")
+    linhas = list(csv.reader(io.StringIO(corpo), delimiter=";"))
+    conferir(f"CSV de junho com {emissoes_junho} linhas + cabeçalho", len(linhas) == emissoes_junho + 1)
+
+    print()
+    for descricao, url in (("um mês", "/api/reports/emissoes.csv?mes=2024-06"),
+                           ("o ano", "/api/reports/emissoes.csv?inicio=2024-01-01&fim=2024-12-31")):
+        tracemalloc.start()
+        resposta = cliente.get(url, buffered=False)
+        tamanho = sum(len(parte) for parte in resposta.response)
+        resposta.close()
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"CSV de {descricao:<7}: {tamanho / 1e6:>7.1f} MB em streaming, pico de memória {pico / 1e6:.1f} MB")
+
+    sys.exit(1 if falhas else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Benchmark e verificação dos GETs condicionais da API de usuários.
+
+Cria N usuários em um banco temporário e mede GET /api/users e GET /api/users/<id>
+em três modos: sem cache (CACHE_RESPOSTAS desligado, consulta + serialização a
+cada requisição), com cache (200 do JSON guardado) e com If-None-Match (304).
+Conta os comandos SQL enviados ao banco em cada modo.
+
+Depois confere a invalidação: POST, PUT e DELETE mudam o ETag e o conteúdo, e uma
+escrita feita por outro processo (como outro worker do gunicorn) também invalida
+o cache deste. Sai com código 1 se alguma verificação falhar.
+
+Exemplo:
+    python scripts/bench_usuarios.py --usuarios 500 --requisicoes 2000
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, RAIZ)
+from ambiente import isolar_ambiente
+
+
+def medir(cliente, url, requisicoes, cabecalhos=None):
+    """(p50 em ms, status das respostas)"""
+    tempos, status = [], set()
+    for _ in range(requisicoes):
+        inicio = time.perf_counter()
+        resposta = cliente.get(url, headers=cabecalhos or {})
+        resposta.get_data()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+        status.add(resposta.status_code)
+    return statistics.median(tempos), status
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--usuarios", type=int, default=500)
+    parser.add_argument("--requisicoes", type=int, default=2000)
+    args = parser.parse_args()
+
+    isolar_ambiente("bench_usuarios_")
+
+    from sqlalchemy import event
+
+    from src.main import app
+    from src.models.user import db
+
+    cliente = app.test_client()
+    for i in range(args.usuarios):
+        cliente.post("/api/users", json={"username": f"painel_{i}", "email": f"painel_{i}@exemplo.com.br"})
+
+    comandos = [0]
+    with app.app_context():
+        event.listen(db.engine, "before_cursor_execute", lambda *_: comandos.__setitem__(0, comandos[0] + 1))
+
+    print(f"{args.usuarios} usuários, {args.requisicoes} requisições por modo")
+    print(f"{'rota':<16} {'modo':<22} {'p50 (ms)':>9} {'SQL/req':>8}  status")
+    for url in ("/api/users", "/api/users/1"):
+        etag = cliente.get(url).headers["ETag"]
+        modos = [
+            ("sem cache", False, None),
+            ("cache (200)", True, None),
+            ("If-None-Match (304)", True, {"If-None-Match": etag}),
+        ]
+        for nome, cache, cabecalhos in modos:
+            app.config["CACHE_RESPOSTAS"] = cache
+            comandos[0] = 0
+            p50, status = medir(cliente, url, args.requisicoes, cabecalhos)
+            print(f"{url:<16} {nome:<22} {p50:>9.3f} {comandos[0] / args.requisicoes:>8.2f}  {sorted(status)}")
+    app.config["CACHE_RESPOSTAS"] = True
+
+    falhas = []
+
+    def conferir(descricao, escrever, url="/api/users"):
+        antes = cliente.get(url)
+        escrever()
+        depois = cliente.get(url, headers={"If-None-Match": antes.headers["ETag"]})
+        ok = depois.status_code == 200 and depois.headers["ETag"] != antes.headers["ETag"]
+        ok = ok and depois.get_json() == app.test_client().get(url).get_json()
+        print(f"{'OK   ' if ok else 'FALHA'} {descricao}")
+        if not ok:
+            falhas.append(descricao)
+
+    conferir("POST invalida a lista",
+             lambda: cliente.post("/api/users", json={"username": "novo", "email": "novo@exemplo.com.br"}))
+    conferir("PUT invalida a lista", lambda: cliente.put("/api/users/2", json={"username": "renomeado"}))
+    conferir("PUT invalida o usuário", lambda: cliente.put("/api/users/1", json={"email": "outro@exemplo.com.br"}),
+             "/api/users/1")
+    conferir("DELETE invalida a lista", lambda: cliente.delete("/api/users/3"))
+    escrita_externa = ("from src.main import app; "
+                       "app.test_client().put('/api/users/4', json={'username': 'de_outro_worker'})")
+    conferir("escrita em outro processo invalida a lista",
+             lambda: subprocess.run([sys.executable, "-c", escrita_externa], cwd=RAIZ, check=True,
+                                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL))
+
+    comandos[0] = 0
+    etag = cliente.get("/api/users").headers["ETag"]
+    comandos[0] = 0
+    resposta = cliente.get("/api/users", headers={"If-None-Match": etag})
+    ok = resposta.status_code == 304 and comandos[0] == 0
+    print(f"{'OK   ' if ok else 'FALHA'} 304 sem comandos SQL depois das escritas")
+    if not ok:
+        falhas.append("304")
+    sys.exit(1 if falhas else 0)
+
+
+if __name__ == "__main__":
+    main()
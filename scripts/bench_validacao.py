@@ -0,0 +1,69 @@
+"""
+Benchmark do custo da validação de payloads frente ao da renderização.
+
+Para cada tipo de documento mede, com payloads realistas, o tempo do validador
+compilado (src/services/schemas.py) e o tempo de montar + serializar o PDF.
+Também mede o caminho de rejeição de um payload inválido pela rota inteira, que
+deve responder 422 sem criar nenhum objeto PDF.
+
+Exemplo:
+    python scripts/bench_validacao.py --repeticoes 2000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ambiente import isolar_ambiente
+from payloads import ROTAS_DOCUMENTOS, payload_documento
+
+
+def cronometrar(funcao, argumentos):
+    inicio = time.perf_counter()
+    for argumento in argumentos:
+        funcao(argumento)
+    return (time.perf_counter() - inicio) / len(argumentos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticoes", type=int, default=2000)
+    parser.add_argument("--renderizacoes", type=int, default=30)
+    args = parser.parse_args()
+
+    isolar_ambiente("bench_validacao_")
+
+    from src.main import app
+    from src.routes.document_types import TIPOS_DOCUMENTO
+    from src.services.pdf import finalizar_pdf
+    from src.services.schemas import validar_payload
+
+    app.config["ARQUIVO_DOCUMENTOS"] = False
+    rng = random.Random(7)
+
+    print(f"{'tipo':<26} {'validar µs':>11} {'renderizar ms':>14} {'overhead':>9}")
+    with app.app_context():
+        for rota in ROTAS_DOCUMENTOS:
+            tipo = rota.removeprefix("generate_")
+            payloads = [payload_documento(rota, rng) for _ in range(args.repeticoes)]
+            assert not any(validar_payload(tipo, p) for p in payloads)
+            validar = cronometrar(lambda p: validar_payload(tipo, p), payloads)
+            renderizar = cronometrar(lambda p: finalizar_pdf(TIPOS_DOCUMENTO[tipo](p)),
+                                     payloads[:args.renderizacoes])
+            print(f"{tipo:<26} {validar * 1e6:>11.2f} {renderizar * 1e3:>14.2f} {validar / renderizar:>9.3%}")
+
+    cliente = app.test_client()
+    invalido = payload_documento("generate_procuracao_pf_multiplos", rng)
+    invalido["poderes"] = "x" * 1_000_000
+    inicio = time.perf_counter()
+    for _ in range(200):
+        resposta = cliente.post("/api/generate_procuracao_pf_multiplos", json=invalido)
+    rejeitar = (time.perf_counter() - inicio) / 200
+    print(f"\nrejeição pela rota (poderes com 1 MB): HTTP {resposta.status_code} em {rejeitar * 1e3:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
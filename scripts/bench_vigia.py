@@ -0,0 +1,216 @@
+"""
+Calibração e verificação do vigia das renderizações (services/vigia.py).
+
+1. Calibração: renderiza uma grade de payloads (1 a 100 outorgados, endereços
+   longos, poderes de até 8.000 caracteres) sem o cache de seções e ajusta por
+   mínimos quadrados custo = base + a * caracteres + b * itens. Mostra os
+   coeficientes medidos ao lado dos usados pela estimativa e a razão
+   real / estimado de cada payload.
+2. Custo do vigia: tempo de estimar_custo no maior payload e renderização com e
+   sem prazo armado (os pontos de verificação).
+3. Prazo: com RENDER_LIMITE_MS baixo, um payload pesado inédito (as quebras de
+   linha não estão no cache) recebe 422 estruturado (com o custo estimado e sem
+   Retry-After) perto do limite, o processo continua respondendo com PDFs idênticos aos de referência e
+   GET /api/monitoramento conta o aborto; na importação, a linha vai para erros.csv.
+4. Estimativa: com RENDER_CUSTO_MAXIMO_MS baixo, o payload pesado recebe 422.
+5. Gunicorn (1 worker gthread): pesados e leves ao mesmo tempo; os pesados abortam,
+   os leves respondem 200 e o pid do worker não muda.
+Sai com código 1 se alguma verificação falhar.
+
+Exemplo:
+    python scripts/bench_vigia.py --limite-ms 30
+"""
+import argparse
+import http.client
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ambiente import isolar_ambiente
+from payloads import payload_documento
+
+PESADA = "generate_procuracao_pf_multiplos"
+LEVE = "generate_procuracao_pf"
+
+
+def payload_pesado(rng, outorgados=100, repeticoes_endereco=2):
+    payload = payload_documento(PESADA, rng, outorgados)
+    for outorgado in payload["outorgados"]:
+        outorgado["endereco"] = " ".join([outorgado["endereco"]] * repeticoes_endereco)[:300]
+    return payload
+
+
+def minimos_quadrados(linhas, alvos):
+    """Coeficientes de alvos ~ linhas (equações normais, eliminação de Gauss)"""
+    n = len(linhas[0])
+    a = [[sum(l[i] * l[j] for l in linhas) for j in range(n)] + [sum(l[i] * y for l, y in zip(linhas, alvos))]
+         for i in range(n)]
+    for i in range(n):
+        pivo = max(range(i, n), key=lambda k: abs(a[k][i]))
+        a[i], a[pivo] = a[pivo], a[i]
+        for k in range(i + 1, n):
+            fator = a[k][i] / a[i][i]
+            a[k] = [x - fator * y for x, y in zip(a[k], a[i])]
+    coeficientes = [0.0] * n
+    for i in reversed(range(n)):
+        coeficientes[i] = (a[i][n] - sum(a[i][j] * coeficientes[j] for j in range(i + 1, n))) / a[i][i]
+    return coeficientes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--limite-ms", type=int, default=30, help="RENDER_LIMITE_MS das verificações de prazo")
+    parser.add_argument("--limite-gunicorn-ms", type=int, default=80)
+    parser.add_argument("--sem-gunicorn", action="store_true")
+    args = parser.parse_args()
+
+    isolar_ambiente("bench_vigia_", ARQUIVO_DOCUMENTOS="0", RELATORIOS_EMISSOES="0")
+
+    from src.main import app
+    from src.services.vigia import (
+        CUSTO_BASE_MS, CUSTO_POR_CARACTERE_MS, CUSTO_POR_ITEM_MS, estimar_custo, medir_payload,
+    )
+
+    cliente = app.test_client()
+    rng = random.Random(41)
+    falhas = []
+
+    def conferir(descricao, ok):
+        print(f"{'OK   ' if ok else 'FALHA'} {descricao}")
+        if not ok:
+            falhas.append(descricao)
+
+    def renderizar(rota, payload, repeticoes=3):
+        tempos = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            resposta = cliente.post(f"/api/{rota}", json=payload)
+            tempos.append((time.perf_counter() - inicio) * 1000)
+        return statistics.median(tempos), resposta
+
+    # 1. Calibração
+    app.config.update(PDF_CACHE_SECOES=False, RENDER_LIMITE_MS=0, RENDER_CUSTO_MAXIMO_MS=0)
+    grade = []
+    for outorgados in (1, 5, 20, 50, 100):
+        for repeticoes in (1, 2):
+            grade.append((PESADA, payload_pesado(rng, outorgados, repeticoes)))
+    for tamanho in (0, 2000, 8000):
+        payload = payload_documento(LEVE, rng)
+        if tamanho:
+            payload["poderes"] = ("poderes específicos " * (tamanho // 20 + 1))[:tamanho]
+        grade.append((LEVE, payload))
+    medidas, alvos = [], []
+    print(f"{'rota':<34} {'caracteres':>10} {'itens':>6} {'real (ms)':>10} {'estimado':>9} {'razão':>6}")
+    for rota, payload in grade:
+        real, _ = renderizar(rota, payload)
+        caracteres, itens = medir_payload(payload)
+        estimado = estimar_custo(payload)
+        medidas.append((1, caracteres, itens))
+        alvos.append(real)
+        print(f"{rota:<34} {caracteres:>10} {itens:>6} {real:>10.1f} {estimado:>9.1f} {real / estimado:>6.2f}")
+    base, por_caractere, por_item = minimos_quadrados(medidas, alvos)
+    print(f"ajuste: base {base:.2f} ms, {por_caractere * 1000:.2f} µs/caractere, {por_item:.3f} ms/item "
+          f"(estimativa: {CUSTO_BASE_MS} ms, {CUSTO_POR_CARACTERE_MS * 1000:.2f} µs, {CUSTO_POR_ITEM_MS} ms)")
+    app.config["PDF_CACHE_SECOES"] = True
+
+    # 2. Custo do vigia
+    maior = grade[9][1]
+    inicio = time.perf_counter()
+    for _ in range(1000):
+        estimar_custo(maior)
+    print(f"\nestimar_custo ({medir_payload(maior)[0]} caracteres): "
+          f"{(time.perf_counter() - inicio) * 1000:.1f} µs por chamada")
+    tempos = {0: [], 60000: []}
+    for _ in range(20):
+        for limite in tempos:
+            app.config["RENDER_LIMITE_MS"] = limite
+            tempos[limite].append(renderizar(PESADA, maior, 1)[0])
+    for limite, medidos in tempos.items():
+        print(f"renderização do maior payload, prazo {'desarmado' if not limite else 'armado':<10}: "
+              f"{statistics.median(medidos):.1f} ms")
+
+    # 3. Prazo
+    leve = payload_documento(LEVE, rng)
+    app.config["RENDER_LIMITE_MS"] = 0
+    referencia = cliente.post(f"/api/{LEVE}", json=leve).data
+    app.config["RENDER_LIMITE_MS"] = args.limite_ms
+    print()
+    inicio = time.perf_counter()
+    resposta = cliente.post(f"/api/{PESADA}", json=payload_pesado(rng))
+    decorrido = (time.perf_counter() - inicio) * 1000
+    corpo = resposta.get_json() or {}
+    conferir(f"payload pesado: {resposta.status_code} em {decorrido:.0f} ms (limite {args.limite_ms} ms), "
+             f"{corpo.get('erro')!r}",
+             resposta.status_code == 422 and corpo.get("limiteMs") == args.limite_ms
+             and corpo.get("custoEstimadoMs", 0) > 0 and "Retry-After" not in resposta.headers
+             and corpo.get("tipo") == PESADA.removeprefix("generate_") and decorrido < args.limite_ms * 3)
+    conferir("depois do aborto, o mesmo processo gera o documento leve idêntico ao de referência",
+             all(cliente.post(f"/api/{LEVE}", json=leve).data == referencia for _ in range(5)))
+    estatisticas = cliente.get("/api/monitoramento").get_json()["renderizacao"]
+    conferir(f"/api/monitoramento conta o aborto: {estatisticas['abortadas']}",
+             estatisticas["abortadas"].get("procuracao_pf_multiplos") == 1)
+
+    csv_planilha = "placa\n" + "\n".join(f"ABC1D{i:02d}" for i in range(3))
+    dados = {k: v for k, v in payload_pesado(rng).items() if k != "veiculoPlaca"}
+    resposta = cliente.post("/api/import/procuracao_pf_multiplos", data={
+        "arquivo": (io.BytesIO(csv_planilha.encode()), "planilha.csv"), "dados": json.dumps(dados)})
+    with zipfile.ZipFile(io.BytesIO(resposta.data)) as arquivo_zip:
+        nomes = arquivo_zip.namelist()
+        erros = arquivo_zip.read("erros.csv").decode() if "erros.csv" in nomes else ""
+    conferir("importação: linhas que estouram o prazo vão para erros.csv",
+             nomes == ["erros.csv"] and erros.count("excedeu") == 3)
+
+    # 4. Estimativa
+    app.config.update(RENDER_LIMITE_MS=0, RENDER_CUSTO_MAXIMO_MS=50)
+    resposta = cliente.post(f"/api/{PESADA}", json=maior)
+    conferir(f"custo estimado acima do máximo: {resposta.status_code} "
+             f"{(resposta.get_json() or {}).get('detalhes')}", resposta.status_code == 422)
+    conferir("payload leve continua aceito", cliente.post(f"/api/{LEVE}", json=leve).data == referencia)
+
+    # 5. Gunicorn
+    if not args.sem_gunicorn:
+        from loadtest import ServidorGunicorn
+        # Com 4 threads disputando o GIL, o tempo de parede de um documento leve chega a
+        # algumas dezenas de ms; o limite fica acima disso e abaixo dos ~150 ms do pesado
+        os.environ["RENDER_LIMITE_MS"] = str(args.limite_gunicorn_ms)
+        with ServidorGunicorn(1, "gthread", 4) as servidor:
+            def requisitar(metodo, caminho, payload=None):
+                conexao = http.client.HTTPConnection("127.0.0.1", servidor.porta, timeout=30)
+                corpo = json.dumps(payload).encode() if payload is not None else None
+                conexao.request(metodo, caminho, body=corpo, headers={"Content-Type": "application/json"})
+                resposta = conexao.getresponse()
+                dados_resposta = resposta.read()
+                conexao.close()
+                return resposta.status, dados_resposta
+
+            pid_inicio = json.loads(requisitar("GET", "/api/monitoramento")[1])["pid"]
+            for _ in range(3):  # carrega as fontes e o cache de seções do worker
+                requisitar("POST", f"/api/{LEVE}", leve)
+            pedidos = [(PESADA, payload_pesado(rng)) for _ in range(20)] + [(LEVE, leve)] * 40
+            random.Random(0).shuffle(pedidos)
+            with ThreadPoolExecutor(8) as executor:
+                resultados = list(executor.map(lambda p: (p[0], requisitar("POST", f"/api/{p[0]}", p[1])), pedidos))
+            monitor = json.loads(requisitar("GET", "/api/monitoramento")[1])
+            pesados = [status for rota, (status, _) in resultados if rota == PESADA]
+            leves = [(status, corpo == referencia) for rota, (status, corpo) in resultados if rota == LEVE]
+            print()
+            conferir(f"gunicorn: 20 pesados -> {sorted(set(pesados))}, 40 leves -> "
+                     f"{sorted(set(s for s, _ in leves))}, leves idênticos: {all(i for _, i in leves)}",
+                     set(pesados) == {422} and all(s == 200 and i for s, i in leves))
+            conferir(f"gunicorn: mesmo worker (pid {pid_inicio} -> {monitor['pid']}), "
+                     f"abortadas {monitor['renderizacao']['abortadas']}",
+                     monitor["pid"] == pid_inicio
+                     and monitor["renderizacao"]["abortadas"].get("procuracao_pf_multiplos") == 20)
+    sys.exit(1 if falhas else 0)
+
+
+if __name__ == "__main__":
+    main()
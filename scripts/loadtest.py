@@ -0,0 +1,301 @@
+"""
+Teste de carga local contra o app rodando em um gunicorn de verdade.
+
+Sobe `gunicorn src.main:app` com diferentes números de workers, dispara
+clientes concorrentes com payloads realistas para todas as rotas de
+documentos e de usuários e grava relatórios CSV/JSON com vazão,
+percentis de latência e taxa de erros por combinação workers x concorrência.
+
+Exemplo:
+    python scripts/loadtest.py --workers 1 2 4 --concorrencia 1 4 16 --duracao 20
+"""
+import argparse
+import csv
+import http.client
+import json
+import os
+import random
+import socket
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(__file__))
+from ambiente import diretorio_temporario, variaveis_isoladas
+from payloads import ROTAS_DOCUMENTOS, payload_documento, payload_usuario
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Peso de cada operação no mix de tráfego (documentos dominam o uso real)
+MIX_PADRAO = {rota: 10 for rota in ROTAS_DOCUMENTOS}
+MIX_PADRAO.update({
+    "get_users": 6,
+    "get_user": 4,
+    "create_user": 2,
+    "update_user": 1,
+    "delete_user": 1,
+    "get_document": 4,
+})
+
+
+def porta_livre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def percentil(valores_ordenados, p):
+    """Percentil por posto mais próximo (valores já ordenados)"""
+    if not valores_ordenados:
+        return 0.0
+    k = max(0, min(len(valores_ordenados) - 1, int(round(p / 100 * len(valores_ordenados) + 0.5)) - 1))
+    return valores_ordenados[k]
+
+
+class ServidorGunicorn:
+    """Sobe e derruba um gunicorn local com banco SQLite temporário"""
+
+    def __init__(self, workers, worker_class="sync", threads=1, timeout=30):
+        self.workers = workers
+        self.worker_class = worker_class
+        self.threads = threads
+        self.timeout = timeout
+        self.porta = porta_livre()
+        self.processo = None
+        self.dir_temp = diretorio_temporario("loadtest_")
+
+    def __enter__(self):
+        env = {**os.environ, **variaveis_isoladas(self.dir_temp)}
+        # Cria as tabelas uma única vez antes de subir os workers
+        subprocess.run([sys.executable, "-c", "import src.main"], cwd=RAIZ, env=env, check=True)
+
+        comando = [
+            sys.executable, "-m", "gunicorn",
+            "--bind", f"127.0.0.1:{self.porta}",
+            "--workers", str(self.workers),
+            "--worker-class", self.worker_class,
+            "--threads", str(self.threads),
+            "--timeout", str(self.timeout),
+            "--log-level", "warning",
+            "src.main:app",
+        ]
+        self.processo = subprocess.Popen(comando, cwd=RAIZ, env=env)
+        self._aguardar_pronto()
+        return self
+
+    def __exit__(self, *exc):
+        self.processo.terminate()
+        try:
+            self.processo.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            self.processo.kill()
+            self.processo.wait()
+        shutil.rmtree(self.dir_temp, ignore_errors=True)
+
+    def _aguardar_pronto(self, limite=30):
+        inicio = time.monotonic()
+        while time.monotonic() - inicio < limite:
+            if self.processo.poll() is not None:
+                raise RuntimeError("gunicorn terminou antes de ficar pronto")
+            try:
+                conn = http.client.HTTPConnection("127.0.0.1", self.porta, timeout=2)
+                conn.request("GET", "/api/users")
+                if conn.getresponse().status == 200:
+                    conn.close()
+                    return
+            except OSError:
+                pass
+            time.sleep(0.2)
+        raise RuntimeError("gunicorn não respondeu dentro do limite")
+
+
+class Cliente:
+    """Cliente HTTP de um único thread que executa operações do mix"""
+
+    def __init__(self, porta, rng, ids_usuarios, hashes_documentos, lock):
+        self.porta = porta
+        self.rng = rng
+        self.ids_usuarios = ids_usuarios
+        self.hashes_documentos = hashes_documentos
+        self.lock = lock
+        self.conn = http.client.HTTPConnection("127.0.0.1", porta, timeout=60)
+
+    def _requisicao(self, metodo, caminho, corpo=None):
+        cabecalhos = {}
+        dados = None
+        if corpo is not None:
+            dados = json.dumps(corpo).encode("utf-8")
+            cabecalhos["Content-Type"] = "application/json"
+        try:
+            self.conn.request(metodo, caminho, body=dados, headers=cabecalhos)
+            resposta = self.conn.getresponse()
+            conteudo = resposta.read()
+            hash_documento = resposta.getheader("X-Documento-Hash")
+            if hash_documento:
+                with self.lock:
+                    self.hashes_documentos.append(hash_documento)
+            return resposta.status, conteudo
+        except (OSError, http.client.HTTPException):
+            self.conn.close()
+            self.conn = http.client.HTTPConnection("127.0.0.1", self.porta, timeout=60)
+            return 0, b""
+
+    def _id_existente(self):
+        with self.lock:
+            return self.rng.choice(self.ids_usuarios) if self.ids_usuarios else None
+
+    def executar(self, operacao):
+        """Executa uma operação e devolve (status, bytes_recebidos)"""
+        if operacao in ROTAS_DOCUMENTOS:
+            status, conteudo = self._requisicao("POST", f"/api/{operacao}", payload_documento(operacao, self.rng))
+            return status, len(conteudo)
+
+        if operacao == "get_document":
+            with self.lock:
+                hash_documento = self.rng.choice(self.hashes_documentos) if self.hashes_documentos else None
+            if hash_documento is None:
+                return self.executar(self.rng.choice(list(ROTAS_DOCUMENTOS)))
+            status, conteudo = self._requisicao("GET", f"/api/documents/{hash_documento}.pdf")
+            return status, len(conteudo)
+
+        if operacao == "get_users":
+            status, conteudo = self._requisicao("GET", "/api/users")
+            return status, len(conteudo)
+
+        if operacao == "create_user":
+            status, conteudo = self._requisicao("POST", "/api/users", payload_usuario())
+            if status == 201:
+                with self.lock:
+                    self.ids_usuarios.append(json.loads(conteudo)["id"])
+            return status, len(conteudo)
+
+        user_id = self._id_existente()
+        if user_id is None:
+            return self.executar("create_user")
+
+        if operacao == "get_user":
+            status, conteudo = self._requisicao("GET", f"/api/users/{user_id}")
+        elif operacao == "update_user":
+            status, conteudo = self._requisicao("PUT", f"/api/users/{user_id}", payload_usuario())
+        else:
+            with self.lock:
+                if user_id in self.ids_usuarios:
+                    self.ids_usuarios.remove(user_id)
+            status, conteudo = self._requisicao("DELETE", f"/api/users/{user_id}")
+        # 404 em get/update/delete é corrida esperada entre clientes
+        if status == 404:
+            status = 200
+        return status, len(conteudo)
+
+
+def rodar_nivel(porta, concorrencia, duracao, mix, semente):
+    """Roda `concorrencia` clientes por `duracao` segundos e devolve as amostras"""
+    operacoes = list(mix)
+    pesos = [mix[op] for op in operacoes]
+    ids_usuarios = []
+    hashes_documentos = []
+    lock = threading.Lock()
+    fim = time.monotonic() + duracao
+
+    def trabalhador(indice):
+        rng = random.Random(semente * 1000 + indice)
+        cliente = Cliente(porta, rng, ids_usuarios, hashes_documentos, lock)
+        amostras = []
+        while time.monotonic() < fim:
+            operacao = rng.choices(operacoes, pesos)[0]
+            inicio = time.perf_counter()
+            status, tamanho = cliente.executar(operacao)
+            amostras.append((operacao, time.perf_counter() - inicio, status, tamanho))
+        cliente.conn.close()
+        return amostras
+
+    inicio = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+        resultados = list(executor.map(trabalhador, range(concorrencia)))
+    decorrido = time.monotonic() - inicio
+    return [amostra for lista in resultados for amostra in lista], decorrido
+
+
+def resumir(amostras, decorrido, workers, concorrencia):
+    """Agrega as amostras por operação e no total"""
+    grupos = defaultdict(list)
+    for amostra in amostras:
+        grupos[amostra[0]].append(amostra)
+        grupos["total"].append(amostra)
+
+    linhas = []
+    for operacao, lista in sorted(grupos.items()):
+        latencias = sorted(a[1] * 1000 for a in lista)
+        erros = sum(1 for a in lista if not 200 <= a[2] < 400)
+        linhas.append({
+            "workers": workers,
+            "concorrencia": concorrencia,
+            "operacao": operacao,
+            "requisicoes": len(lista),
+            "erros": erros,
+            "taxa_erros": round(erros / len(lista), 4),
+            "vazao_rps": round(len(lista) / decorrido, 2),
+            "latencia_media_ms": round(sum(latencias) / len(latencias), 2),
+            "p50_ms": round(percentil(latencias, 50), 2),
+            "p90_ms": round(percentil(latencias, 90), 2),
+            "p95_ms": round(percentil(latencias, 95), 2),
+            "p99_ms": round(percentil(latencias, 99), 2),
+            "max_ms": round(latencias[-1], 2),
+            "bytes_recebidos": sum(a[3] for a in lista),
+        })
+    return linhas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="números de workers do gunicorn")
+    parser.add_argument("--concorrencia", type=int, nargs="+", default=[1, 4, 16], help="clientes simultâneos")
+    parser.add_argument("--duracao", type=float, default=15, help="segundos por nível de concorrência")
+    parser.add_argument("--aquecimento", type=float, default=2, help="segundos de aquecimento por servidor")
+    parser.add_argument("--worker-class", default="sync", help="classe de worker do gunicorn")
+    parser.add_argument("--threads", type=int, default=1, help="threads por worker (gthread)")
+    parser.add_argument("--apenas", nargs="+", choices=sorted(MIX_PADRAO), help="restringe o mix a estas operações")
+    parser.add_argument("--saida", default="loadtest_resultados", help="diretório dos relatórios")
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+
+    mix = {op: peso for op, peso in MIX_PADRAO.items() if not args.apenas or op in args.apenas}
+    os.makedirs(args.saida, exist_ok=True)
+    linhas = []
+
+    for workers in args.workers:
+        with ServidorGunicorn(workers, args.worker_class, args.threads) as servidor:
+            if args.aquecimento:
+                rodar_nivel(servidor.porta, max(args.concorrencia), args.aquecimento, mix, args.semente)
+            for concorrencia in args.concorrencia:
+                amostras, decorrido = rodar_nivel(servidor.porta, concorrencia, args.duracao, mix, args.semente)
+                resumo = resumir(amostras, decorrido, workers, concorrencia)
+                linhas.extend(resumo)
+                total = next(l for l in resumo if l["operacao"] == "total")
+                print(f"workers={workers:<3} concorrencia={concorrencia:<4} "
+                      f"rps={total['vazao_rps']:<8} p50={total['p50_ms']}ms p95={total['p95_ms']}ms "
+                      f"p99={total['p99_ms']}ms erros={total['taxa_erros']:.2%}")
+
+    carimbo = datetime.now().strftime("%Y%m%d_%H%M%S")
+    caminho_csv = os.path.join(args.saida, f"loadtest_{carimbo}.csv")
+    caminho_json = os.path.join(args.saida, f"loadtest_{carimbo}.json")
+    with open(caminho_csv, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(linhas[0]))
+        writer.writeheader()
+        writer.writerows(linhas)
+    with open(caminho_json, "w", encoding="utf-8") as f:
+        json.dump({
+            "parametros": vars(args),
+            "cpus": os.cpu_count(),
+            "resultados": linhas,
+        }, f, ensure_ascii=False, indent=2)
+    print(f"Relatórios gravados em {caminho_csv} e {caminho_json}")
+
+
+if __name__ == "__main__":
+    main()
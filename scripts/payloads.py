@@ -0,0 +1,114 @@
+"""
+Geradores de payloads realistas para as rotas da API.
+
+Usado pelos scripts de carga e de benchmark para exercitar todas as rotas
+de documentos e de usuários com dados no mesmo formato que o frontend envia.
+"""
+import random
+import uuid
+
+NOMES = ["João da Silva", "Maria Aparecida Souza", "José Carlos Pereira", "Ana Luíza Gonçalves",
+         "Antônio Conceição", "Francisca Araújo", "Luís Fernando Brandão", "Cláudia Simões"]
+RAZOES_SOCIAIS = ["Auto Peças São Jorge Ltda", "Revenda de Veículos Paraná S/A",
+                  "Transportadora Irmãos Mânica Ltda", "Despachante Três Fronteiras ME"]
+ENDERECOS = ["Rua das Flores, 123, Centro, Curitiba/PR, CEP 80010-000",
+             "Av. Brasil, 4500, apto 12, Jardim América, São Paulo/SP, CEP 01430-001",
+             "Rua Marechal Deodoro, 77, Santa Maria/RS, CEP 97010-100",
+             "Travessa João Pessoa, 9, Boa Vista, Recife/PE"]
+CIDADES = ["Curitiba/PR", "São Paulo/SP", "Santa Maria/RS", "Recife/PE", "Florianópolis/SC"]
+VEICULOS = ["VW/GOL 1.0 MI", "FIAT/UNO MILLE FIRE", "CHEVROLET/ONIX 1.4 LT", "HONDA/CG 160 FAN",
+            "TOYOTA/COROLLA XEI 2.0", "FORD/KA SE 1.5"]
+CORES = ["Branca", "Prata", "Preta", "Vermelha", "Cinza", "Azul"]
+
+# Rotas de documentos e o tipo de outorgante/outorgados que cada uma espera
+ROTAS_DOCUMENTOS = {
+    "generate_procuracao_pf": ("pf", "unico"),
+    "generate_procuracao_pj": ("pj", "unico"),
+    "generate_procuracao_pf_multiplos": ("pf", "multiplos"),
+    "generate_procuracao_pj_multiplos": ("pj", "multiplos"),
+    "generate_representacao_pf": ("pf", "unico"),
+    "generate_representacao_pj": ("pj", "unico"),
+    "generate_substabelecimento_pf": ("pf", "unico"),
+    "generate_substabelecimento_pj": ("pj", "unico"),
+}
+
+
+def _cpf(rng):
+    d = [rng.randint(0, 9) for _ in range(11)]
+    return f"{d[0]}{d[1]}{d[2]}.{d[3]}{d[4]}{d[5]}.{d[6]}{d[7]}{d[8]}-{d[9]}{d[10]}"
+
+
+def _cnpj(rng):
+    d = "".join(str(rng.randint(0, 9)) for _ in range(14))
+    return f"{d[:2]}.{d[2:5]}.{d[5:8]}/{d[8:12]}-{d[12:]}"
+
+
+def _placa(rng):
+    letras = "".join(rng.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ") for _ in range(3))
+    return f"{letras}{rng.randint(0, 9)}{rng.choice('ABCDEFGHIJ')}{rng.randint(10, 99)}"
+
+
+def _chassi(rng):
+    return "".join(rng.choice("ABCDEFGHJKLMNPRSTUVWXYZ0123456789") for _ in range(17))
+
+
+def _outorgado(rng):
+    return {
+        "nome": rng.choice(NOMES),
+        "nacionalidade": "brasileiro(a)",
+        "cpf": _cpf(rng),
+        "endereco": rng.choice(ENDERECOS),
+    }
+
+
+def payload_documento(rota, rng=None, num_outorgados=3):
+    """Gera um payload válido para uma das rotas generate_*"""
+    rng = rng or random.Random()
+    tipo_outorgante, tipo_outorgados = ROTAS_DOCUMENTOS[rota]
+    ano = rng.randint(2005, 2024)
+
+    payload = {
+        "veiculoPlaca": _placa(rng),
+        "veiculoRenavam": str(rng.randint(10**10, 10**11 - 1)),
+        "veiculoChassi": _chassi(rng),
+        "veiculoCor": rng.choice(CORES),
+        "veiculoAnoModelo": f"{ano}/{ano + 1}",
+        "localEmissao": rng.choice(CIDADES),
+        "dataEmissao": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+    }
+    veiculo = rng.choice(VEICULOS)
+    payload["veiculoNome"] = veiculo
+    payload["veiculoMarcaModelo"] = veiculo
+
+    if tipo_outorgante == "pf":
+        payload.update({
+            "outorganteNome": rng.choice(NOMES),
+            "outorganteNacionalidade": "brasileiro(a)",
+            "outorganteCpf": _cpf(rng),
+            "outorganteEndereco": rng.choice(ENDERECOS),
+        })
+    else:
+        payload.update({
+            "outorganteRazaoSocial": rng.choice(RAZOES_SOCIAIS),
+            "outorganteCnpj": _cnpj(rng),
+            "outorganteEndereco": rng.choice(ENDERECOS),
+        })
+
+    if tipo_outorgados == "multiplos":
+        payload["outorgados"] = [_outorgado(rng) for _ in range(num_outorgados)]
+    else:
+        outorgado = _outorgado(rng)
+        payload.update({
+            "outorgadoNome": outorgado["nome"],
+            "outorgadoNacionalidade": outorgado["nacionalidade"],
+            "outorgadoCpf": outorgado["cpf"],
+            "outorgadoEndereco": outorgado["endereco"],
+        })
+
+    return payload
+
+
+def payload_usuario():
+    """Gera um payload único para POST/PUT /api/users"""
+    sufixo = uuid.uuid4().hex[:12]
+    return {"username": f"usuario_{sufixo}", "email": f"usuario_{sufixo}@exemplo.com.br"}
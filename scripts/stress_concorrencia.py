@@ -0,0 +1,265 @@
+"""
+Teste de estresse de concorrência: requisições misturadas em paralelo contra o app
+em modo multi-thread, com cada PDF conferido byte a byte.
+
+1. Renderiza, em um único thread e no próprio processo, o PDF de referência de um
+   conjunto de casos (todas as rotas generate_*, 1 a 8 outorgados, linearizado ou
+   não, poderes em texto livre e por poderesId de uma cláusula do banco) e a
+   pré-visualização de cada um.
+2. Sobe um gunicorn com workers gthread (ou, com --em-processo, usa threads com o
+   test client do Flask) e dispara clientes simultâneos com um mix de operações:
+   emissão de documentos, pré-visualização, reimpressão pelo hash, CRUD de usuários
+   com nomes repetidos de propósito e edições simultâneas da mesma cláusula.
+3. Confere cada PDF e cada prévia com a referência e exige que nenhuma resposta seja
+   5xx; conflitos de unicidade devem voltar como 409.
+
+Sai com código 1 se houver qualquer divergência ou erro.
+
+Exemplo:
+    python scripts/stress_concorrencia.py --threads 8 --clientes 32 --requisicoes 2000
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import sys
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(__file__))
+from ambiente import isolar_ambiente
+from payloads import ROTAS_DOCUMENTOS, payload_documento
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+CLAUSULA = {
+    "id": "estresse",
+    "nome": "Cláusula do teste de estresse",
+    "texto": "Poderes para transferir o veículo, assinar a ATPV-e e representar o outorgante perante o DETRAN. " * 6,
+}
+
+# Peso de cada operação no mix
+MIX = {
+    "documento": 12,
+    "preview": 4,
+    "reimpressao": 3,
+    "listar_usuarios": 2,
+    "criar_usuario": 3,
+    "atualizar_usuario": 1,
+    "remover_usuario": 1,
+    "editar_clausula": 1,
+}
+
+# Status aceitos por operação (409: corrida de unicidade resolvida; 404: registro já removido)
+STATUS_ACEITOS = {
+    "documento": {200},
+    "preview": {200},
+    "reimpressao": {200},
+    "listar_usuarios": {200},
+    "criar_usuario": {201, 409},
+    "atualizar_usuario": {200, 404, 409},
+    "remover_usuario": {204, 404},
+    "editar_clausula": {200, 409},
+}
+
+
+def casos_documentos(semente):
+    """(url, payload) de cada documento do teste"""
+    rng = random.Random(semente)
+    casos = []
+    for rota, (_, tipo_outorgados) in ROTAS_DOCUMENTOS.items():
+        quantidades = [1, 2, 5, 8] if tipo_outorgados == "multiplos" else [1, 1]
+        for i, quantidade in enumerate(quantidades):
+            payload = payload_documento(rota, rng, quantidade)
+            if i == 1 and not rota.startswith("generate_substabelecimento"):
+                payload["poderesId"] = CLAUSULA["id"]
+                payload["poderesVersao"] = 1
+            for linearizar in ("0", "1"):
+                casos.append((f"/api/{rota}?linearizar={linearizar}", payload))
+    return casos
+
+
+def url_preview(url):
+    rota = url.split("?")[0][len("/api/generate_"):]
+    return f"/api/preview/{rota}"
+
+
+def referencias(casos):
+    """PDFs e prévias renderizados sequencialmente no próprio processo"""
+    from src.main import app
+
+    cliente = app.test_client()
+    cliente.post("/api/clausulas", json=CLAUSULA)
+    pdfs, previas = [], []
+    for url, payload in casos:
+        resposta = cliente.post(url, json=payload)
+        assert resposta.status_code == 200, resposta.data
+        pdfs.append(resposta.data)
+        previas.append(cliente.post(url_preview(url), json=payload).get_json())
+    return pdfs, previas
+
+
+class ClienteHTTP:
+    """Uma conexão HTTP keep-alive com o gunicorn"""
+
+    def __init__(self, porta):
+        self.porta = porta
+        self.conn = http.client.HTTPConnection("127.0.0.1", porta, timeout=60)
+
+    def __call__(self, metodo, url, corpo=None):
+        dados = json.dumps(corpo).encode("utf-8") if corpo is not None else None
+        cabecalhos = {"Content-Type": "application/json"} if corpo is not None else {}
+        try:
+            self.conn.request(metodo, url, body=dados, headers=cabecalhos)
+            resposta = self.conn.getresponse()
+            return resposta.status, resposta.read(), resposta.getheader("X-Documento-Hash")
+        except (OSError, http.client.HTTPException):
+            self.conn.close()
+            self.conn = http.client.HTTPConnection("127.0.0.1", self.porta, timeout=60)
+            return 0, b"", None
+
+    def fechar(self):
+        self.conn.close()
+
+
+class ClienteFlask:
+    """Mesma interface do ClienteHTTP, sobre o test client (um por thread)"""
+
+    def __init__(self, app):
+        self.cliente = app.test_client()
+
+    def __call__(self, metodo, url, corpo=None):
+        resposta = self.cliente.open(url, method=metodo, json=corpo)
+        return resposta.status_code, resposta.data, resposta.headers.get("X-Documento-Hash")
+
+    def fechar(self):
+        pass
+
+
+def executar(requisitar, operacao, rng, casos, pdfs, previas, estado):
+    """Executa uma operação; devolve (operação executada, status, divergência ou None)"""
+    if operacao == "documento":
+        i = rng.randrange(len(casos))
+        status, corpo, hash_documento = requisitar("POST", *casos[i])
+        if status == 200 and corpo != pdfs[i]:
+            return operacao, status, f"PDF divergente: {casos[i][0]} ({len(corpo)} x {len(pdfs[i])} bytes)"
+        if hash_documento:
+            with estado["lock"]:
+                estado["hashes"][hash_documento] = i
+        return operacao, status, None
+
+    if operacao == "preview":
+        i = rng.randrange(len(casos))
+        status, corpo, _ = requisitar("POST", url_preview(casos[i][0]), casos[i][1])
+        if status == 200 and json.loads(corpo) != previas[i]:
+            return operacao, status, f"prévia divergente: {casos[i][0]}"
+        return operacao, status, None
+
+    if operacao == "reimpressao":
+        with estado["lock"]:
+            emitidos = list(estado["hashes"].items())
+        if not emitidos:
+            return executar(requisitar, "documento", rng, casos, pdfs, previas, estado)
+        hash_documento, i = rng.choice(emitidos)
+        status, corpo, _ = requisitar("GET", f"/api/documents/{hash_documento}.pdf")
+        if status == 200 and corpo != pdfs[i]:
+            return operacao, status, f"reimpressão divergente: {hash_documento}"
+        return operacao, status, None
+
+    if operacao == "listar_usuarios":
+        return operacao, requisitar("GET", "/api/users")[0], None
+
+    if operacao == "criar_usuario":
+        # Poucos nomes possíveis: clientes simultâneos colidem no UNIQUE de propósito
+        nome = f"estresse_{rng.randrange(40)}"
+        status, corpo, _ = requisitar("POST", "/api/users", {"username": nome, "email": f"{nome}@exemplo.com.br"})
+        if status == 201:
+            with estado["lock"]:
+                estado["usuarios"].append(json.loads(corpo)["id"])
+        return operacao, status, None
+
+    with estado["lock"]:
+        usuario = rng.choice(estado["usuarios"]) if estado["usuarios"] else None
+    if operacao == "editar_clausula" or usuario is None:
+        operacao = "editar_clausula"
+        texto = f"{CLAUSULA['texto']} Revisão {rng.randrange(10 ** 6)}."
+        return operacao, requisitar("PUT", f"/api/clausulas/{CLAUSULA['id']}", {"texto": texto})[0], None
+    if operacao == "atualizar_usuario":
+        nome = f"estresse_{rng.randrange(40)}"
+        return operacao, requisitar("PUT", f"/api/users/{usuario}", {"username": nome})[0], None
+    return operacao, requisitar("DELETE", f"/api/users/{usuario}")[0], None
+
+
+def disparar(fabrica_cliente, clientes, requisicoes, casos, pdfs, previas, semente):
+    operacoes = list(MIX)
+    pesos = [MIX[op] for op in operacoes]
+    estado = {"lock": threading.Lock(), "hashes": {}, "usuarios": []}
+    por_cliente = -(-requisicoes // clientes)
+
+    def trabalhador(indice):
+        rng = random.Random(semente * 1000 + indice)
+        requisitar = fabrica_cliente()
+        resultados = []
+        for _ in range(por_cliente):
+            operacao = rng.choices(operacoes, pesos)[0]
+            resultados.append(executar(requisitar, operacao, rng, casos, pdfs, previas, estado))
+        requisitar.fechar()
+        return resultados
+
+    with ThreadPoolExecutor(max_workers=clientes) as executor:
+        return [r for lista in executor.map(trabalhador, range(clientes)) for r in lista]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=1, help="workers do gunicorn")
+    parser.add_argument("--threads", type=int, default=8, help="threads por worker gthread")
+    parser.add_argument("--clientes", type=int, default=32, help="clientes simultâneos")
+    parser.add_argument("--requisicoes", type=int, default=2000, help="total de requisições")
+    parser.add_argument("--em-processo", action="store_true", help="threads com o test client, sem gunicorn")
+    parser.add_argument("--semente", type=int, default=7)
+    args = parser.parse_args()
+
+    # Referência e servidor com banco e arquivo temporários (a cláusula do teste é criada nos dois)
+    isolar_ambiente("estresse_")
+
+    casos = casos_documentos(args.semente)
+    pdfs, previas = referencias(casos)
+    print(f"{len(casos)} documentos de referência renderizados em um único thread")
+
+    if args.em_processo:
+        from src.main import app
+
+        resultados = disparar(lambda: ClienteFlask(app), args.clientes, args.requisicoes,
+                              casos, pdfs, previas, args.semente)
+        modo = f"em processo, {args.clientes} threads"
+    else:
+        from loadtest import ServidorGunicorn
+
+        with ServidorGunicorn(args.workers, "gthread", args.threads) as servidor:
+            ClienteHTTP(servidor.porta)("POST", "/api/clausulas", CLAUSULA)
+            resultados = disparar(lambda: ClienteHTTP(servidor.porta), args.clientes, args.requisicoes,
+                                  casos, pdfs, previas, args.semente)
+        modo = f"gunicorn gthread, {args.workers} worker(s) x {args.threads} threads, {args.clientes} clientes"
+
+    print(f"{len(resultados)} requisições ({modo})")
+    contagem = Counter((operacao, status) for operacao, status, _ in resultados)
+    for (operacao, status), quantidade in sorted(contagem.items()):
+        marcador = "" if status in STATUS_ACEITOS[operacao] else "  <-- inesperado"
+        print(f"  {operacao:<18} {status:>3} x {quantidade}{marcador}")
+
+    divergencias = [d for _, _, d in resultados if d]
+    inesperados = sum(q for (op, status), q in contagem.items() if status not in STATUS_ACEITOS[op])
+    for divergencia in divergencias[:20]:
+        print(f"  DIVERGÊNCIA {divergencia}")
+    conferidos = sum(1 for op, status, _ in resultados if op in ("documento", "reimpressao") and status == 200)
+    print(f"{conferidos} PDFs conferidos byte a byte, {len(divergencias)} divergências, "
+          f"{inesperados} respostas inesperadas")
+    sys.exit(1 if divergencias or inesperados else 0)
+
+
+if __name__ == "__main__":
+    main()
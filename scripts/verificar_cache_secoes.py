@@ -0,0 +1,108 @@
+"""
+Verifica o cache de seções: uma edição de um campo só re-quebra a seção que o contém.
+
+Para cada tipo de documento, renderiza o payload base e, em seguida, edições de um
+único campo (cor do veículo, nome do outorgante, também com um caractere que só a
+face de reserva tem, outorgado, local, data, poderes).
+Em cada edição confere que:
+  - só as seções que usam o campo editado faltam no cache (as demais acertam);
+  - o PDF é byte a byte igual ao gerado com o cache desligado.
+Uma lista de outorgados acima de MAX_CARACTERES_SECAO não entra no cache (falta de
+novo na segunda renderização, com os mesmos bytes) e o total em cache fica abaixo
+de MAX_CARACTERES_CACHE.
+Mostra também o tempo de renderização frio (cache vazio) e após a edição.
+Falha (código de saída 1) se alguma verificação não passar.
+
+Exemplo:
+    python scripts/verificar_cache_secoes.py
+"""
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ambiente import isolar_ambiente
+from payloads import ROTAS_DOCUMENTOS, payload_documento
+
+
+def edicoes(rota, payload):
+    """(descrição, payload editado, seções que devem ser quebradas de novo)"""
+    multiplos = "multiplos" in rota
+    pj = ROTAS_DOCUMENTOS[rota][0] == "pj"
+    procuracao = rota.startswith("generate_procuracao")
+    representacao = rota.startswith("generate_representacao")
+    campo_outorgante = "outorganteRazaoSocial" if pj else "outorganteNome"
+
+    yield "veiculoCor", dict(payload, veiculoCor="Azul Metálico"), {"representacao"}
+    yield campo_outorgante, dict(payload, **{campo_outorgante: payload.get(campo_outorgante, "") + " Jr."}), {"outorgante"}
+    # "ễ" não existe na face padrão: sai da face de reserva (services/fonts.py)
+    yield f"{campo_outorgante} (reserva)", dict(payload, **{campo_outorgante: payload.get(campo_outorgante, "")
+                                                           + " Nguyễn"}), {"outorgante"}
+    if multiplos:
+        outorgados = [dict(o) for o in payload["outorgados"]]
+        outorgados[0]["nome"] += " Neto"
+        yield "outorgados[0].nome", dict(payload, outorgados=outorgados), {"outorgados"}
+    else:
+        yield "outorgadoNome", dict(payload, outorgadoNome=payload["outorgadoNome"] + " Neto"), {"outorgados"}
+    yield "localEmissao", dict(payload, localEmissao="Porto Alegre/RS"), {"local_data"}
+    yield "dataEmissao", dict(payload, dataEmissao="2024-12-31"), {"local_data"}
+    poderes = "Poderes específicos para transferir o veículo e assinar a ATPV-e"
+    esperado = {"poderes"} if procuracao else {"representacao"} if representacao else set()
+    yield "poderes", dict(payload, poderes=poderes), esperado
+
+
+def main():
+    isolar_ambiente("verificar_cache_secoes_")
+
+    from src.main import app
+    from src.services.fragmentos import CACHE_FRAGMENTOS, MAX_CARACTERES_CACHE, MAX_CARACTERES_SECAO
+
+    app.config["ARQUIVO_DOCUMENTOS"] = False
+    cliente = app.test_client()
+    rng = random.Random(11)
+    falhas = 0
+
+    def gerar(rota, payload, cache=True):
+        app.config["PDF_CACHE_SECOES"] = cache
+        inicio = time.perf_counter()
+        resposta = cliente.post(f"/api/{rota}", json=payload)
+        return resposta.data, (time.perf_counter() - inicio) * 1000
+
+    for rota in ROTAS_DOCUMENTOS:
+        payload = payload_documento(rota, rng, 3)
+        CACHE_FRAGMENTOS.limpar()
+        _, frio = gerar(rota, payload)
+        tempos = []
+        for descricao, editado, esperado in edicoes(rota, payload):
+            CACHE_FRAGMENTOS.acertos.clear()
+            CACHE_FRAGMENTOS.faltas.clear()
+            pdf, tempo = gerar(rota, editado)
+            tempos.append(tempo)
+            faltas = set(CACHE_FRAGMENTOS.faltas)
+            acertos = set(CACHE_FRAGMENTOS.acertos)
+            referencia, _ = gerar(rota, editado, cache=False)
+            ok = faltas == esperado and pdf == referencia
+            falhas += not ok
+            print(f"{'OK   ' if ok else 'FALHA'} {rota:<34} {descricao:<22} "
+                  f"faltas={sorted(faltas)} acertos={sorted(acertos)}")
+        print(f"      {rota:<34} frio {frio:.1f} ms, após edição p50 {statistics.median(tempos):.1f} ms")
+
+    rota = "generate_procuracao_pf_multiplos"
+    longo = payload_documento(rota, rng, 120)
+    gerar(rota, longo)
+    CACHE_FRAGMENTOS.faltas.clear()
+    pdf, _ = gerar(rota, longo)
+    referencia, _ = gerar(rota, longo, cache=False)
+    ok = "outorgados" in CACHE_FRAGMENTOS.faltas and pdf == referencia \
+        and CACHE_FRAGMENTOS.caracteres <= MAX_CARACTERES_CACHE
+    falhas += not ok
+    print(f"{'OK   ' if ok else 'FALHA'} {rota:<34} {'120 outorgados':<22} faltas={sorted(CACHE_FRAGMENTOS.faltas)} "
+          f"(seção acima de {MAX_CARACTERES_SECAO} caracteres), {CACHE_FRAGMENTOS.caracteres} caracteres em cache")
+    sys.exit(1 if falhas else 0)
+
+
+if __name__ == "__main__":
+    main()
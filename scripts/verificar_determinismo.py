@@ -0,0 +1,42 @@
+"""
+Verifica que payloads idênticos geram PDFs byte a byte idênticos em todas as rotas.
+
+Renderiza cada tipo de documento duas vezes, com um intervalo maior que a
+resolução do carimbo de data do PDF, e falha (código de saída 1) se qualquer
+par divergir.
+
+Exemplo:
+    python scripts/verificar_determinismo.py
+"""
+import hashlib
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ambiente import isolar_ambiente
+from payloads import ROTAS_DOCUMENTOS, payload_documento
+
+
+def main():
+    isolar_ambiente("verificar_determinismo_")
+
+    from src.main import app
+
+    cliente = app.test_client()
+    falhas = 0
+    for rota in ROTAS_DOCUMENTOS:
+        for payload in (payload_documento(rota, random.Random(7)), {"outorganteNome": "Sem data"}):
+            primeiro = cliente.post(f"/api/{rota}", json=payload).data
+            time.sleep(1.1)
+            segundo = cliente.post(f"/api/{rota}", json=payload).data
+            ok = primeiro == segundo
+            falhas += not ok
+            print(f"{'OK   ' if ok else 'FALHA'} {rota:<36} {hashlib.sha256(primeiro).hexdigest()[:16]}")
+    sys.exit(1 if falhas else 0)
+
+
+if __name__ == "__main__":
+    main()
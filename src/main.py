@@ -6,20 +6,109 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 from flask import Flask, send_from_directory
 from flask_cors import CORS
 from src.models.user import db
+from src.services.arquivo import arquivo_documentos
+from src.services.compressao import PERFIS_COMPRESSAO
+from src.services.fila import fila_renderizacao
+from src.services.fonts import REGISTRO_FONTES
+from src.services.json_rapido import ProvedorJSONRapido
+from src.services.versoes import versoes_tabelas
 from src.routes.user import user_bp
 from src.routes.document_generation import document_bp
 from src.routes.document_generation_extra import extra_bp
+from src.routes.document_archive import archive_bp
+from src.routes.document_import import import_bp
+from src.routes.clausulas import clausula_bp
+from src.routes.document_preview import preview_bp
+from src.routes.relatorios import relatorio_bp
+from src.routes.monitoramento import monitoramento_bp
+from src.routes.fila import fila_bp
+from src.routes.veiculos import veiculo_bp
+from src.routes.reemissao import reemissao_bp
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
 app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
-CORS(app)
+# JSON de requisições e respostas pelo orjson (0 volta ao módulo json da biblioteca padrão)
+if os.environ.get('JSON_RAPIDO', '1') != '0':
+    app.json = ProvedorJSONRapido(app)
+# PDFs byte a byte reprodutíveis: data de criação derivada do payload (0 desliga)
+app.config['PDF_DETERMINISTICO'] = os.environ.get('PDF_DETERMINISTICO', '1') != '0'
+# Fontes TTF embutidas (Unicode) no lugar da core Times; analisadas uma vez por processo
+app.config['PDF_FONTE_EMBUTIDA'] = os.environ.get('PDF_FONTE_EMBUTIDA', '1') != '0'
+if app.config['PDF_FONTE_EMBUTIDA']:
+    REGISTRO_FONTES.carregar()
+# Cache das seções já quebradas em linhas (re-renderização só do que mudou)
+app.config['PDF_CACHE_SECOES'] = os.environ.get('PDF_CACHE_SECOES', '1') != '0'
+# PDFs linearizados por padrão nas rotas generate_* (?linearizar=0/1 decide por requisição)
+app.config['PDF_LINEARIZADO'] = os.environ.get('PDF_LINEARIZADO', '0') != '0'
+# Perfil de compressão dos PDFs (rapido, padrao ou compacto; ?compressao= decide por requisição)
+app.config['PDF_COMPRESSAO'] = os.environ.get('PDF_COMPRESSAO', 'padrao')
+if app.config['PDF_COMPRESSAO'] not in PERFIS_COMPRESSAO:
+    raise ValueError(f"PDF_COMPRESSAO deve ser um de {', '.join(PERFIS_COMPRESSAO)}")
+# Prazo por documento renderizado (422 ao esgotar) e custo estimado máximo aceito (422); 0 desliga
+app.config['RENDER_LIMITE_MS'] = int(os.environ.get('RENDER_LIMITE_MS', '3000'))
+app.config['RENDER_CUSTO_MAXIMO_MS'] = int(os.environ.get('RENDER_CUSTO_MAXIMO_MS', '500'))
+# Modo formulário nas rotas generate_*: modelo por tipo preenchido por requisição (?formulario=0/1 decide
+# por requisição); achatado por padrão (?achatar=0 entrega os campos editáveis)
+app.config['PDF_FORMULARIO'] = os.environ.get('PDF_FORMULARIO', '0') != '0'
+app.config['PDF_FORMULARIO_ACHATADO'] = os.environ.get('PDF_FORMULARIO_ACHATADO', '1') != '0'
+# Arquivo endereçado por conteúdo dos PDFs emitidos (reimpressão sem renderizar)
+app.config['ARQUIVO_DOCUMENTOS'] = os.environ.get('ARQUIVO_DOCUMENTOS', '1') != '0'
+app.config['ARQUIVO_DOCUMENTOS_DIR'] = os.environ.get(
+    'ARQUIVO_DOCUMENTOS_DIR',
+    os.path.join(os.path.dirname(__file__), 'database', 'documentos')
+)
+# Os PDFs trazem CPFs e endereços: saem do arquivo depois de ARQUIVO_RETENCAO_DIAS sem acesso
+# (gravação ou download; 0 guarda para sempre) ou quando o total passa de ARQUIVO_MAX_BYTES
+app.config['ARQUIVO_RETENCAO_DIAS'] = float(os.environ.get('ARQUIVO_RETENCAO_DIAS', '90'))
+app.config['ARQUIVO_MAX_BYTES'] = os.environ.get('ARQUIVO_MAX_BYTES')
+arquivo_documentos.init_app(app)
+# Registro das emissões e resumo diário para /api/reports (0 desliga o registro)
+app.config['RELATORIOS_EMISSOES'] = os.environ.get('RELATORIOS_EMISSOES', '1') != '0'
+app.config['RELATORIOS_FUSO'] = os.environ.get('RELATORIOS_FUSO', 'America/Sao_Paulo')
+# Dias em que o payload de cada emissão fica guardado para a reemissão em lote (0 não guarda)
+app.config['REEMISSAO_RETENCAO_DIAS'] = int(os.environ.get('REEMISSAO_RETENCAO_DIAS', '365'))
+# Respostas dos GETs de usuários em cache até a próxima escrita, com ETag/If-None-Match
+app.config['CACHE_RESPOSTAS'] = os.environ.get('CACHE_RESPOSTAS', '1') != '0'
+# Autocompletar de veículos pelo índice em memória do processo (0 consulta o SQLite a cada pedido)
+app.config['CATALOGO_MEMORIA'] = os.environ.get('CATALOGO_MEMORIA', '1') != '0'
+app.config['VERSOES_TABELAS_DIR'] = os.environ.get(
+    'VERSOES_TABELAS_DIR',
+    os.path.join(os.path.dirname(__file__), 'database', 'versoes')
+)
+versoes_tabelas.init_app(app)
+CORS(app, expose_headers=["X-Documento-Hash", "X-Documento-Url", "ETag"])
 app.register_blueprint(user_bp, url_prefix="/api")
 app.register_blueprint(document_bp, url_prefix="/api")
 app.register_blueprint(extra_bp, url_prefix="/api")
+app.register_blueprint(archive_bp, url_prefix="/api")
+app.register_blueprint(import_bp, url_prefix="/api")
+app.register_blueprint(clausula_bp, url_prefix="/api")
+app.register_blueprint(preview_bp, url_prefix="/api")
+app.register_blueprint(relatorio_bp, url_prefix="/api")
+app.register_blueprint(monitoramento_bp, url_prefix="/api")
+app.register_blueprint(fila_bp, url_prefix="/api")
+app.register_blueprint(veiculo_bp, url_prefix="/api")
+app.register_blueprint(reemissao_bp, url_prefix="/api")
 # uncomment if you need to use database
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get(
+    'DATABASE_URL',
+    f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+)
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Fila de renderização durável (banco SQLite próprio), consumida por python -m src.worker neste ou em
+# outros nós que montem o mesmo volume; FILA_RENDER_WAL=0 quando houver workers em outras máquinas
+app.config['FILA_RENDER_DB'] = os.environ.get(
+    'FILA_RENDER_DB',
+    os.path.join(os.path.dirname(__file__), 'database', 'fila.db')
+)
+app.config['FILA_RENDER_WAL'] = os.environ.get('FILA_RENDER_WAL', '1') != '0'
+app.config['FILA_LEASE_S'] = int(os.environ.get('FILA_LEASE_S', '60'))
+app.config['FILA_MAX_TENTATIVAS'] = int(os.environ.get('FILA_MAX_TENTATIVAS', '3'))
+app.config['SQLALCHEMY_BINDS'] = {
+    "fila": {"url": f"sqlite:///{app.config['FILA_RENDER_DB']}", "connect_args": {"timeout": 30}},
+}
 db.init_app(app)
+fila_renderizacao.init_app(app)
 with app.app_context():
     db.create_all()
 
@@ -0,0 +1,55 @@
+from datetime import datetime, timezone
+
+from src.models.user import db
+
+
+def _agora():
+    return datetime.now(timezone.utc)
+
+
+class Clausula(db.Model):
+    """Texto de poderes reutilizável, referenciado nos payloads por poderesId"""
+    id = db.Column(db.String(64), primary_key=True)
+    nome = db.Column(db.String(200), nullable=False)
+    versao_atual = db.Column(db.Integer, nullable=False, default=1)
+    atualizada_em = db.Column(db.DateTime, nullable=False, default=_agora)
+    versoes = db.relationship('ClausulaVersao', backref='clausula', cascade='all, delete-orphan',
+                              order_by='ClausulaVersao.versao')
+
+    def __repr__(self):
+        return f'<Clausula {self.id} v{self.versao_atual}>'
+
+    def texto_atual(self):
+        return self.versoes[-1].texto
+
+    def to_dict(self, com_texto=True):
+        dados = {
+            'id': self.id,
+            'nome': self.nome,
+            'versao': self.versao_atual,
+            'atualizadaEm': self.atualizada_em.isoformat(),
+            'padrao': False,
+        }
+        if com_texto:
+            dados['texto'] = self.texto_atual()
+            dados['versoes'] = [v.versao for v in self.versoes]
+        return dados
+
+
+class ClausulaVersao(db.Model):
+    """Versão imutável do texto de uma cláusula; editar cria uma versão nova"""
+    id = db.Column(db.Integer, primary_key=True)
+    clausula_id = db.Column(db.String(64), db.ForeignKey('clausula.id'), nullable=False, index=True)
+    versao = db.Column(db.Integer, nullable=False)
+    texto = db.Column(db.Text, nullable=False)
+    criada_em = db.Column(db.DateTime, nullable=False, default=_agora)
+
+    __table_args__ = (db.UniqueConstraint('clausula_id', 'versao'),)
+
+    def to_dict(self):
+        return {
+            'id': self.clausula_id,
+            'versao': self.versao,
+            'texto': self.texto,
+            'criadaEm': self.criada_em.isoformat(),
+        }
@@ -0,0 +1,75 @@
+from datetime import datetime, timezone
+
+from src.models.user import db
+
+
+def _agora():
+    return datetime.now(timezone.utc)
+
+
+class Emissao(db.Model):
+    """
+    Um documento emitido, só com as dimensões dos relatórios e da exportação CSV:
+    tipo, quando, cliente, cidade, placa e o hash do PDF. O payload completo não
+    fica aqui: para a reemissão, vai para PayloadEmissao, com retenção.
+    `substituida_por` é o lote da reemissão que gerou o documento que a substitui;
+    uma emissão substituída não entra mais nas reemissões.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    tipo = db.Column(db.String(40), nullable=False)
+    emitido_em = db.Column(db.DateTime, nullable=False, default=_agora, index=True)
+    cliente_documento = db.Column(db.String(32), nullable=False, default="", index=True)
+    cliente_nome = db.Column(db.String(200), nullable=False, default="")
+    cidade = db.Column(db.String(120), nullable=False, default="")
+    placa = db.Column(db.String(40), nullable=False, default="")
+    hash_documento = db.Column(db.String(64))
+    substituida_por = db.Column(db.String(36))
+    partes = db.relationship("EmissaoParte", cascade="all, delete-orphan")
+    payload = db.relationship("PayloadEmissao", uselist=False, cascade="all, delete-orphan")
+
+    def __repr__(self):
+        return f'<Emissao {self.id} {self.tipo}>'
+
+
+class EmissaoParte(db.Model):
+    """
+    CPF/CNPJ (só dígitos) de cada parte citada numa emissão: o outorgante e cada
+    outorgado. Índice para achar, sem abrir os payloads, os documentos de uma
+    parte (reemissão depois de uma mudança de dados).
+    """
+    emissao_id = db.Column(db.Integer, db.ForeignKey("emissao.id"), primary_key=True)
+    papel = db.Column(db.String(12), primary_key=True)
+    documento = db.Column(db.String(32), primary_key=True, index=True)
+
+    def __repr__(self):
+        return f'<EmissaoParte {self.emissao_id} {self.papel}={self.documento}>'
+
+
+class PayloadEmissao(db.Model):
+    """
+    Payload de uma emissão, guardado só para a reemissão e só até `expira_em`
+    (REEMISSAO_RETENCAO_DIAS depois da emissão). Vencido, sai das reemissões e é
+    apagado pelo worker da fila (services/reemissao.py, expurgar_payloads).
+    """
+    emissao_id = db.Column(db.Integer, db.ForeignKey("emissao.id"), primary_key=True)
+    dados = db.Column(db.Text, nullable=False)
+    expira_em = db.Column(db.DateTime, nullable=False, index=True)
+
+    def __repr__(self):
+        return f'<PayloadEmissao {self.emissao_id} até {self.expira_em}>'
+
+
+class ResumoEmissoes(db.Model):
+    """
+    Contagem diária de emissões por dimensão ("total", "tipo", "cliente", "cidade")
+    e valor, incrementada a cada emissão. Os relatórios somam estas linhas em vez de
+    percorrer as emissões.
+    """
+    dia = db.Column(db.Date, primary_key=True)
+    dimensao = db.Column(db.String(16), primary_key=True)
+    valor = db.Column(db.String(200), primary_key=True)
+    rotulo = db.Column(db.String(200), nullable=False, default="")
+    quantidade = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<ResumoEmissoes {self.dia} {self.dimensao}={self.valor}: {self.quantidade}>'
@@ -0,0 +1,52 @@
+from datetime import datetime, timezone
+
+from src.models.user import db
+
+
+def _agora():
+    return datetime.now(timezone.utc)
+
+
+class TarefaRenderizacao(db.Model):
+    """
+    Um documento na fila de renderização (banco da fila, bind "fila"). `dono` e
+    `lease_ate` identificam o worker que reservou a tarefa e até quando; uma
+    reserva vencida volta a ser reservável. O índice de `estado` guarda as linhas na
+    ordem do id, então a reserva da mais antiga não ordena as pendentes. Numa
+    reemissão, `substitui` (lista JSON) traz as emissões que o documento substitui.
+    """
+    __bind_key__ = "fila"
+
+    id = db.Column(db.Integer, primary_key=True)
+    lote = db.Column(db.String(36), index=True)
+    tipo = db.Column(db.String(40), nullable=False)
+    dados = db.Column(db.Text, nullable=False)
+    substitui = db.Column(db.Text)
+    estado = db.Column(db.String(12), nullable=False, default="pendente", index=True)
+    tentativas = db.Column(db.Integer, nullable=False, default=0)
+    criado_em = db.Column(db.DateTime, nullable=False, default=_agora)
+    disponivel_em = db.Column(db.DateTime, nullable=False, default=_agora)
+    dono = db.Column(db.String(120))
+    lease_ate = db.Column(db.DateTime)
+    concluido_em = db.Column(db.DateTime)
+    hash_documento = db.Column(db.String(64))
+    erro = db.Column(db.Text)
+
+    def __repr__(self):
+        return f'<TarefaRenderizacao {self.id} {self.tipo} {self.estado}>'
+
+    def to_dict(self):
+        resultado = {
+            'id': self.id,
+            'lote': self.lote,
+            'tipo': self.tipo,
+            'estado': self.estado,
+            'tentativas': self.tentativas,
+            'criadoEm': self.criado_em.isoformat() if self.criado_em else None,
+            'concluidoEm': self.concluido_em.isoformat() if self.concluido_em else None,
+            'erro': self.erro,
+        }
+        if self.hash_documento:
+            resultado['hash'] = self.hash_documento
+            resultado['documentoUrl'] = f"/api/documents/{self.hash_documento}.pdf"
+        return resultado
@@ -0,0 +1,52 @@
+import json
+from datetime import datetime, timezone
+
+from src.models.user import db
+
+
+def _agora():
+    return datetime.now(timezone.utc)
+
+
+class Reemissao(db.Model):
+    """
+    Uma reemissão em lote: a parte (CPF/CNPJ), as alterações aplicadas e o que foi
+    enfileirado. `lote` é o mesmo das tarefas na fila de renderização; `origens` é a
+    lista, na ordem das tarefas do lote, dos ids das emissões que cada documento
+    substitui (mais de um quando os payloads alterados ficaram iguais).
+
+    Fica no banco da fila (bind "fila"), junto com as tarefas: o registro e as
+    tarefas entram na mesma transação. `em_andamento` marca a reemissão ativa da
+    parte; o índice único parcial sobre `documento` impede duas ao mesmo tempo.
+    """
+    __bind_key__ = "fila"
+
+    lote = db.Column(db.String(36), primary_key=True)
+    documento = db.Column(db.String(32), nullable=False, index=True)
+    alteracoes = db.Column(db.Text, nullable=False)
+    criado_em = db.Column(db.DateTime, nullable=False, default=_agora)
+    encontradas = db.Column(db.Integer, nullable=False, default=0)
+    documentos = db.Column(db.Integer, nullable=False, default=0)
+    ignoradas = db.Column(db.Text, nullable=False, default="[]")
+    origens = db.Column(db.Text, nullable=False, default="[]")
+    em_andamento = db.Column(db.Boolean, nullable=False, default=True)
+
+    __table_args__ = (
+        db.Index("ix_reemissao_ativa", "documento", unique=True, sqlite_where=em_andamento.is_(True)),
+    )
+
+    def __repr__(self):
+        return f'<Reemissao {self.lote} {self.documento}>'
+
+    def to_dict(self):
+        ignoradas = json.loads(self.ignoradas)
+        return {
+            'lote': self.lote,
+            'documento': self.documento,
+            'alteracoes': json.loads(self.alteracoes),
+            'criadoEm': self.criado_em.isoformat() if self.criado_em else None,
+            'encontradas': self.encontradas,
+            'documentos': self.documentos,
+            'duplicadas': self.encontradas - self.documentos - len(ignoradas),
+            'ignoradas': ignoradas,
+        }
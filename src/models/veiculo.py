@@ -0,0 +1,45 @@
+import logging
+
+from sqlalchemy import DDL, event
+from sqlalchemy.exc import OperationalError
+
+from src.models.user import db
+
+logger = logging.getLogger(__name__)
+
+
+class Veiculo(db.Model):
+    """
+    Item do catálogo de veículos (marca/modelo) para o autocompletar. `chave` é o
+    nome normalizado (sem acentos, maiúsculo, separadores como espaço); o índice
+    dela atende as buscas por prefixo e a tabela FTS5 veiculo_trigramas, as buscas
+    por trecho.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    marca = db.Column(db.String(60), nullable=False)
+    modelo = db.Column(db.String(120), nullable=False)
+    nome = db.Column(db.String(181), nullable=False)
+    chave = db.Column(db.String(181), nullable=False, unique=True)
+
+    def __repr__(self):
+        return f'<Veiculo {self.nome}>'
+
+    def to_dict(self):
+        return {'id': self.id, 'marca': self.marca, 'modelo': self.modelo, 'marcaModelo': self.nome}
+
+
+# Índice de trigramas sobre veiculo.chave (conteúdo externo: o texto fica só na
+# tabela veiculo). Reconstruído a cada importação do catálogo. Só no SQLite: em
+# outros bancos (DATABASE_URL) as buscas por trecho percorrem a tabela.
+TRIGRAMAS = DDL(
+    "CREATE VIRTUAL TABLE IF NOT EXISTS veiculo_trigramas "
+    "USING fts5(chave, content='veiculo', content_rowid='id', tokenize='trigram')"
+).execute_if(dialect="sqlite")
+
+
+@event.listens_for(Veiculo.__table__, "after_create")
+def criar_trigramas(tabela, conexao, **kw):
+    try:
+        TRIGRAMAS(tabela, conexao, **kw)
+    except OperationalError as exc:  # SQLite sem FTS5: as buscas por trecho percorrem a tabela
+        logger.warning("Índice de trigramas do catálogo indisponível: %s", exc)
@@ -0,0 +1,160 @@
+import re
+import uuid
+from datetime import datetime, timezone
+
+from flask import Blueprint, jsonify, request
+from fpdf.errors import FPDFUnicodeEncodingException
+from sqlalchemy.exc import IntegrityError
+
+from src.models.clausula import Clausula, ClausulaVersao
+from src.models.user import db
+from src.services.clausulas import BIBLIOTECA_CLAUSULAS, ClausulaNaoEncontrada, ClausulaResolvida
+from src.services.schemas import MAX_ID_CLAUSULA, MAX_NOME, MAX_PODERES, Texto, compilar, resposta_invalida
+
+clausula_bp = Blueprint('clausulas', __name__)
+
+ID_VALIDO = re.compile(rf'^[a-z0-9][a-z0-9_-]{{0,{MAX_ID_CLAUSULA - 1}}}$')
+
+validar_clausula = compilar({
+    "id": Texto(MAX_ID_CLAUSULA),
+    "nome": Texto(MAX_NOME),
+    "texto": Texto(MAX_PODERES),
+})
+
+
+@clausula_bp.app_errorhandler(ClausulaNaoEncontrada)
+def clausula_nao_encontrada(erro):
+    return resposta_invalida([{"campo": "poderesId", "mensagem": f"cláusula não encontrada: {erro.args[0]}"}])
+
+
+def padrao_to_dict(nome, clausula, com_texto=True):
+    dados = {'id': clausula.id, 'nome': nome, 'versao': clausula.versao, 'padrao': True}
+    if com_texto:
+        dados['texto'] = clausula.texto
+        dados['versoes'] = [clausula.versao]
+    return dados
+
+
+def ler_corpo(obrigatorios):
+    """JSON do corpo validado; devolve (dados, None) ou (None, resposta 422)"""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return None, resposta_invalida([{"campo": "$", "mensagem": "corpo deve ser um objeto JSON"}])
+    erros = validar_clausula(data)
+    erros += [{"campo": campo, "mensagem": "obrigatório"} for campo in obrigatorios if not data.get(campo)]
+    if erros:
+        return None, resposta_invalida(erros)
+    return data, None
+
+
+def preparar_layout(clausula_id, versao, texto):
+    """Quebra o texto em linhas já ao salvar; texto que a fonte não suporta é recusado"""
+    try:
+        BIBLIOTECA_CLAUSULAS.preparar(ClausulaResolvida(clausula_id, versao, texto))
+    except FPDFUnicodeEncodingException as erro:
+        return resposta_invalida([{"campo": "texto", "mensagem": str(erro)}])
+    return None
+
+
+def salvar(clausula, mensagem_conflito):
+    """
+    Grava a sessão e devolve (clausula.to_dict(), None) ou (None, resposta 409).
+    Duas requisições simultâneas podem passar juntas pela checagem de id livre (POST)
+    ou calcular a mesma versão nova (PUT): o UNIQUE do banco decide qual fica, e a
+    outra recebe o conflito. O dicionário é montado antes do commit, que expira o objeto.
+    """
+    try:
+        db.session.flush()
+        dados = clausula.to_dict()
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return None, (jsonify({"erro": mensagem_conflito}), 409)
+    return dados, None
+
+
+@clausula_bp.route('/clausulas', methods=['GET'])
+def listar_clausulas():
+    padroes = [padrao_to_dict(nome, c, com_texto=False) for nome, c in BIBLIOTECA_CLAUSULAS.padroes.values()]
+    clausulas = Clausula.query.order_by(Clausula.id).all()
+    return jsonify(padroes + [c.to_dict(com_texto=False) for c in clausulas])
+
+
+@clausula_bp.route('/clausulas', methods=['POST'])
+def criar_clausula():
+    data, erro = ler_corpo(("nome", "texto"))
+    if erro:
+        return erro
+    clausula_id = data.get("id") or uuid.uuid4().hex[:12]
+    if not ID_VALIDO.match(clausula_id):
+        return resposta_invalida([{"campo": "id", "mensagem": "use letras minúsculas, números, '-' ou '_'"}])
+    if clausula_id in BIBLIOTECA_CLAUSULAS.padroes or db.session.get(Clausula, clausula_id):
+        return jsonify({"erro": f"Cláusula já existe: {clausula_id}"}), 409
+    erro = preparar_layout(clausula_id, 1, data["texto"])
+    if erro:
+        return erro
+
+    clausula = Clausula(id=clausula_id, nome=data["nome"], versao_atual=1)
+    clausula.versoes.append(ClausulaVersao(versao=1, texto=data["texto"]))
+    db.session.add(clausula)
+    dados, erro = salvar(clausula, f"Cláusula já existe: {clausula_id}")
+    if erro:
+        return erro
+    return jsonify(dados), 201
+
+
+@clausula_bp.route('/clausulas/<string:clausula_id>', methods=['GET'])
+def obter_clausula(clausula_id):
+    if clausula_id in BIBLIOTECA_CLAUSULAS.padroes:
+        return jsonify(padrao_to_dict(*BIBLIOTECA_CLAUSULAS.padroes[clausula_id]))
+    clausula = Clausula.query.get_or_404(clausula_id)
+    return jsonify(clausula.to_dict())
+
+
+@clausula_bp.route('/clausulas/<string:clausula_id>/versoes/<int:versao>', methods=['GET'])
+def obter_versao(clausula_id, versao):
+    if clausula_id in BIBLIOTECA_CLAUSULAS.padroes:
+        _, padrao = BIBLIOTECA_CLAUSULAS.padroes[clausula_id]
+        if versao != padrao.versao:
+            return jsonify({"erro": "Versão não encontrada"}), 404
+        return jsonify({'id': padrao.id, 'versao': padrao.versao, 'texto': padrao.texto})
+    registro = ClausulaVersao.query.filter_by(clausula_id=clausula_id, versao=versao).first_or_404()
+    return jsonify(registro.to_dict())
+
+
+@clausula_bp.route('/clausulas/<string:clausula_id>', methods=['PUT'])
+def atualizar_clausula(clausula_id):
+    """Renomeia e/ou cria uma nova versão do texto; as versões anteriores continuam acessíveis"""
+    if clausula_id in BIBLIOTECA_CLAUSULAS.padroes:
+        return jsonify({"erro": "Cláusulas padrão não podem ser alteradas"}), 409
+    clausula = Clausula.query.get_or_404(clausula_id)
+    data, erro = ler_corpo(())
+    if erro:
+        return erro
+
+    clausula.nome = data.get("nome") or clausula.nome
+    texto = data.get("texto")
+    if texto and texto != clausula.texto_atual():
+        nova_versao = clausula.versao_atual + 1
+        BIBLIOTECA_CLAUSULAS.invalidar(clausula_id)
+        erro = preparar_layout(clausula_id, nova_versao, texto)
+        if erro:
+            return erro
+        clausula.versoes.append(ClausulaVersao(versao=nova_versao, texto=texto))
+        clausula.versao_atual = nova_versao
+    clausula.atualizada_em = datetime.now(timezone.utc)
+    dados, erro = salvar(clausula, f"Cláusula alterada por outra requisição: {clausula_id}; tente novamente")
+    if erro:
+        return erro
+    return jsonify(dados)
+
+
+@clausula_bp.route('/clausulas/<string:clausula_id>', methods=['DELETE'])
+def remover_clausula(clausula_id):
+    if clausula_id in BIBLIOTECA_CLAUSULAS.padroes:
+        return jsonify({"erro": "Cláusulas padrão não podem ser removidas"}), 409
+    clausula = Clausula.query.get_or_404(clausula_id)
+    db.session.delete(clausula)
+    db.session.commit()
+    BIBLIOTECA_CLAUSULAS.invalidar(clausula_id)
+    return '', 204
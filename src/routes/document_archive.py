@@ -0,0 +1,34 @@
+from flask import Blueprint, abort, send_file
+
+from src.services.arquivo import arquivo_documentos
+
+archive_bp = Blueprint('document_archive', __name__)
+
+
+@archive_bp.route('/documents/<string:hash_documento>.pdf', methods=['GET'])
+def get_documento(hash_documento):
+    """
+    Reimpressão de um PDF já emitido, lido do arquivo local pelo SHA-256.
+    Suporta Range e requisições condicionais (If-None-Match / If-Modified-Since /
+    If-Range), com o Last-Modified da primeira gravação; sob o gunicorn o corpo sai
+    via sendfile, sem passar pelo Python. Responde 404 depois que a retenção do
+    arquivo (ARQUIVO_RETENCAO_DIAS sem acesso, ARQUIVO_MAX_BYTES) remove o PDF.
+    """
+    caminho = arquivo_documentos.localizar(hash_documento)
+    if caminho is None:
+        abort(404)
+    # Renova o último acesso usado pela retenção; o Last-Modified (mtime) não muda
+    if not arquivo_documentos.registrar_acesso(caminho):
+        # Removido pela retenção em outro thread depois do localizar
+        abort(404)
+    resposta = send_file(
+        caminho,
+        mimetype="application/pdf",
+        download_name=f"{hash_documento}.pdf",
+        conditional=True,
+        etag=hash_documento,
+        max_age=31536000,
+    )
+    # O conteúdo de um hash nunca muda
+    resposta.cache_control.immutable = True
+    return resposta
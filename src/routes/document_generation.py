@@ -1,8 +1,21 @@
-from flask import Blueprint, request, send_file
-from fpdf import FPDF
-import io
-from datetime import datetime
-import re
+from flask import Blueprint, request
+
+from src.services.clausulas import BIBLIOTECA_CLAUSULAS, escrever_poderes
+from src.services.formularios import formulario_rapido
+from src.services.fragmentos import assinatura_secao, escrever_secao
+from src.services.pdf import criar_pdf, responder_pdf
+from src.services.schemas import payload_validado
+from src.services.textos import (
+    ROTULO_OUTORGADOS,
+    ROTULO_OUTORGANTE,
+    ROTULO_REPRESENTACAO,
+    textos_procuracao_pf,
+    textos_procuracao_pf_multiplos,
+    textos_procuracao_pj,
+)
+from src.services.vigia import renderizacao_vigiada
+# Manter compatibilidade com código que importava remover_cep daqui
+from src.services.textos import remover_cep
 
 document_bp = Blueprint('document_generation', __name__)
 
@@ -35,344 +48,217 @@ PODERES_SUBSTABELECIMENTO = ("O procurador fica substabelecido com todos os pode
 # Manter compatibilidade com código antigo
 PODERES_PADRAO = PODERES_PROCURACAO
 
+# Textos padrão também disponíveis na biblioteca de cláusulas (poderesId)
+BIBLIOTECA_CLAUSULAS.registrar_padrao("procuracao", "Poderes de procuração geral", PODERES_PROCURACAO)
+BIBLIOTECA_CLAUSULAS.registrar_padrao("representacao", "Poderes de representação na compra", PODERES_REPRESENTACAO)
+BIBLIOTECA_CLAUSULAS.registrar_padrao("substabelecimento", "Poderes de substabelecimento", PODERES_SUBSTABELECIMENTO)
+
 # Manter compatibilidade com nome antigo
 document_generation_bp = document_bp
 
-def remover_cep(endereco):
-    """Remove CEP do endereço"""
-    # Remove padrões como "CEP 12345-678" ou ", CEP 12345-678"
-    endereco = re.sub(r',?\s*CEP\s*\d{5}-?\d{3}\.?', '', endereco, flags=re.IGNORECASE)
-    # Remove vírgula dupla que pode ter sobrado
-    endereco = re.sub(r',\s*,', ',', endereco)
-    # Remove vírgula no final
-    endereco = re.sub(r',\s*$', '', endereco)
-    return endereco.strip()
-
 @document_bp.route('/generate_procuracao_pf', methods=['POST'])
+@payload_validado("procuracao_pf")
+@renderizacao_vigiada("procuracao_pf")
+@formulario_rapido("procuracao_pf")
 def generate_procuracao_pf():
     """
     Gera uma procuração para Pessoa Física (Um Outorgado) em formato PDF
     """
     data = request.get_json()
-    
-    # Extrair dados do JSON
-    outorgante_nome = data.get("outorganteNome", "")
-    outorgante_nacionalidade = data.get("outorganteNacionalidade", "")
-    outorgante_cpf = data.get("outorganteCpf", "")
-    outorgante_endereco = remover_cep(data.get("outorganteEndereco", ""))
-    
-    outorgado_nome = data.get("outorgadoNome", "")
-    outorgado_nacionalidade = data.get("outorgadoNacionalidade", "")
-    outorgado_cpf = data.get("outorgadoCpf", "")
-    outorgado_endereco = remover_cep(data.get("outorgadoEndereco", ""))
-    
-    veiculo_placa = data.get("veiculoPlaca", "")
-    veiculo_renavam = data.get("veiculoRenavam", "")
-    veiculo_chassi = data.get("veiculoChassi", "")
-    veiculo_marca_modelo = data.get("veiculoMarcaModelo", "")
-    veiculo_cor = data.get("veiculoCor", "")
-    
-    local_emissao = data.get("localEmissao", "")
-    data_emissao = data.get("dataEmissao", "")
-    
-    # Converter data do formato YYYY-MM-DD (ISO) para DD/MM/YYYY (brasileiro)
-    if data_emissao:
-        try:
-            data_obj = datetime.strptime(data_emissao, "%Y-%m-%d")
-            data_emissao = data_obj.strftime("%d/%m/%Y")
-        except ValueError:
-            pass
-    
-    poderes = data.get("poderes", PODERES_PADRAO)
+    pdf = montar_procuracao_pf(data)
+    return responder_pdf(pdf, "procuracao_pf.pdf", "procuracao_pf", data)
+
+
+def montar_procuracao_pf(data):
+    """
+    Monta uma procuração para Pessoa Física (Um Outorgado) a partir do payload
+    """
+    textos = textos_procuracao_pf(data)
 
     # Criar PDF com configurações profissionais
-    pdf = FPDF()
+    pdf = criar_pdf(data)
     pdf.add_page()
     pdf.set_margins(20, 20, 20)
     pdf.set_auto_page_break(auto=True, margin=20)
+    pdf.titulo_continuacao = textos.titulo
 
     # Título: PROCURAÇÃO (Times New Roman, 16, Negrito, Centralizado)
     pdf.set_font("Times", "B", 16)
-    pdf.cell(0, 10, "PROCURAÇÃO", align="C", new_x="LMARGIN", new_y="NEXT")
+    pdf.cell(0, 10, textos.titulo, align="C", new_x="LMARGIN", new_y="NEXT")
     pdf.ln(5)
 
     # OUTORGANTE - NEGRITO inline + JUSTIFICADO
     pdf.set_font("Times", "B", 12)
-    pdf.write(5, "OUTORGANTE: ")
+    escrever_secao(pdf, 5, ROTULO_OUTORGANTE, "rotulo")
     pdf.set_font("Times", "", 12)
-    pdf.write(5, f"{outorgante_nome}, {outorgante_nacionalidade}, maior, inscrito sob o CPF: {outorgante_cpf}, residente e domiciliado em {outorgante_endereco}.")
+    escrever_secao(pdf, 5, textos.outorgante, "outorgante")
     pdf.ln(8)
 
     # NOMEIO E CONSTITUO MEU BASTANTE PROCURADOR
     pdf.set_font("Times", "B", 12)
-    pdf.cell(0, 5, "NOMEIO E CONSTITUO MEU BASTANTE PROCURADOR", align="C", new_x="LMARGIN", new_y="NEXT")
+    pdf.cell(0, 5, textos.nomeacao, align="C", new_x="LMARGIN", new_y="NEXT")
     pdf.ln(5)
 
     # OUTORGADOS - NEGRITO inline + JUSTIFICADO
     pdf.set_font("Times", "B", 12)
-    pdf.write(5, "OUTORGADOS: ")
+    escrever_secao(pdf, 5, ROTULO_OUTORGADOS, "rotulo")
     pdf.set_font("Times", "", 12)
-    pdf.write(5, f"{outorgado_nome}, {outorgado_nacionalidade}, maior, inscrito sob o CPF: {outorgado_cpf}, residente e domiciliado em {outorgado_endereco}.")
+    escrever_secao(pdf, 5, textos.outorgados, "outorgados")
     pdf.ln(8)
 
     # REPRESENTAÇÃO - NEGRITO inline + JUSTIFICADO
     pdf.set_font("Times", "B", 12)
-    pdf.write(5, "REPRESENTAÇÃO: ")
+    escrever_secao(pdf, 5, ROTULO_REPRESENTACAO, "rotulo")
     pdf.set_font("Times", "", 12)
-    pdf.write(5, f"para fim especial, podendo vender para si e/ou para terceiros um {veiculo_marca_modelo}, Placa: {veiculo_placa}, RENAVAM: {veiculo_renavam}, CHASSI: {veiculo_chassi}, cor {veiculo_cor}.")
+    escrever_secao(pdf, 5, textos.representacao, "representacao")
     pdf.ln(8)
 
     # PODERES - JUSTIFICADO
     pdf.set_font("Times", "", 12)
-    pdf.multi_cell(0, 5, poderes, align="J")
+    escrever_poderes(pdf, textos.poderes)
     pdf.ln(5)
 
-    # LOCAL E DATA - JUSTIFICADO
-    pdf.set_font("Times", "", 12)
-    pdf.multi_cell(0, 5, f"{local_emissao}, {data_emissao}.", align="J")
-    pdf.ln(15)  # Espaço maior para assinatura
-
-    # Linha horizontal para assinatura
-    pdf.set_line_width(0.5)
-    x_start = 60
-    x_end = 150
-    y_line = pdf.get_y()
-    pdf.line(x_start, y_line, x_end, y_line)
-    
-    # Texto abaixo da linha: "Assinatura do Outorgante"
-    pdf.ln(2)
-    pdf.set_font("Times", "", 10)
-    pdf.cell(0, 5, "Assinatura do Outorgante", align="C", new_x="LMARGIN", new_y="NEXT")
-
-    # Salvar o PDF em um buffer de memória
-    pdf_output = pdf.output(dest="S")
-    return send_file(
-        io.BytesIO(pdf_output),
-        mimetype="application/pdf",
-        as_attachment=True,
-        download_name="procuracao_pf.pdf"
-    )
+    # LOCAL E DATA + ASSINATURA - sempre na mesma página
+    assinatura_secao(pdf, textos.local_data, textos.assinatura, 15)
+
+    return pdf
 
 
 @document_bp.route('/generate_procuracao_pj', methods=['POST'])
+@payload_validado("procuracao_pj")
+@renderizacao_vigiada("procuracao_pj")
+@formulario_rapido("procuracao_pj")
 def generate_procuracao_pj():
     """
     Gera uma procuração para Pessoa Jurídica (Um Outorgado) em formato PDF
     """
     data = request.get_json()
-    
-    # Extrair dados do OUTORGANTE (Pessoa Jurídica)
-    outorgante_razao_social = data.get("outorganteRazaoSocial", "")
-    outorgante_cnpj = data.get("outorganteCnpj", "")
-    outorgante_endereco = remover_cep(data.get("outorganteEndereco", ""))
-    
-    # Extrair dados do OUTORGADO (Pessoa Física)
-    outorgado_nome = data.get("outorgadoNome", "")
-    outorgado_nacionalidade = data.get("outorgadoNacionalidade", "")
-    outorgado_cpf = data.get("outorgadoCpf", "")
-    outorgado_endereco = remover_cep(data.get("outorgadoEndereco", ""))
-    
-    # Extrair dados do VEÍCULO
-    veiculo_nome = data.get("veiculoNome", "")
-    veiculo_placa = data.get("veiculoPlaca", "")
-    veiculo_renavam = data.get("veiculoRenavam", "")
-    veiculo_chassi = data.get("veiculoChassi", "")
-    veiculo_ano_modelo = data.get("veiculoAnoModelo", "")
-    veiculo_cor = data.get("veiculoCor", "")
-    
-    local_emissao = data.get("localEmissao", "")
-    data_emissao = data.get("dataEmissao", "")
-    
-    # Converter data
-    if data_emissao:
-        try:
-            data_obj = datetime.strptime(data_emissao, "%Y-%m-%d")
-            data_emissao = data_obj.strftime("%d/%m/%Y")
-        except ValueError:
-            pass
-    
-    poderes = data.get("poderes", PODERES_PROCURACAO)
+    pdf = montar_procuracao_pj(data)
+    return responder_pdf(pdf, "procuracao_pj.pdf", "procuracao_pj", data)
+
+
+def montar_procuracao_pj(data):
+    """
+    Monta uma procuração para Pessoa Jurídica (Um Outorgado) a partir do payload
+    """
+    textos = textos_procuracao_pj(data)
 
     # Criar PDF
-    pdf = FPDF()
+    pdf = criar_pdf(data)
     pdf.add_page()
     pdf.set_margins(20, 20, 20)
     pdf.set_auto_page_break(auto=True, margin=20)
+    pdf.titulo_continuacao = textos.titulo
 
     # Título
     pdf.set_font("Times", "B", 16)
-    pdf.cell(0, 10, "PROCURAÇÃO", align="C", new_x="LMARGIN", new_y="NEXT")
+    pdf.cell(0, 10, textos.titulo, align="C", new_x="LMARGIN", new_y="NEXT")
     pdf.ln(5)
 
     # OUTORGANTE (Pessoa Jurídica) - NEGRITO inline + JUSTIFICADO
     pdf.set_font("Times", "B", 12)
-    pdf.write(5, "OUTORGANTE: ")
+    escrever_secao(pdf, 5, ROTULO_OUTORGANTE, "rotulo")
     pdf.set_font("Times", "", 12)
-    pdf.write(5, f"{outorgante_razao_social}, inscrito sob o CNPJ: {outorgante_cnpj}, estabelecida em {outorgante_endereco}.")
+    escrever_secao(pdf, 5, textos.outorgante, "outorgante")
     pdf.ln(8)
 
     # NOMEIO E CONSTITUO
     pdf.set_font("Times", "B", 12)
-    pdf.cell(0, 5, "NOMEIO E CONSTITUO MEU BASTANTE PROCURADOR", align="C", new_x="LMARGIN", new_y="NEXT")
+    pdf.cell(0, 5, textos.nomeacao, align="C", new_x="LMARGIN", new_y="NEXT")
     pdf.ln(5)
 
     # OUTORGADOS - NEGRITO inline + JUSTIFICADO
     pdf.set_font("Times", "B", 12)
-    pdf.write(5, "OUTORGADOS: ")
+    escrever_secao(pdf, 5, ROTULO_OUTORGADOS, "rotulo")
     pdf.set_font("Times", "", 12)
-    pdf.write(5, f"{outorgado_nome}, {outorgado_nacionalidade}, maior, inscrito sob o CPF: {outorgado_cpf}, residente e domiciliado em {outorgado_endereco}.")
+    escrever_secao(pdf, 5, textos.outorgados, "outorgados")
     pdf.ln(8)
 
     # REPRESENTAÇÃO - NEGRITO inline + JUSTIFICADO
     pdf.set_font("Times", "B", 12)
-    pdf.write(5, "REPRESENTAÇÃO: ")
+    escrever_secao(pdf, 5, ROTULO_REPRESENTACAO, "rotulo")
     pdf.set_font("Times", "", 12)
-    pdf.write(5, f"para fim especial, podendo vender para si e/ou para terceiros um {veiculo_nome}, Placa: {veiculo_placa}, RENAVAM: {veiculo_renavam}, CHASSI: {veiculo_chassi}, ANO/MODELO {veiculo_ano_modelo}, cor {veiculo_cor}.")
+    escrever_secao(pdf, 5, textos.representacao, "representacao")
     pdf.ln(8)
 
     # PODERES - JUSTIFICADO
     pdf.set_font("Times", "", 12)
-    pdf.multi_cell(0, 5, poderes, align="J")
+    escrever_poderes(pdf, textos.poderes)
     pdf.ln(5)
 
-    # LOCAL E DATA - JUSTIFICADO
-    pdf.set_font("Times", "", 12)
-    pdf.multi_cell(0, 5, f"{local_emissao}, {data_emissao}.", align="J")
-    pdf.ln(15)  # Espaço maior para assinatura
-
-    # Assinatura
-    pdf.set_line_width(0.5)
-    x_start = 60
-    x_end = 150
-    y_line = pdf.get_y()
-    pdf.line(x_start, y_line, x_end, y_line)
-    pdf.ln(2)
-    pdf.set_font("Times", "", 10)
-    pdf.cell(0, 5, "OUTORGANTE", align="C", new_x="LMARGIN", new_y="NEXT")
-
-    pdf_output = pdf.output(dest="S")
-    return send_file(
-        io.BytesIO(pdf_output),
-        mimetype="application/pdf",
-        as_attachment=True,
-        download_name="procuracao_pj.pdf"
-    )
+    # LOCAL E DATA + ASSINATURA - sempre na mesma página
+    assinatura_secao(pdf, textos.local_data, textos.assinatura, 15)
+
+    return pdf
 
 
 @document_bp.route('/generate_procuracao_pf_multiplos', methods=['POST'])
+@payload_validado("procuracao_pf_multiplos")
+@renderizacao_vigiada("procuracao_pf_multiplos")
+@formulario_rapido("procuracao_pf_multiplos")
 def generate_procuracao_pf_multiplos():
     """
     Gera uma procuração para Pessoa Física com Múltiplos Outorgados em formato PDF
     OTIMIZADO PARA CABER EM 1 PÁGINA - ESPAÇAMENTOS EQUILIBRADOS
     """
     data = request.get_json()
-    
-    # Extrair dados do OUTORGANTE (Pessoa Física)
-    outorgante_nome = data.get("outorganteNome", "")
-    outorgante_nacionalidade = data.get("outorganteNacionalidade", "")
-    outorgante_cpf = data.get("outorganteCpf", "")
-    outorgante_endereco = remover_cep(data.get("outorganteEndereco", ""))
-    
-    # Extrair lista de OUTORGADOS (array de objetos)
-    outorgados = data.get("outorgados", [])
-    
-    # Extrair dados do VEÍCULO
-    veiculo_nome = data.get("veiculoNome", "")
-    veiculo_placa = data.get("veiculoPlaca", "")
-    veiculo_renavam = data.get("veiculoRenavam", "")
-    veiculo_chassi = data.get("veiculoChassi", "")
-    veiculo_ano_modelo = data.get("veiculoAnoModelo", "")
-    veiculo_cor = data.get("veiculoCor", "")
-    
-    local_emissao = data.get("localEmissao", "")
-    data_emissao = data.get("dataEmissao", "")
-    
-    # Converter data
-    if data_emissao:
-        try:
-            data_obj = datetime.strptime(data_emissao, "%Y-%m-%d")
-            data_emissao = data_obj.strftime("%d/%m/%Y")
-        except ValueError:
-            pass
-    
-    poderes = data.get("poderes", PODERES_PROCURACAO)
+    pdf = montar_procuracao_pf_multiplos(data)
+    return responder_pdf(pdf, "procuracao_pf_multiplos.pdf", "procuracao_pf_multiplos", data)
+
+
+def montar_procuracao_pf_multiplos(data):
+    """
+    Monta uma procuração para Pessoa Física com Múltiplos Outorgados a partir do payload
+    OTIMIZADO PARA CABER EM 1 PÁGINA - ESPAÇAMENTOS EQUILIBRADOS
+    """
+    textos = textos_procuracao_pf_multiplos(data)
 
     # Criar PDF - ESPAÇAMENTOS REDUZIDOS MAS EQUILIBRADOS
-    pdf = FPDF()
+    pdf = criar_pdf(data)
     pdf.add_page()
     pdf.set_margins(20, 20, 20)
     pdf.set_auto_page_break(auto=True, margin=20)
+    pdf.titulo_continuacao = textos.titulo
 
     # Título
     pdf.set_font("Times", "B", 16)
-    pdf.cell(0, 8, "PROCURAÇÃO", align="C", new_x="LMARGIN", new_y="NEXT")
+    pdf.cell(0, 8, textos.titulo, align="C", new_x="LMARGIN", new_y="NEXT")
     pdf.ln(3)
 
     # OUTORGANTE - NEGRITO inline + JUSTIFICADO
     pdf.set_font("Times", "B", 12)
-    pdf.write(5, "OUTORGANTE: ")
+    escrever_secao(pdf, 5, ROTULO_OUTORGANTE, "rotulo")
     pdf.set_font("Times", "", 12)
-    pdf.write(5, f"{outorgante_nome}, {outorgante_nacionalidade}, maior, inscrito sob o CPF: {outorgante_cpf}, residente e domiciliado em {outorgante_endereco}.")
+    escrever_secao(pdf, 5, textos.outorgante, "outorgante")
     pdf.ln(5)
 
     # NOMEIO E CONSTITUO
     pdf.set_font("Times", "B", 12)
-    pdf.cell(0, 5, "NOMEIO E CONSTITUO MEU BASTANTE PROCURADOR", align="C", new_x="LMARGIN", new_y="NEXT")
+    pdf.cell(0, 5, textos.nomeacao, align="C", new_x="LMARGIN", new_y="NEXT")
     pdf.ln(5)
 
     # OUTORGADOS (Múltiplos) - NEGRITO inline + JUSTIFICADO
     pdf.set_font("Times", "B", 12)
-    pdf.write(5, "OUTORGADOS: ")
+    escrever_secao(pdf, 5, ROTULO_OUTORGADOS, "rotulo")
     pdf.set_font("Times", "", 12)
-    
-    # Construir texto dos outorgados
-    outorgados_texto = ""
-    for i, outorgado in enumerate(outorgados):
-        nome = outorgado.get("nome", "")
-        nacionalidade = outorgado.get("nacionalidade", "")
-        cpf = outorgado.get("cpf", "")
-        endereco = remover_cep(outorgado.get("endereco", ""))
-        
-        if i == len(outorgados) - 1:
-            outorgados_texto += f"{nome}, {nacionalidade}, maior, inscrito sob o CPF: {cpf}, residente e domiciliado em {endereco}."
-        else:
-            outorgados_texto += f"{nome}, {nacionalidade}, maior, inscrito sob o CPF: {cpf}, residente e domiciliado em {endereco}, e/ou: "
-    
-    pdf.write(5, outorgados_texto)
+    with pdf.secao_continua("OUTORGADOS"):
+        escrever_secao(pdf, 5, textos.outorgados, "outorgados")
     pdf.ln(5)
 
     # REPRESENTAÇÃO - NEGRITO inline + JUSTIFICADO
     pdf.set_font("Times", "B", 12)
-    pdf.write(5, "REPRESENTAÇÃO: ")
+    escrever_secao(pdf, 5, ROTULO_REPRESENTACAO, "rotulo")
     pdf.set_font("Times", "", 12)
-    pdf.write(5, f"para fim especial, podendo vender para si e/ou para terceiros um {veiculo_nome}, Placa: {veiculo_placa}, RENAVAM: {veiculo_renavam}, CHASSI: {veiculo_chassi}, ANO/MODELO {veiculo_ano_modelo}, cor {veiculo_cor}.")
+    escrever_secao(pdf, 5, textos.representacao, "representacao")
     pdf.ln(5)
 
     # PODERES - JUSTIFICADO
     pdf.set_font("Times", "", 12)
-    pdf.multi_cell(0, 5, poderes, align="J")
+    escrever_poderes(pdf, textos.poderes)
     pdf.ln(5)
 
-    # LOCAL E DATA - JUSTIFICADO
-    pdf.set_font("Times", "", 12)
-    pdf.multi_cell(0, 5, f"{local_emissao}, {data_emissao}.", align="J")
-    pdf.ln(10)  # Espaço para assinatura
-
-    # Assinatura
-    pdf.set_line_width(0.5)
-    x_start = 60
-    x_end = 150
-    y_line = pdf.get_y()
-    pdf.line(x_start, y_line, x_end, y_line)
-    pdf.ln(2)
-    pdf.set_font("Times", "", 10)
-    pdf.cell(0, 5, "Assinatura do Outorgante", align="C", new_x="LMARGIN", new_y="NEXT")
-
-    pdf_output = pdf.output(dest="S")
-    return send_file(
-        io.BytesIO(pdf_output),
-        mimetype="application/pdf",
-        as_attachment=True,
-        download_name="procuracao_pf_multiplos.pdf"
-    )
+    # LOCAL E DATA + ASSINATURA - sempre na mesma página
+    assinatura_secao(pdf, textos.local_data, textos.assinatura, 10)
+
+    return pdf
 
@@ -75,19 +75,14 @@ def test_procuracao_pf_multiplos():
     pdf.cell(0, 5, "NOMEIO E CONSTITUO MEU BASTANTE PROCURADOR", align="C", new_x="LMARGIN", new_y="NEXT")
     pdf.ln(5)
 
-    # OUTORGADOS
-    outorgados_texto = ""
-    for i, outorgado in enumerate(outorgados):
-        nome = outorgado.get("nome", "")
-        nacionalidade = outorgado.get("nacionalidade", "")
-        cpf = outorgado.get("cpf", "")
-        endereco = remover_cep(outorgado.get("endereco", ""))
-        
-        if i == len(outorgados) - 1:
-            outorgados_texto += f"{nome}, {nacionalidade}, maior, inscrito sob o CPF: {cpf}, residente e domiciliado em {endereco}."
-        else:
-            outorgados_texto += f"{nome}, {nacionalidade}, maior, inscrito sob o CPF: {cpf}, residente e domiciliado em {endereco}, e/ou: "
-    
+    # OUTORGADOS - separados por ", e/ou: ", com ponto final no último
+    qualificacoes = [
+        f"{o.get('nome', '')}, {o.get('nacionalidade', '')}, maior, inscrito sob o CPF: {o.get('cpf', '')}, "
+        f"residente e domiciliado em {remover_cep(o.get('endereco', ''))}"
+        for o in outorgados
+    ]
+    outorgados_texto = ", e/ou: ".join(qualificacoes) + "." if qualificacoes else ""
+
     pdf.set_font("Times", "B", 12)
     pdf.write(5, "OUTORGADOS: ")
     pdf.set_font("Times", "", 12)
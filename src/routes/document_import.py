@@ -0,0 +1,182 @@
+import codecs
+import csv
+import io
+import itertools
+import json
+import re
+import unicodedata
+
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+
+from src.routes.document_types import TIPOS_DOCUMENTO
+from src.services.pdf import compressao_pedida, finalizar_pdf
+from src.services.relatorios import confirmar_emissoes
+from src.services.schemas import validar_payload
+from src.services.vigia import VIGIA_RENDERIZACAO
+from src.services.zip_stream import gerar_zip
+
+import_bp = Blueprint('document_import', __name__)
+
+# Cabeçalhos aceitos na planilha (normalizados: minúsculos, sem acento e sem separadores)
+# e os campos do payload que cada um preenche. Cabeçalhos fora desta lista são usados
+# como nome de campo do payload (ex.: "outorganteNome").
+COLUNAS = {
+    "placa": ["veiculoPlaca"],
+    "renavam": ["veiculoRenavam"],
+    "chassi": ["veiculoChassi"],
+    "cor": ["veiculoCor"],
+    "anomodelo": ["veiculoAnoModelo"],
+    "ano": ["veiculoAnoModelo"],
+    "marcamodelo": ["veiculoMarcaModelo", "veiculoNome"],
+    "modelo": ["veiculoMarcaModelo", "veiculoNome"],
+    "veiculo": ["veiculoMarcaModelo", "veiculoNome"],
+}
+
+# Emissões registradas por commit durante uma importação (um commit por PDF custaria um fsync cada)
+EMISSOES_POR_COMMIT = 200
+
+
+def normalizar_cabecalho(cabecalho):
+    """Remove acentos, separadores e caixa: "Ano/Modelo" -> "anomodelo" """
+    sem_acento = unicodedata.normalize("NFKD", cabecalho).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r'[\s_\-/.]+', '', sem_acento).lower()
+
+
+def mapear_colunas(cabecalhos):
+    """Lista, para cada coluna da planilha, os campos do payload que ela preenche"""
+    return [COLUNAS.get(normalizar_cabecalho(c), [c.strip()]) for c in cabecalhos]
+
+
+# Bytes que não decodificam no encoding da planilha (lidos com errors="surrogateescape")
+BYTES_INVALIDOS = re.compile("[\udc80-\udcff]")
+
+
+def abrir_planilha(arquivo, encoding="utf-8-sig"):
+    """
+    Abre o CSV e lê o cabeçalho; devolve (texto, delimitador, campos por coluna).
+    ValueError (encoding desconhecido ou que não é de texto, cabeçalho ilegível) vira
+    400 na rota, antes de a resposta começar. Aceita ";" ou "," como separador.
+    """
+    try:
+        codec = codecs.lookup(encoding)
+    except LookupError:
+        raise ValueError(f"Encoding desconhecido: {encoding}") from None
+    if not codec._is_text_encoding:  # base64, rot13, zlib...
+        raise ValueError(f"{encoding} não é um encoding de texto")
+    texto = io.TextIOWrapper(arquivo, encoding=encoding, errors="surrogateescape", newline="")
+    try:
+        primeira = texto.readline()
+    except UnicodeError:
+        primeira = "\udcff"
+    if BYTES_INVALIDOS.search(primeira):
+        raise ValueError(f"O cabeçalho da planilha não está em {encoding}")
+    delimitador = ";" if primeira.count(";") > primeira.count(",") else ","
+    cabecalhos = next(csv.reader([primeira], delimiter=delimitador), [])
+    return texto, delimitador, mapear_colunas(cabecalhos)
+
+
+def ler_linhas(texto, delimitador, campos_por_coluna, encoding="utf-8-sig"):
+    """
+    Lê o CSV aberto por abrir_planilha linha a linha (sem carregar o arquivo inteiro)
+    e produz (número da linha, {campo do payload: valor}, erro). Uma linha com bytes
+    que não decodificam vem só com o erro; as seguintes continuam sendo lidas.
+    """
+    linhas = csv.reader(texto, delimiter=delimitador)
+    for numero in itertools.count(2):
+        try:
+            valores = next(linhas)
+        except StopIteration:
+            return
+        except UnicodeError as exc:
+            # Codecs que não sabem escapar o byte (utf-16, por exemplo): o resto do arquivo é ilegível
+            yield numero, None, f"o restante do arquivo não está em {encoding}: {exc}"
+            return
+        if not any(v.strip() for v in valores):
+            continue
+        if any(BYTES_INVALIDOS.search(v) for v in valores):
+            yield numero, None, f"bytes inválidos para o encoding {encoding}"
+            continue
+        campos = {}
+        for campos_coluna, valor in zip(campos_por_coluna, valores):
+            for campo in campos_coluna:
+                campos[campo] = valor.strip()
+        yield numero, campos, None
+
+
+def nome_arquivo(tipo, numero, campos):
+    placa = re.sub(r'[^A-Za-z0-9]+', '', campos.get("veiculoPlaca", "")) or "sem_placa"
+    return f"{tipo}_{numero:05d}_{placa}.pdf"
+
+
+@import_bp.route('/import/<string:tipo>', methods=['POST'])
+def importar_planilha(tipo):
+    """
+    Importa uma planilha CSV de veículos e devolve um ZIP com um documento por linha.
+
+    Multipart: "arquivo" (CSV) e, opcionalmente, "dados" (JSON com os campos comuns a
+    todas as linhas, como outorgante, outorgado, localEmissao e dataEmissao) e
+    "encoding" (padrão utf-8). Encoding desconhecido ou que não é de texto e
+    cabeçalho que não decodifica respondem 400. Cada PDF vai direto para o ZIP em streaming, então o uso de
+    memória não depende do número de linhas. Linhas que falham (inclusive as com
+    bytes inválidos para o encoding) são listadas em erros.csv dentro do ZIP.
+    ?compressao= vale para todos os documentos do ZIP.
+    """
+    montar = TIPOS_DOCUMENTO.get(tipo)
+    if montar is None:
+        return jsonify({"erro": f"Tipo de documento desconhecido: {tipo}"}), 404
+    arquivo = request.files.get("arquivo")
+    if arquivo is None:
+        return jsonify({"erro": "Envie a planilha CSV no campo 'arquivo'"}), 400
+    try:
+        dados_comuns = json.loads(request.form.get("dados") or "{}")
+    except ValueError:
+        return jsonify({"erro": "O campo 'dados' deve ser um JSON válido"}), 400
+    if not isinstance(dados_comuns, dict):
+        return jsonify({"erro": "O campo 'dados' deve ser um objeto JSON"}), 400
+    encoding = request.form.get("encoding", "utf-8-sig")
+    try:
+        texto, delimitador, campos_por_coluna = abrir_planilha(arquivo.stream, encoding)
+    except ValueError as exc:
+        return jsonify({"erro": str(exc)}), 400
+    compressao = compressao_pedida()
+
+    def documentos():
+        erros = []
+        emitidos = 0
+        for numero, campos, erro in ler_linhas(texto, delimitador, campos_por_coluna, encoding):
+            if erro:
+                erros.append((numero, erro))
+                continue
+            payload = {**dados_comuns, **campos}
+            invalidos = validar_payload(tipo, payload)
+            if invalidos:
+                erros.append((numero, "; ".join(f"{e['campo']}: {e['mensagem']}" for e in invalidos)))
+                continue
+            erro = VIGIA_RENDERIZACAO.custo_excedido(tipo, payload)
+            if erro:
+                erros.append((numero, erro))
+                continue
+            try:
+                with VIGIA_RENDERIZACAO.prazo(tipo):
+                    conteudo, _ = finalizar_pdf(montar(payload), tipo=tipo, data=payload, confirmar=False,
+                                                compressao=compressao)
+            except Exception as exc:  # uma linha ruim não derruba a importação inteira
+                erros.append((numero, str(exc)))
+                continue
+            emitidos += 1
+            if emitidos % EMISSOES_POR_COMMIT == 0:
+                confirmar_emissoes()
+            yield nome_arquivo(tipo, numero, campos), conteudo
+        confirmar_emissoes()
+        if erros:
+            relatorio = io.StringIO()
+            writer = csv.writer(relatorio)
+            writer.writerow(["linha", "erro"])
+            writer.writerows(erros)
+            yield "erros.csv", relatorio.getvalue().encode("utf-8")
+
+    return Response(
+        stream_with_context(gerar_zip(documentos())),
+        mimetype="application/zip",
+        headers={"Content-Disposition": f"attachment; filename={tipo}_lote.zip"},
+    )
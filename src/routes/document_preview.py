@@ -0,0 +1,46 @@
+from flask import Blueprint, Response, abort, jsonify, request
+from markupsafe import escape
+
+from src.services.schemas import resposta_invalida, validar_payload
+from src.services.textos import TEXTOS_DOCUMENTO
+
+preview_bp = Blueprint('document_preview', __name__)
+
+
+def secoes_html(tipo, secoes):
+    """Fragmento HTML com uma tag por seção (data-secao = chave), para o frontend estilizar"""
+    partes = [f'<article class="documento" data-tipo="{tipo}">']
+    for secao in secoes:
+        if secao["chave"] == "titulo":
+            partes.append(f'<h1 data-secao="titulo">{escape(secao["texto"])}</h1>')
+            continue
+        rotulo = f'<strong>{escape(secao["rotulo"])}</strong>' if secao["rotulo"] else ""
+        partes.append(f'<p data-secao="{secao["chave"]}">{rotulo}{escape(secao["texto"])}</p>')
+    partes.append("</article>")
+    return "\n".join(partes)
+
+
+@preview_bp.route('/preview/<string:tipo>', methods=['POST'])
+def preview_documento(tipo):
+    """
+    Pré-visualização sem gerar PDF: os textos de cada seção do documento, com a
+    mesma redação e normalização das rotas generate_<tipo> (services/textos.py).
+    Responde JSON ({"tipo", "secoes": [{"chave", "rotulo", "texto"}]}) ou, com
+    ?formato=html ou Accept: text/html, um fragmento HTML.
+    """
+    if tipo not in TEXTOS_DOCUMENTO:
+        abort(404)
+    data = request.get_json(silent=True)
+    if data is None:
+        return resposta_invalida([{"campo": "$", "mensagem": "corpo deve ser um objeto JSON"}])
+    erros = validar_payload(tipo, data)
+    if erros:
+        return resposta_invalida(erros)
+
+    secoes = TEXTOS_DOCUMENTO[tipo](data).secoes()
+    formato = request.args.get("formato")
+    if formato is None:
+        formato = "html" if request.accept_mimetypes.best_match(["application/json", "text/html"]) == "text/html" else "json"
+    if formato == "html":
+        return Response(secoes_html(tipo, secoes), mimetype="text/html")
+    return jsonify({"tipo": tipo, "secoes": secoes})
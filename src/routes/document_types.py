@@ -0,0 +1,20 @@
+from .document_generation import montar_procuracao_pf, montar_procuracao_pj, montar_procuracao_pf_multiplos
+from .document_generation_extra import (
+    montar_procuracao_pj_multiplos,
+    montar_representacao_pf,
+    montar_representacao_pj,
+    montar_substabelecimento_pf,
+    montar_substabelecimento_pj,
+)
+
+# Tipos de documento (mesmo nome das rotas generate_<tipo>) e a função que monta cada PDF
+TIPOS_DOCUMENTO = {
+    "procuracao_pf": montar_procuracao_pf,
+    "procuracao_pj": montar_procuracao_pj,
+    "procuracao_pf_multiplos": montar_procuracao_pf_multiplos,
+    "procuracao_pj_multiplos": montar_procuracao_pj_multiplos,
+    "representacao_pf": montar_representacao_pf,
+    "representacao_pj": montar_representacao_pj,
+    "substabelecimento_pf": montar_substabelecimento_pf,
+    "substabelecimento_pj": montar_substabelecimento_pj,
+}
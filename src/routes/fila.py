@@ -0,0 +1,55 @@
+from flask import Blueprint, jsonify, request
+
+from src.models.fila import TarefaRenderizacao
+from src.models.user import db
+from src.routes.document_types import TIPOS_DOCUMENTO
+from src.services.clausulas import resolver_poderes
+from src.services.fila import fila_renderizacao
+from src.services.schemas import resposta_invalida, validar_payload
+from src.services.vigia import VIGIA_RENDERIZACAO
+
+fila_bp = Blueprint('fila', __name__)
+
+
+@fila_bp.route('/fila/<string:tipo>', methods=['POST'])
+def enfileirar_documento(tipo):
+    """
+    Enfileira a renderização de um documento para os workers (python -m src.worker).
+    Mesmo corpo e mesma validação da rota generate_<tipo> (inclusive o 422 de um
+    poderesId desconhecido); responde 202 com a tarefa, cujo estado fica em
+    GET /api/fila/tarefas/<id>.
+    """
+    if tipo not in TIPOS_DOCUMENTO:
+        return jsonify({"erro": f"Tipo de documento desconhecido: {tipo}"}), 404
+    data = request.get_json(silent=True)
+    if data is None:
+        return resposta_invalida([{"campo": "$", "mensagem": "corpo deve ser um objeto JSON"}])
+    erros = validar_payload(tipo, data)
+    if erros:
+        return resposta_invalida(erros)
+    erro = VIGIA_RENDERIZACAO.custo_excedido(tipo, data)
+    if erro:
+        return resposta_invalida([{"campo": "$", "mensagem": erro}])
+    if not tipo.startswith("substabelecimento"):  # o substabelecimento ignora poderes/poderesId
+        # ClausulaNaoEncontrada vira 422 (routes/clausulas.py), antes de a tarefa entrar na fila
+        resolver_poderes(data, tipo.split("_")[0])
+    tarefa = fila_renderizacao.enfileirar(tipo, data)
+    resposta = jsonify(tarefa.to_dict())
+    resposta.status_code = 202
+    resposta.headers["Location"] = f"/api/fila/tarefas/{tarefa.id}"
+    return resposta
+
+
+@fila_bp.route('/fila/tarefas/<int:tarefa_id>', methods=['GET'])
+def get_tarefa(tarefa_id):
+    """Estado de uma tarefa; concluída, traz o hash e a URL do PDF no arquivo"""
+    tarefa = db.session.get(TarefaRenderizacao, tarefa_id)
+    if tarefa is None:
+        return jsonify({"erro": "Tarefa não encontrada"}), 404
+    return jsonify(tarefa.to_dict())
+
+
+@fila_bp.route('/fila', methods=['GET'])
+def get_fila():
+    """Tarefas por estado na fila toda"""
+    return jsonify(fila_renderizacao.contagens())
@@ -0,0 +1,37 @@
+import os
+
+from flask import Blueprint, current_app, jsonify
+
+from src.services.clausulas import BIBLIOTECA_CLAUSULAS
+from src.services.fonts import REGISTRO_FONTES
+from src.services.formularios import MODELOS_FORMULARIO
+from src.services.fragmentos import CACHE_FRAGMENTOS
+from src.services.versoes import cache_respostas
+from src.services.vigia import VIGIA_RENDERIZACAO
+
+monitoramento_bp = Blueprint('monitoramento', __name__)
+
+
+@monitoramento_bp.route('/monitoramento', methods=['GET'])
+def monitoramento():
+    """
+    Contadores do processo que atendeu (cada worker do gunicorn tem os seus):
+    renderizações concluídas, abortadas pelo prazo e recusadas pela estimativa de
+    custo, por tipo, e acertos/faltas dos caches de renderização. Cada contador é
+    lido sob o lock do próprio cache, como as renderizações fazem ao atualizá-lo.
+    """
+    return jsonify({
+        "pid": os.getpid(),
+        "renderizacao": {
+            **VIGIA_RENDERIZACAO.estatisticas(),
+            "limiteMs": current_app.config.get("RENDER_LIMITE_MS", 0),
+            "custoMaximoMs": current_app.config.get("RENDER_CUSTO_MAXIMO_MS", 0),
+        },
+        "caches": {
+            "fragmentos": CACHE_FRAGMENTOS.estatisticas(),
+            "clausulas": BIBLIOTECA_CLAUSULAS.estatisticas(),
+            "subsetsFontes": REGISTRO_FONTES.estatisticas(),
+            "respostas": cache_respostas.estatisticas(),
+            "formularios": MODELOS_FORMULARIO.estatisticas(),
+        },
+    })
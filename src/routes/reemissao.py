@@ -0,0 +1,127 @@
+import csv
+import io
+from datetime import date
+
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+
+from src.models.reemissao import Reemissao
+from src.models.user import db
+from src.routes.document_import import nome_arquivo
+from src.routes.document_types import TIPOS_DOCUMENTO
+from src.services.arquivo import arquivo_documentos
+from src.services.reemissao import (CAMPOS_ALTERAVEIS, ReemissaoEmAndamento, documentos_do_lote,
+                                    iniciar_reemissao, progresso, reemissao_em_andamento)
+from src.services.relatorios import limites_utc, somente_digitos
+from src.services.schemas import resposta_invalida
+from src.services.zip_stream import gerar_zip
+
+reemissao_bp = Blueprint('reemissao', __name__)
+
+
+def validar_pedido(data):
+    """Erros ({"campo", "mensagem"}) do corpo de POST /reemissoes"""
+    if not isinstance(data, dict):
+        return [{"campo": "$", "mensagem": "corpo deve ser um objeto JSON"}]
+    erros = []
+    documento = data.get("documento")
+    if not isinstance(documento, str) or not 0 < len(somente_digitos(documento)) <= 32:
+        erros.append({"campo": "documento", "mensagem": "CPF ou CNPJ obrigatório"})
+    alteracoes = data.get("alteracoes")
+    if not isinstance(alteracoes, dict) or not alteracoes:
+        erros.append({"campo": "alteracoes", "mensagem": f"objeto com {', '.join(CAMPOS_ALTERAVEIS)}"})
+    else:
+        for campo, valor in alteracoes.items():
+            if campo not in CAMPOS_ALTERAVEIS:
+                erros.append({"campo": f"alteracoes.{campo}", "mensagem": "campo não alterável"})
+            elif type(valor) is not str:
+                erros.append({"campo": f"alteracoes.{campo}", "mensagem": "deve ser texto"})
+    tipos = data.get("tipos")
+    if tipos is not None and (type(tipos) is not list or any(t not in TIPOS_DOCUMENTO for t in tipos)):
+        erros.append({"campo": "tipos", "mensagem": "lista de tipos de documento conhecidos"})
+    desde = data.get("desde")
+    if desde is not None:
+        try:
+            date.fromisoformat(desde)
+        except (TypeError, ValueError):
+            erros.append({"campo": "desde", "mensagem": "use AAAA-MM-DD"})
+    if "dataEmissao" in data and type(data["dataEmissao"]) is not str:
+        erros.append({"campo": "dataEmissao", "mensagem": "deve ser texto"})
+    return erros
+
+
+@reemissao_bp.route('/reemissoes', methods=['POST'])
+def criar_reemissao():
+    """
+    Reemite, em segundo plano, os documentos já emitidos que citam um CPF/CNPJ,
+    com os dados novos da parte. Corpo: {"documento", "alteracoes": {nome,
+    nacionalidade, endereco}, "tipos"?, "desde"? (AAAA-MM-DD, data local),
+    "dataEmissao"?}. Responde 202 com o progresso, que segue em
+    GET /api/reemissoes/<lote>; a renderização é feita pelos workers da fila.
+    Responde 409 enquanto a reemissão anterior da mesma parte não termina.
+    """
+    data = request.get_json(silent=True)
+    erros = validar_pedido(data)
+    if erros:
+        return resposta_invalida(erros)
+    anterior = reemissao_em_andamento(somente_digitos(data["documento"]))
+    if anterior is not None:
+        return jsonify({"erro": "Reemissão anterior desta parte em andamento", "lote": anterior.lote}), 409
+    desde = None
+    if data.get("desde") is not None:
+        dia = date.fromisoformat(data["desde"])
+        desde = limites_utc(dia, dia)[0]
+    try:
+        reemissao = iniciar_reemissao(somente_digitos(data["documento"]), data["alteracoes"],
+                                      tipos=data.get("tipos"), desde=desde, data_emissao=data.get("dataEmissao"))
+    except ReemissaoEmAndamento as exc:
+        # Outro pedido da mesma parte gravou a sua reemissão primeiro
+        return jsonify({"erro": "Reemissão anterior desta parte em andamento", "lote": exc.lote}), 409
+    resposta = jsonify(progresso(reemissao))
+    resposta.status_code = 202
+    resposta.headers["Location"] = f"/api/reemissoes/{reemissao.lote}"
+    return resposta
+
+
+@reemissao_bp.route('/reemissoes/<string:lote>', methods=['GET'])
+def get_reemissao(lote):
+    """Progresso da reemissão: tarefas do lote por estado e fração encerrada"""
+    reemissao = db.session.get(Reemissao, lote)
+    if reemissao is None:
+        return jsonify({"erro": "Reemissão não encontrada"}), 404
+    return jsonify(progresso(reemissao))
+
+
+@reemissao_bp.route('/reemissoes/<string:lote>/documentos.zip', methods=['GET'])
+def baixar_reemissao(lote):
+    """
+    ZIP com os PDFs reemitidos (um por documento único, lidos do arquivo) e
+    reemissao.csv ligando cada arquivo às emissões que ele substitui. Antes de o
+    lote terminar responde 409 com o progresso, a menos que ?parcial=1.
+    """
+    reemissao = db.session.get(Reemissao, lote)
+    if reemissao is None:
+        return jsonify({"erro": "Reemissão não encontrada"}), 404
+    estado = progresso(reemissao)
+    if not estado["encerrada"] and request.args.get("parcial") != "1":
+        return jsonify(estado), 409
+
+    def entradas():
+        relatorio = io.StringIO()
+        writer = csv.writer(relatorio, delimiter=";")
+        writer.writerow(["arquivo", "tipo", "estado", "hash", "emissoes_substituidas"])
+        arquivos = {}
+        for numero, (tipo, dados, situacao, hash_documento, origens) in enumerate(documentos_do_lote(reemissao), 1):
+            caminho = arquivo_documentos.localizar(hash_documento) if hash_documento else None
+            if caminho is not None and hash_documento not in arquivos:
+                arquivos[hash_documento] = nome_arquivo(tipo, numero, dados)
+                with open(caminho, "rb") as f:
+                    yield arquivos[hash_documento], f.read()
+            writer.writerow([arquivos.get(hash_documento, ""), tipo, situacao, hash_documento or "",
+                             " ".join(map(str, origens))])
+        yield "reemissao.csv", relatorio.getvalue().encode("utf-8")
+
+    return Response(
+        stream_with_context(gerar_zip(entradas())),
+        mimetype="application/zip",
+        headers={"Content-Disposition": f"attachment; filename=reemissao_{lote}.zip"},
+    )
@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+
+from src.services.relatorios import MAX_DIAS_RELATORIO, exportar_csv, fuso, relatorio
+from src.services.schemas import resposta_invalida
+
+relatorio_bp = Blueprint('relatorios', __name__)
+
+
+def ler_data(campo, formato="%Y-%m-%d"):
+    return datetime.strptime(request.args[campo], formato).date()
+
+
+def periodo_pedido():
+    """
+    Período da query string: ?dia=AAAA-MM-DD, ?mes=AAAA-MM ou ?inicio=...&fim=...
+    (datas locais, inclusivas); sem parâmetros, o mês corrente.
+    Devolve ((inicio, fim), None) ou (None, resposta 422).
+    """
+    try:
+        if "dia" in request.args:
+            inicio = fim = ler_data("dia")
+        elif "mes" in request.args:
+            inicio = ler_data("mes", "%Y-%m")
+            fim = (inicio.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+        elif "inicio" in request.args or "fim" in request.args:
+            inicio, fim = ler_data("inicio"), ler_data("fim")
+        else:
+            hoje = datetime.now(fuso()).date()
+            inicio = hoje.replace(day=1)
+            fim = hoje
+    except KeyError as erro:
+        return None, resposta_invalida([{"campo": erro.args[0], "mensagem": "obrigatório"}])
+    except ValueError:
+        return None, resposta_invalida([{"campo": "periodo", "mensagem": "use dia=AAAA-MM-DD, mes=AAAA-MM "
+                                                                         "ou inicio/fim=AAAA-MM-DD"}])
+    if fim < inicio:
+        return None, resposta_invalida([{"campo": "fim", "mensagem": "anterior ao início"}])
+    if (fim - inicio).days >= MAX_DIAS_RELATORIO:
+        return None, resposta_invalida([{"campo": "periodo", "mensagem": f"máximo de {MAX_DIAS_RELATORIO} dias"}])
+    return (inicio, fim), None
+
+
+@relatorio_bp.route('/reports', methods=['GET'])
+def relatorio_emissoes():
+    """
+    Contagens de documentos emitidos no período: total, por dia e por tipo, cliente
+    (CPF/CNPJ do outorgante) e cidade (localEmissao), lidas do resumo diário.
+    """
+    periodo, erro = periodo_pedido()
+    if erro:
+        return erro
+    return jsonify(relatorio(*periodo))
+
+
+@relatorio_bp.route('/reports/emissoes.csv', methods=['GET'])
+def exportar_emissoes():
+    """CSV de todas as emissões do período (mesmos parâmetros de /reports), em streaming"""
+    periodo, erro = periodo_pedido()
+    if erro:
+        return erro
+    inicio, fim = periodo
+    nome = f"emissoes_{inicio.isoformat()}_{fim.isoformat()}.csv"
+    return Response(
+        stream_with_context(exportar_csv(inicio, fim)),
+        mimetype="text/csv",
+        headers={"Content-Disposition": f"attachment; filename={nome}"},
+    )
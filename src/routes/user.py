@@ -1,12 +1,42 @@
 from flask import Blueprint, jsonify, request
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
 from src.models.user import User, db
+from src.services.versoes import responder_json_versionado, tabela_alterada
 
 user_bp = Blueprint('user', __name__)
 
+
+def salvar(user):
+    """
+    Grava a sessão e devolve (user.to_dict(), None) ou (None, resposta de erro).
+
+    A unicidade de username/email é garantida pelo banco, não por uma consulta antes
+    do INSERT (que duas requisições simultâneas passariam juntas): conflito vira 409
+    e usuário removido por outra requisição no meio do PUT vira 404. O dicionário é
+    montado antes do commit, que expira o objeto e obrigaria a reler a linha. Depois
+    do commit, a versão da tabela muda e as respostas dos GETs em cache caducam.
+    """
+    try:
+        db.session.flush()
+        dados = user.to_dict()
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return None, (jsonify({"erro": "Nome de usuário ou e-mail já cadastrado"}), 409)
+    except StaleDataError:
+        db.session.rollback()
+        return None, (jsonify({"erro": "Usuário não encontrado"}), 404)
+    tabela_alterada(User.__tablename__)
+    return dados, None
+
 @user_bp.route('/users', methods=['GET'])
 def get_users():
-    users = User.query.all()
-    return jsonify([user.to_dict() for user in users])
+    return responder_json_versionado(
+        User.__tablename__, ("users",),
+        lambda: (user.to_dict() for user in User.query.yield_per(1000)),
+        lista=True
+    )
 
 @user_bp.route('/users', methods=['POST'])
 def create_user():
@@ -14,13 +44,17 @@ def create_user():
     data = request.json
     user = User(username=data['username'], email=data['email'])
     db.session.add(user)
-    db.session.commit()
-    return jsonify(user.to_dict()), 201
+    dados, erro = salvar(user)
+    if erro:
+        return erro
+    return jsonify(dados), 201
 
 @user_bp.route('/users/<int:user_id>', methods=['GET'])
 def get_user(user_id):
-    user = User.query.get_or_404(user_id)
-    return jsonify(user.to_dict())
+    return responder_json_versionado(
+        User.__tablename__, ("user", user_id),
+        lambda: User.query.get_or_404(user_id).to_dict()
+    )
 
 @user_bp.route('/users/<int:user_id>', methods=['PUT'])
 def update_user(user_id):
@@ -28,12 +62,15 @@ def update_user(user_id):
     data = request.json
     user.username = data.get('username', user.username)
     user.email = data.get('email', user.email)
-    db.session.commit()
-    return jsonify(user.to_dict())
+    dados, erro = salvar(user)
+    if erro:
+        return erro
+    return jsonify(dados)
 
 @user_bp.route('/users/<int:user_id>', methods=['DELETE'])
 def delete_user(user_id):
     user = User.query.get_or_404(user_id)
     db.session.delete(user)
     db.session.commit()
+    tabela_alterada(User.__tablename__)
     return '', 204
@@ -0,0 +1,42 @@
+from flask import Blueprint, jsonify, request
+
+from src.services.catalogo import CATALOGO_VEICULOS, LIMITE_MAXIMO, LIMITE_PADRAO, CatalogoInvalido
+
+veiculo_bp = Blueprint('veiculos', __name__)
+
+
+@veiculo_bp.route('/veiculos/autocomplete', methods=['GET'])
+def autocompletar_veiculo():
+    """
+    Sugestões de marca/modelo para ?q=: primeiro os nomes que começam com o texto,
+    depois os que têm uma palavra começando com ele, depois os que o contêm.
+    Acentos, caixa e separadores ("/", "-", espaços) não contam. ?limite= até 50.
+    """
+    try:
+        limite = int(request.args.get("limite", LIMITE_PADRAO))
+    except ValueError:
+        return jsonify({"erro": "limite deve ser um número inteiro"}), 400
+    limite = max(1, min(limite, LIMITE_MAXIMO))
+    return jsonify(CATALOGO_VEICULOS.autocompletar(request.args.get("q", ""), limite))
+
+
+@veiculo_bp.route('/veiculos/importar', methods=['POST'])
+def importar_catalogo():
+    """
+    Substitui o catálogo de veículos por um CSV. Multipart: "arquivo" (colunas
+    marca e modelo, ou marcaModelo como "MARCA/MODELO") e, opcionalmente,
+    "encoding" (padrão utf-8). Devolve quantos entraram e as linhas ignoradas.
+    """
+    arquivo = request.files.get("arquivo")
+    if arquivo is None:
+        return jsonify({"erro": "Envie o catálogo CSV no campo 'arquivo'"}), 400
+    try:
+        importados, ignoradas = CATALOGO_VEICULOS.importar(arquivo.stream, request.form.get("encoding", "utf-8-sig"))
+    except CatalogoInvalido as exc:
+        return jsonify({"erro": str(exc)}), 400
+    except (UnicodeDecodeError, LookupError):
+        return jsonify({"erro": "Não foi possível ler o CSV com o encoding informado"}), 400
+    return jsonify({
+        "importados": importados,
+        "ignoradas": [{"linha": linha, "motivo": motivo} for linha, motivo in ignoradas],
+    })
@@ -0,0 +1,194 @@
+"""
+Arquivo local, endereçado por conteúdo, dos PDFs emitidos.
+
+Cada PDF é gravado uma única vez sob o SHA-256 dos seus bytes, em subdiretórios
+por prefixo do hash (ab/cd/abcd...pdf) para não concentrar milhares de arquivos
+num diretório só. Como a saída é determinística (PDF_DETERMINISTICO), payloads
+idênticos caem no mesmo arquivo. A reimpressão lê do disco em vez de renderizar.
+
+O mtime de cada arquivo é o da primeira gravação e não muda: é o Last-Modified
+da reimpressão (If-Modified-Since / If-Range). O último acesso (nova gravação do
+mesmo conteúdo ou download), usado pela retenção, fica no atime, renovado
+explicitamente por registrar_acesso. A retenção percorre o diretório numa thread
+de fundo, disparada a cada `intervalo_retencao` gravações, fora da requisição.
+"""
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+HASH_VALIDO = re.compile(r'^[0-9a-f]{64}$')
+
+
+class SemRetencao:
+    """Mantém todos os documentos indefinidamente"""
+
+    def selecionar_para_remover(self, entradas):
+        return []
+
+
+class RetencaoPorIdade:
+    """Remove documentos sem acesso (gravação ou download) há mais de `max_dias`"""
+
+    def __init__(self, max_dias):
+        self.max_segundos = max_dias * 86400
+
+    def selecionar_para_remover(self, entradas):
+        limite = time.time() - self.max_segundos
+        return [entrada for entrada in entradas if entrada[2] < limite]
+
+
+class RetencaoPorTamanho:
+    """Mantém o arquivo abaixo de `max_bytes`, removendo primeiro os menos usados recentemente"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+
+    def selecionar_para_remover(self, entradas):
+        total = sum(entrada[1] for entrada in entradas)
+        remover = []
+        for entrada in sorted(entradas, key=lambda e: e[2]):
+            if total <= self.max_bytes:
+                break
+            remover.append(entrada)
+            total -= entrada[1]
+        return remover
+
+
+class RetencaoCombinada:
+    """Aplica várias políticas; um documento sai se qualquer uma o selecionar"""
+
+    def __init__(self, *politicas):
+        self.politicas = politicas
+
+    def selecionar_para_remover(self, entradas):
+        remover = {}
+        restantes = list(entradas)
+        for politica in self.politicas:
+            for entrada in politica.selecionar_para_remover(restantes):
+                remover[entrada[0]] = entrada
+            restantes = [e for e in restantes if e[0] not in remover]
+        return list(remover.values())
+
+
+class ArquivoDocumentos:
+    """Blob store em disco, deduplicado por hash, com retenção plugável"""
+
+    def __init__(self, diretorio=None, retencao=None, intervalo_retencao=200):
+        self.diretorio = diretorio
+        self.retencao = retencao or SemRetencao()
+        self.intervalo_retencao = intervalo_retencao
+        self._gravacoes = 0
+        self._retencao_rodando = False
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.diretorio = app.config['ARQUIVO_DOCUMENTOS_DIR']
+        politicas = []
+        if app.config.get('ARQUIVO_RETENCAO_DIAS'):
+            politicas.append(RetencaoPorIdade(float(app.config['ARQUIVO_RETENCAO_DIAS'])))
+        if app.config.get('ARQUIVO_MAX_BYTES'):
+            politicas.append(RetencaoPorTamanho(int(app.config['ARQUIVO_MAX_BYTES'])))
+        if politicas:
+            self.retencao = RetencaoCombinada(*politicas)
+        os.makedirs(self.diretorio, exist_ok=True)
+        app.extensions['arquivo_documentos'] = self
+
+    def caminho(self, hash_documento):
+        return os.path.join(self.diretorio, hash_documento[:2], hash_documento[2:4], f"{hash_documento}.pdf")
+
+    def guardar(self, conteudo):
+        """Grava o PDF (se ainda não existir) e devolve o seu SHA-256"""
+        hash_documento = hashlib.sha256(conteudo).hexdigest()
+        destino = self.caminho(hash_documento)
+        if os.path.exists(destino):
+            # Já arquivado: só renova o acesso usado pela retenção
+            if self.registrar_acesso(destino):
+                return hash_documento
+            # Removido pela retenção (em outro thread) entre a checagem e o registro: grava de novo
+
+        pasta = os.path.dirname(destino)
+        os.makedirs(pasta, exist_ok=True)
+        # Grava em arquivo temporário e renomeia: leitores nunca veem um PDF pela metade
+        fd, temporario = tempfile.mkstemp(dir=pasta, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(conteudo)
+            os.replace(temporario, destino)
+        except BaseException:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+            raise
+
+        with self._lock:
+            self._gravacoes += 1
+            aplicar = self._gravacoes % self.intervalo_retencao == 0
+        if aplicar:
+            self.aplicar_retencao_em_segundo_plano()
+        return hash_documento
+
+    def registrar_acesso(self, caminho):
+        """
+        Renova o atime (último acesso, usado pela retenção) sem mexer no mtime, que
+        é o Last-Modified do documento; devolve False se o arquivo já não existe
+        """
+        try:
+            os.utime(caminho, (time.time(), os.stat(caminho).st_mtime))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def localizar(self, hash_documento):
+        """Caminho do PDF arquivado, ou None se o hash for inválido ou desconhecido"""
+        if not HASH_VALIDO.match(hash_documento):
+            return None
+        caminho = self.caminho(hash_documento)
+        return caminho if os.path.isfile(caminho) else None
+
+    def entradas(self):
+        """Lista (caminho, tamanho, último acesso) de todos os documentos arquivados"""
+        for raiz, _, arquivos in os.walk(self.diretorio):
+            for nome in arquivos:
+                if nome.endswith(".pdf"):
+                    caminho = os.path.join(raiz, nome)
+                    try:
+                        info = os.stat(caminho)
+                    except FileNotFoundError:
+                        continue
+                    yield caminho, info.st_size, max(info.st_atime, info.st_mtime)
+
+    def aplicar_retencao(self):
+        """Remove os documentos selecionados pela política de retenção; devolve quantos saíram"""
+        removidos = 0
+        for caminho, _, _ in self.retencao.selecionar_para_remover(list(self.entradas())):
+            try:
+                os.remove(caminho)
+                removidos += 1
+            except FileNotFoundError:
+                pass
+        return removidos
+
+    def aplicar_retencao_em_segundo_plano(self):
+        """Aplica a retenção numa thread de fundo; não faz nada se uma já estiver rodando"""
+        with self._lock:
+            if self._retencao_rodando:
+                return
+            self._retencao_rodando = True
+        threading.Thread(target=self._rodar_retencao, name="arquivo-retencao", daemon=True).start()
+
+    def _rodar_retencao(self):
+        try:
+            self.aplicar_retencao()
+        except Exception:
+            logger.exception("Falha ao aplicar a retenção do arquivo de documentos")
+        finally:
+            with self._lock:
+                self._retencao_rodando = False
+
+
+arquivo_documentos = ArquivoDocumentos()
@@ -0,0 +1,356 @@
+"""
+Catálogo local de veículos (marca/modelo) para o autocompletar dos campos
+veiculoMarcaModelo/veiculoNome.
+
+O catálogo vem de um CSV (POST /api/veiculos/importar), que substitui o conteúdo
+da tabela veiculo. No SQLite, o índice de veiculo.chave atende as buscas por
+prefixo e a tabela FTS5 veiculo_trigramas (tokenizador trigram), as buscas por
+trecho; é o caminho usado com CATALOGO_MEMORIA=0.
+
+Em memória, cada processo mantém um IndiceVeiculos compacto, recarregado quando a
+versão da tabela muda (services/versoes.py, compartilhada entre os workers); a
+recarga roda numa thread de fundo e as consultas usam o índice anterior até ela
+terminar:
+
+    chaves    todas as chaves normalizadas, em ordem, numa única string separada
+              por "\\n", com o início de cada uma num array('I')
+    nomes     os nomes de exibição, também numa única string com array de inícios
+    palavras  array('I') com a posição de cada palavra que não é a primeira da sua
+              chave, em ordem do texto que começa nela (um array de sufixos só dos
+              inícios de palavra)
+    trigramas cada trigrama -> faixa de um único array('I') com as chaves (em
+              ordem) que o contêm
+
+Uma consulta é: o intervalo de chaves que começam com o texto (busca binária),
+depois o intervalo de palavras que começam com ele (outra busca binária) e, se
+ainda faltarem itens, os trechos no meio de palavras, conferindo só as chaves do
+trigrama mais raro da consulta (com 1 ou 2 caracteres, str.find na string de
+chaves). Cada etapa para ao juntar `limite` itens.
+"""
+import csv
+import io
+import logging
+import re
+import threading
+import unicodedata
+from array import array
+from bisect import bisect_left, bisect_right
+
+from flask import current_app
+from sqlalchemy import bindparam, column, delete, func, insert, select, table, text
+
+from src.models.user import db
+from src.models.veiculo import Veiculo
+from src.services.versoes import tabela_alterada, versoes_tabelas
+
+logger = logging.getLogger(__name__)
+
+TABELA = "veiculo"
+
+# Itens devolvidos por consulta: padrão e máximo
+LIMITE_PADRAO = 10
+LIMITE_MAXIMO = 50
+
+# Caracteres considerados da consulta (o resto é ignorado)
+MAX_CONSULTA = 60
+
+# Linhas inseridas por INSERT na importação
+VEICULOS_POR_INSERT = 1000
+
+SEPARADORES = re.compile(r"[^A-Z0-9.]+")
+
+# Tabela FTS5 (tokenizador trigram) sobre veiculo.chave, criada em models/veiculo.py
+TRIGRAMAS = table("veiculo_trigramas", column("rowid"), column("chave"))
+
+
+class CatalogoInvalido(ValueError):
+    """CSV do catálogo sem as colunas esperadas"""
+
+
+def normalizar(texto):
+    """"Fiat/Uno Mille  Fire" -> "FIAT UNO MILLE FIRE": sem acentos, maiúsculo, separadores como espaço"""
+    sem_acento = unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode("ascii")
+    return SEPARADORES.sub(" ", sem_acento.upper()).strip()
+
+
+def _proxima(texto):
+    """Menor string maior que todas as que começam com `texto`"""
+    return texto[:-1] + chr(ord(texto[-1]) + 1)
+
+
+class IndiceVeiculos:
+    """Estrutura imutável de consulta, montada a partir de (id, nome, chave) em ordem de chave"""
+
+    def __init__(self, linhas):
+        ids, nomes, chaves = array('I'), [], []
+        for veiculo_id, nome, chave in linhas:
+            ids.append(veiculo_id)
+            nomes.append(nome)
+            chaves.append(chave)
+        self.ids = ids
+        self.chaves, self.inicios = self._juntar(chaves)
+        self.nomes, self.inicios_nomes = self._juntar(nomes)
+
+        todas = self.chaves
+        palavras = [inicio + i + 1 for inicio, chave in zip(self.inicios, chaves)
+                    for i, c in enumerate(chave) if c == " "]
+        palavras.sort(key=lambda p: todas[p:todas.index("\n", p)])
+        self.palavras = array('I', palavras)
+
+        listas = {}
+        for posicao, chave in enumerate(chaves):
+            for trigrama in {chave[i:i + 3] for i in range(len(chave) - 2)}:
+                listas.setdefault(trigrama, array('I')).append(posicao)
+        self.trigramas = {}
+        self.postagens = array('I')
+        for trigrama, posicoes in listas.items():
+            self.trigramas[trigrama] = (len(self.postagens), len(self.postagens) + len(posicoes))
+            self.postagens.extend(posicoes)
+
+    @staticmethod
+    def _juntar(textos):
+        inicios = array('I', [0])
+        for texto in textos:
+            inicios.append(inicios[-1] + len(texto) + 1)
+        return "\n".join(textos) + "\n", inicios
+
+    def __len__(self):
+        return len(self.ids)
+
+    def bytes_em_memoria(self):
+        arrays = (self.ids, self.inicios, self.inicios_nomes, self.palavras, self.postagens)
+        return len(self.chaves) + len(self.nomes) + sum(a.itemsize * len(a) for a in arrays)
+
+    def item(self, posicao):
+        inicio, fim = self.inicios_nomes[posicao], self.inicios_nomes[posicao + 1] - 1
+        nome = self.nomes[inicio:fim]
+        marca, _, modelo = nome.partition("/")
+        return {'id': self.ids[posicao], 'marca': marca, 'modelo': modelo, 'marcaModelo': nome}
+
+    def buscar(self, consulta, limite=LIMITE_PADRAO):
+        """Posições dos itens: chaves que começam com a consulta, palavras que começam com ela, trechos"""
+        chaves, inicios, n = self.chaves, self.inicios, len(consulta)
+        if not n or not len(self):
+            return []
+
+        def prefixo(inicio):
+            return chaves[inicio:inicio + n]
+
+        # 1. Chave inteira começando com a consulta: um intervalo contíguo de posições
+        primeira = bisect_left(inicios, consulta, 0, len(self), key=prefixo)
+        ultima = bisect_right(inicios, consulta, primeira, len(self), key=prefixo)
+        encontrados = list(range(primeira, min(ultima, primeira + limite)))
+        if len(encontrados) == limite:
+            return encontrados
+        vistos = set(encontrados)
+
+        # 2. Alguma palavra (depois da primeira) começando com a consulta
+        palavras = self.palavras
+        inicio = bisect_left(palavras, consulta, key=prefixo)
+        fim = bisect_right(palavras, consulta, inicio, key=prefixo)
+        for p in range(inicio, fim):
+            posicao = bisect_right(inicios, palavras[p]) - 1
+            if posicao not in vistos:
+                vistos.add(posicao)
+                encontrados.append(posicao)
+                if len(encontrados) == limite:
+                    return encontrados
+
+        # 3. A consulta no meio de uma palavra: candidatos do trigrama mais raro dela
+        if n < 3:
+            candidatos = self._trecho_curto(consulta)
+        else:
+            faixas = [self.trigramas.get(consulta[i:i + 3], (0, 0)) for i in range(n - 2)]
+            inicio, fim = min(faixas, key=lambda faixa: faixa[1] - faixa[0])
+            candidatos = self.postagens[inicio:fim]
+        for posicao in candidatos:
+            if posicao not in vistos and chaves.find(consulta, inicios[posicao], inicios[posicao + 1]) != -1:
+                vistos.add(posicao)
+                encontrados.append(posicao)
+                if len(encontrados) == limite:
+                    break
+        return encontrados
+
+    def _trecho_curto(self, consulta):
+        """Posições das chaves que contêm `consulta` (1 ou 2 caracteres), pela string inteira"""
+        chaves, inicios = self.chaves, self.inicios
+        achado = chaves.find(consulta)
+        while achado != -1:
+            posicao = bisect_right(inicios, achado) - 1
+            yield posicao
+            achado = chaves.find(consulta, inicios[posicao + 1])
+
+
+class CatalogoVeiculos:
+    """Índice em memória do processo, válido enquanto a versão da tabela veiculo não muda"""
+
+    def __init__(self):
+        self._indice = None
+        self._versao = None
+        self._lock = threading.Lock()
+        self._recarregando = False
+        self.recargas = 0
+        self._trigramas = None
+
+    def indice(self):
+        """
+        Índice do processo. Só a primeira consulta espera a montagem; depois de uma
+        importação em outro processo, o índice novo é montado numa thread de fundo e
+        as consultas seguem no anterior até a troca.
+        """
+        versao = versoes_tabelas.versao(TABELA)
+        if self._indice is None:
+            with self._lock:
+                if self._indice is None:
+                    self._recarregar(versao)
+        elif self._versao != versao:
+            self._recarregar_em_segundo_plano(versao)
+        return self._indice
+
+    def _recarregar(self, versao):
+        linhas = db.session.execute(select(Veiculo.id, Veiculo.nome, Veiculo.chave).order_by(Veiculo.chave)).all()
+        self._indice, self._versao = IndiceVeiculos(linhas), versao
+        self.recargas += 1
+
+    def _recarregar_em_segundo_plano(self, versao):
+        with self._lock:
+            if self._recarregando:
+                return
+            self._recarregando = True
+        app = current_app._get_current_object()
+
+        def recarregar():
+            try:
+                with app.app_context():
+                    self._recarregar(versao)
+            except Exception:
+                logger.exception("Falha ao recarregar o índice do catálogo de veículos")
+            finally:
+                self._recarregando = False
+
+        threading.Thread(target=recarregar, name="catalogo-indice", daemon=True).start()
+
+    def _tem_trigramas(self):
+        # Pela sessão: na importação ela já tem a escrita do banco
+        if self._trigramas is None:
+            self._trigramas = db.session.get_bind(Veiculo).dialect.name == "sqlite" and db.session.execute(
+                text("SELECT 1 FROM sqlite_master WHERE name = 'veiculo_trigramas'")).first() is not None
+        return self._trigramas
+
+    def autocompletar(self, texto, limite=LIMITE_PADRAO):
+        consulta = normalizar(texto[:MAX_CONSULTA])
+        if not consulta:
+            return []
+        if current_app.config.get("CATALOGO_MEMORIA", True):
+            indice = self.indice()
+            return [indice.item(posicao) for posicao in indice.buscar(consulta, limite)]
+        return self.buscar_sql(consulta, limite)
+
+    def buscar_sql(self, consulta, limite=LIMITE_PADRAO):
+        """
+        Mesma ordem da busca em memória, pelo SQLite, em até três consultas com LIMIT:
+        chaves que começam com a consulta (intervalo do índice de chave), palavras que
+        começam com ela e trechos no meio de palavras (tabela de trigramas). Como a
+        importação grava o catálogo em ordem de chave, a tabela de trigramas devolve
+        os casamentos já nessa ordem (pelo rowid) e cada consulta para ao juntar os
+        itens, sem ordenar todos os casamentos. Sem FTS5, ou quando o padrão não tem
+        um trigrama, o LIKE percorre o índice de chave em ordem, com a mesma parada.
+        """
+        parametros = {"inicio": consulta, "fim": _proxima(consulta), "prefixo": f"{consulta}%",
+                      "palavra": f"% {consulta}%", "trecho": f"%{consulta}%", "limite": limite}
+        itens = _itens(db.session.execute(_PREFIXO, parametros))
+        for nivel, trigrama in (("palavra", len(consulta) >= 2), ("trecho", len(consulta) >= 3)):
+            if len(itens) == limite:
+                break
+            parametros["limite"] = limite - len(itens)
+            consulta_nivel = _TRECHOS[nivel, trigrama and self._tem_trigramas()]
+            itens += _itens(db.session.execute(consulta_nivel, parametros))
+        return itens
+
+    def importar(self, arquivo, encoding="utf-8-sig"):
+        """
+        Substitui o catálogo pelo CSV (colunas marca e modelo, ou uma coluna
+        marcaModelo no formato "MARCA/MODELO"; separador ";" ou ","). Linhas vazias,
+        incompletas ou repetidas (mesma chave) são ignoradas. Devolve
+        (importados, [(linha, motivo)] das ignoradas).
+        """
+        texto = io.TextIOWrapper(arquivo, encoding=encoding, newline="")
+        primeira = texto.readline()
+        delimitador = ";" if primeira.count(";") > primeira.count(",") else ","
+        colunas = {re.sub(r"[^a-z]", "", normalizar(c).lower()): i
+                   for i, c in enumerate(next(csv.reader([primeira], delimiter=delimitador)))}
+        if not ({"marca", "modelo"} <= colunas.keys() or "marcamodelo" in colunas):
+            raise CatalogoInvalido("o CSV precisa das colunas marca e modelo, ou marcaModelo")
+
+        linhas, ignoradas, chaves = [], [], set()
+        for numero, valores in enumerate(csv.reader(texto, delimiter=delimitador), start=2):
+            if "marca" in colunas and "modelo" in colunas:
+                campos = [valores[colunas[c]] if colunas[c] < len(valores) else "" for c in ("marca", "modelo")]
+            else:
+                campos = (valores[colunas["marcamodelo"]] if colunas["marcamodelo"] < len(valores) else "")
+                campos = campos.partition("/")[::2]
+            marca, modelo = (" ".join(c.split()) for c in campos)
+            if not marca and not modelo:
+                continue
+            if not marca or not modelo or "/" in marca:
+                ignoradas.append((numero, "marca e modelo obrigatórios (marca sem '/')"))
+                continue
+            if len(marca) > Veiculo.marca.type.length or len(modelo) > Veiculo.modelo.type.length:
+                ignoradas.append((numero, "marca ou modelo longo demais"))
+                continue
+            nome = f"{marca}/{modelo}"
+            chave = normalizar(nome)
+            if chave in chaves:
+                ignoradas.append((numero, "repetido"))
+                continue
+            chaves.add(chave)
+            linhas.append({"marca": marca, "modelo": modelo, "nome": nome, "chave": chave})
+
+        # Em ordem de chave: o id (rowid dos trigramas) segue a ordem das chaves
+        linhas.sort(key=lambda linha: linha["chave"])
+        db.session.execute(delete(Veiculo))
+        for inicio in range(0, len(linhas), VEICULOS_POR_INSERT):
+            db.session.execute(insert(Veiculo), linhas[inicio:inicio + VEICULOS_POR_INSERT])
+        if self._tem_trigramas():
+            db.session.execute(text("INSERT INTO veiculo_trigramas(veiculo_trigramas) VALUES ('rebuild')"))
+        db.session.commit()
+        tabela_alterada(TABELA)
+        if self._indice is not None:
+            # Quem importou monta o índice novo já: a resposta da importação reflete o catálogo
+            with self._lock:
+                self._recarregar(versoes_tabelas.versao(TABELA))
+        return len(linhas), ignoradas
+
+    def total(self):
+        return db.session.scalar(select(func.count()).select_from(Veiculo))
+
+
+def _itens(linhas):
+    return [{'id': veiculo_id, 'marca': marca, 'modelo': modelo, 'marcaModelo': nome}
+            for veiculo_id, marca, modelo, nome in linhas]
+
+
+# Consultas de buscar_sql, montadas uma vez, só com parâmetros
+_COLUNAS = (Veiculo.id, Veiculo.marca, Veiculo.modelo, Veiculo.nome)
+_PREFIXO = (select(*_COLUNAS)
+            .where(Veiculo.chave >= bindparam("inicio"), Veiculo.chave < bindparam("fim"))
+            .order_by(Veiculo.chave).limit(bindparam("limite")))
+
+
+def _consulta_trecho(padrao, anteriores, trigramas):
+    """Itens com chave LIKE :padrao que não casaram com os padrões `anteriores`, em ordem de chave"""
+    consulta = (select(*_COLUNAS).where(*(Veiculo.chave.not_like(bindparam(p)) for p in anteriores))
+                .limit(bindparam("limite")))
+    if trigramas:
+        # Pela tabela de trigramas (padrão com 3+ caracteres seguidos): rowid em ordem = chave em ordem
+        return (consulta.join(TRIGRAMAS, TRIGRAMAS.c.rowid == Veiculo.id)
+                .where(TRIGRAMAS.c.chave.like(bindparam(padrao))).order_by(TRIGRAMAS.c.rowid))
+    # LIKE percorrendo o índice de chave em ordem, até juntar os itens
+    return consulta.where(Veiculo.chave.like(bindparam(padrao))).order_by(Veiculo.chave)
+
+
+_TRECHOS = {(padrao, trigramas): _consulta_trecho(padrao, anteriores, trigramas)
+            for padrao, anteriores in (("palavra", ("prefixo",)), ("trecho", ("prefixo", "palavra")))
+            for trigramas in (True, False)}
+
+CATALOGO_VEICULOS = CatalogoVeiculos()
@@ -0,0 +1,153 @@
+"""
+Biblioteca de cláusulas de poderes com layout pré-calculado.
+
+Os textos de poderes padrão (PODERES_PROCURACAO, PODERES_REPRESENTACAO,
+PODERES_SUBSTABELECIMENTO) e as cláusulas dos clientes, guardadas no banco com
+versão, são referenciados nos payloads por poderesId, em vez de o texto inteiro
+viajar em toda requisição.
+
+O parágrafo de poderes é o bloco mais caro de quebrar em linhas (multi_cell com
+justificação). Aqui a quebra de cada versão de cláusula é feita uma vez, ao
+salvar, e fica em cache por estado de fonte (família, estilo, tamanho, largura).
+Na renderização as linhas prontas são só reposicionadas no documento, com o mesmo
+resultado de pdf.multi_cell(0, 5, texto, align="J"). Editar uma cláusula cria uma
+versão nova.
+
+A chave do cache leva o próprio texto, não só (id, versão): o texto sempre vem do
+banco, e um id removido e recriado recomeça na versão 1, então (id, versão) pode
+voltar com outro texto, e os outros workers do gunicorn não veem o invalidar()
+deste processo.
+"""
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
+
+from src.services.fragmentos import desenhar_justificado, estado_fonte, paragrafo_secao, quebrar_justificado
+
+
+# Número máximo de layouts mantidos em memória (por versão de cláusula + estado de fonte)
+MAX_LAYOUTS_CACHE = 256
+
+# Altura de linha usada nos parágrafos de poderes de todos os documentos
+ALTURA_LINHA = 5
+
+
+class ClausulaNaoEncontrada(LookupError):
+    """poderesId (ou poderesVersao) que não existe na biblioteca"""
+
+
+class ClausulaResolvida(NamedTuple):
+    id: str
+    versao: int
+    texto: str
+
+
+class BibliotecaClausulas:
+    """Resolve poderesId em texto e mantém o cache de linhas já quebradas"""
+
+    def __init__(self, max_layouts=MAX_LAYOUTS_CACHE):
+        self.padroes = {}
+        self.max_layouts = max_layouts
+        self._layouts = OrderedDict()
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.faltas = 0
+
+    def registrar_padrao(self, clausula_id, nome, texto):
+        """Registra um texto de poderes embutido no código (somente leitura, versão 1)"""
+        self.padroes[clausula_id] = (nome, ClausulaResolvida(clausula_id, 1, texto))
+
+    def resolver(self, clausula_id, versao=None):
+        """Texto de uma cláusula (padrão ou do banco); sem versão, usa a atual"""
+        from src.models.clausula import Clausula, ClausulaVersao
+
+        if clausula_id in self.padroes:
+            clausula = self.padroes[clausula_id][1]
+            if versao not in (None, clausula.versao):
+                raise ClausulaNaoEncontrada(clausula_id)
+            return clausula
+        consulta = ClausulaVersao.query.filter(ClausulaVersao.clausula_id == clausula_id)
+        if versao is None:
+            consulta = consulta.join(Clausula).filter(ClausulaVersao.versao == Clausula.versao_atual)
+        else:
+            consulta = consulta.filter(ClausulaVersao.versao == versao)
+        registro = consulta.with_entities(ClausulaVersao.versao, ClausulaVersao.texto).first()
+        if registro is None:
+            raise ClausulaNaoEncontrada(clausula_id)
+        return ClausulaResolvida(clausula_id, registro.versao, registro.texto)
+
+    @staticmethod
+    def chave(clausula, pdf, largura):
+        return (clausula.id, clausula.texto, estado_fonte(pdf), round(largura, 4))
+
+    def layout(self, clausula, pdf, largura):
+        """Linhas quebradas da cláusula para o estado de fonte atual do pdf"""
+        chave = self.chave(clausula, pdf, largura)
+        with self._lock:
+            linhas = self._layouts.get(chave)
+            if linhas is not None:
+                self._layouts.move_to_end(chave)
+                self.acertos += 1
+                return linhas
+            self.faltas += 1
+        linhas = quebrar_justificado(pdf, clausula.texto, largura, ALTURA_LINHA)
+        with self._lock:
+            self._layouts[chave] = linhas
+            while len(self._layouts) > self.max_layouts:
+                self._layouts.popitem(last=False)
+        return linhas
+
+    def preparar(self, clausula):
+        """
+        Pré-calcula as linhas da cláusula no estado de fonte dos documentos
+        (Times 12, margens de 20 mm), para que a primeira emissão já acerte o cache.
+        """
+        from src.services.pdf import criar_pdf
+
+        pdf = criar_pdf({})
+        pdf.add_page()
+        pdf.set_margins(20, 20, 20)
+        pdf.set_font("Times", "", 12)
+        self.layout(clausula, pdf, pdf.w - pdf.r_margin - pdf.x)
+
+    def invalidar(self, clausula_id):
+        """Libera os layouts de todas as versões de uma cláusula (só memória: ver chave)"""
+        with self._lock:
+            for chave in [c for c in self._layouts if c[0] == clausula_id]:
+                del self._layouts[chave]
+
+    def escrever(self, pdf, clausula):
+        """Equivalente a pdf.multi_cell(0, ALTURA_LINHA, clausula.texto, align="J")"""
+        linhas = self.layout(clausula, pdf, pdf.w - pdf.r_margin - pdf.x)
+        desenhar_justificado(pdf, linhas, ALTURA_LINHA)
+
+    def estatisticas(self):
+        with self._lock:
+            return {"acertos": self.acertos, "faltas": self.faltas}
+
+
+BIBLIOTECA_CLAUSULAS = BibliotecaClausulas()
+
+
+def resolver_poderes(data, padrao_id):
+    """
+    Poderes do documento: o texto livre em "poderes" (comportamento original), a
+    cláusula referenciada por "poderesId"/"poderesVersao" ou, sem nenhum dos dois,
+    a cláusula padrão do tipo de documento.
+    """
+    if "poderes" in data:
+        return data["poderes"]
+    return BIBLIOTECA_CLAUSULAS.resolver(data.get("poderesId", padrao_id), data.get("poderesVersao"))
+
+
+def escrever_poderes(pdf, poderes):
+    """Escreve o parágrafo de poderes justificado, usando o layout em cache quando houver"""
+    if isinstance(poderes, ClausulaResolvida):
+        BIBLIOTECA_CLAUSULAS.escrever(pdf, poderes)
+    else:
+        paragrafo_secao(pdf, ALTURA_LINHA, poderes, "poderes")
+
+
+def texto_poderes(poderes):
+    """Texto puro dos poderes, para os documentos que os escrevem no meio de outro parágrafo"""
+    return poderes.texto if isinstance(poderes, ClausulaResolvida) else poderes
@@ -0,0 +1,117 @@
+"""
+Perfis de compressão da saída dos documentos.
+
+Dois tipos de tráfego pedem coisas diferentes: o download interativo quer a menor
+latência de renderização; a emissão em lote e o arquivo querem o menor arquivo
+(armazenamento, envio para celular). Cada perfil combina:
+
+    nivel           nível do zlib nos fluxos gerados por documento (conteúdo das
+                    páginas, ToUnicode, CIDToGIDMap); None mantém a saída do fpdf2
+                    byte a byte (conteúdo no nível 6, ToUnicode sem compressão)
+    fluxos_objetos  os objetos que não são fluxos (páginas, dicionários de fonte,
+                    recursos, catálogo, /Info) vão comprimidos num único fluxo de
+                    objetos, com a xref também em fluxo (PDF 1.5)
+    enxugar         omite o /ProcSet, obsoleto desde o PDF 1.4
+    recorte_exato   embute só os glifos usados; sem ele, o documento que cabe nos
+                    CARACTERES_BASE leva o recorte base da face, pronto desde a
+                    primeira emissão (services/fonts.py)
+
+O fluxo da fonte vem sempre do registro, já comprimido: o nível não muda o custo
+dele, e o nível 9 não ganha nada sobre o 6 nesses fluxos. O que pesa na latência
+é montar o recorte exato de um conjunto de glifos ainda fora do cache; o perfil
+rapido troca esse recorte pelo base (~16 KB a mais, o dobro do padrao) e usa o
+nível 1 nos demais fluxos (ver scripts/bench_compressao.py). A saída
+linearizada mantém o próprio layout (sem fluxos de objetos); o nível e o enxugar
+valem nela também. Documentos criptografados ou assinados saem sem fluxos de
+objetos. Todos os perfis são determinísticos.
+
+Escolha por implantação (PDF_COMPRESSAO) ou por requisição (?compressao=); os
+workers da fila usam PDF_COMPRESSAO do próprio ambiente.
+"""
+import re
+import zlib
+from typing import NamedTuple, Optional
+
+from fpdf.output import ContentWithoutID
+from fpdf.syntax import Name, PDFObject
+
+
+class PerfilCompressao(NamedTuple):
+    nivel: Optional[int]
+    fluxos_objetos: bool
+    enxugar: bool
+    recorte_exato: bool = True
+
+
+PERFIS_COMPRESSAO = {
+    "rapido": PerfilCompressao(nivel=1, fluxos_objetos=False, enxugar=False, recorte_exato=False),
+    "padrao": PerfilCompressao(nivel=None, fluxos_objetos=False, enxugar=False),
+    "compacto": PerfilCompressao(nivel=9, fluxos_objetos=True, enxugar=True),
+}
+PERFIL_PADRAO = PERFIS_COMPRESSAO["padrao"]
+
+CABECALHO = re.compile(rb"^%PDF-1\.[0-4]")
+TRAILER = re.compile(rb"trailer\n<<\n(.*?)\n>>\nstartxref\n", re.S)
+
+
+def comprimir_fluxo(fluxo, conteudo, nivel):
+    """Grava `conteudo` comprimido no nível pedido num PDFContentStream já criado"""
+    if isinstance(conteudo, str):
+        conteudo = conteudo.encode("latin-1")
+    fluxo._contents = zlib.compress(conteudo, nivel)
+    fluxo.filter = Name("FlateDecode")
+    fluxo.length = len(fluxo._contents)
+
+
+def _e_fluxo(pdf_obj):
+    return type(pdf_obj).content_stream is not PDFObject.content_stream
+
+
+def empacotar_objetos(produtor, nivel):
+    """
+    Reescreve a saída já serializada de um OutputProducer com os objetos que não
+    são fluxos dentro de um fluxo de objetos (/ObjStm) e a xref num fluxo (/XRef).
+    Os bytes de cada objeto saem do buffer pelos deslocamentos da xref original;
+    nada é serializado de novo. O /ID continua o da saída original.
+    """
+    buffer = produtor.buffer
+    objetos = [obj for obj in produtor.pdf_objs if not isinstance(obj, ContentWithoutID)]
+    inicio_xref = buffer.rindex(b"\nxref\n") + 1
+    trailer = TRAILER.search(buffer, inicio_xref).group(1).split(b"\n")
+    limites = [produtor.offsets[obj.id] for obj in objetos] + [inicio_xref]
+
+    num_objstm = objetos[-1].id + 1
+    num_xref = num_objstm + 1
+    saida = bytearray(CABECALHO.sub(b"%PDF-1.5", bytes(buffer[:limites[0]])))
+    entradas = {0: (0, 0, 0xFFFF)}
+    indice, corpos, posicao = [], [], 0
+    for obj, inicio, fim in zip(objetos, limites, limites[1:]):
+        dados = buffer[inicio:fim]
+        if _e_fluxo(obj):
+            entradas[obj.id] = (1, len(saida), 0)
+            saida += dados
+            continue
+        # "N 0 obj\n<corpo>\nendobj\n"
+        corpo = bytes(dados[dados.index(b"\n") + 1:dados.rindex(b"\nendobj")])
+        entradas[obj.id] = (2, num_objstm, len(corpos))
+        indice.append(b"%d %d" % (obj.id, posicao))
+        corpos.append(corpo)
+        posicao += len(corpo) + 1
+
+    cabecalho_objstm = b" ".join(indice) + b"\n"
+    objstm = zlib.compress(cabecalho_objstm + b"\n".join(corpos), nivel)
+    entradas[num_objstm] = (1, len(saida), 0)
+    saida += (b"%d 0 obj\n<</Type /ObjStm /N %d /First %d /Filter /FlateDecode /Length %d>>\nstream\n"
+              % (num_objstm, len(corpos), len(cabecalho_objstm), len(objstm))) + objstm + b"\nendstream\nendobj\n"
+
+    inicio_xref = len(saida)
+    entradas[num_xref] = (1, inicio_xref, 0)
+    largura = max(2, (inicio_xref.bit_length() + 7) // 8)
+    linhas = b"".join(tipo.to_bytes(1, "big") + campo.to_bytes(largura, "big") + extra.to_bytes(2, "big")
+                      for tipo, campo, extra in (entradas[numero] for numero in range(num_xref + 1)))
+    xref = zlib.compress(linhas, nivel)
+    trailer = b" ".join(linha for linha in trailer if not linha.startswith(b"/Size "))
+    saida += (b"%d 0 obj\n<</Type /XRef /Size %d /W [1 %d 2] %s /Filter /FlateDecode /Length %d>>\nstream\n"
+              % (num_xref, num_xref + 1, largura, trailer, len(xref))) + xref + b"\nendstream\nendobj\n"
+    saida += b"startxref\n%d\n%%%%EOF\n" % inicio_xref
+    return saida
@@ -0,0 +1,169 @@
+"""
+Fila de renderização durável em SQLite, consumida por workers separados.
+
+A aplicação grava cada tarefa (tipo + payload já validado) no banco da fila
+(FILA_RENDER_DB, bind "fila" do SQLAlchemy) e responde 202. Qualquer número de
+processos `python -m src.worker`, nesta máquina ou em outro nó que monte o mesmo
+volume, reserva as tarefas, renderiza com as mesmas funções montar_<tipo> das rotas
+generate_* e grava o PDF no arquivo endereçado por conteúdo (ARQUIVO_DOCUMENTOS_DIR,
+no mesmo volume); o resultado sai em GET /api/documents/<hash>.pdf.
+
+Reserva: um único UPDATE ... RETURNING escolhe a tarefa com reserva vencida ou a
+pendente mais antiga e grava o dono e o lease (FILA_LEASE_S). O SQLite serializa as
+escritas, então duas reservas nunca pegam a mesma tarefa. O lease é bem maior que
+o prazo de renderização (RENDER_LIMITE_MS) e não precisa ser renovado: o worker
+não inicia com o prazo desligado (0) ou maior que metade do lease. Se o worker
+morrer no meio, a tarefa volta para a fila quando o lease vencer. Uma falha devolve
+a tarefa com espera exponencial até FILA_MAX_TENTATIVAS; depois, ela fica como
+"falhou", com o erro; uma falha do próprio payload (cláusula inexistente, por
+exemplo) vai direto para "falhou". Só o dono atual conclui a tarefa, e o worker só registra a
+emissão depois de concluir; como a saída é determinística, uma tarefa
+renderizada duas vezes cai no mesmo arquivo.
+
+Com todos os processos na mesma máquina o banco fica em modo WAL (leitores não
+esperam o escritor). O WAL usa memória compartilhada e não funciona entre nós: com
+workers em outras máquinas, FILA_RENDER_WAL=0 volta ao journal de rollback, que
+depende só dos locks de arquivo do volume compartilhado.
+"""
+import json
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app
+from sqlalchemy import bindparam, event, func, insert, select, update
+
+from src.models.fila import TarefaRenderizacao
+from src.models.user import db
+
+# Espera antes de uma nova tentativa: ESPERA_RETENTATIVA_S * 2 ** (tentativas - 1)
+ESPERA_RETENTATIVA_S = 2
+
+# Tarefas inseridas por INSERT em enfileirar_varios
+TAREFAS_POR_INSERT = 500
+
+
+def _agora():
+    return datetime.now(timezone.utc)
+
+
+class FilaRenderizacao:
+    """Operações da fila: enfileirar, reservar com lease, concluir, falhar e contar"""
+
+    def init_app(self, app):
+        wal = app.config.get('FILA_RENDER_WAL', True)
+        with app.app_context():
+            @event.listens_for(db.engines["fila"], "connect")
+            def configurar(conexao, _):
+                cursor = conexao.cursor()
+                if wal:
+                    cursor.execute("PRAGMA journal_mode=WAL")
+                    cursor.execute("PRAGMA synchronous=NORMAL")
+                cursor.close()
+        app.extensions['fila_renderizacao'] = self
+
+    def enfileirar(self, tipo, dados, lote=None):
+        tarefa = TarefaRenderizacao(tipo=tipo, dados=json.dumps(dados, ensure_ascii=False), lote=lote)
+        db.session.add(tarefa)
+        db.session.commit()
+        return tarefa
+
+    def enfileirar_varios(self, itens, lote=None):
+        """
+        Enfileira (tipo, dados) ou (tipo, dados, ids das emissões substituídas) em lotes
+        de INSERTs de várias linhas; devolve quantas entraram
+        """
+        agora = _agora()
+        linhas = [{"tipo": tipo, "dados": json.dumps(dados, ensure_ascii=False), "lote": lote, "estado": "pendente",
+                   "substitui": json.dumps(substitui[0]) if substitui else None,
+                   "tentativas": 0, "criado_em": agora, "disponivel_em": agora} for tipo, dados, *substitui in itens]
+        for inicio in range(0, len(linhas), TAREFAS_POR_INSERT):
+            db.session.execute(insert(TarefaRenderizacao), linhas[inicio:inicio + TAREFAS_POR_INSERT])
+        db.session.commit()
+        return len(linhas)
+
+    def reservar(self, dono):
+        """Reserva a próxima tarefa para `dono`; devolve (id, tipo, dados, tentativas, lote, substitui) ou None"""
+        agora = _agora()
+        config = current_app.config
+        linha = db.session.execute(_RESERVAR, {
+            "agora": agora, "maximo": config.get("FILA_MAX_TENTATIVAS", 3), "reservante": dono,
+            "lease": agora + timedelta(seconds=config.get("FILA_LEASE_S", 60)),
+        }).first()
+        db.session.commit()
+        return linha
+
+    def concluir(self, tarefa_id, dono, hash_documento):
+        """
+        Marca a tarefa como concluída se `dono` ainda tem a reserva; devolve se marcou.
+        Usa uma conexão própria do banco da fila: o que estiver pendente na sessão (a
+        emissão registrada pelo worker) só é confirmado por quem chama, depois.
+        """
+        with db.engines["fila"].begin() as conexao:
+            resultado = conexao.execute(_CONCLUIR, {"tarefa_id": tarefa_id, "reservante": dono,
+                                                    "hash": hash_documento, "agora": _agora()})
+        return resultado.rowcount == 1
+
+    def falhar(self, tarefa_id, dono, tentativas, erro, definitiva=False):
+        """
+        Devolve a tarefa à fila com espera exponencial, ou a encerra como "falhou" na
+        última tentativa ou se a falha é `definitiva` (repetir daria o mesmo erro)
+        """
+        agora = _agora()
+        if definitiva or tentativas >= current_app.config.get("FILA_MAX_TENTATIVAS", 3):
+            valores = {"estado": "falhou", "concluido_em": agora}
+        else:
+            espera = timedelta(seconds=ESPERA_RETENTATIVA_S * 2 ** (tentativas - 1))
+            valores = {"estado": "pendente", "disponivel_em": agora + espera}
+        db.session.execute(
+            update(TarefaRenderizacao)
+            .where(TarefaRenderizacao.id == tarefa_id, TarefaRenderizacao.dono == dono,
+                   TarefaRenderizacao.estado == "executando")
+            .values(lease_ate=None, erro=erro[:2000], **valores)
+        )
+        db.session.commit()
+
+    def expirar(self):
+        """Encerra como "falhou" as reservas vencidas que já gastaram todas as tentativas"""
+        agora = _agora()
+        resultado = db.session.execute(
+            update(TarefaRenderizacao)
+            .where(TarefaRenderizacao.estado == "executando", TarefaRenderizacao.lease_ate < agora,
+                   TarefaRenderizacao.tentativas >= current_app.config.get("FILA_MAX_TENTATIVAS", 3))
+            .values(estado="falhou", concluido_em=agora, lease_ate=None,
+                    erro="reserva vencida na última tentativa (worker interrompido?)")
+        )
+        db.session.commit()
+        return resultado.rowcount
+
+    def contagens(self, lote=None):
+        """Tarefas por estado (de um lote, ou da fila toda)"""
+        consulta = select(TarefaRenderizacao.estado, func.count()).group_by(TarefaRenderizacao.estado)
+        if lote is not None:
+            consulta = consulta.where(TarefaRenderizacao.lote == lote)
+        contagens = {"pendente": 0, "executando": 0, "concluida": 0, "falhou": 0}
+        contagens.update(db.session.execute(consulta).all())
+        return contagens
+
+
+# Reserva e conclusão rodam a cada tarefa: montadas uma vez, só com parâmetros
+_vencida = (select(TarefaRenderizacao.id)
+            .where(TarefaRenderizacao.estado == "executando", TarefaRenderizacao.lease_ate < bindparam("agora"),
+                   TarefaRenderizacao.tentativas < bindparam("maximo"))
+            .order_by(TarefaRenderizacao.id).limit(1).scalar_subquery())
+_pendente = (select(TarefaRenderizacao.id)
+             .where(TarefaRenderizacao.estado == "pendente", TarefaRenderizacao.disponivel_em <= bindparam("agora"))
+             .order_by(TarefaRenderizacao.id).limit(1).scalar_subquery())
+_RESERVAR = (update(TarefaRenderizacao)
+             .where(TarefaRenderizacao.id == func.coalesce(_vencida, _pendente))
+             .values(estado="executando", dono=bindparam("reservante"), lease_ate=bindparam("lease"),
+                     tentativas=TarefaRenderizacao.tentativas + 1)
+             .returning(TarefaRenderizacao.id, TarefaRenderizacao.tipo, TarefaRenderizacao.dados,
+                        TarefaRenderizacao.tentativas, TarefaRenderizacao.lote, TarefaRenderizacao.substitui)
+             .execution_options(synchronize_session=False))
+_CONCLUIR = (update(TarefaRenderizacao)
+             .where(TarefaRenderizacao.id == bindparam("tarefa_id"), TarefaRenderizacao.dono == bindparam("reservante"),
+                    TarefaRenderizacao.estado == "executando")
+             .values(estado="concluida", hash_documento=bindparam("hash"),
+                     concluido_em=bindparam("agora"), lease_ate=None, erro=None)
+             .execution_options(synchronize_session=False))
+
+fila_renderizacao = FilaRenderizacao()
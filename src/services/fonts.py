@@ -0,0 +1,438 @@
+"""
+Registro de fontes TTF compartilhado pelo processo.
+
+O FPDF.add_font() abre e analisa o arquivo TTF (cmap, larguras, descritor) a cada
+documento, e o OutputProducer gera o subset da fonte inteira a cada pdf.output().
+Aqui as fontes são analisadas uma única vez na inicialização e cada FPDF recebe
+uma cópia leve que compartilha as tabelas somente-leitura. O recorte (subset)
+também sai do caminho da requisição: cada documento embute só os glifos que usa
+(recorte exato), cortado de uma matriz preparada na inicialização e guardado em
+cache por conjunto de glifos.
+"""
+import copy
+import os
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+from functools import cached_property
+from io import BytesIO
+
+from fontTools import subset as ftsubset
+from fontTools import ttLib
+from fontTools.ttLib.sfnt import SFNTWriter
+from fpdf import FPDF
+from fpdf.fonts import SubsetMap, TTFFont
+from fpdf.output import LOGGER, CIDSystemInfo, OutputProducer, PDFFont, _tt_font_widths
+from fpdf.syntax import Name, PDFArray, PDFContentStream, PDFObject
+
+from src.services.compressao import PERFIL_PADRAO, comprimir_fluxo, empacotar_objetos
+
+DIRETORIO_FONTES = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'fonts')
+
+# Faces embutidas nos documentos. São registradas com a chave da família "Times"
+# para que os handlers continuem chamando pdf.set_font("Times", ...) sem mudanças;
+# sem os arquivos, o FPDF cai de volta na fonte core Times-Roman. A STIX General
+# tem as larguras da Times: a paginação é a mesma da fonte core (os layouts
+# "CABER EM 1 PÁGINA" contam com isso).
+FACES_PADRAO = {
+    "times": "STIXGeneral.ttf",
+    "timesB": "STIXGeneralBol.ttf",
+}
+
+# Faces de reserva (fallback do fpdf2) para os caracteres que as faces padrão não
+# têm, como as vogais vietnamitas com dois diacríticos. Só entram no PDF quando
+# algum caractere é desenhado com elas.
+FACES_RESERVA = {
+    "dejavu": "DejaVuSerif.ttf",
+    "dejavuB": "DejaVuSerif-Bold.ttf",
+}
+
+# Caracteres da matriz de cada face, preparada na inicialização: Latin-1 e a
+# pontuação tipográfica comum. Os recortes exatos de documentos que só usam esses
+# caracteres (a grande maioria) saem da matriz; os demais, da fonte inteira.
+CARACTERES_BASE = (
+    list(range(0x20, 0x7F))
+    + list(range(0xA0, 0x100))
+    + [0x2013, 0x2014, 0x2018, 0x2019, 0x201C, 0x201D, 0x2022, 0x2026, 0x20AC]
+)
+
+# Número máximo de recortes exatos mantidos em memória (por face + conjunto de glifos)
+MAX_SUBSETS_CACHE = 256
+
+
+def _recortar(dados, nomes_glifos, manter_nomes=False):
+    """
+    Recorta a fonte para os glifos pedidos e devolve
+    (bytes, bytes comprimidos com zlib, {nome do glifo: novo glyph id}).
+    Usa as opções do OutputProducer do fpdf2, sem as instruções de hinting TrueType
+    (ignoradas pelos visualizadores de PDF e responsáveis por metade do tamanho).
+    """
+    ttfont = ttLib.TTFont(BytesIO(dados), recalcTimestamp=False, fontNumber=0, lazy=True)
+    options = ftsubset.Options(notdef_outline=True, recommended_glyphs=True, hinting=False,
+                               glyph_names=manter_nomes)
+    options.drop_tables += ["FFTM", "GDEF", "GPOS", "GSUB", "MATH", "hdmx", "meta"]
+    subsetter = ftsubset.Subsetter(options)
+    subsetter.populate(glyphs=list(nomes_glifos))
+    subsetter.subset(ttfont)
+    glyph_ids = {nome: ttfont.getGlyphID(nome) for nome in nomes_glifos}
+    saida = BytesIO()
+    ttfont.save(saida)
+    ttfont.close()
+    dados_recorte = saida.getvalue()
+    return dados_recorte, zlib.compress(dados_recorte), glyph_ids
+
+
+class MatrizFace:
+    """
+    Recorte dos CARACTERES_BASE de uma face, sem hinting, desmontado por glifo.
+
+    O recorte exato de glifos da matriz mantém os glyph ids dela e deixa vazios os
+    contornos dos glifos não usados: é montado copiando bytes, sem o subsetter do
+    fontTools (~1 ms em vez de ~9 ms), e fica quase do tamanho de um recorte
+    renumerado (loca, hmtx e cmap da matriz são pequenos).
+    """
+
+    def __init__(self, dados, nomes_glifos):
+        ttfont = ttLib.TTFont(BytesIO(_recortar(dados, nomes_glifos, manter_nomes=True)[0]))
+        ordem = ttfont.getGlyphOrder()
+        self.glyph_ids = {nome: gid for gid, nome in enumerate(ordem)}
+        loca, glyf = ttfont["loca"], ttfont.reader["glyf"]
+        self.contornos = []
+        for gid in range(len(ordem)):
+            contorno = glyf[loca[gid]:loca[gid + 1]]
+            self.contornos.append(contorno + b"\0" * (-len(contorno) % 4))
+        tabela_glyf = ttfont["glyf"]
+        self.componentes = {gid: [self.glyph_ids[nome] for nome in tabela_glyf[nome].getComponentNames(tabela_glyf)]
+                            for gid, nome in enumerate(ordem) if tabela_glyf[nome].isComposite()}
+        self.tabelas = {tag: ttfont.reader[tag] for tag in ttfont.reader.keys()}
+        # loca longa (indexToLocFormat = 1) e post 3.0, sem os nomes dos glifos
+        self.tabelas["head"] = self.tabelas["head"][:50] + struct.pack(">h", 1) + self.tabelas["head"][52:]
+        self.tabelas["post"] = struct.pack(">I", 0x00030000) + self.tabelas["post"][4:32]
+
+    def recortar(self, nomes_glifos):
+        """Como _recortar(dados, nomes_glifos), mas sem renumerar os glifos"""
+        usados = {0}
+        pendentes = [self.glyph_ids[nome] for nome in nomes_glifos]
+        while pendentes:
+            gid = pendentes.pop()
+            if gid not in usados:
+                usados.add(gid)
+                pendentes.extend(self.componentes.get(gid, ()))
+        glyf, loca = bytearray(), []
+        for gid, contorno in enumerate(self.contornos):
+            loca.append(len(glyf))
+            if gid in usados:
+                glyf += contorno
+        loca.append(len(glyf))
+
+        saida = BytesIO()
+        writer = SFNTWriter(saida, len(self.tabelas))
+        for tag, dados in self.tabelas.items():
+            if tag == "glyf":
+                dados = bytes(glyf)
+            elif tag == "loca":
+                dados = struct.pack(f">{len(loca)}I", *loca)
+            writer[tag] = dados
+        writer.close()
+        dados_recorte = saida.getvalue()
+        return dados_recorte, zlib.compress(dados_recorte), self.glyph_ids
+
+
+class FonteRegistrada(TTFFont):
+    """TTFFont criada a partir do registro, sem reler nem reanalisar o arquivo"""
+
+    __slots__ = ("face",)
+
+
+class SubsetMapRegistrado(SubsetMap):
+    """
+    SubsetMap com cache por caractere funcionando: no fpdf2 2.7.x o cache é
+    preenchido com a tupla glyph.unicode e consultado com o inteiro, então
+    nunca acerta e cada caractere renderizado cria um Glyph novo.
+    """
+
+    def pick(self, unicode: int):
+        char_id = self._char_id_per_unicode.get(unicode)
+        if char_id is None:
+            char_id = super().pick(unicode)
+            if char_id is not None:
+                self._char_id_per_unicode[unicode] = char_id
+        return char_id
+
+
+class FaceTTF:
+    """Uma face TTF analisada uma única vez e compartilhada entre documentos"""
+
+    def __init__(self, fontkey, caminho):
+        self.fontkey = fontkey
+        self.caminho = caminho
+        with open(caminho, "rb") as f:
+            self.dados = f.read()
+        # A análise completa é feita uma vez com um FPDF descartável
+        self.modelo = TTFFont(FPDF(), caminho, fontkey, fontkey[len(fontkey.rstrip("BI")):])
+        self.modelo.close()
+        cmap = self.modelo.cmap
+        self.nomes_base = frozenset([".notdef"] + [cmap[c] for c in CARACTERES_BASE if c in cmap])
+        self.matriz = MatrizFace(self.dados, self.nomes_base)
+
+    @cached_property
+    def recorte_base(self):
+        """Recorte com todos os CARACTERES_BASE, o mesmo para qualquer documento que caiba nele"""
+        return self.matriz.recortar(self.nomes_base)
+
+    def instanciar(self, pdf):
+        """Cria a fonte de um documento compartilhando cmap, larguras e glyph_ids"""
+        modelo = self.modelo
+        fonte = FonteRegistrada.__new__(FonteRegistrada)
+        fonte.face = self
+        fonte.i = len(pdf.fonts) + 1
+        fonte.type = modelo.type
+        fonte.ttffile = modelo.ttffile
+        fonte.fontkey = self.fontkey
+        fonte.scale = modelo.scale
+        fonte.desc = copy.copy(modelo.desc)
+        fonte.cw = modelo.cw
+        fonte.cmap = modelo.cmap
+        fonte.glyph_ids = modelo.glyph_ids
+        fonte.name = modelo.name
+        fonte.up = modelo.up
+        fonte.ut = modelo.ut
+        fonte.emphasis = modelo.emphasis
+        fonte.missing_glyphs = []
+        # O ttfont completo nunca é aberto por documento: o ProdutorPDF usa o cache de subsets
+        fonte.ttfont = None
+
+        sbarr = "\x00 \r\n"
+        if pdf.str_alias_nb_pages:
+            sbarr += "0123456789"
+            sbarr += pdf.str_alias_nb_pages
+        fonte.subset = SubsetMapRegistrado(fonte, [ord(char) for char in sbarr])
+        return fonte
+
+
+class RegistroFontes:
+    """Faces carregadas na inicialização + cache LRU de subsets por conjunto de glifos"""
+
+    def __init__(self):
+        self.faces = {}
+        self.reservas = {}
+        self._subsets = OrderedDict()
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.faltas = 0
+
+    def carregar(self, diretorio=DIRETORIO_FONTES, faces=None, reservas=None):
+        """Analisa as faces disponíveis no diretório; faces ausentes são ignoradas"""
+        for destino, lista in ((self.faces, faces or FACES_PADRAO), (self.reservas, reservas or FACES_RESERVA)):
+            for fontkey, arquivo in lista.items():
+                caminho = os.path.join(diretorio, arquivo)
+                if os.path.exists(caminho):
+                    destino[fontkey] = FaceTTF(fontkey, caminho)
+        return self
+
+    def registrar_em(self, pdf):
+        """Disponibiliza as faces do registro (e as de reserva, como fallback) em um FPDF recém-criado"""
+        if not self.faces:
+            return
+        for fontkey, face in (*self.faces.items(), *self.reservas.items()):
+            pdf.fonts[fontkey] = face.instanciar(pdf)
+        if self.reservas:
+            pdf.set_fallback_fonts(sorted({fontkey.rstrip("BI") for fontkey in self.reservas}))
+
+    def subset(self, face, nomes_glifos, exato=True):
+        """
+        Devolve o recorte da face (ver _recortar) cobrindo os glifos pedidos: só eles
+        ou, com exato=False, o recorte base quando ele os cobre. A escolha do recorte
+        depende só do conjunto de glifos, então a saída continua determinística
+        independentemente do estado do cache.
+        """
+        nomes = frozenset(nomes_glifos)
+        if not exato and nomes <= face.nomes_base:
+            return face.recorte_base
+
+        chave = (face.fontkey, nomes)
+        with self._lock:
+            recorte = self._subsets.get(chave)
+            if recorte is not None:
+                self._subsets.move_to_end(chave)
+                self.acertos += 1
+                return recorte
+            self.faltas += 1
+
+        if nomes <= face.nomes_base:
+            recorte = face.matriz.recortar(nomes)
+        else:
+            recorte = _recortar(face.dados, nomes)
+        with self._lock:
+            self._subsets[chave] = recorte
+            while len(self._subsets) > MAX_SUBSETS_CACHE:
+                self._subsets.popitem(last=False)
+        return recorte
+
+    def estatisticas(self):
+        with self._lock:
+            return {"acertos": self.acertos, "faltas": self.faltas}
+
+
+REGISTRO_FONTES = RegistroFontes()
+
+
+def _formatar_unicode(unicode):
+    if unicode > 0xFFFF:
+        # Par substituto (surrogate pair)
+        code_high = 0xD800 | (unicode - 0x10000) >> 10
+        code_low = 0xDC00 | (unicode & 0x3FF)
+        return f"{code_high:04X}{code_low:04X}"
+    return f"{unicode:04X}"
+
+
+class FluxoFonteComprimido(PDFContentStream):
+    """PDFFontStream (FontFile2) montado a partir de bytes já comprimidos no cache"""
+
+    def __init__(self, comprimido, tamanho_original):
+        PDFObject.__init__(self)
+        self._contents = comprimido
+        self.filter = Name("FlateDecode")
+        self.length = len(comprimido)
+        self.length1 = tamanho_original
+
+
+class ProdutorPDF(OutputProducer):
+    """
+    OutputProducer que embute as fontes do registro a partir do cache de subsets.
+
+    Reproduz os objetos que o OutputProducer._add_fonts do fpdf2 (2.7.x) gera para
+    fontes TTF, trocando o recorte + serialização da fonte (a parte cara) pelo
+    resultado guardado no registro. Documentos com fontes de fora do registro
+    seguem pelo caminho original do fpdf2.
+
+    Aplica também o perfil de compressão do documento (fpdf.perfil_compressao,
+    ver services/compressao.py).
+    """
+
+    @property
+    def perfil(self):
+        return getattr(self.fpdf, "perfil_compressao", PERFIL_PADRAO)
+
+    def bufferize(self):
+        buffer = super().bufferize()
+        fpdf = self.fpdf
+        if self.perfil.fluxos_objetos and not (fpdf._security_handler or fpdf._sign_key):
+            self.buffer = buffer = empacotar_objetos(self, self.perfil.nivel or zlib.Z_DEFAULT_COMPRESSION)
+        return buffer
+
+    def _add_pages(self, _slice=slice(0, None)):
+        fpdf, nivel = self.fpdf, self.perfil.nivel
+        if nivel is None or not fpdf.compress:
+            return super()._add_pages(_slice)
+        fpdf.compress = False
+        try:
+            page_objs = super()._add_pages(_slice)
+        finally:
+            fpdf.compress = True
+        for page_obj in page_objs:
+            comprimir_fluxo(page_obj.contents, page_obj.contents._contents, nivel)
+        return page_objs
+
+    def _add_resources_dict(self, *args):
+        resources_obj = super()._add_resources_dict(*args)
+        if self.perfil.enxugar:
+            resources_obj.proc_set = None
+        return resources_obj
+
+    def _add_fonts(self):
+        fontes = sorted(self.fpdf.fonts.values(), key=lambda font: font.i)
+        if not all(isinstance(fonte, FonteRegistrada) for fonte in fontes):
+            return super()._add_fonts()
+
+        font_objs_per_index = {}
+        nivel = self.perfil.nivel
+        reservas = REGISTRO_FONTES.reservas
+        for font in fontes:
+            # Face de reserva que não desenhou nenhum caractere: não é referenciada nas páginas
+            if font.fontkey in reservas and not font.subset._char_id_per_unicode:
+                continue
+            fontname = f"MPDFAA+{font.name}"
+            if font.missing_glyphs:
+                LOGGER.warning(
+                    "Font %s is missing the following glyphs: %s",
+                    fontname,
+                    ", ".join(chr(x) for x in font.missing_glyphs),
+                )
+
+            ttfontstream, ttfontstream_comprimido, glyph_ids = REGISTRO_FONTES.subset(
+                font.face, font.subset.get_all_glyph_names(), exato=self.perfil.recorte_exato)
+            code_to_glyph = {char_id: glyph_ids[glyph.glyph_name] for glyph, char_id in font.subset.items()}
+
+            composite_font_obj = PDFFont(subtype="Type0", base_font=fontname, encoding="Identity-H")
+            self._add_pdf_obj(composite_font_obj, "fonts")
+            font_objs_per_index[font.i] = composite_font_obj
+
+            cid_font_obj = PDFFont(
+                subtype="CIDFontType2",
+                base_font=fontname,
+                d_w=font.desc.missing_width,
+                w=_tt_font_widths(font),
+            )
+            self._add_pdf_obj(cid_font_obj, "fonts")
+            composite_font_obj.descendant_fonts = PDFArray([cid_font_obj])
+
+            bfChar = [
+                f'<{code_mapped:04X}> <{"".join(_formatar_unicode(code) for code in glyph.unicode)}>\n'
+                for glyph, code_mapped in font.subset.items()
+                if len(glyph.unicode) > 0
+            ]
+            to_unicode_obj = PDFContentStream(
+                "/CIDInit /ProcSet findresource begin\n"
+                "12 dict begin\n"
+                "begincmap\n"
+                "/CIDSystemInfo\n"
+                "<</Registry (Adobe)\n"
+                "/Ordering (UCS)\n"
+                "/Supplement 0\n"
+                ">> def\n"
+                "/CMapName /Adobe-Identity-UCS def\n"
+                "/CMapType 2 def\n"
+                "1 begincodespacerange\n"
+                "<0000> <FFFF>\n"
+                "endcodespacerange\n"
+                f"{len(bfChar)} beginbfchar\n"
+                f"{''.join(bfChar)}"
+                "endbfchar\n"
+                "endcmap\n"
+                "CMapName currentdict /CMap defineresource pop\n"
+                "end\n"
+                "end"
+            )
+            if nivel is not None:
+                comprimir_fluxo(to_unicode_obj, to_unicode_obj._contents, nivel)
+            self._add_pdf_obj(to_unicode_obj, "fonts")
+            composite_font_obj.to_unicode = to_unicode_obj
+
+            cid_system_info_obj = CIDSystemInfo()
+            self._add_pdf_obj(cid_system_info_obj, "fonts")
+            cid_font_obj.c_i_d_system_info = cid_system_info_obj
+
+            font_descriptor_obj = font.desc
+            font_descriptor_obj.font_name = Name(fontname)
+            self._add_pdf_obj(font_descriptor_obj, "fonts")
+            cid_font_obj.font_descriptor = font_descriptor_obj
+
+            # CIDToGIDMap: 2 bytes big-endian por CID. O fpdf2 grava sempre os 65536 CIDs;
+            # basta cobrir até o maior CID usado (CIDs além do fim do stream mapeiam para o glifo 0)
+            cid_to_gid_map = bytearray((max(code_to_glyph, default=0) + 1) * 2)
+            for cc, glyph in code_to_glyph.items():
+                cid_to_gid_map[cc * 2] = glyph >> 8
+                cid_to_gid_map[cc * 2 + 1] = glyph & 0xFF
+            cid_to_gid_map_obj = PDFContentStream(contents=bytes(cid_to_gid_map), compress=True)
+            if nivel is not None:
+                comprimir_fluxo(cid_to_gid_map_obj, cid_to_gid_map, nivel)
+            self._add_pdf_obj(cid_to_gid_map_obj, "fonts")
+            cid_font_obj.c_i_d_to_g_i_d_map = cid_to_gid_map_obj
+
+            font_file_cs_obj = FluxoFonteComprimido(ttfontstream_comprimido, len(ttfontstream))
+            self._add_pdf_obj(font_file_cs_obj, "fonts")
+            font_descriptor_obj.font_file2 = font_file_cs_obj
+
+        return font_objs_per_index
@@ -0,0 +1,490 @@
+"""
+Modo formulário (AcroForm): o documento montado uma vez por tipo, preenchido por
+requisição.
+
+O modelo de cada tipo é renderizado uma única vez pelo FPDF com as partes fixas
+(título, rótulos, nomeação, poderes, linha de assinatura) e, no lugar de cada
+seção variável, um campo de texto com nome: "outorgante", "outorgados",
+"representacao" (inclui o veículo) e "local_data". Os campos são acrescentados
+ao PDF do FPDF como uma atualização incremental (novos objetos, nova xref com
+/Prev), sem reescrever o arquivo.
+
+Preencher é acrescentar mais uma atualização incremental ao modelo, com o valor
+(/V) e a aparência (/AP) de cada campo; achatar é acrescentar ao PDF base um
+conteúdo por página com o mesmo texto e nenhum campo. Nos dois casos o custo por
+documento é a quebra em linhas de quatro textos e a escrita de alguns objetos:
+o layout das partes fixas, as fontes e a compressão já estão no modelo.
+
+O documento inteiro (rótulos, textos fixos e campos) usa a fonte core Times,
+disponível em todo visualizador sem embutir fonte. Quando um valor tem caracteres
+fora do WinAnsi (cp1252) ou não cabe no campo nem em TAMANHO_MINIMO, ou quando
+os textos fixos saem do Latin-1 da fonte core, preencher devolve None e a rota
+renderiza o documento pelo caminho normal, com a fonte embutida.
+
+O perfil de compressão pedido (?compressao=, PDF_COMPRESSAO) vale para o modelo e
+para os fluxos acrescentados a ele. Perfis com fluxos de objetos (compacto), como
+a saída linearizada, seguem pela renderização normal: as atualizações
+incrementais daqui leem e acrescentam objetos soltos.
+
+Os modelos ficam em cache no processo, com chave no tipo, no perfil e nos textos
+fixos (uma cláusula de poderes nova ou editada gera um modelo novo). Ligado com
+PDF_FORMULARIO=1 ou ?formulario=1; ?achatar=0 mantém os campos editáveis.
+"""
+import hashlib
+import re
+import threading
+import zlib
+from collections import Counter, OrderedDict
+from datetime import datetime, timezone
+from functools import wraps
+from typing import NamedTuple
+
+from flask import current_app, request
+from fpdf.errors import FPDFUnicodeEncodingException
+from fpdf.fonts import CORE_FONTS_CHARWIDTHS
+
+from src.services.clausulas import escrever_poderes, texto_poderes
+from src.services.compressao import PERFIS_COMPRESSAO
+from src.services.pdf import (
+    compressao_pedida,
+    criar_pdf,
+    data_criacao_deterministica,
+    linearizacao_pedida,
+    registrar_pdf,
+    resposta_download,
+)
+from src.services.textos import (
+    ROTULO_OUTORGADOS,
+    ROTULO_OUTORGANTE,
+    ROTULO_REPRESENTACAO,
+    TEXTOS_DOCUMENTO,
+)
+
+# Campos do formulário: seções de TextosDocumento com dados do payload
+CAMPOS = ("outorgante", "outorgados", "representacao", "local_data")
+
+# Linhas reservadas em cada campo além das que o texto fixo da seção já ocupa
+LINHAS_DADOS = {"outorgante": 2, "outorgados": 2, "representacao": 2, "local_data": 0}
+LINHAS_DADOS_MULTIPLOS = 4
+
+# Chaves do payload que mudam os textos fixos (e portanto o modelo)
+CHAVES_MODELO = ("poderes", "poderesId", "poderesVersao")
+
+# Fonte dos campos: tamanho inicial, mínimo e passo da redução até caber
+TAMANHO_FONTE = 12
+TAMANHO_MINIMO = 8
+PASSO_TAMANHO = 0.5
+ENTRELINHA = 5 * 72 / 25.4 / 12  # 5 mm por linha a 12 pt, como no documento renderizado
+RECUO = 72 / 25.4  # pt entre a borda do campo e o texto (1 mm, como o c_margin do FPDF)
+LARGURAS_TIMES = CORE_FONTS_CHARWIDTHS["times"]
+FONTE_CAMPOS = "TiRo"
+DICIONARIO_FONTE = "<< /Type /Font /Subtype /Type1 /BaseFont /Times-Roman /Encoding /WinAnsiEncoding >>"
+
+# Número máximo de modelos mantidos em memória
+MAX_MODELOS = 64
+
+OBJETO = re.compile(rb"^(\d+) 0 obj\n(.*?)\nendobj", re.S | re.M)
+
+
+class Campo(NamedTuple):
+    nome: str
+    pagina: int        # número do objeto da página
+    retangulo: tuple   # (x, y, largura, altura) em pt, origem no canto inferior esquerdo
+    recuo: float       # pt antes do texto na primeira linha (rótulo em negrito desenhado no modelo)
+    objeto: int        # número do objeto do widget
+
+
+class Modelo(NamedTuple):
+    base: bytes         # PDF do FPDF, sem campos (ponto de partida do documento achatado)
+    formulario: bytes   # base + atualização com o AcroForm (ponto de partida do preenchido)
+    xref_base: int
+    xref_formulario: int
+    tamanho: int        # /Size depois da atualização do formulário
+    raiz: int
+    info: int
+    id_arquivo: str
+    paginas: dict       # número do objeto da página -> dicionário original (sem /Annots)
+    recursos: tuple     # (número do objeto, dicionário) dos recursos das páginas
+    catalogo: str
+    fonte: int          # objeto da fonte Times-Roman dos campos
+    campos: tuple
+
+
+def codificar(texto):
+    """Texto em cp1252 (WinAnsi), como a fonte core espera; None se algum caractere não existir nele"""
+    try:
+        return texto.encode("cp1252")
+    except UnicodeEncodeError:
+        return None
+
+
+def largura_texto(dados, tamanho):
+    return sum(LARGURAS_TIMES[chr(byte)] for byte in dados) * tamanho / 1000
+
+
+def quebrar(palavras, largura, tamanho, recuo=0):
+    """
+    Linhas [(bytes, largura em pt)] de até `largura` pt (a primeira, `recuo` a
+    menos), a partir das palavras [(bytes, largura a 1000 pt)].
+    """
+    escala = tamanho / 1000
+    espaco = LARGURAS_TIMES[" "] * escala
+    linhas, atual, ocupada = [], [], 0
+    for palavra, unitaria in palavras:
+        medida = unitaria * escala
+        disponivel = largura - (0 if linhas else recuo)
+        if atual and ocupada + espaco + medida > disponivel:
+            linhas.append((b" ".join(atual), ocupada))
+            atual, ocupada = [], 0
+        ocupada += (espaco if atual else 0) + medida
+        atual.append(palavra)
+    return linhas + [(b" ".join(atual), ocupada)]
+
+
+def ajustar(texto, largura, altura, recuo=0):
+    """
+    (tamanho da fonte, linhas) do maior tamanho em que o texto cabe no campo, ou
+    None (não cabe, ou tem caracteres fora do WinAnsi)
+    """
+    dados = codificar(texto)
+    if dados is None:
+        return None
+    palavras = [(palavra, largura_texto(palavra, 1000)) for palavra in dados.split()]
+    tamanho = TAMANHO_FONTE
+    while tamanho >= TAMANHO_MINIMO:
+        linhas = quebrar(palavras, largura - 2 * RECUO, tamanho, recuo)
+        if len(linhas) * tamanho * ENTRELINHA <= altura and all(
+                medida <= largura - 2 * RECUO - (0 if i else recuo) for i, (_, medida) in enumerate(linhas)):
+            return tamanho, linhas
+        tamanho -= PASSO_TAMANHO
+    return None
+
+
+def escapar(dados):
+    return dados.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+def operadores_texto(tamanho, linhas, largura, altura, recuo=0):
+    """Operadores que desenham as linhas justificadas a partir do topo do campo"""
+    entrelinha = tamanho * ENTRELINHA
+    # Linha de base da primeira linha centrada na faixa de 5 mm, como no multi_cell
+    partes = [b"BT /%s %.2f Tf 0 g %.2f TL %.2f %.2f Td" % (
+        FONTE_CAMPOS.encode(), tamanho, entrelinha, RECUO + recuo, altura - (entrelinha + tamanho * 0.7) / 2)]
+    ultima = len(linhas) - 1
+    for i, (linha, medida) in enumerate(linhas):
+        espacos = linha.count(b" ")
+        folga = (largura - 2 * RECUO - (0 if i else recuo)) - medida
+        espacamento = folga / espacos if i < ultima and espacos else 0
+        avanco = b"" if i == 0 else b"%.2f %.2f Td " % (-recuo, -entrelinha) if i == 1 else b"T* "
+        partes.append(b"%s%.3f Tw (%s) Tj" % (avanco, espacamento, escapar(linha)))
+    partes.append(b"ET")
+    return b"\n".join(partes)
+
+
+def texto_pdf(texto):
+    """String de texto PDF em UTF-16BE (valor /V do campo)"""
+    return "<FEFF" + texto.encode("utf-16-be").hex().upper() + ">"
+
+
+def data_pdf(data):
+    return data.strftime("(D:%Y%m%d%H%M%SZ00'00')")
+
+
+def fluxo(numero, conteudo, dicionario="", nivel=None):
+    comprimido = zlib.compress(conteudo, zlib.Z_DEFAULT_COMPRESSION if nivel is None else nivel)
+    return (b"%d 0 obj\n<<%s /Filter /FlateDecode /Length %d>>\nstream\n" % (numero, dicionario.encode(), len(comprimido))
+            + comprimido + b"\nendstream\nendobj\n")
+
+
+def objeto(numero, dicionario):
+    return b"%d 0 obj\n%s\nendobj\n" % (numero, dicionario.encode("latin-1"))
+
+
+def atualizacao(tamanho_arquivo, objetos, tamanho, modelo, xref_anterior):
+    """
+    Atualização incremental: os objetos (número -> bytes serializados), a xref só
+    com eles e o trailer com /Prev. Devolve os bytes a acrescentar ao arquivo.
+    """
+    corpo, deslocamentos = b"\n", {}
+    for numero in sorted(objetos):
+        deslocamentos[numero] = tamanho_arquivo + len(corpo)
+        corpo += objetos[numero]
+    # Como nas atualizações do Acrobat: cada seção começa pela entrada livre 0
+    xref = [b"xref", b"0 1", b"0000000000 65535 f "]
+    numeros = sorted(deslocamentos)
+    inicio = 0
+    while inicio < len(numeros):
+        fim = inicio
+        while fim + 1 < len(numeros) and numeros[fim + 1] == numeros[fim] + 1:
+            fim += 1
+        xref.append(b"%d %d" % (numeros[inicio], fim - inicio + 1))
+        xref.extend(b"%010d 00000 n " % deslocamentos[n] for n in numeros[inicio:fim + 1])
+        inicio = fim + 1
+    segundo_id = hashlib.md5(corpo).hexdigest().upper()
+    trailer = (f"trailer\n<<\n/Size {tamanho}\n/Root {modelo.raiz} 0 R\n/Info {modelo.info} 0 R\n"
+               f"/ID [<{modelo.id_arquivo}><{segundo_id}>]\n/Prev {xref_anterior}\n>>\n")
+    inicio_xref = tamanho_arquivo + len(corpo)
+    return corpo + b"\n".join(xref) + b"\n" + trailer.encode() + b"startxref\n%d\n%%%%EOF\n" % inicio_xref
+
+
+def reservar_campo(pdf, nome, linhas, campos, rotulo="", depois=0):
+    """
+    Reserva a área do campo na posição atual, com o rótulo em negrito no começo da
+    primeira linha. Vai para a página seguinte se a área (mais `depois` mm que
+    precisam ficar na mesma página) não couber.
+    """
+    altura = linhas * 5
+    if pdf.get_y() + altura + depois > pdf.page_break_trigger:
+        pdf.add_page()
+    x, y = pdf.l_margin, pdf.get_y()
+    recuo = 0
+    if rotulo:
+        pdf.set_font("Times", "B", 12)
+        pdf.cell(0, 5, rotulo)
+        recuo = pdf.get_string_width(rotulo) * pdf.k
+    campos.append((nome, pdf.page, (x * pdf.k, (pdf.h - y - altura) * pdf.k, pdf.epw * pdf.k, altura * pdf.k), recuo))
+    pdf.set_xy(x, y + altura)
+
+
+def linhas_texto(pdf, texto):
+    pdf.set_font("Times", "", 12)
+    return len(pdf.multi_cell(pdf.epw, 5, texto, dry_run=True, output="LINES")) if texto else 1
+
+
+def montar_modelo(tipo, fixos, perfil):
+    """PDF do modelo (partes fixas e áreas vazias dos campos) e as áreas reservadas"""
+    # Fonte core, a mesma dos campos (ver DICIONARIO_FONTE)
+    pdf = criar_pdf({}, fonte_embutida=False)
+    pdf.perfil_compressao = perfil
+    pdf.add_page()
+    pdf.set_margins(20, 20, 20)
+    pdf.set_auto_page_break(auto=True, margin=20)
+    campos = []
+
+    def secao(rotulo, nome):
+        extras = LINHAS_DADOS_MULTIPLOS if nome == "outorgados" and "multiplos" in tipo else LINHAS_DADOS[nome]
+        linhas = linhas_texto(pdf, getattr(fixos, nome)) + extras
+        reservar_campo(pdf, nome, linhas, campos, rotulo)
+        pdf.ln(8)
+
+    pdf.set_font("Times", "B", 16)
+    pdf.cell(0, 10, fixos.titulo, align="C", new_x="LMARGIN", new_y="NEXT")
+    pdf.ln(5)
+    secao(ROTULO_OUTORGANTE, "outorgante")
+    pdf.set_font("Times", "B", 12)
+    pdf.cell(0, 5, fixos.nomeacao, align="C", new_x="LMARGIN", new_y="NEXT")
+    pdf.ln(5)
+    secao(ROTULO_OUTORGADOS, "outorgados")
+    secao(ROTULO_REPRESENTACAO, "representacao")
+    if fixos.poderes is not None:
+        pdf.set_font("Times", "", 12)
+        escrever_poderes(pdf, fixos.poderes)
+        pdf.ln(5)
+    # Local e data na mesma página da linha de assinatura
+    reservar_campo(pdf, "local_data", linhas_texto(pdf, fixos.local_data) + LINHAS_DADOS["local_data"], campos,
+                   depois=22)
+    pdf.ln(15)
+    pdf.set_line_width(0.5)
+    pdf.line(60, pdf.get_y(), 150, pdf.get_y())
+    pdf.ln(2)
+    pdf.set_font("Times", "", 10)
+    pdf.cell(0, 5, fixos.assinatura, align="C", new_x="LMARGIN", new_y="NEXT")
+    return bytes(pdf.output()), campos
+
+
+def construir_modelo(tipo, fixos, perfil):
+    """Modelo de `tipo`: o PDF base do FPDF e a atualização incremental com os campos"""
+    base, areas = montar_modelo(tipo, fixos, perfil)
+    objetos = {int(numero): corpo.decode("latin-1") for numero, corpo in OBJETO.findall(base)}
+    trailer = base[base.rindex(b"trailer"):].decode("latin-1")
+    tamanho = int(re.search(r"/Size (\d+)", trailer).group(1))
+    raiz = int(re.search(r"/Root (\d+) 0 R", trailer).group(1))
+    info = int(re.search(r"/Info (\d+) 0 R", trailer).group(1))
+    id_arquivo = re.search(r"/ID \[<([0-9A-F]+)>", trailer).group(1)
+    xref_base = int(re.search(r"startxref\s+(\d+)", trailer).group(1))
+
+    catalogo = objetos[raiz]
+    arvore = objetos[int(re.search(r"/Pages (\d+) 0 R", catalogo).group(1))]
+    paginas = [int(n) for n in re.findall(r"(\d+) 0 R", re.search(r"/Kids \[(.*?)\]", arvore, re.S).group(1))]
+    numero_recursos = int(re.search(r"/Resources (\d+) 0 R", objetos[paginas[0]]).group(1))
+
+    fonte, acroform = tamanho, tamanho + 1
+    campos = tuple(Campo(nome, paginas[pagina - 1], retangulo, recuo, acroform + 1 + i)
+                   for i, (nome, pagina, retangulo, recuo) in enumerate(areas))
+    novos = {
+        fonte: objeto(fonte, DICIONARIO_FONTE),
+        acroform: objeto(acroform, "<< /Fields [%s] /DR << /Font << /%s %d 0 R >> >> /DA (/%s %d Tf 0 g) >>" % (
+            " ".join(f"{campo.objeto} 0 R" for campo in campos), FONTE_CAMPOS, fonte, FONTE_CAMPOS, TAMANHO_FONTE)),
+        raiz: objeto(raiz, catalogo[:catalogo.rindex(">>")] + f"/AcroForm {acroform} 0 R\n>>"),
+    }
+    modelo = Modelo(base, b"", xref_base, 0, acroform + 1 + len(campos), raiz, info, id_arquivo,
+                    {numero: objetos[numero] for numero in paginas}, (numero_recursos, objetos[numero_recursos]),
+                    catalogo, fonte, campos)
+    for numero in paginas:
+        widgets = " ".join(f"{campo.objeto} 0 R" for campo in campos if campo.pagina == numero)
+        if widgets:
+            dicionario = objetos[numero]
+            novos[numero] = objeto(numero, dicionario[:dicionario.rindex(">>")] + f"/Annots [{widgets}]\n>>")
+    for campo in campos:
+        novos[campo.objeto] = objeto(campo.objeto, widget(modelo, campo, ""))
+    formulario = base + atualizacao(len(base), novos, modelo.tamanho, modelo, xref_base)
+    return modelo._replace(formulario=formulario,
+                           xref_formulario=int(formulario[formulario.rindex(b"startxref") + 10:].split()[0]))
+
+
+def widget(modelo, campo, valor, aparencia=None):
+    x, y, largura, altura = campo.retangulo
+    dicionario = (f"<< /Type /Annot /Subtype /Widget /FT /Tx /T ({campo.nome}) /P {campo.pagina} 0 R "
+                  f"/Rect [{x:.2f} {y:.2f} {x + largura:.2f} {y + altura:.2f}] /F 4 /Ff 4096 /Q 0 "
+                  f"/DA (/{FONTE_CAMPOS} 0 Tf 0 g) /V {texto_pdf(valor)}")
+    if aparencia is not None:
+        dicionario += f" /AP << /N {aparencia} 0 R >>"
+    return dicionario + " >>"
+
+
+def textos_fixos(tipo, data):
+    """Textos da seção sem os dados do payload: só o que o modelo desenha ou dimensiona"""
+    return TEXTOS_DOCUMENTO[tipo]({chave: data[chave] for chave in CHAVES_MODELO if chave in data})
+
+
+class ModelosFormulario:
+    """
+    Modelos em memória (LRU), com chave no tipo, no perfil de compressão e nos
+    textos fixos. A construção acontece uma vez por chave e processo (textos fixos
+    que a fonte core não tem ficam guardados como None); preenchidos e recusados
+    contam as requisições servidas pelo formulário e as que voltaram à renderização.
+    """
+
+    def __init__(self, maximo=MAX_MODELOS):
+        self.maximo = maximo
+        self.modelos = OrderedDict()
+        self.lock = threading.Lock()
+        self.construidos = 0
+        self.preenchidos = Counter()
+        self.recusados = Counter()
+
+    def _contar(self, contador, tipo):
+        with self.lock:
+            contador[tipo] += 1
+
+    def obter(self, tipo, fixos, perfil):
+        chave = (tipo, perfil, *(texto_poderes(valor) if valor is not None else None for valor in fixos))
+        with self.lock:
+            if chave in self.modelos:
+                self.modelos.move_to_end(chave)
+                return self.modelos[chave]
+        try:
+            modelo = construir_modelo(tipo, fixos, perfil)
+        except FPDFUnicodeEncodingException:
+            modelo = None
+        with self.lock:
+            if modelo is not None:
+                self.construidos += 1
+            self.modelos[chave] = modelo
+            while len(self.modelos) > self.maximo:
+                self.modelos.popitem(last=False)
+        return modelo
+
+    def limpar(self):
+        with self.lock:
+            self.modelos.clear()
+
+    def estatisticas(self):
+        with self.lock:
+            return {"modelos": self.construidos, "preenchidos": sum(self.preenchidos.values()),
+                    "recusados": sum(self.recusados.values())}
+
+
+MODELOS_FORMULARIO = ModelosFormulario()
+
+
+def preencher(tipo, data, achatar=True, compressao="padrao"):
+    """
+    Bytes do documento `tipo` pelo modelo: campos preenchidos (achatar=False) ou
+    texto desenhado nas páginas, sem campos. None quando algum texto não cabe ou
+    não existe na fonte core.
+    """
+    perfil = PERFIS_COMPRESSAO[compressao]
+    modelo = MODELOS_FORMULARIO.obter(tipo, textos_fixos(tipo, data), perfil)
+    if modelo is None:
+        MODELOS_FORMULARIO._contar(MODELOS_FORMULARIO.recusados, tipo)
+        return None
+    textos = TEXTOS_DOCUMENTO[tipo](data)
+    ajustes = []
+    for campo in modelo.campos:
+        ajuste = ajustar(getattr(textos, campo.nome), *campo.retangulo[2:], campo.recuo)
+        if ajuste is None:
+            MODELOS_FORMULARIO._contar(MODELOS_FORMULARIO.recusados, tipo)
+            return None
+        ajustes.append(ajuste)
+    MODELOS_FORMULARIO._contar(MODELOS_FORMULARIO.preenchidos, tipo)
+
+    if current_app.config.get("PDF_DETERMINISTICO", True):
+        criacao = data_criacao_deterministica(data)
+    else:
+        criacao = datetime.now(timezone.utc)
+    novos = {modelo.info: objeto(modelo.info, f"<<\n/CreationDate {data_pdf(criacao)}\n>>")}
+
+    if not achatar:
+        proximo = modelo.tamanho
+        for campo, (tamanho, linhas) in zip(modelo.campos, ajustes):
+            largura, altura = campo.retangulo[2:]
+            novos[proximo] = fluxo(proximo, operadores_texto(tamanho, linhas, largura, altura, campo.recuo), (
+                f" /Type /XObject /Subtype /Form /BBox [0 0 {largura:.2f} {altura:.2f}]"
+                f" /Resources << /Font << /{FONTE_CAMPOS} {modelo.fonte} 0 R >> >>"), perfil.nivel)
+            novos[campo.objeto] = objeto(campo.objeto, widget(modelo, campo, getattr(textos, campo.nome), proximo))
+            proximo += 1
+        return modelo.formulario + atualizacao(len(modelo.formulario), novos, proximo, modelo,
+                                               modelo.xref_formulario)
+
+    # Achatado: parte do PDF base, em que a fonte dos campos ainda não existe
+    novos[modelo.fonte] = objeto(modelo.fonte, DICIONARIO_FONTE)
+    proximo = modelo.fonte + 1
+    for numero, dicionario in modelo.paginas.items():
+        conteudo = [b"q 1 0 0 1 %.2f %.2f cm\n%s\nQ" % (campo.retangulo[0], campo.retangulo[1],
+                                                         operadores_texto(tamanho, linhas, *campo.retangulo[2:],
+                                                                          campo.recuo))
+                    for campo, (tamanho, linhas) in zip(modelo.campos, ajustes) if campo.pagina == numero]
+        if not conteudo:
+            continue
+        novos[proximo] = fluxo(proximo, b"\n".join(conteudo), nivel=perfil.nivel)
+        anterior = re.search(r"/Contents (\d+) 0 R", dicionario).group(1)
+        novos[numero] = objeto(numero, dicionario.replace(f"/Contents {anterior} 0 R",
+                                                          f"/Contents [{anterior} 0 R {proximo} 0 R]"))
+        proximo += 1
+    numero_recursos, recursos = modelo.recursos
+    novos[numero_recursos] = objeto(numero_recursos, recursos.replace(
+        "/Font <<", f"/Font <</{FONTE_CAMPOS} {modelo.fonte} 0 R\n", 1))
+    return modelo.base + atualizacao(len(modelo.base), novos, proximo, modelo, modelo.xref_base)
+
+
+def parametro_ligado(nome, padrao):
+    valor = request.args.get(nome)
+    if valor is None:
+        return padrao
+    return valor.lower() in ("1", "true", "sim")
+
+
+def formulario_rapido(tipo):
+    """
+    Decorador das rotas generate_* (depois de payload_validado): com o modo
+    formulário ligado (PDF_FORMULARIO ou ?formulario=1), responde com o modelo
+    preenchido; se algum valor não couber no campo ou não existir na fonte core, ou
+    se a saída linearizada ou um perfil com fluxos de objetos foi pedido, segue
+    para a renderização normal da rota.
+    """
+    def decorador(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            compressao = compressao_pedida()
+            if parametro_ligado("formulario", current_app.config.get("PDF_FORMULARIO", False)) \
+                    and not linearizacao_pedida() and not PERFIS_COMPRESSAO[compressao].fluxos_objetos:
+                data = request.get_json()
+                achatar = parametro_ligado("achatar", current_app.config.get("PDF_FORMULARIO_ACHATADO", True))
+                pdf_output = preencher(tipo, data, achatar, compressao)
+                if pdf_output is not None:
+                    hash_documento = registrar_pdf(pdf_output, tipo, data)
+                    return resposta_download(pdf_output, hash_documento, f"{tipo}.pdf")
+            return view(*args, **kwargs)
+        return wrapper
+    return decorador
@@ -0,0 +1,229 @@
+"""
+Cache de fragmentos por seção, para re-renderizar só o que mudou.
+
+A parte cara de cada parágrafo dos documentos é a quebra em linhas (larguras de
+cada palavra, justificação), não o desenho das linhas. Aqui as linhas quebradas
+de cada seção (OUTORGANTE, OUTORGADOS, REPRESENTAÇÃO, poderes, local e data) ficam
+em cache, com chave no texto da seção e no estado de fonte e de posição que
+influencia a quebra: família, estilo, tamanho, larguras disponíveis.
+
+Numa nova renderização em que só um campo mudou (a cor do veículo, por exemplo),
+só a seção que contém o campo é quebrada de novo. As outras vêm do cache e são
+apenas desenhadas, nas posições que resultam das seções anteriores, com o mesmo
+resultado byte a byte de pdf.write / pdf.multi_cell. O cache vale para o processo
+todo e não depende do objeto FPDF: cada renderização religa as linhas ao estado
+gráfico (e ao subset de fonte) do documento atual.
+
+O cache é limitado pelo total de caracteres das seções guardadas, não pelo número
+delas, e seções muito longas não entram. Desligado com PDF_CACHE_SECOES=0; as
+contagens de acertos e faltas por seção estão em CACHE_FRAGMENTOS.acertos /
+CACHE_FRAGMENTOS.faltas (os totais, lidos sob o lock, em estatisticas()).
+"""
+import threading
+from collections import Counter, OrderedDict
+
+from flask import current_app
+from fpdf.enums import Align, WrapMode, XPos, YPos
+from fpdf.line_break import Fragment, MultiLineBreak, TextLine
+
+from src.services.vigia import verificar_prazo
+
+# Total de caracteres das seções mantidas em memória: cada caractere em cache custa
+# até ~80 bytes entre chave, lista de caracteres dos fragmentos e linhas (~40 MB)
+MAX_CARACTERES_CACHE = 500_000
+
+# Seções maiores que isto (poderes ou listas de outorgados muito longos) não entram
+# no cache: seriam poucas ocupando o espaço de muitas e raramente se repetem
+MAX_CARACTERES_SECAO = 10_000
+
+
+def estado_fonte(pdf):
+    """Parte do estado do FPDF que influencia a quebra de linhas"""
+    fonte = pdf.current_font
+    return (pdf.is_ttf_font, getattr(fonte, "name", None), pdf.font_style, pdf.font_size_pt,
+            pdf.c_margin, pdf.char_spacing, pdf.font_stretching)
+
+
+def quebrar_justificado(pdf, texto, largura, altura):
+    """Linhas de pdf.multi_cell(largura, altura, texto, align="J")"""
+    texto = pdf.normalize_text(texto).replace("\r", "")
+    fragmentos = pdf._preload_font_styles(texto, False)
+    quebra = MultiLineBreak(fragmentos, largura, [pdf.c_margin, pdf.c_margin],
+                            align=Align.J, print_sh=False, wrapmode=WrapMode.WORD)
+    linhas = []
+    linha = quebra.get_line()
+    while linha is not None:
+        verificar_prazo()
+        linhas.append(linha)
+        linha = quebra.get_line()
+    if not linhas:
+        linhas = [TextLine("", text_width=0, number_of_spaces=0, align=Align.J,
+                           height=altura, max_width=largura, trailing_nl=False)]
+    return tuple(linhas)
+
+
+def quebrar_continuo(pdf, texto, primeira_largura, largura):
+    """Linhas de pdf.write(h, texto): a primeira a partir de x, as demais entre as margens"""
+    texto = pdf.normalize_text(texto).replace("\r", "")
+    fragmentos = pdf._preload_font_styles(texto, False)
+    # Mesmo esquema do FPDF.write: a largura muda depois da primeira linha
+    largura_atual = [primeira_largura]
+    quebra = MultiLineBreak(fragmentos, lambda h: largura_atual[0], (pdf.c_margin, pdf.c_margin),
+                            print_sh=False, wrapmode=WrapMode.WORD)
+    linhas = []
+    linha = quebra.get_line()
+    largura_atual[0] = largura
+    while linha is not None:
+        verificar_prazo()
+        linhas.append(linha)
+        linha = quebra.get_line()
+    return tuple(linhas)
+
+
+def religar(pdf, linha):
+    """
+    Linha em cache com os fragmentos apontando para o estado gráfico atual do pdf.
+    Fragmentos de uma face de reserva (caracteres que a fonte atual não tem, ver
+    services/fonts.py) continuam com ela.
+    """
+    estado = pdf._get_current_graphics_state()
+    fragmentos = []
+    for f in linha.fragments:
+        if f.font_family == estado["font_family"]:
+            fragmentos.append(Fragment(f.characters, estado, pdf.k))
+            continue
+        fragmento = Fragment(f.characters, {**estado, "font_family": f.font_family}, pdf.k)
+        fragmento.font = pdf.fonts[f.font_family]
+        fragmentos.append(fragmento)
+    return linha._replace(fragments=tuple(fragmentos))
+
+
+def desenhar_justificado(pdf, linhas, altura):
+    """Desenha linhas de quebrar_justificado como o multi_cell (posição final à direita)"""
+    ultima = len(linhas) - 1
+    for i, linha in enumerate(linhas):
+        pdf._render_styled_text_line(
+            religar(pdf, linha),
+            h=altura,
+            new_x=XPos.RIGHT if i == ultima else XPos.LEFT,
+            new_y=YPos.NEXT,
+        )
+    if linhas[-1].trailing_nl:
+        pdf.ln()
+
+
+def desenhar_continuo(pdf, linhas, altura):
+    """Desenha linhas de quebrar_continuo como o write (posição final no fim do texto)"""
+    for i, linha in enumerate(linhas):
+        if i > 0:
+            pdf.ln()
+        pdf._render_styled_text_line(religar(pdf, linha), h=altura, border=0,
+                                     new_x=XPos.WCONT, new_y=YPos.TOP, fill=False)
+    if linhas and linhas[-1].trailing_nl:
+        pdf.ln()
+
+
+class CacheFragmentos:
+    """
+    LRU de seções já quebradas em linhas, limitado pelo total de caracteres das
+    seções, com contagem de acertos/faltas por seção
+    """
+
+    def __init__(self, max_caracteres=MAX_CARACTERES_CACHE, max_secao=MAX_CARACTERES_SECAO):
+        self.max_caracteres = max_caracteres
+        self.max_secao = max_secao
+        self.caracteres = 0
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+        self.acertos = Counter()
+        self.faltas = Counter()
+
+    def linhas(self, secao, chave, texto, quebrar):
+        with self._lock:
+            linhas = self._itens.get(chave)
+            if linhas is not None:
+                self._itens.move_to_end(chave)
+                self.acertos[secao] += 1
+                return linhas
+            self.faltas[secao] += 1
+        linhas = quebrar()
+        if len(texto) > self.max_secao:
+            return linhas
+        with self._lock:
+            if chave not in self._itens:
+                self._itens[chave] = linhas
+                self.caracteres += len(texto)
+            while self.caracteres > self.max_caracteres:
+                chave_antiga, _ = self._itens.popitem(last=False)
+                self.caracteres -= len(chave_antiga[1])
+        return linhas
+
+    def write(self, pdf, altura, texto, secao):
+        """Equivalente a pdf.write(altura, texto)"""
+        primeira = pdf.w - pdf.x - pdf.r_margin
+        largura = pdf.w - pdf.l_margin - pdf.r_margin
+        chave = ("write", texto, estado_fonte(pdf), round(primeira, 4), round(largura, 4))
+        linhas = self.linhas(secao, chave, texto, lambda: quebrar_continuo(pdf, texto, primeira, largura))
+        desenhar_continuo(pdf, linhas, altura)
+
+    def multi_cell(self, pdf, altura, texto, secao):
+        """Equivalente a pdf.multi_cell(0, altura, texto, align="J")"""
+        largura = pdf.w - pdf.r_margin - pdf.x
+        chave = ("multi_cell", texto, estado_fonte(pdf), round(largura, 4), altura)
+        linhas = self.linhas(secao, chave, texto, lambda: quebrar_justificado(pdf, texto, largura, altura))
+        desenhar_justificado(pdf, linhas, altura)
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+            self.caracteres = 0
+            self.acertos.clear()
+            self.faltas.clear()
+
+    def estatisticas(self):
+        with self._lock:
+            return {"acertos": sum(self.acertos.values()), "faltas": sum(self.faltas.values())}
+
+
+CACHE_FRAGMENTOS = CacheFragmentos()
+
+
+def _cache_ligado():
+    return current_app.config.get("PDF_CACHE_SECOES", True)
+
+
+def escrever_secao(pdf, altura, texto, secao):
+    """pdf.write(altura, texto) com as linhas da seção vindas do cache"""
+    if _cache_ligado():
+        CACHE_FRAGMENTOS.write(pdf, altura, texto, secao)
+    else:
+        pdf.write(altura, texto)
+
+
+def paragrafo_secao(pdf, altura, texto, secao):
+    """pdf.multi_cell(0, altura, texto, align="J") com as linhas da seção vindas do cache"""
+    if _cache_ligado():
+        CACHE_FRAGMENTOS.multi_cell(pdf, altura, texto, secao)
+    else:
+        pdf.multi_cell(0, altura, texto, align="J")
+
+
+def assinatura_secao(pdf, local_data, assinatura, espaco):
+    """
+    Local e data, linha e rótulo da assinatura, sempre na mesma página: se o bloco
+    não cabe no que resta da página, começa na próxima, em vez de deixar a linha de
+    assinatura sozinha (ou a linha numa página e o rótulo na outra).
+    """
+    pdf.set_font("Times", "", 12)
+    linhas = pdf.multi_cell(0, 5, local_data, align="J", dry_run=True, output="LINES")
+    if pdf.will_page_break(len(linhas) * 5 + espaco + 2 + 5):
+        pdf.add_page(same=True)
+    paragrafo_secao(pdf, 5, local_data, "local_data")
+    pdf.ln(espaco)
+
+    pdf.set_line_width(0.5)
+    y_linha = pdf.get_y()
+    pdf.line(60, y_linha, 150, y_linha)
+    pdf.ln(2)
+    pdf.set_font("Times", "", 10)
+    pdf.cell(0, 5, assinatura, align="C", new_x="LMARGIN", new_y="NEXT")
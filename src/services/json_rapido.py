@@ -0,0 +1,101 @@
+"""
+Provedor JSON do app com orjson e codificação em fluxo de listas grandes.
+
+O DefaultJSONProvider do Flask usa o módulo json da biblioteca padrão em toda
+requisição (request.get_json dos payloads de documentos) e toda resposta (jsonify).
+O ProvedorJSONRapido troca os dois pelo orjson, mantendo o que o Flask garante:
+chaves ordenadas, saída compacta (indentada em modo debug), "\\n" no fim da resposta
+e os mesmos tipos extras (datas no formato HTTP, UUID, dataclass, __html__).
+
+A única diferença visível é que caracteres não ASCII (acentos dos nomes e
+endereços) saem em UTF-8 em vez de escapes \\uXXXX: o JSON decodificado é idêntico
+e a resposta fica menor. Entradas que o orjson recusa mas a biblioteca padrão
+aceita (NaN, UTF-16, inteiros acima de 64 bits) caem no caminho original. Sem o
+orjson instalado, o provedor se comporta como o padrão do Flask.
+"""
+from flask import current_app
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Itens por bloco na codificação em fluxo: cada bloco é serializado de uma vez
+ITENS_POR_BLOCO = 500
+
+if orjson is not None:
+    # Datas e dataclasses passam pelo `default` do Flask, para sair no mesmo formato
+    OPCOES_ORJSON = (orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+                     | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS)
+
+
+class ProvedorJSONRapido(DefaultJSONProvider):
+    """JSONProvider do Flask sobre o orjson, com a saída equivalente à do padrão"""
+
+    ensure_ascii = False
+
+    def _opcoes(self, indentar=False):
+        opcoes = OPCOES_ORJSON if self.sort_keys else OPCOES_ORJSON & ~orjson.OPT_SORT_KEYS
+        if indentar:
+            opcoes |= orjson.OPT_INDENT_2
+        return opcoes
+
+    def _indentar(self):
+        return (self.compact is None and self._app.debug) or self.compact is False
+
+    def dumps_bytes(self, obj, indentar=False):
+        """JSON em bytes UTF-8, sem passar por str (usado nas respostas)"""
+        if orjson is not None:
+            try:
+                return orjson.dumps(obj, default=self.default, option=self._opcoes(indentar))
+            except TypeError:
+                pass  # orjson.JSONEncodeError: tipo ou inteiro que só a biblioteca padrão aceita
+        argumentos = {"indent": 2} if indentar else {"separators": (",", ":")}
+        return super().dumps(obj, **argumentos).encode("utf-8")
+
+    def dumps(self, obj, **kwargs):
+        # Argumentos de formatação específicos do módulo json seguem pelo caminho original
+        if orjson is None or set(kwargs) - {"separators"} or kwargs.get("separators", (",", ":")) != (",", ":"):
+            return super().dumps(obj, **kwargs)
+        return self.dumps_bytes(obj).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            try:
+                return orjson.loads(s)
+            except orjson.JSONDecodeError:
+                pass  # NaN/Infinity, BOM, UTF-16/32: a biblioteca padrão decide
+        return super().loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj, self._indentar()) + b"\n", mimetype=self.mimetype)
+
+
+def json_em_fluxo(itens, converter=None, itens_por_bloco=ITENS_POR_BLOCO):
+    """
+    Gera, em pedaços de bytes, o mesmo JSON que jsonify(list(itens)) produziria
+    (lista compacta + "\\n"), sem montar a lista inteira em memória: os itens são
+    serializados em blocos de `itens_por_bloco`. `converter` transforma cada item
+    (um modelo, por exemplo) no objeto a serializar.
+    """
+    provedor = current_app.json
+    if isinstance(provedor, ProvedorJSONRapido):
+        serializar = provedor.dumps_bytes
+    else:
+        def serializar(obj):
+            return provedor.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+    yield b"["
+    primeiro = True
+    bloco = []
+    for item in itens:
+        bloco.append(converter(item) if converter else item)
+        if len(bloco) >= itens_por_bloco:
+            yield (b"" if primeiro else b",") + serializar(bloco)[1:-1]
+            primeiro = False
+            bloco = []
+    if bloco:
+        yield (b"" if primeiro else b",") + serializar(bloco)[1:-1]
+    yield b"]\n"
@@ -0,0 +1,297 @@
+"""
+Saída linearizada ("fast web view") dos documentos.
+
+Num PDF linearizado a primeira página e tudo de que ela depende (fontes, recursos)
+vêm logo no começo do arquivo, precedidos de um dicionário de linearização e de
+uma tabela de referências própria. O visualizador do navegador desenha a primeira
+página assim que esses bytes chegam, sem esperar o resto do download.
+
+O LinearizedOutputProducer do fpdf2 (2.7.x, experimental) não serve: falha em
+qualquer documento ao gravar a primeira tabela xref e, mesmo corrigido, deixaria
+as fontes depois de todas as páginas. Aqui a montagem segue o Anexo F da
+especificação PDF 1.7:
+
+    cabeçalho, dicionário de linearização, xref da primeira página, catálogo,
+    hint stream, seção da primeira página (página 1, conteúdo, fontes, recursos),
+    demais páginas, demais objetos (árvore de páginas, /Info) e xref principal
+
+Os objetos são criados pelas mesmas rotinas do ProdutorPDF (incluindo o cache de
+fontes), numerados já na ordem final e serializados uma única vez. Os
+deslocamentos são calculados depois e gravados em campos de largura fixa. O hint
+stream (tabelas de páginas e de objetos compartilhados) usa os deslocamentos
+"como se ele não existisse", como pede a especificação.
+
+Documentos com recursos que este produtor não organiza (imagens, assinatura,
+criptografia, anexos, sumário, árvore de estrutura, metadados XMP) saem no
+formato normal.
+"""
+import zlib
+
+from fpdf.annotations import PDFAnnotation
+from fpdf.output import PDFHeader, PDFResources, _dimensions_to_mediabox
+from fpdf.syntax import PDFArray
+from fpdf.syntax import create_dictionary_string as pdf_dict
+from fpdf.syntax import iobj_ref as pdf_ref
+
+from src.services.fonts import ProdutorPDF
+
+# Largura fixa dos números preenchidos depois da serialização
+LARGURA_NUMERO = 10
+
+
+class RecursosTardios(PDFResources):
+    """
+    Dicionário de recursos que resolve as referências só na serialização: o
+    PDFResources original grava os números dos objetos no construtor, antes de a
+    linearização renumerá-los.
+    """
+
+    def __init__(self, fontes, estados):
+        super().__init__(proc_set="[/PDF /Text /ImageB /ImageC /ImageI]", font=None,
+                         x_object=None, ext_g_state=None)
+        self._fontes = fontes
+        self._estados = estados
+
+    def serialize(self, obj_dict=None, _security_handler=None):
+        if self._fontes:
+            self.font = pdf_dict({f"/F{i}": pdf_ref(obj.id) for i, obj in sorted(self._fontes.items())})
+        if self._estados:
+            self.ext_g_state = pdf_dict({f"/{nome}": pdf_ref(obj.id) for nome, obj in self._estados.items()})
+        return super().serialize(obj_dict, _security_handler)
+
+
+class EscritorBits:
+    """Acumula campos de tamanho arbitrário em bits, como nas hint tables"""
+
+    def __init__(self):
+        self.dados = bytearray()
+        self._valor = 0
+        self._bits = 0
+
+    def escrever(self, valor, bits):
+        if bits == 0:
+            return
+        self._valor = (self._valor << bits) | valor
+        self._bits += bits
+        while self._bits >= 8:
+            self._bits -= 8
+            self.dados.append((self._valor >> self._bits) & 0xFF)
+        self._valor &= (1 << self._bits) - 1
+
+    def alinhar(self):
+        """Completa o byte atual com zeros: cada grupo de itens começa num byte novo"""
+        if self._bits:
+            self.escrever(0, 8 - self._bits)
+
+
+def tabela_paginas(paginas, posicao_primeira, compartilhados_por_pagina):
+    """
+    Page offset hint table (Tabelas F.3 e F.4). `paginas` traz (nº de objetos,
+    tamanho em bytes) de cada página e `compartilhados_por_pagina` os índices, na
+    tabela de objetos compartilhados, dos objetos que cada página usa.
+    """
+    objetos = [n for n, _ in paginas]
+    tamanhos = [t for _, t in paginas]
+    min_objetos, min_tamanho = min(objetos), min(tamanhos)
+    bits_objetos = (max(objetos) - min_objetos).bit_length()
+    bits_tamanho = (max(tamanhos) - min_tamanho).bit_length()
+    bits_qtd = max(len(c) for c in compartilhados_por_pagina).bit_length()
+    bits_indice = max((max(c) for c in compartilhados_por_pagina if c), default=0).bit_length()
+
+    w = EscritorBits()
+    for valor, bits in (
+        (min_objetos, 32), (posicao_primeira, 32), (bits_objetos, 16),
+        (min_tamanho, 32), (bits_tamanho, 16),
+        (0, 32), (0, 16),                       # deslocamento do conteúdo na página (sempre 0)
+        (min_tamanho, 32), (bits_tamanho, 16),  # tamanho do conteúdo: o da página inteira
+        (bits_qtd, 16), (bits_indice, 16),
+        (0, 16), (4, 16),                       # numerador (0 bits) e denominador
+    ):
+        w.escrever(valor, bits)
+
+    for grupo in (
+        [(n - min_objetos, bits_objetos) for n in objetos],
+        [(t - min_tamanho, bits_tamanho) for t in tamanhos],
+        [(len(c), bits_qtd) for c in compartilhados_por_pagina],
+        [(i, bits_indice) for c in compartilhados_por_pagina for i in c],
+        [(t - min_tamanho, bits_tamanho) for t in tamanhos],
+    ):
+        for valor, bits in grupo:
+            w.escrever(valor, bits)
+        w.alinhar()
+    return bytes(w.dados)
+
+
+def tabela_compartilhados(tamanhos):
+    """
+    Shared object hint table (Tabelas F.5 e F.6). Todos os objetos compartilhados
+    ficam na seção da primeira página, um por grupo; não há a parte 8 do arquivo.
+    """
+    minimo = min(tamanhos)
+    bits_tamanho = (max(tamanhos) - minimo).bit_length()
+
+    w = EscritorBits()
+    for valor, bits in ((0, 32), (0, 32), (len(tamanhos), 32), (len(tamanhos), 32),
+                        (0, 16), (minimo, 32), (bits_tamanho, 16)):
+        w.escrever(valor, bits)
+    for tamanho in tamanhos:
+        w.escrever(tamanho - minimo, bits_tamanho)
+    w.alinhar()
+    for _ in tamanhos:
+        w.escrever(0, 1)  # sem assinatura MD5 do grupo
+    w.alinhar()
+    return bytes(w.dados)
+
+
+def serializar(obj):
+    dados = obj.serialize()
+    if isinstance(dados, str):
+        dados = dados.encode("latin-1")
+    return dados + b"\n"
+
+
+class ProdutorPDFLinearizado(ProdutorPDF):
+    """ProdutorPDF que grava o documento linearizado"""
+
+    def _linearizavel(self):
+        fpdf = self.fpdf
+        return not (fpdf.images or fpdf._security_handler or fpdf._sign_key or fpdf.embedded_files
+                    or fpdf._outline or fpdf.xmp_metadata or fpdf.struct_builder.doc_struct_elem.k)
+
+    def bufferize(self):
+        if not self._linearizavel():
+            return super().bufferize()
+        fpdf = self.fpdf
+
+        # 1. Objetos, pelas mesmas rotinas do OutputProducer
+        pages_root_obj = self._add_pages_root()
+        catalog_obj = self._add_catalog()
+        page_objs = self._add_pages()
+        self._add_annotations_as_objects()
+        inicio_recursos = len(self.pdf_objs)
+        font_objs_per_index = self._add_fonts()
+        gfxstate_objs_per_name = self._add_gfxstates()
+        resources_dict_obj = RecursosTardios(font_objs_per_index, gfxstate_objs_per_name)
+        if self.perfil.enxugar:
+            resources_dict_obj.proc_set = None
+        self._add_pdf_obj(resources_dict_obj)
+        objetos_recursos = self.pdf_objs[inicio_recursos:]
+        info_obj = self._add_info()
+
+        def objetos_da_pagina(page_obj):
+            anotacoes = [a for a in page_obj.annots if isinstance(a, PDFAnnotation)]
+            return [page_obj, page_obj.contents, *anotacoes]
+
+        # 2. Partes do arquivo e numeração final, na ordem do Anexo F: demais páginas
+        #    e objetos com 1..K, depois dicionário de linearização, catálogo, hint
+        #    stream e seção da primeira página
+        parte6 = objetos_da_pagina(page_objs[0]) + objetos_recursos
+        parte7 = [objetos_da_pagina(page_obj) for page_obj in page_objs[1:]]
+        parte9 = [pages_root_obj, info_obj]
+        restantes = [obj for pagina in parte7 for obj in pagina] + parte9
+        num_linearizacao = len(restantes) + 1
+        num_hint = num_linearizacao + 2
+        for numero, obj in enumerate([*restantes, None, catalog_obj, None, *parte6], start=1):
+            if obj is not None:
+                obj.id = numero
+        total_objetos = parte6[-1].id + 1
+
+        # 3. Referências entre objetos, como no OutputProducer, já com os números finais
+        pages_root_obj.kids = PDFArray(page_objs)
+        self._finalize_catalog(catalog_obj, pages_root_obj=pages_root_obj, first_page_obj=page_objs[0],
+                               sig_annotation_obj=None, xmp_metadata_obj=None,
+                               struct_tree_root_obj=None, outline_dict_obj=None)
+        dests = []
+        for page_obj in page_objs:
+            # Sem atributos herdados da árvore de páginas: cada página fica completa
+            # na sua seção, sem depender de objetos gravados no fim do arquivo
+            page_obj.media_box = _dimensions_to_mediabox(page_obj.dimensions())
+            page_obj.parent = pages_root_obj
+            page_obj.resources = resources_dict_obj
+            for annot in page_obj.annots:
+                if annot.dest:
+                    dests.append(annot.dest)
+                if annot.a and hasattr(annot.a, "dest"):
+                    dests.append(annot.a.dest)
+            if not page_obj.annots:
+                page_obj.annots = None
+        for dest in dests:
+            dest.page_ref = pdf_ref(page_objs[dest.page_number - 1].id)
+
+        # 4. Serialização e deslocamentos "sem o hint stream"
+        cabecalho = PDFHeader(fpdf.pdf_version).serialize().encode("latin-1") + b"\n"
+        bytes_catalogo = serializar(catalog_obj)
+        bytes_parte6 = [serializar(obj) for obj in parte6]
+        bytes_restantes = [serializar(obj) for obj in restantes]
+        file_id = fpdf.file_id()
+        if file_id == -1:
+            file_id = fpdf._default_file_id(b"".join([bytes_catalogo, *bytes_parte6, *bytes_restantes]))
+
+        def linearizacao(tamanho=0, hint=(0, 0), fim_primeira_pagina=0, primeira_entrada=0):
+            n = LARGURA_NUMERO
+            return (
+                f"{num_linearizacao} 0 obj\n<</Linearized 1 /L {tamanho:>{n}} "
+                f"/H [{hint[0]:>{n}} {hint[1]:>{n}}] /O {page_objs[0].id} "
+                f"/E {fim_primeira_pagina:>{n}} /N {len(page_objs)} /T {primeira_entrada:>{n}}>>\nendobj\n"
+            ).encode("latin-1")
+
+        def xref_primeira_pagina(deslocamentos, anterior=0):
+            trailer = (f"<</Size {total_objetos} /Root {pdf_ref(catalog_obj.id)} /Info {pdf_ref(info_obj.id)}"
+                       f" /Prev {anterior:>{LARGURA_NUMERO}}" + (f" /ID [{file_id}]" if file_id else "") + ">>")
+            linhas = ["xref", f"{num_linearizacao} {total_objetos - num_linearizacao}"]
+            linhas += [f"{deslocamentos.get(i, 0):010} 00000 n " for i in range(num_linearizacao, total_objetos)]
+            linhas += ["trailer", trailer, "startxref", "0", "%%EOF", ""]
+            return "\n".join(linhas).encode("latin-1")
+
+        tamanho_inicio = len(cabecalho) + len(linearizacao())
+        ajustados = {}
+        posicao = tamanho_inicio + len(xref_primeira_pagina({}))
+        for obj, dados in [(catalog_obj, bytes_catalogo), *zip(parte6, bytes_parte6),
+                           *zip(restantes, bytes_restantes)]:
+            ajustados[obj.id] = posicao
+            posicao += len(dados)
+        fim_objetos = posicao
+
+        # 5. Hint stream. As demais páginas usam os recursos e as fontes gravados na
+        #    seção da primeira página (os objetos compartilhados).
+        inicios = [ajustados[page_obj.id] for page_obj in page_objs]
+        fins = inicios[1:] + [ajustados[parte9[0].id]]
+        fins[0] = ajustados[restantes[0].id]
+        paginas = [(len(parte6), fins[0] - inicios[0])]
+        paginas += [(len(pagina), fim - inicio) for pagina, inicio, fim in zip(parte7, inicios[1:], fins[1:])]
+        indices_recursos = list(range(len(parte6) - len(objetos_recursos), len(parte6)))
+        compartilhados = [[]] + [indices_recursos] * len(parte7)
+        dados_paginas = tabela_paginas(paginas, inicios[0], compartilhados)
+        dados_hint = zlib.compress(dados_paginas + tabela_compartilhados([len(d) for d in bytes_parte6]))
+        bytes_hint = (
+            f"{num_hint} 0 obj\n<</Filter /FlateDecode /Length {len(dados_hint)} /S {len(dados_paginas)}>>\n"
+            "stream\n"
+        ).encode("latin-1") + dados_hint + b"\nendstream\nendobj\n"
+
+        # 6. Deslocamentos reais: o hint stream entra entre o catálogo e a primeira página
+        posicao_hint = ajustados[catalog_obj.id] + len(bytes_catalogo)
+        deslocamentos = {num: d + len(bytes_hint) if d >= posicao_hint else d for num, d in ajustados.items()}
+        deslocamentos[num_linearizacao] = len(cabecalho)
+        deslocamentos[num_hint] = posicao_hint
+        inicio_xref_principal = fim_objetos + len(bytes_hint)
+
+        xref_principal = "\n".join(
+            ["xref", f"0 {num_linearizacao}", "0000000000 65535 f "]
+            + [f"{deslocamentos[i]:010} 00000 n " for i in range(1, num_linearizacao)]
+            + ["trailer", f"<</Size {num_linearizacao}>>", "startxref", str(tamanho_inicio), "%%EOF", ""]
+        ).encode("latin-1")
+        # /T: o espaço em branco que precede a primeira entrada da xref principal
+        primeira_entrada = inicio_xref_principal + xref_principal.index(b"0000000000 65535 f") - 1
+
+        self.buffer = bytearray().join([
+            cabecalho,
+            linearizacao(inicio_xref_principal + len(xref_principal), (posicao_hint, len(bytes_hint)),
+                         deslocamentos[restantes[0].id], primeira_entrada),
+            xref_primeira_pagina(deslocamentos, inicio_xref_principal),
+            bytes_catalogo,
+            bytes_hint,
+            *bytes_parte6,
+            *bytes_restantes,
+            xref_principal,
+        ])
+        return self.buffer
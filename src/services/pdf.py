@@ -0,0 +1,183 @@
+import io
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from flask import current_app, request, send_file
+from fpdf import FPDF
+
+from src.services.arquivo import arquivo_documentos
+from src.services.compressao import PERFIL_PADRAO, PERFIS_COMPRESSAO
+from src.services.fonts import REGISTRO_FONTES, ProdutorPDF
+from src.services.linearizacao import ProdutorPDFLinearizado
+from src.services.relatorios import confirmar_emissoes, registrar_emissao
+from src.services.vigia import verificar_prazo
+
+# Data de criação usada quando o payload não traz uma dataEmissao válida
+DATA_CRIACAO_PADRAO = datetime(2000, 1, 1, tzinfo=timezone.utc)
+
+
+class DocumentoPDF(FPDF):
+    """
+    FPDF dos documentos: gera a saída com o cache de subsets de fontes e, com
+    linearize=True, no formato linearizado de services/linearizacao.py. Cada linha
+    desenhada e cada página nova são pontos de verificação do prazo de renderização
+    (services/vigia.py).
+
+    Quando o texto passa para uma nova página (listas longas de outorgados, poderes
+    extensos), o cabeçalho da página repete o título do documento e, dentro de
+    secao_continua, o rótulo da seção em andamento.
+
+    O perfil de compressão (services/compressao.py) é aplicado pelo ProdutorPDF.
+    """
+
+    titulo_continuacao = None
+    secao_continuacao = None
+    perfil_compressao = PERFIL_PADRAO
+
+    def header(self):
+        if self.page_no() == 1 or not self.titulo_continuacao:
+            return
+        self.set_font("Times", "B", 12)
+        self.cell(0, 5, f"{self.titulo_continuacao} (continuação)", align="C", new_x="LMARGIN", new_y="NEXT")
+        if self.secao_continuacao:
+            self.cell(0, 5, f"{self.secao_continuacao} (continuação):", new_x="LMARGIN", new_y="NEXT")
+        self.ln(3)
+
+    @contextmanager
+    def secao_continua(self, rotulo):
+        """Repete `rotulo` no cabeçalho das páginas abertas enquanto o bloco escreve"""
+        self.secao_continuacao = rotulo
+        try:
+            yield
+        finally:
+            self.secao_continuacao = None
+
+    def add_page(self, *args, **kwargs):
+        verificar_prazo()
+        super().add_page(*args, **kwargs)
+
+    def _render_styled_text_line(self, *args, **kwargs):
+        verificar_prazo()
+        return super()._render_styled_text_line(*args, **kwargs)
+
+    def output(self, name="", dest="", linearize=False, output_producer_class=ProdutorPDF):
+        if linearize:
+            output_producer_class = ProdutorPDFLinearizado
+        return super().output(name, dest, False, output_producer_class)
+
+
+def data_criacao_deterministica(data):
+    """
+    Deriva a data de criação do PDF a partir da dataEmissao do payload (YYYY-MM-DD).
+    Sem data válida, usa uma data fixa para que a saída dependa apenas do conteúdo.
+    """
+    data_emissao = data.get("dataEmissao", "")
+    if data_emissao:
+        try:
+            return datetime.strptime(data_emissao, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+        except (TypeError, ValueError):
+            pass
+    return DATA_CRIACAO_PADRAO
+
+
+def criar_pdf(data, fonte_embutida=None):
+    """
+    Cria o objeto FPDF base dos documentos.
+
+    No modo determinístico (PDF_DETERMINISTICO, ligado por padrão) a data de criação
+    vem do payload em vez do relógio. Como o /ID do arquivo é o hash do conteúdo somado
+    a essa data, payloads idênticos passam a gerar exatamente os mesmos bytes.
+
+    Com PDF_FONTE_EMBUTIDA (ou fonte_embutida=True), as faces TTF do registro do
+    processo substituem a fonte core Times, permitindo qualquer caractere Unicode
+    nos nomes e endereços.
+    """
+    pdf = DocumentoPDF()
+    if current_app.config.get("PDF_DETERMINISTICO", True):
+        pdf.set_creation_date(data_criacao_deterministica(data))
+    if fonte_embutida is None:
+        fonte_embutida = current_app.config.get("PDF_FONTE_EMBUTIDA", True)
+    if fonte_embutida:
+        REGISTRO_FONTES.registrar_em(pdf)
+    return pdf
+
+
+def finalizar_pdf(pdf, linearizar=False, tipo=None, data=None, confirmar=True, compressao=None):
+    """
+    Gera os bytes do PDF (linearizados, se pedido) com o perfil de compressão
+    `compressao` (sem ele, vale PDF_COMPRESSAO) e os entrega a registrar_pdf.
+    Devolve (bytes, hash do documento ou None).
+    """
+    verificar_prazo()
+    pdf.perfil_compressao = PERFIS_COMPRESSAO[compressao or current_app.config.get("PDF_COMPRESSAO", "padrao")]
+    pdf_output = bytes(pdf.output(linearize=linearizar))
+    return pdf_output, registrar_pdf(pdf_output, tipo, data, confirmar)
+
+
+def registrar_pdf(pdf_output, tipo=None, data=None, confirmar=True):
+    """
+    Com ARQUIVO_DOCUMENTOS ligado, guarda o PDF no arquivo endereçado por conteúdo e
+    devolve o hash (ou None).
+
+    Com `tipo` e `data` (o payload), registra a emissão para os relatórios
+    (RELATORIOS_EMISSOES); confirmar=False deixa o commit para quem chama, que
+    emite vários documentos por requisição (importação de planilhas).
+    """
+    hash_documento = None
+    if current_app.config.get("ARQUIVO_DOCUMENTOS", True):
+        hash_documento = arquivo_documentos.guardar(pdf_output)
+    if tipo is not None and current_app.config.get("RELATORIOS_EMISSOES", True):
+        registrar_emissao(tipo, data, hash_documento)
+        if confirmar:
+            confirmar_emissoes()
+    return hash_documento
+
+
+def linearizacao_pedida():
+    """
+    ?linearizar=1 (ou 0) na rota; sem o parâmetro, vale PDF_LINEARIZADO. O PDF
+    linearizado começa a aparecer no navegador antes de o download terminar.
+    """
+    valor = request.args.get("linearizar")
+    if valor is None:
+        return current_app.config.get("PDF_LINEARIZADO", False)
+    return valor.lower() in ("1", "true", "sim")
+
+
+def compressao_pedida():
+    """
+    ?compressao=rapido|padrao|compacto na rota; sem o parâmetro (ou com um perfil
+    desconhecido), vale PDF_COMPRESSAO.
+    """
+    valor = request.args.get("compressao")
+    if valor in PERFIS_COMPRESSAO:
+        return valor
+    return current_app.config.get("PDF_COMPRESSAO", "padrao")
+
+
+def responder_pdf(pdf, download_name, tipo=None, data=None):
+    """
+    Finaliza o PDF (linearizado conforme linearizacao_pedida, comprimido conforme
+    compressao_pedida), registra a emissão
+    do `tipo` com o payload `data` e devolve a resposta de download.
+
+    Quando o PDF foi arquivado, os cabeçalhos X-Documento-Hash / X-Documento-Url
+    apontam para a reimpressão em GET /api/documents/<hash>.pdf, que não precisa
+    renderizar de novo.
+    """
+    pdf_output, hash_documento = finalizar_pdf(pdf, linearizacao_pedida(), tipo, data,
+                                               compressao=compressao_pedida())
+    return resposta_download(pdf_output, hash_documento, download_name)
+
+
+def resposta_download(pdf_output, hash_documento, download_name):
+    resposta = send_file(
+        io.BytesIO(pdf_output),
+        mimetype="application/pdf",
+        as_attachment=True,
+        download_name=download_name
+    )
+    if hash_documento:
+        resposta.headers["X-Documento-Hash"] = hash_documento
+        resposta.headers["X-Documento-Url"] = f"/api/documents/{hash_documento}.pdf"
+    return resposta
@@ -0,0 +1,217 @@
+"""
+Reemissão em lote dos documentos de uma parte depois de uma mudança de dados
+(endereço, nome, nacionalidade de um outorgado recorrente, por exemplo).
+
+    1. As emissões que citam o CPF/CNPJ saem do índice EmissaoParte (gravado a cada
+       emissão; as emissões anteriores a ele são indexadas na primeira reemissão).
+       Só entram as que ainda têm o payload guardado (PayloadEmissao, por
+       REEMISSAO_RETENCAO_DIAS) e que não foram substituídas por uma reemissão.
+    2. Cada payload gravado recebe as alterações em todos os lugares onde a parte
+       aparece (outorgante, outorgado ou item de outorgados) e passa pela mesma
+       validação e estimativa de custo das rotas.
+    3. Payloads que ficaram iguais (a mesma procuração emitida duas vezes, ou uma
+       emissão e a sua reemissão anterior) viram um único documento: a saída é
+       determinística, então renderizar de novo daria o mesmo PDF.
+    4. Os documentos únicos entram na fila de renderização (services/fila.py) com o
+       lote da reemissão e são renderizados em paralelo pelos workers
+       (python -m src.worker --processos N); cada um é registrado como nova emissão
+       e, no mesmo commit, marca as emissões de origem como substituídas pelo lote.
+       Uma reemissão seguinte parte dos documentos novos, não dos originais.
+
+Uma parte tem no máximo uma reemissão em andamento: enquanto os originais não
+foram marcados, uma segunda reemissão os reemitiria de novo. A regra vale na
+própria gravação (índice único parcial de Reemissao), então dois pedidos
+simultâneos não passam os dois; o perdedor recebe ReemissaoEmAndamento.
+
+O progresso vem das contagens das tarefas do lote; o pacote (ZIP) lê os PDFs do
+arquivo de documentos pelo hash gravado em cada tarefa.
+"""
+import json
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import delete, exists, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from src.models.emissao import Emissao, EmissaoParte, PayloadEmissao
+from src.models.fila import TarefaRenderizacao
+from src.models.reemissao import Reemissao
+from src.models.user import db
+from src.services.fila import fila_renderizacao
+from src.services.relatorios import partes_do_payload, somente_digitos
+from src.services.schemas import validar_payload
+from src.services.vigia import VIGIA_RENDERIZACAO
+
+CAMPOS_ALTERAVEIS = ("nome", "nacionalidade", "endereco")
+
+# Campo do payload de cada dado da parte, por papel
+CAMPOS_OUTORGADO = {"nome": "outorgadoNome", "nacionalidade": "outorgadoNacionalidade",
+                    "endereco": "outorgadoEndereco"}
+CAMPOS_OUTORGANTE_PF = {"nome": "outorganteNome", "nacionalidade": "outorganteNacionalidade",
+                        "endereco": "outorganteEndereco"}
+CAMPOS_OUTORGANTE_PJ = {"nome": "outorganteRazaoSocial", "endereco": "outorganteEndereco"}
+
+# Emissões lidas e indexadas por vez
+EMISSOES_POR_BLOCO = 1000
+
+
+class ReemissaoEmAndamento(Exception):
+    """A parte já tem uma reemissão ativa (`lote`)"""
+
+    def __init__(self, documento, lote):
+        super().__init__(f"reemissão {lote} de {documento} em andamento")
+        self.documento = documento
+        self.lote = lote
+
+
+def indexar_partes_pendentes():
+    """Grava EmissaoParte das emissões registradas antes do índice; devolve quantas indexou"""
+    sem_partes = (select(Emissao.id, Emissao.tipo, PayloadEmissao.dados)
+                  .join(PayloadEmissao)
+                  .where(~exists().where(EmissaoParte.emissao_id == Emissao.id))
+                  .order_by(Emissao.id).limit(EMISSOES_POR_BLOCO))
+    total = 0
+    while bloco := db.session.execute(sem_partes).all():
+        linhas = [{"emissao_id": emissao_id, "papel": papel, "documento": documento}
+                  for emissao_id, tipo, dados in bloco
+                  for papel, documento in partes_do_payload(tipo, json.loads(dados))]
+        db.session.execute(insert(EmissaoParte), linhas)
+        db.session.commit()
+        total += len(bloco)
+    return total
+
+
+def expurgar_payloads():
+    """Apaga os payloads com a retenção vencida; devolve quantos apagou"""
+    resultado = db.session.execute(delete(PayloadEmissao)
+                                   .where(PayloadEmissao.expira_em < datetime.now(timezone.utc)))
+    db.session.commit()
+    return resultado.rowcount
+
+
+def marcar_substituidas(emissoes, lote):
+    """
+    Marca as emissões como substituídas pela reemissão `lote`, na sessão: o commit
+    é o mesmo que registra a emissão do documento novo
+    """
+    db.session.execute(update(Emissao)
+                       .where(Emissao.id.in_(emissoes), Emissao.substituida_por.is_(None))
+                       .values(substituida_por=lote))
+
+
+def reemissao_em_andamento(documento):
+    """
+    A reemissão ativa da parte, se ainda tiver tarefas pendentes ou em execução;
+    uma que já terminou deixa de ser ativa aqui
+    """
+    ativa = db.session.scalars(select(Reemissao).where(Reemissao.documento == documento,
+                                                       Reemissao.em_andamento.is_(True))).first()
+    if ativa is None:
+        return None
+    if not progresso(ativa)["encerrada"]:
+        return ativa
+    db.session.execute(update(Reemissao).where(Reemissao.lote == ativa.lote).values(em_andamento=False))
+    db.session.commit()
+    return None
+
+
+def aplicar_alteracoes(tipo, dados, documento, alteracoes):
+    """Cópia do payload com `alteracoes` nos campos de cada ocorrência da parte `documento`"""
+    novo = dict(dados)
+    campos_outorgante = CAMPOS_OUTORGANTE_PJ if "_pj" in tipo else CAMPOS_OUTORGANTE_PF
+    documento_outorgante = novo.get("outorganteCnpj" if "_pj" in tipo else "outorganteCpf")
+    if somente_digitos(documento_outorgante) == documento:
+        novo.update((campos_outorgante[campo], valor) for campo, valor in alteracoes.items()
+                    if campo in campos_outorgante)
+    if "_multiplos" in tipo:
+        novo["outorgados"] = [
+            {**outorgado, **alteracoes} if somente_digitos(outorgado.get("cpf")) == documento else outorgado
+            for outorgado in novo.get("outorgados") or ()
+        ]
+    elif somente_digitos(novo.get("outorgadoCpf")) == documento:
+        novo.update((CAMPOS_OUTORGADO[campo], valor) for campo, valor in alteracoes.items())
+    return novo
+
+
+def iniciar_reemissao(documento, alteracoes, tipos=None, desde=None, data_emissao=None):
+    """
+    Localiza as emissões da parte, aplica as alterações (e a nova dataEmissao, se
+    informada), junta os payloads iguais e enfileira um documento por payload único.
+    Devolve a Reemissao gravada; levanta ReemissaoEmAndamento se outra reemissão da
+    parte ficou ativa enquanto esta era planejada.
+    """
+    expurgar_payloads()
+    indexar_partes_pendentes()
+    consulta = (select(Emissao.id, Emissao.tipo, PayloadEmissao.dados)
+                .join(PayloadEmissao)
+                .where(Emissao.id.in_(select(EmissaoParte.emissao_id).where(EmissaoParte.documento == documento)),
+                       Emissao.substituida_por.is_(None))
+                .order_by(Emissao.id)
+                .execution_options(yield_per=EMISSOES_POR_BLOCO))
+    if tipos:
+        consulta = consulta.where(Emissao.tipo.in_(tipos))
+    if desde is not None:
+        consulta = consulta.where(Emissao.emitido_em >= desde)
+
+    unicos = {}
+    ignoradas = []
+    encontradas = 0
+    for emissao_id, tipo, dados in db.session.execute(consulta):
+        encontradas += 1
+        novo = aplicar_alteracoes(tipo, json.loads(dados), documento, alteracoes)
+        if data_emissao is not None:
+            novo["dataEmissao"] = data_emissao
+        erros = validar_payload(tipo, novo)
+        motivo = ("; ".join(f"{e['campo']}: {e['mensagem']}" for e in erros) if erros
+                  else VIGIA_RENDERIZACAO.custo_excedido(tipo, novo))
+        if motivo:
+            ignoradas.append({"emissao": emissao_id, "motivo": motivo})
+            continue
+        chave = json.dumps([tipo, novo], sort_keys=True, ensure_ascii=False)
+        unicos.setdefault(chave, (tipo, novo, []))[2].append(emissao_id)
+
+    reemissao = Reemissao(
+        lote=uuid.uuid4().hex,
+        documento=documento,
+        alteracoes=json.dumps(alteracoes, ensure_ascii=False),
+        encontradas=encontradas,
+        documentos=len(unicos),
+        ignoradas=json.dumps(ignoradas, ensure_ascii=False),
+        origens=json.dumps([emissoes for _, _, emissoes in unicos.values()]),
+        em_andamento=bool(unicos),
+    )
+    db.session.add(reemissao)
+    # Registro e tarefas no banco da fila: um commit, uma transação. A ordem das
+    # tarefas no lote é a de `origens`
+    try:
+        fila_renderizacao.enfileirar_varios(unicos.values(), lote=reemissao.lote)
+    except IntegrityError:
+        db.session.rollback()
+        lote = db.session.scalars(select(Reemissao.lote).where(Reemissao.documento == documento,
+                                                               Reemissao.em_andamento.is_(True))).first()
+        raise ReemissaoEmAndamento(documento, lote) from None
+    return reemissao
+
+
+def progresso(reemissao):
+    """Registro da reemissão com as tarefas do lote por estado e a fração já encerrada"""
+    estados = fila_renderizacao.contagens(reemissao.lote)
+    encerradas = estados["concluida"] + estados["falhou"]
+    return {
+        **reemissao.to_dict(),
+        "estados": estados,
+        "progresso": round(encerradas / reemissao.documentos, 4) if reemissao.documentos else 1.0,
+        "encerrada": encerradas == reemissao.documentos,
+    }
+
+
+def documentos_do_lote(reemissao):
+    """(tipo, payload, estado, hash, ids das emissões substituídas) de cada tarefa, na ordem do lote"""
+    consulta = (select(TarefaRenderizacao.tipo, TarefaRenderizacao.dados, TarefaRenderizacao.estado,
+                       TarefaRenderizacao.hash_documento)
+                .where(TarefaRenderizacao.lote == reemissao.lote)
+                .order_by(TarefaRenderizacao.id)
+                .execution_options(yield_per=EMISSOES_POR_BLOCO))
+    for (tipo, dados, estado, hash_documento), origens in zip(db.session.execute(consulta),
+                                                             json.loads(reemissao.origens)):
+        yield tipo, json.loads(dados), estado, hash_documento, origens
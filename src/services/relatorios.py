@@ -0,0 +1,226 @@
+"""
+Registro das emissões de documentos e relatórios pré-agregados.
+
+Cada PDF emitido (rotas generate_* e importação de planilhas) grava uma linha em
+Emissao só com as dimensões que os relatórios e a exportação usam; o CPF/CNPJ de
+cada parte vai para EmissaoParte e o payload, por REEMISSAO_RETENCAO_DIAS, para
+PayloadEmissao (os dois só para a reemissão). No mesmo commit, incrementa as
+contagens do dia em ResumoEmissoes: uma linha para o total e uma por dimensão (tipo, cliente = CPF/CNPJ do outorgante,
+cidade = localEmissao). Os incrementos são somados na sessão e aplicados com um
+único INSERT ... ON CONFLICT DO UPDATE, atômico mesmo com workers e threads
+emitindo ao mesmo tempo.
+
+GET /api/reports soma só as linhas do resumo do período: o custo depende do número
+de dias e de valores distintos, não do número de documentos emitidos. A exportação
+CSV percorre as emissões com cursor do lado do servidor (stream_results), em
+blocos, então a memória não cresce com o número de linhas.
+
+Os dias são contados no fuso RELATORIOS_FUSO (padrão America/Sao_Paulo); as datas
+ficam gravadas em UTC.
+"""
+import csv
+import io
+import re
+from datetime import datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from flask import current_app
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as insert_postgresql
+from sqlalchemy.dialects.sqlite import insert as insert_sqlite
+
+from src.models.emissao import Emissao, EmissaoParte, PayloadEmissao, ResumoEmissoes
+from src.models.user import db
+
+DIMENSOES = ("tipo", "cliente", "cidade")
+
+# Período máximo de um relatório (mantém o custo da consulta limitado)
+MAX_DIAS_RELATORIO = 366
+
+# Linhas lidas do cursor e escritas no CSV por vez
+LINHAS_POR_BLOCO_CSV = 1000
+
+COLUNAS_CSV = ["emitido_em", "tipo", "cliente_documento", "cliente_nome", "cidade", "placa", "hash_documento"]
+
+
+def fuso():
+    try:
+        return ZoneInfo(current_app.config.get("RELATORIOS_FUSO", "America/Sao_Paulo"))
+    except ZoneInfoNotFoundError:
+        return timezone.utc
+
+
+def somente_digitos(documento):
+    """CPF/CNPJ sem pontuação, para que formatações diferentes contem como o mesmo cliente"""
+    return re.sub(r'\D', '', documento or "")
+
+
+def cliente_do_payload(tipo, data):
+    """(CPF/CNPJ só com dígitos, nome ou razão social) do outorgante"""
+    if "_pj" in tipo:
+        return somente_digitos(data.get("outorganteCnpj")), data.get("outorganteRazaoSocial", "")
+    return somente_digitos(data.get("outorganteCpf")), data.get("outorganteNome", "")
+
+
+def partes_do_payload(tipo, data):
+    """
+    {(papel, CPF/CNPJ só com dígitos)} das partes citadas: sempre o outorgante
+    (mesmo sem documento, para marcar a emissão como indexada) e cada outorgado
+    """
+    partes = {("outorgante", cliente_do_payload(tipo, data)[0])}
+    outorgados = data.get("outorgados") if "_multiplos" in tipo else [{"cpf": data.get("outorgadoCpf")}]
+    for outorgado in outorgados or ():
+        documento = somente_digitos(outorgado.get("cpf"))
+        if documento:
+            partes.add(("outorgado", documento))
+    return partes
+
+
+def _incrementar(linhas):
+    """Soma as quantidades das linhas ao resumo (upsert atômico no SQLite e no PostgreSQL)"""
+    dialeto = db.session.get_bind().dialect.name
+    if dialeto not in ("sqlite", "postgresql"):
+        # Outros bancos: leitura + escrita na sessão (sem garantia entre processos)
+        for linha in linhas:
+            resumo = db.session.get(ResumoEmissoes, (linha["dia"], linha["dimensao"], linha["valor"]))
+            if resumo is None:
+                db.session.add(ResumoEmissoes(**linha))
+            else:
+                resumo.quantidade += linha["quantidade"]
+                resumo.rotulo = linha["rotulo"]
+        return
+    insert = insert_sqlite if dialeto == "sqlite" else insert_postgresql
+    comando = insert(ResumoEmissoes).values(linhas)
+    comando = comando.on_conflict_do_update(
+        index_elements=["dia", "dimensao", "valor"],
+        set_={
+            "quantidade": ResumoEmissoes.__table__.c.quantidade + comando.excluded.quantidade,
+            "rotulo": comando.excluded.rotulo,
+        },
+    )
+    db.session.execute(comando)
+
+
+def registrar_emissao(tipo, data, hash_documento=None, emitido_em=None):
+    """
+    Adiciona a emissão à sessão e acumula os incrementos do resumo, aplicados por
+    confirmar_emissoes no mesmo commit (um upsert por linha distinta do resumo, não
+    por documento). O payload, para a reemissão, fica guardado por
+    REEMISSAO_RETENCAO_DIAS (0 não guarda).
+    """
+    emitido_em = emitido_em or datetime.now(timezone.utc)
+    documento, nome = cliente_do_payload(tipo, data)
+    retencao = current_app.config.get("REEMISSAO_RETENCAO_DIAS", 365)
+    payload = None
+    if retencao:
+        payload = PayloadEmissao(dados=current_app.json.dumps(data), expira_em=emitido_em + timedelta(days=retencao))
+    cidade = (data.get("localEmissao") or "").strip()
+    db.session.add(Emissao(
+        tipo=tipo,
+        emitido_em=emitido_em,
+        cliente_documento=documento,
+        cliente_nome=nome,
+        cidade=cidade,
+        placa=data.get("veiculoPlaca", ""),
+        hash_documento=hash_documento,
+        partes=[EmissaoParte(papel=papel, documento=documento) for papel, documento in partes_do_payload(tipo, data)],
+        payload=payload,
+    ))
+    dia = emitido_em.astimezone(fuso()).date()
+    pendentes = db.session.info.setdefault("resumo_pendente", {})
+    for chave, rotulo in (((dia, "total", ""), ""), ((dia, "tipo", tipo), ""),
+                          ((dia, "cliente", documento), nome), ((dia, "cidade", cidade), "")):
+        quantidade, _ = pendentes.get(chave, (0, ""))
+        pendentes[chave] = (quantidade + 1, rotulo)
+
+
+def confirmar_emissoes():
+    """
+    Aplica os incrementos pendentes e faz o commit das emissões. Uma falha no
+    registro (banco ocupado, por exemplo) é registrada no log e não impede a entrega
+    do documento já gerado.
+    """
+    pendentes = db.session.info.pop("resumo_pendente", {})
+    try:
+        if pendentes:
+            _incrementar([
+                {"dia": dia, "dimensao": dimensao, "valor": valor, "rotulo": rotulo, "quantidade": quantidade}
+                for (dia, dimensao, valor), (quantidade, rotulo) in pendentes.items()
+            ])
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        current_app.logger.exception("Falha ao registrar emissões para os relatórios")
+
+
+def relatorio(inicio, fim):
+    """Contagens do período [inicio, fim] (datas locais): total, por dia e por dimensão"""
+    periodo = ResumoEmissoes.dia.between(inicio, fim)
+    por_dia = db.session.execute(
+        select(ResumoEmissoes.dia, ResumoEmissoes.quantidade)
+        .where(periodo, ResumoEmissoes.dimensao == "total")
+        .order_by(ResumoEmissoes.dia)
+    ).all()
+    somas = db.session.execute(
+        select(ResumoEmissoes.dimensao, ResumoEmissoes.valor, func.max(ResumoEmissoes.rotulo),
+               func.sum(ResumoEmissoes.quantidade))
+        .where(periodo, ResumoEmissoes.dimensao.in_(DIMENSOES))
+        .group_by(ResumoEmissoes.dimensao, ResumoEmissoes.valor)
+    ).all()
+
+    dados = {
+        "inicio": inicio.isoformat(),
+        "fim": fim.isoformat(),
+        "total": sum(quantidade for _, quantidade in por_dia),
+        "dias": [{"dia": dia.isoformat(), "quantidade": quantidade} for dia, quantidade in por_dia],
+    }
+    for dimensao in DIMENSOES:
+        dados[dimensao] = []
+    for dimensao, valor, rotulo, quantidade in somas:
+        item = {"valor": valor, "quantidade": int(quantidade)}
+        if dimensao == "cliente":
+            item["nome"] = rotulo
+        dados[dimensao].append(item)
+    for dimensao in DIMENSOES:
+        dados[dimensao].sort(key=lambda item: (-item["quantidade"], item["valor"]))
+    return dados
+
+
+def limites_utc(inicio, fim):
+    """[início, fim) em UTC (sem tzinfo, como gravado) dos dias locais inicio..fim"""
+    local = fuso()
+    de = datetime.combine(inicio, time.min, local).astimezone(timezone.utc).replace(tzinfo=None)
+    ate = datetime.combine(fim + timedelta(days=1), time.min, local).astimezone(timezone.utc).replace(tzinfo=None)
+    return de, ate
+
+
+def exportar_csv(inicio, fim):
+    """
+    Gera o CSV (bytes, em blocos) das emissões dos dias locais inicio..fim, em ordem
+    de emissão. Separador ";" e BOM UTF-8, como o Excel em português espera.
+    """
+    de, ate = limites_utc(inicio, fim)
+    local = fuso()
+    consulta = (
+        select(Emissao.emitido_em, Emissao.tipo, Emissao.cliente_documento, Emissao.cliente_nome,
+               Emissao.cidade, Emissao.placa, Emissao.hash_documento)
+        .where(Emissao.emitido_em >= de, Emissao.emitido_em < ate)
+        .order_by(Emissao.emitido_em, Emissao.id)
+        .execution_options(stream_results=True, yield_per=LINHAS_POR_BLOCO_CSV)
+    )
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=";")
+    writer.writerow(COLUNAS_CSV)
+    yield ("﻿" + buffer.getvalue()).encode("utf-8")
+
+    resultado = db.session.execute(consulta)
+    try:
+        for bloco in resultado.partitions():
+            buffer.seek(0)
+            buffer.truncate()
+            for emitido_em, *colunas in bloco:
+                emitido_local = emitido_em.replace(tzinfo=timezone.utc).astimezone(local)
+                writer.writerow([emitido_local.isoformat(timespec="seconds"), *colunas])
+            yield buffer.getvalue().encode("utf-8")
+    finally:
+        resultado.close()
@@ -0,0 +1,181 @@
+"""
+Esquemas dos payloads de documentos e validação antes de qualquer renderização.
+
+Cada tipo de documento declara os campos que lê e o tamanho máximo de cada um.
+Os limites impedem que um payload malformado ou gigantesco (um "poderes" de
+megabytes, milhares de outorgados) chegue ao FPDF. O esquema é compilado uma
+única vez, na importação do módulo, numa função que só percorre uma tupla de
+verificações. Validar custa poucos microssegundos, contra milissegundos de
+renderização (ver scripts/bench_validacao.py).
+
+Todos os campos continuam opcionais, como nos handlers, que usam "" quando
+falta algum. Campos desconhecidos são ignorados.
+"""
+from functools import wraps
+
+from flask import jsonify, request
+
+# Limites de tamanho (em caracteres) e de quantidade de itens
+MAX_NOME = 200
+MAX_ENDERECO = 300
+MAX_DOCUMENTO = 32       # CPF/CNPJ formatados, com folga
+MAX_CURTO = 40           # placa, RENAVAM, chassi, cor, ano/modelo, data
+MAX_VEICULO = 120
+MAX_PODERES = 8000       # o maior texto padrão (PODERES_PROCURACAO) tem ~2.000
+MAX_OUTORGADOS = 500     # as listas longas seguem em páginas de continuação
+MAX_ID_CLAUSULA = 64
+
+
+class Texto:
+    """Campo de texto opcional com tamanho máximo"""
+
+    def __init__(self, max_caracteres):
+        self.max_caracteres = max_caracteres
+
+
+class Inteiro:
+    """Campo inteiro opcional (positivo)"""
+
+
+class Lista:
+    """Lista opcional de objetos que seguem `esquema`, com no máximo `max_itens`"""
+
+    def __init__(self, esquema, max_itens):
+        self.esquema = esquema
+        self.max_itens = max_itens
+
+
+OUTORGANTE_PF = {
+    "outorganteNome": Texto(MAX_NOME),
+    "outorganteNacionalidade": Texto(MAX_CURTO),
+    "outorganteCpf": Texto(MAX_DOCUMENTO),
+    "outorganteEndereco": Texto(MAX_ENDERECO),
+}
+
+OUTORGANTE_PJ = {
+    "outorganteRazaoSocial": Texto(MAX_NOME),
+    "outorganteCnpj": Texto(MAX_DOCUMENTO),
+    "outorganteEndereco": Texto(MAX_ENDERECO),
+}
+
+OUTORGADO = {
+    "outorgadoNome": Texto(MAX_NOME),
+    "outorgadoNacionalidade": Texto(MAX_CURTO),
+    "outorgadoCpf": Texto(MAX_DOCUMENTO),
+    "outorgadoEndereco": Texto(MAX_ENDERECO),
+}
+
+OUTORGADOS = {
+    "outorgados": Lista({
+        "nome": Texto(MAX_NOME),
+        "nacionalidade": Texto(MAX_CURTO),
+        "cpf": Texto(MAX_DOCUMENTO),
+        "endereco": Texto(MAX_ENDERECO),
+    }, MAX_OUTORGADOS),
+}
+
+VEICULO_E_EMISSAO = {
+    "veiculoNome": Texto(MAX_VEICULO),
+    "veiculoMarcaModelo": Texto(MAX_VEICULO),
+    "veiculoPlaca": Texto(MAX_CURTO),
+    "veiculoRenavam": Texto(MAX_CURTO),
+    "veiculoChassi": Texto(MAX_CURTO),
+    "veiculoAnoModelo": Texto(MAX_CURTO),
+    "veiculoCor": Texto(MAX_CURTO),
+    "localEmissao": Texto(MAX_VEICULO),
+    "dataEmissao": Texto(MAX_CURTO),
+    "poderes": Texto(MAX_PODERES),
+    "poderesId": Texto(MAX_ID_CLAUSULA),
+    "poderesVersao": Inteiro(),
+}
+
+ESQUEMAS = {
+    "procuracao_pf": {**OUTORGANTE_PF, **OUTORGADO, **VEICULO_E_EMISSAO},
+    "procuracao_pj": {**OUTORGANTE_PJ, **OUTORGADO, **VEICULO_E_EMISSAO},
+    "procuracao_pf_multiplos": {**OUTORGANTE_PF, **OUTORGADOS, **VEICULO_E_EMISSAO},
+    "procuracao_pj_multiplos": {**OUTORGANTE_PJ, **OUTORGADOS, **VEICULO_E_EMISSAO},
+    "representacao_pf": {**OUTORGANTE_PF, **OUTORGADO, **VEICULO_E_EMISSAO},
+    "representacao_pj": {**OUTORGANTE_PJ, **OUTORGADO, **VEICULO_E_EMISSAO},
+    "substabelecimento_pf": {**OUTORGANTE_PF, **OUTORGADO, **VEICULO_E_EMISSAO},
+    "substabelecimento_pj": {**OUTORGANTE_PJ, **OUTORGADO, **VEICULO_E_EMISSAO},
+}
+
+
+def compilar(esquema):
+    """
+    Transforma um esquema em uma função validar(objeto, caminho="") que devolve a
+    lista de erros ({"campo", "mensagem"}); lista vazia quando o objeto é válido.
+    """
+    textos = tuple((campo, regra.max_caracteres) for campo, regra in esquema.items()
+                   if isinstance(regra, Texto))
+    inteiros = tuple(campo for campo, regra in esquema.items() if isinstance(regra, Inteiro))
+    listas = tuple((campo, compilar(regra.esquema), regra.max_itens) for campo, regra in esquema.items()
+                   if isinstance(regra, Lista))
+
+    def validar(objeto, caminho=""):
+        if not isinstance(objeto, dict):
+            return [{"campo": caminho.rstrip(".") or "$", "mensagem": "deve ser um objeto JSON"}]
+        erros = []
+        get = objeto.get
+        for campo, maximo in textos:
+            valor = get(campo)
+            if valor is None:
+                if campo in objeto:
+                    erros.append({"campo": caminho + campo, "mensagem": "não pode ser null"})
+            elif type(valor) is not str:
+                erros.append({"campo": caminho + campo, "mensagem": "deve ser texto"})
+            elif len(valor) > maximo:
+                erros.append({"campo": caminho + campo, "mensagem": f"excede {maximo} caracteres"})
+        for campo in inteiros:
+            valor = get(campo)
+            if valor is None:
+                if campo in objeto:
+                    erros.append({"campo": caminho + campo, "mensagem": "não pode ser null"})
+            elif type(valor) is not int or valor < 1:
+                erros.append({"campo": caminho + campo, "mensagem": "deve ser um inteiro positivo"})
+        for campo, validar_item, maximo in listas:
+            valor = get(campo)
+            if valor is None:
+                if campo in objeto:
+                    erros.append({"campo": caminho + campo, "mensagem": "não pode ser null"})
+            elif type(valor) is not list:
+                erros.append({"campo": caminho + campo, "mensagem": "deve ser uma lista"})
+            elif len(valor) > maximo:
+                erros.append({"campo": caminho + campo, "mensagem": f"excede {maximo} itens"})
+            else:
+                for i, item in enumerate(valor):
+                    erros.extend(validar_item(item, f"{caminho}{campo}[{i}]."))
+        return erros
+
+    return validar
+
+
+VALIDADORES = {tipo: compilar(esquema) for tipo, esquema in ESQUEMAS.items()}
+
+
+def validar_payload(tipo, data):
+    """Erros do payload de um tipo de documento (lista vazia quando válido)"""
+    return VALIDADORES[tipo](data)
+
+
+def resposta_invalida(erros):
+    return jsonify({"erro": "Payload inválido", "detalhes": erros}), 422
+
+
+def payload_validado(tipo):
+    """
+    Decorador das rotas generate_*: lê o JSON do corpo e responde 422 com os erros
+    estruturados antes de a rota criar qualquer objeto PDF.
+    """
+    def decorador(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            data = request.get_json(silent=True)
+            if data is None:
+                return resposta_invalida([{"campo": "$", "mensagem": "corpo deve ser um objeto JSON"}])
+            erros = validar_payload(tipo, data)
+            if erros:
+                return resposta_invalida(erros)
+            return view(*args, **kwargs)
+        return wrapper
+    return decorador
@@ -0,0 +1,210 @@
+"""
+Redação dos documentos: os textos de cada seção, já normalizados.
+
+Tanto a renderização em PDF (montar_<tipo> nas rotas generate_*) quanto a
+pré-visualização (POST /api/preview/<tipo>) leem os textos daqui, então a
+prévia não tem como divergir do documento emitido. Aqui ficam a normalização dos
+campos (remover_cep, data no formato brasileiro, junção dos outorgados) e as
+frases fixas de cada tipo; o layout (fontes, espaçamentos, linha de assinatura)
+continua nas funções montar_<tipo>.
+"""
+import re
+from datetime import datetime
+from typing import NamedTuple, Optional, Union
+
+from src.services.clausulas import BIBLIOTECA_CLAUSULAS, ClausulaResolvida, resolver_poderes, texto_poderes
+
+# Rótulos em negrito que abrem os parágrafos
+ROTULO_OUTORGANTE = "OUTORGANTE: "
+ROTULO_OUTORGADOS = "OUTORGADOS: "
+ROTULO_REPRESENTACAO = "REPRESENTAÇÃO: "
+
+NOMEACAO = "NOMEIO E CONSTITUO MEU BASTANTE PROCURADOR"
+
+
+class TextosDocumento(NamedTuple):
+    """Textos de cada seção de um documento, na ordem em que aparecem"""
+    titulo: str
+    outorgante: str
+    nomeacao: str
+    outorgados: str
+    representacao: str
+    poderes: Optional[Union[str, ClausulaResolvida]]  # None: o documento não tem o parágrafo de poderes
+    local_data: str
+    assinatura: str
+
+    def secoes(self):
+        """Seções como dicionários {chave, rotulo, texto}, para a pré-visualização"""
+        rotulos = {
+            "outorgante": ROTULO_OUTORGANTE,
+            "outorgados": ROTULO_OUTORGADOS,
+            "representacao": ROTULO_REPRESENTACAO,
+        }
+        return [
+            {"chave": chave, "rotulo": rotulos.get(chave, ""),
+             "texto": texto_poderes(valor) if chave == "poderes" else valor}
+            for chave, valor in zip(self._fields, self)
+            if valor is not None
+        ]
+
+
+def remover_cep(endereco):
+    """Remove CEP do endereço"""
+    # Remove padrões como "CEP 12345-678" ou ", CEP 12345-678"
+    endereco = re.sub(r',?\s*CEP\s*\d{5}-?\d{3}\.?', '', endereco, flags=re.IGNORECASE)
+    # Remove vírgula dupla que pode ter sobrado
+    endereco = re.sub(r',\s*,', ',', endereco)
+    # Remove vírgula no final
+    endereco = re.sub(r',\s*$', '', endereco)
+    return endereco.strip()
+
+
+def formatar_data(data_emissao):
+    """Converte a data do formato YYYY-MM-DD (ISO) para DD/MM/YYYY; outros formatos ficam como vieram"""
+    if data_emissao:
+        try:
+            return datetime.strptime(data_emissao, "%Y-%m-%d").strftime("%d/%m/%Y")
+        except ValueError:
+            pass
+    return data_emissao
+
+
+def qualificacao_pf(nome, nacionalidade, cpf, endereco):
+    return f"{nome}, {nacionalidade}, maior, inscrito sob o CPF: {cpf}, residente e domiciliado em {remover_cep(endereco)}"
+
+
+def texto_outorgante_pf(data):
+    return qualificacao_pf(data.get("outorganteNome", ""), data.get("outorganteNacionalidade", ""),
+                           data.get("outorganteCpf", ""), data.get("outorganteEndereco", "")) + "."
+
+
+def texto_outorgante_pj(data):
+    return (f"{data.get('outorganteRazaoSocial', '')}, inscrito sob o CNPJ: {data.get('outorganteCnpj', '')}, "
+            f"estabelecida em {remover_cep(data.get('outorganteEndereco', ''))}.")
+
+
+def texto_outorgado(data):
+    return qualificacao_pf(data.get("outorgadoNome", ""), data.get("outorgadoNacionalidade", ""),
+                           data.get("outorgadoCpf", ""), data.get("outorgadoEndereco", "")) + "."
+
+
+def texto_outorgados(outorgados):
+    """Outorgados da lista separados por ", e/ou: ", com ponto final no último"""
+    if not outorgados:
+        return ""
+    qualificacoes = [
+        qualificacao_pf(o.get("nome", ""), o.get("nacionalidade", ""), o.get("cpf", ""), o.get("endereco", ""))
+        for o in outorgados
+    ]
+    return ", e/ou: ".join(qualificacoes) + "."
+
+
+def descricao_veiculo(data):
+    return (f"{data.get('veiculoNome', '')}, Placa: {data.get('veiculoPlaca', '')}, "
+            f"RENAVAM: {data.get('veiculoRenavam', '')}, CHASSI: {data.get('veiculoChassi', '')}, "
+            f"ANO/MODELO {data.get('veiculoAnoModelo', '')}, cor {data.get('veiculoCor', '')}.")
+
+
+def texto_local_data(data):
+    return f"{data.get('localEmissao', '')}, {formatar_data(data.get('dataEmissao', ''))}."
+
+
+def _procuracao(data, outorgante, outorgados, representacao, assinatura):
+    return TextosDocumento(
+        titulo="PROCURAÇÃO",
+        outorgante=outorgante,
+        nomeacao=NOMEACAO,
+        outorgados=outorgados,
+        representacao=representacao,
+        poderes=resolver_poderes(data, "procuracao"),
+        local_data=texto_local_data(data),
+        assinatura=assinatura,
+    )
+
+
+def textos_procuracao_pf(data):
+    # A procuração PF de um outorgado descreve o veículo pela marca/modelo, sem ano
+    representacao = (f"para fim especial, podendo vender para si e/ou para terceiros um "
+                     f"{data.get('veiculoMarcaModelo', '')}, Placa: {data.get('veiculoPlaca', '')}, "
+                     f"RENAVAM: {data.get('veiculoRenavam', '')}, CHASSI: {data.get('veiculoChassi', '')}, "
+                     f"cor {data.get('veiculoCor', '')}.")
+    return _procuracao(data, texto_outorgante_pf(data), texto_outorgado(data), representacao,
+                       "Assinatura do Outorgante")
+
+
+def _representacao_venda(data):
+    return f"para fim especial, podendo vender para si e/ou para terceiros um {descricao_veiculo(data)}"
+
+
+def textos_procuracao_pj(data):
+    return _procuracao(data, texto_outorgante_pj(data), texto_outorgado(data), _representacao_venda(data),
+                       "OUTORGANTE")
+
+
+def textos_procuracao_pf_multiplos(data):
+    return _procuracao(data, texto_outorgante_pf(data), texto_outorgados(data.get("outorgados", [])),
+                       _representacao_venda(data), "Assinatura do Outorgante")
+
+
+def textos_procuracao_pj_multiplos(data):
+    return _procuracao(data, texto_outorgante_pj(data), texto_outorgados(data.get("outorgados", [])),
+                       _representacao_venda(data), "OUTORGANTE")
+
+
+def _representacao(data, outorgante):
+    # Os poderes de representação entram no meio do parágrafo, antes do veículo
+    poderes = texto_poderes(resolver_poderes(data, "representacao"))
+    return TextosDocumento(
+        titulo="PROCURAÇÃO REPRESENTAÇÃO",
+        outorgante=outorgante,
+        nomeacao=NOMEACAO,
+        outorgados=texto_outorgado(data),
+        representacao=f"{poderes}, do veículo: {descricao_veiculo(data)}",
+        poderes=None,
+        local_data=texto_local_data(data),
+        assinatura="OUTORGANTE",
+    )
+
+
+def textos_representacao_pf(data):
+    return _representacao(data, texto_outorgante_pf(data))
+
+
+def textos_representacao_pj(data):
+    return _representacao(data, texto_outorgante_pj(data))
+
+
+def _substabelecimento(data, outorgante):
+    # O substabelecimento sempre usa o texto padrão (ignora poderes/poderesId)
+    poderes = BIBLIOTECA_CLAUSULAS.resolver("substabelecimento").texto
+    return TextosDocumento(
+        titulo="SUBSTABELECIMENTO",
+        outorgante=outorgante,
+        nomeacao=NOMEACAO,
+        outorgados=texto_outorgado(data),
+        representacao=f"{poderes}. Sob o veículo: {descricao_veiculo(data)}",
+        poderes=None,
+        local_data=texto_local_data(data),
+        assinatura="OUTORGANTE",
+    )
+
+
+def textos_substabelecimento_pf(data):
+    return _substabelecimento(data, texto_outorgante_pf(data))
+
+
+def textos_substabelecimento_pj(data):
+    return _substabelecimento(data, texto_outorgante_pj(data))
+
+
+# Tipos de documento (mesmo nome das rotas generate_<tipo>) e a função que redige cada um
+TEXTOS_DOCUMENTO = {
+    "procuracao_pf": textos_procuracao_pf,
+    "procuracao_pj": textos_procuracao_pj,
+    "procuracao_pf_multiplos": textos_procuracao_pf_multiplos,
+    "procuracao_pj_multiplos": textos_procuracao_pj_multiplos,
+    "representacao_pf": textos_representacao_pf,
+    "representacao_pj": textos_representacao_pj,
+    "substabelecimento_pf": textos_substabelecimento_pf,
+    "substabelecimento_pj": textos_substabelecimento_pj,
+}
@@ -0,0 +1,165 @@
+"""
+Versão por tabela e cache de respostas serializadas, para GETs condicionais.
+
+As rotas de leitura que os painéis consultam o tempo todo (GET /api/users,
+GET /api/users/<id>) guardam o JSON já serializado junto com a versão da tabela
+em que foi gerado. Toda escrita na tabela incrementa a versão depois do commit;
+enquanto ela não muda, a rota responde do cache, e um If-None-Match com o ETag
+atual recebe 304, sem consultar o banco nem serializar nada.
+
+A versão fica num arquivo por tabela (VERSOES_TABELAS_DIR), compartilhado pelos
+workers do gunicorn: uma escrita em um processo invalida o cache de todos. Ler a
+versão custa um os.stat; o conteúdo só é relido quando o arquivo foi trocado.
+"""
+import fcntl
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
+
+from flask import Response, current_app, request, stream_with_context
+
+from src.services.json_rapido import json_em_fluxo
+
+# Número máximo de respostas serializadas mantidas em memória por processo
+MAX_RESPOSTAS_CACHE = 1024
+
+
+class VersoesTabelas:
+    """Contador de versão por tabela, em arquivo, incrementado a cada escrita"""
+
+    def __init__(self, diretorio=None):
+        self.diretorio = diretorio
+        self._lidas = {}  # tabela -> (assinatura do arquivo, versão)
+
+    def init_app(self, app):
+        self.diretorio = app.config['VERSOES_TABELAS_DIR']
+        os.makedirs(self.diretorio, exist_ok=True)
+        app.extensions['versoes_tabelas'] = self
+
+    def caminho(self, tabela):
+        return os.path.join(self.diretorio, f"{tabela}.versao")
+
+    def versao(self, tabela):
+        """Versão atual da tabela (0 enquanto nunca houve escrita)"""
+        caminho = self.caminho(tabela)
+        try:
+            info = os.stat(caminho)
+        except FileNotFoundError:
+            return 0
+        # Cada incremento grava um arquivo novo (os.replace): inode/mtime mudam
+        assinatura = (info.st_ino, info.st_mtime_ns, info.st_size)
+        lida = self._lidas.get(tabela)
+        if lida is not None and lida[0] == assinatura:
+            return lida[1]
+        try:
+            with open(caminho, encoding="ascii") as f:
+                versao = int(f.read() or 0)
+        except FileNotFoundError:
+            return 0
+        self._lidas[tabela] = (assinatura, versao)
+        return versao
+
+    def incrementar(self, tabela):
+        """Incrementa a versão da tabela; chamar depois do commit da escrita"""
+        # flock serializa os incrementos entre threads e entre processos
+        with open(os.path.join(self.diretorio, f"{tabela}.lock"), "a") as trava:
+            fcntl.flock(trava, fcntl.LOCK_EX)
+            try:
+                caminho = self.caminho(tabela)
+                try:
+                    with open(caminho, encoding="ascii") as f:
+                        versao = int(f.read() or 0) + 1
+                except FileNotFoundError:
+                    versao = 1
+                fd, temporario = tempfile.mkstemp(dir=self.diretorio, suffix=".tmp")
+                with os.fdopen(fd, "w", encoding="ascii") as f:
+                    f.write(str(versao))
+                os.replace(temporario, caminho)
+            finally:
+                fcntl.flock(trava, fcntl.LOCK_UN)
+        return versao
+
+
+class RespostaCacheada(NamedTuple):
+    versao: int
+    corpo: bytes
+    etag: str
+
+
+class CacheRespostas:
+    """LRU de corpos JSON serializados, válidos enquanto a versão da tabela não muda"""
+
+    def __init__(self, max_itens=MAX_RESPOSTAS_CACHE):
+        self.max_itens = max_itens
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.faltas = 0
+
+    def obter(self, chave, versao):
+        with self._lock:
+            entrada = self._itens.get(chave)
+            if entrada is not None and entrada.versao == versao:
+                self._itens.move_to_end(chave)
+                self.acertos += 1
+                return entrada
+            self.faltas += 1
+            return None
+
+    def guardar(self, chave, versao, corpo):
+        entrada = RespostaCacheada(versao, corpo, hashlib.sha256(corpo).hexdigest()[:32])
+        with self._lock:
+            self._itens[chave] = entrada
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+        return entrada
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+            self.acertos = 0
+            self.faltas = 0
+
+    def estatisticas(self):
+        with self._lock:
+            return {"acertos": self.acertos, "faltas": self.faltas}
+
+
+versoes_tabelas = VersoesTabelas()
+cache_respostas = CacheRespostas()
+
+
+def responder_json_versionado(tabela, chave, gerar, lista=False):
+    """
+    Resposta JSON de uma rota de leitura com ETag e If-None-Match.
+
+    `gerar()` consulta o banco e devolve o objeto a serializar; só é chamado quando
+    a versão da tabela mudou desde a última resposta guardada para `chave`. Com
+    lista=True, `gerar()` devolve um iterável de itens, serializado em blocos por
+    json_em_fluxo. Com CACHE_RESPOSTAS desligado, consulta e serializa a cada
+    requisição (sem ETag), e as listas saem em fluxo, sem montar o corpo inteiro.
+    """
+    if not current_app.config.get("CACHE_RESPOSTAS", True):
+        if lista:
+            return Response(stream_with_context(json_em_fluxo(gerar())), mimetype=current_app.json.mimetype)
+        return current_app.json.response(gerar())
+    versao = versoes_tabelas.versao(tabela)
+    entrada = cache_respostas.obter(chave, versao)
+    if entrada is None:
+        corpo = b"".join(json_em_fluxo(gerar())) if lista else current_app.json.response(gerar()).get_data()
+        entrada = cache_respostas.guardar(chave, versao, corpo)
+    resposta = Response(entrada.corpo, mimetype=current_app.json.mimetype)
+    resposta.set_etag(entrada.etag)
+    # O cliente pode guardar, mas precisa revalidar (If-None-Match) a cada consulta
+    resposta.cache_control.no_cache = True
+    return resposta.make_conditional(request)
+
+
+def tabela_alterada(tabela):
+    """Registra uma escrita confirmada na tabela (invalida as respostas em cache)"""
+    # Incrementa mesmo com o cache desligado: outro worker pode estar com ele ligado
+    versoes_tabelas.incrementar(tabela)
@@ -0,0 +1,174 @@
+"""
+Vigia das renderizações: estimativa de custo antes de renderizar e prazo máximo
+por documento.
+
+A estimativa soma os caracteres de texto do payload (todos os campos, inclusive
+os de cada outorgado) e o número de itens das listas, com os coeficientes
+medidos por scripts/bench_vigia.py. Um payload cujo custo estimado passa de
+RENDER_CUSTO_MAXIMO_MS é recusado com 422 antes de criar qualquer FPDF.
+
+O prazo (RENDER_LIMITE_MS) vale para cada documento e é verificado em pontos
+seguros da renderização: a cada linha quebrada (services/fragmentos.py), a cada
+linha desenhada e a cada página nova (DocumentoPDF) e antes da geração dos bytes.
+Passado o prazo, verificar_prazo levanta RenderizacaoExcedida, a renderização é
+descartada e a rota responde 422 com um erro estruturado que traz o custo
+estimado do payload. Sinais (SIGALRM) não servem aqui: nos workers gthread a
+renderização não roda na thread principal. Como a interrupção só acontece nesses
+pontos, nenhum cache de processo fica pela metade e o worker continua atendendo;
+o gunicorn não chega a matá-lo pelo timeout. Com PDF_CACHE_SECOES=0 o FPDF quebra
+o texto inteiro de cada pdf.write/multi_cell antes de desenhar a primeira linha,
+então o aborto só acontece no desenho e pode passar mais do limite.
+
+Renderizações concluídas, abortadas e recusadas são contadas por tipo (por
+processo, em GET /api/monitoramento) e cada aborto ou recusa vai para o log.
+"""
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import current_app, jsonify, request
+
+from src.services.schemas import resposta_invalida
+
+# Coeficientes da estimativa (ms), medidos com PDF_CACHE_SECOES=0 por scripts/bench_vigia.py
+CUSTO_BASE_MS = 12.0
+CUSTO_POR_CARACTERE_MS = 0.0035
+CUSTO_POR_ITEM_MS = 0.4
+
+_local = threading.local()
+
+
+class RenderizacaoExcedida(Exception):
+    """A renderização passou do prazo e foi interrompida"""
+
+    def __init__(self, tipo, limite_ms, decorrido_ms):
+        super().__init__(f"renderização de {tipo} excedeu {limite_ms} ms ({decorrido_ms:.0f} ms)")
+        self.tipo = tipo
+        self.limite_ms = limite_ms
+        self.decorrido_ms = decorrido_ms
+
+
+def medir_payload(valor):
+    """(caracteres de texto, itens de listas) do payload, recursivamente"""
+    if isinstance(valor, str):
+        return len(valor), 0
+    caracteres = itens = 0
+    if isinstance(valor, dict):
+        valores = valor.values()
+    elif isinstance(valor, list):
+        valores = valor
+        itens = len(valor)
+    else:
+        return 0, 0
+    for item in valores:
+        c, i = medir_payload(item)
+        caracteres += c
+        itens += i
+    return caracteres, itens
+
+
+def estimar_custo(data):
+    """Custo estimado da renderização do payload, em ms"""
+    caracteres, itens = medir_payload(data)
+    return CUSTO_BASE_MS + caracteres * CUSTO_POR_CARACTERE_MS + itens * CUSTO_POR_ITEM_MS
+
+
+def verificar_prazo():
+    """Ponto de verificação: levanta RenderizacaoExcedida se o prazo da thread passou"""
+    prazo = getattr(_local, "prazo", None)
+    if prazo is not None and time.monotonic() > prazo[1]:
+        inicio, _, tipo, limite_ms = prazo
+        raise RenderizacaoExcedida(tipo, limite_ms, (time.monotonic() - inicio) * 1000)
+
+
+class VigiaRenderizacao:
+    """Prazo por renderização e contagens de concluídas, abortadas e recusadas por tipo"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.concluidas = Counter()
+        self.abortadas = Counter()
+        self.recusadas = Counter()
+
+    def _contar(self, contador, tipo):
+        with self.lock:
+            contador[tipo] += 1
+
+    @contextmanager
+    def prazo(self, tipo, limite_ms=None):
+        """
+        Executa o bloco com o prazo de RENDER_LIMITE_MS (ou `limite_ms`; 0 desliga).
+        Conta o resultado e deixa RenderizacaoExcedida seguir para quem chamou.
+        """
+        if limite_ms is None:
+            limite_ms = current_app.config.get("RENDER_LIMITE_MS", 0)
+        anterior = getattr(_local, "prazo", None)
+        inicio = time.monotonic()
+        _local.prazo = (inicio, inicio + limite_ms / 1000, tipo, limite_ms) if limite_ms else None
+        try:
+            yield
+        except RenderizacaoExcedida as excedida:
+            self._contar(self.abortadas, tipo)
+            current_app.logger.warning("Renderização abortada: %s", excedida)
+            raise
+        else:
+            self._contar(self.concluidas, tipo)
+        finally:
+            _local.prazo = anterior
+
+    def custo_excedido(self, tipo, data):
+        """Mensagem de erro se o custo estimado passar de RENDER_CUSTO_MAXIMO_MS (0 desliga), senão None"""
+        maximo = current_app.config.get("RENDER_CUSTO_MAXIMO_MS", 0)
+        if not maximo:
+            return None
+        custo = estimar_custo(data)
+        if custo <= maximo:
+            return None
+        self._contar(self.recusadas, tipo)
+        current_app.logger.warning("Renderização recusada: %s com custo estimado de %.0f ms", tipo, custo)
+        return f"custo estimado de {custo:.0f} ms excede o limite de {maximo} ms"
+
+    def estatisticas(self):
+        with self.lock:
+            return {
+                "concluidas": dict(self.concluidas),
+                "abortadas": dict(self.abortadas),
+                "recusadas": dict(self.recusadas),
+            }
+
+
+VIGIA_RENDERIZACAO = VigiaRenderizacao()
+
+
+def resposta_excedida(excedida, data):
+    return jsonify({
+        "erro": "Renderização interrompida por exceder o tempo limite",
+        "tipo": excedida.tipo,
+        "limiteMs": excedida.limite_ms,
+        "decorridoMs": round(excedida.decorrido_ms),
+        "custoEstimadoMs": round(estimar_custo(data)),
+    }), 422
+
+
+def renderizacao_vigiada(tipo):
+    """
+    Decorador das rotas generate_* (depois de payload_validado): recusa com 422 o
+    payload caro demais e executa a rota dentro do prazo, respondendo 422 (com o
+    custo estimado) se ele se esgotar.
+    """
+    def decorador(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            data = request.get_json()
+            erro = VIGIA_RENDERIZACAO.custo_excedido(tipo, data)
+            if erro:
+                return resposta_invalida([{"campo": "$", "mensagem": erro}])
+            try:
+                with VIGIA_RENDERIZACAO.prazo(tipo):
+                    return view(*args, **kwargs)
+            except RenderizacaoExcedida as excedida:
+                return resposta_excedida(excedida, data)
+        return wrapper
+    return decorador
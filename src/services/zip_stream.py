@@ -0,0 +1,48 @@
+"""
+ZIP gerado em streaming: cada arquivo é escrito e imediatamente entregue ao cliente,
+sem montar o ZIP inteiro em memória nem em disco.
+"""
+import zipfile
+
+# Data fixa nas entradas: o mesmo conteúdo gera o mesmo ZIP
+DATA_ENTRADAS = (1980, 1, 1, 0, 0, 0)
+
+
+class _BufferSaida:
+    """Destino não-posicionável do ZipFile; acumula bytes até o próximo yield"""
+
+    def __init__(self):
+        self._partes = []
+        self._posicao = 0
+
+    def write(self, dados):
+        self._partes.append(bytes(dados))
+        self._posicao += len(dados)
+        return len(dados)
+
+    def tell(self):
+        return self._posicao
+
+    def flush(self):
+        pass
+
+    def retirar(self):
+        dados = b"".join(self._partes)
+        self._partes = []
+        return dados
+
+
+def gerar_zip(entradas, compressao=zipfile.ZIP_STORED):
+    """
+    Gera os bytes de um ZIP a partir de um iterável de (nome, conteúdo).
+    PDFs já têm os streams comprimidos, por isso o padrão é ZIP_STORED.
+    """
+    saida = _BufferSaida()
+    with zipfile.ZipFile(saida, mode="w", compression=compressao, allowZip64=True) as zf:
+        for nome, conteudo in entradas:
+            info = zipfile.ZipInfo(nome, date_time=DATA_ENTRADAS)
+            info.compress_type = compressao
+            with zf.open(info, mode="w", force_zip64=len(conteudo) > 0x7FFFFFFF) as destino:
+                destino.write(conteudo)
+            yield saida.retirar()
+    yield saida.retirar()
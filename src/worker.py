@@ -0,0 +1,155 @@
+"""
+Worker de renderização da fila durável (services/fila.py).
+
+    python -m src.worker [--processos N] [--intervalo 0.5] [--ate-esvaziar]
+
+Cada processo importa o app, com a mesma configuração por variáveis de ambiente do
+servidor web (DATABASE_URL, FILA_RENDER_DB, ARQUIVO_DOCUMENTOS_DIR, RENDER_LIMITE_MS...),
+e repete: reserva uma tarefa, renderiza com a função montar_<tipo> da rota
+generate_<tipo> sob o mesmo prazo das rotas, grava o PDF no arquivo endereçado por
+conteúdo, marca a tarefa como concluída e só então registra a emissão (numa
+reemissão, marcando as de origem como substituídas). Sem tarefas, expurga os
+payloads com a retenção vencida (uma vez por hora) e espera `--intervalo`
+segundos; com --ate-esvaziar, sai quando não há nada pendente nem em execução.
+SIGTERM/SIGINT terminam a tarefa em andamento antes de sair.
+
+O lease não é renovado: o worker não inicia se RENDER_LIMITE_MS for 0 ou maior que
+metade de FILA_LEASE_S.
+
+Em outro nó, basta apontar FILA_RENDER_DB e ARQUIVO_DOCUMENTOS_DIR (e DATABASE_URL,
+para o registro das emissões) para o volume compartilhado, com FILA_RENDER_WAL=0.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import time
+
+from flask import current_app
+
+from src.models.user import db
+from src.routes.document_types import TIPOS_DOCUMENTO
+from src.services.arquivo import arquivo_documentos
+from src.services.clausulas import ClausulaNaoEncontrada
+from src.services.fila import fila_renderizacao
+from src.services.pdf import finalizar_pdf
+from src.services.reemissao import expurgar_payloads, marcar_substituidas
+from src.services.relatorios import confirmar_emissoes
+from src.services.vigia import VIGIA_RENDERIZACAO
+
+logger = logging.getLogger("src.worker")
+
+# Intervalo entre expurgos dos payloads vencidos (REEMISSAO_RETENCAO_DIAS), por processo
+EXPURGO_INTERVALO_S = 3600
+
+
+def processar(tarefa, dono):
+    """Renderiza uma tarefa reservada; devolve True se concluiu"""
+    tarefa_id, tipo, dados, tentativas, lote, substitui = tarefa
+    try:
+        dados = json.loads(dados)
+        with VIGIA_RENDERIZACAO.prazo(tipo):
+            pdf_output, hash_documento = finalizar_pdf(TIPOS_DOCUMENTO[tipo](dados), tipo=tipo, data=dados,
+                                                       confirmar=False)
+        if hash_documento is None:
+            # O resultado da fila sempre vai para o arquivo, mesmo com ARQUIVO_DOCUMENTOS=0 no servidor web
+            hash_documento = arquivo_documentos.guardar(pdf_output)
+        if substitui and current_app.config.get("RELATORIOS_EMISSOES", True):
+            # Reemissão: as emissões de origem saem das próximas reemissões junto com o registro da nova
+            marcar_substituidas(json.loads(substitui), lote)
+    except Exception as exc:  # a tarefa volta para a fila (ou encerra, se o payload é o problema); o worker segue
+        db.session.rollback()
+        logger.warning("Tarefa %s (%s) falhou na tentativa %s: %s", tarefa_id, tipo, tentativas, exc)
+        # Cláusula removida depois de enfileirar: nenhuma nova tentativa a traz de volta
+        fila_renderizacao.falhar(tarefa_id, dono, tentativas, f"{type(exc).__name__}: {exc}",
+                                 definitiva=isinstance(exc, ClausulaNaoEncontrada))
+        return False
+    # A emissão só é registrada por quem ainda tem a reserva: outro worker pode ter
+    # retomado a tarefa depois de o lease vencer e vai registrá-la ele mesmo
+    if not fila_renderizacao.concluir(tarefa_id, dono, hash_documento):
+        db.session.rollback()
+        logger.warning("Tarefa %s terminou depois de perder a reserva (lease vencido); descartada", tarefa_id)
+        return False
+    confirmar_emissoes()
+    return True
+
+
+def verificar_configuracao(config):
+    """
+    O lease não é renovado durante a renderização: o prazo (RENDER_LIMITE_MS) precisa
+    estar ligado e caber com folga no lease (FILA_LEASE_S), senão uma renderização
+    lenta perde a reserva e a tarefa é feita duas vezes
+    """
+    limite_ms = config.get("RENDER_LIMITE_MS", 0)
+    lease_ms = config.get("FILA_LEASE_S", 60) * 1000
+    if not 0 < limite_ms * 2 <= lease_ms:
+        raise SystemExit(f"RENDER_LIMITE_MS ({limite_ms}) deve ser maior que 0 e no máximo metade de "
+                         f"FILA_LEASE_S ({lease_ms} ms) para o worker da fila")
+
+
+def executar(intervalo=0.5, ate_esvaziar=False):
+    """Laço de um processo worker; devolve o número de tarefas concluídas"""
+    # O app (engine, fontes, caches) é criado em cada processo, como nos workers do gunicorn
+    from src.main import app
+
+    verificar_configuracao(app.config)
+    parar = []
+    for sinal in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sinal, lambda *_: parar.append(True))
+    dono = f"{socket.gethostname()}:{os.getpid()}"
+    concluidas = 0
+    proximo_expurgo = 0
+    while not parar:
+        with app.app_context():
+            tarefa = fila_renderizacao.reservar(dono)
+            if tarefa is not None:
+                concluidas += processar(tarefa, dono)
+                continue
+            fila_renderizacao.expirar()
+            if time.monotonic() >= proximo_expurgo:
+                expurgar_payloads()
+                proximo_expurgo = time.monotonic() + EXPURGO_INTERVALO_S
+            if ate_esvaziar:
+                contagens = fila_renderizacao.contagens()
+                if not contagens["pendente"] and not contagens["executando"]:
+                    break
+        time.sleep(intervalo)
+    logger.info("Worker %s saindo: %s tarefas concluídas", dono, concluidas)
+    return concluidas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processos", type=int, default=1, help="processos worker nesta máquina")
+    parser.add_argument("--intervalo", type=float, default=0.5, help="espera (s) quando a fila está vazia")
+    parser.add_argument("--ate-esvaziar", action="store_true", help="sai quando não houver tarefas")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(process)d %(levelname)s %(message)s")
+    # Os recortes das fontes na carga do app (services/fonts.py) registram cada tabela em INFO
+    logging.getLogger("fontTools").setLevel(logging.WARNING)
+
+    if args.processos == 1:
+        executar(args.intervalo, args.ate_esvaziar)
+        return
+    contexto = multiprocessing.get_context("spawn")
+    processos = [contexto.Process(target=executar, args=(args.intervalo, args.ate_esvaziar))
+                 for _ in range(args.processos)]
+    for processo in processos:
+        processo.start()
+
+    def repassar(sinal, _):
+        for processo in processos:
+            if processo.is_alive():
+                os.kill(processo.pid, sinal)
+
+    signal.signal(signal.SIGTERM, repassar)
+    signal.signal(signal.SIGINT, repassar)
+    for processo in processos:
+        processo.join()
+
+
+if __name__ == "__main__":
+    main()